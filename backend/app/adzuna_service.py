@@ -1,28 +1,197 @@
 import os
+import math
+import time
+import asyncio
+import importlib.util
 import httpx
+from collections import deque
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
+from app.cache import SearchCache, SingleFlight, TTLCache, search_cache_key
+from app.jobs import Job
+from app.job_index import JobIndex, freshness_key
+from app.dedup import DuplicateDetector
+from app.ranking import JobRanker, job_ranker
+from app.reference_data import ReferenceData, reference_data
+from app.metrics import UPSTREAM_IN_FLIGHT, UPSTREAM_RESPONSES, instrumented, stage
+from app.scheduler import (
+    BACKGROUND, INTERACTIVE, RateLimited, UpstreamBusyError, UpstreamScheduler, parse_retry_after
+)
 
 load_dotenv()
 
+LATENCY_WINDOW = 512
+
 class AdzunaService:
     """Service for interacting with Adzuna Job Search API"""
     
     def __init__(self):
         self.app_id = os.getenv("ADZUNA_APP_ID")
         self.app_key = os.getenv("ADZUNA_APP_KEY")
-        self.base_url = "https://api.adzuna.com/v1/api/jobs"
+        self.base_url = os.getenv("ADZUNA_BASE_URL", "https://api.adzuna.com/v1/api/jobs")
         
         if not self.app_id or not self.app_key:
             print("WARNING: Adzuna credentials not found in environment variables")
+
+        # Shared connection pool settings
+        self.limits = httpx.Limits(
+            max_connections=int(os.getenv("ADZUNA_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("ADZUNA_MAX_KEEPALIVE", "10")),
+            keepalive_expiry=float(os.getenv("ADZUNA_KEEPALIVE_EXPIRY", "60")),
+        )
+        self.timeout = httpx.Timeout(
+            connect=float(os.getenv("ADZUNA_CONNECT_TIMEOUT", "5")),
+            read=float(os.getenv("ADZUNA_READ_TIMEOUT", "10")),
+            write=5.0,
+            pool=float(os.getenv("ADZUNA_POOL_TIMEOUT", "5")),
+        )
+        self.http2 = os.getenv("ADZUNA_HTTP2", "false").lower() in ("1", "true", "yes")
+        if self.http2 and importlib.util.find_spec("h2") is None:
+            print("WARNING: ADZUNA_HTTP2 is set but the 'h2' package is not installed; using HTTP/1.1")
+            self.http2 = False
+
+        self.client: Optional[httpx.AsyncClient] = None
+        # Shared request quota (Adzuna's free tier allows 25 calls a minute)
+        self.scheduler = UpstreamScheduler.from_env("adzuna", "ADZUNA", rate=0.4, burst=5)
+        self.cache = SearchCache.from_env()
+        # Near-duplicate postings are collapsed before results are cached
+        self.dedup = DuplicateDetector.from_env()
+        # Description preview length in result lists, and full jobs kept for get_job
+        self.description_chars = int(os.getenv("JOB_DESCRIPTION_CHARS", "500"))
+        self.details = TTLCache(
+            max_entries=int(os.getenv("JOB_DETAIL_CACHE_SIZE", "5000")),
+            ttl=float(os.getenv("JOB_DETAIL_CACHE_TTL", "3600")),
+        )
+
+        # Local full-text index of every job received
+        self.index = JobIndex.from_env()
+        self.index_max_age = float(os.getenv("JOB_INDEX_MAX_AGE", "3600"))
+        self.index_refresh_pages = int(os.getenv("JOB_INDEX_REFRESH_PAGES", "2"))
+        self._refreshes = SingleFlight()
+        # Result pages are embedded for relevance ranking as they arrive
+        self.ranker: Optional[JobRanker] = job_ranker
+        # Location gazetteer, query normalization and category snapshots
+        self.reference: ReferenceData = reference_data
+        self._background: set = set()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._stats = {
+            "requests": 0,
+            "errors": 0,
+            "connections_opened": 0,
+            "tls_handshakes": 0,
+            "clients_created": 0,
+        }
+
+    # ─── Connection Lifecycle ─────────────────────────────────────────────────
+
+    async def startup(self):
+        """Create the shared HTTP client. Called from the FastAPI lifespan."""
+        if self.client is None or self.client.is_closed:
+            self.client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+            )
+            self._stats["clients_created"] += 1
+        self.reference.start(self.fetch_job_categories)
+
+    async def shutdown(self):
+        """Close the shared HTTP client and its pooled connections."""
+        await self.reference.shutdown()
+        for task in list(self._background):
+            task.cancel()
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+        await self.cache.close()
+        if self.index is not None:
+            await self.index.close()
+
+    async def _trace(self, event_name: str, info: Dict):
+        # httpcore reports each new TCP connection and TLS handshake; requests
+        # served from a pooled keep-alive connection emit neither.
+        if event_name.endswith("connect_tcp.complete"):
+            self._stats["connections_opened"] += 1
+        elif event_name.endswith("start_tls.complete"):
+            self._stats["tls_handshakes"] += 1
+
+    async def _get(self, url: str, params: Dict, priority: int = INTERACTIVE) -> httpx.Response:
+        """
+        GET through the shared client once the scheduler admits it, retrying 429s.
+
+        Raises:
+            UpstreamBusyError: if the request cannot be sent within its priority's wait budget
+        """
+        if self.client is None or self.client.is_closed:
+            # Scripts and tests may run without the app lifespan
+            await self.startup()
+        return await self.scheduler.run(lambda: self._send(url, params), priority)
+
+    async def _send(self, url: str, params: Dict) -> httpx.Response:
+        """One GET, recording latency and connection reuse."""
+        self._stats["requests"] += 1
+        start = time.perf_counter()
+        in_flight = UPSTREAM_IN_FLIGHT.labels("adzuna")
+        in_flight.inc()
+        try:
+            with stage("adzuna.http"):
+                response = await self.client.get(url, params=params, extensions={"trace": self._trace})
+        except Exception:
+            self._stats["errors"] += 1
+            UPSTREAM_RESPONSES.labels("adzuna", "error").inc()
+            raise
+        finally:
+            in_flight.dec()
+            self._latencies.append((time.perf_counter() - start) * 1000)
+        UPSTREAM_RESPONSES.labels("adzuna", response.status_code).inc()
+        if response.status_code == 429:
+            raise RateLimited(parse_retry_after(response.headers.get("retry-after")))
+        return response
+
+    def stats(self) -> Dict:
+        """Connection-reuse and latency counters for the shared client."""
+        latencies = sorted(self._latencies)
+        requests = self._stats["requests"]
+        opened = self._stats["connections_opened"]
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 2)
+
+        return {
+            **self._stats,
+            "reused_connections": max(requests - opened, 0),
+            "reuse_ratio": round(1 - opened / requests, 4) if requests else None,
+            "http2": self.http2,
+            "pool": {
+                "max_connections": self.limits.max_connections,
+                "max_keepalive_connections": self.limits.max_keepalive_connections,
+                "keepalive_expiry": self.limits.keepalive_expiry,
+            },
+            "scheduler": self.scheduler.stats(),
+            "latency_ms": {
+                "samples": len(latencies),
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "max": round(latencies[-1], 2) if latencies else None,
+            },
+        }
+
+    # ─── Search ───────────────────────────────────────────────────────────────
     
+    @instrumented("adzuna.search_jobs")
     async def search_jobs(
         self,
         what: str = "",
         where: str = "",
         country: str = "ca",
         results_per_page: int = 10,
-        page: int = 1
+        page: int = 1,
+        use_cache: bool = True,
+        priority: int = INTERACTIVE
     ) -> Dict:
         """
         Search for jobs using Adzuna API
@@ -33,10 +202,152 @@ class AdzunaService:
             country: Country code (default: "ca" for Canada)
             results_per_page: Number of results (max 50)
             page: Page number
+            use_cache: Set False to skip cached results and fetch fresh from Adzuna
+            priority: scheduler class (INTERACTIVE, ADVISOR, BACKGROUND) when a fetch is needed
         
         Returns:
-            Dictionary with job results and metadata
+            Dictionary with job results and metadata. Near-duplicate postings are
+            collapsed; "duplicates_collapsed" says how many were dropped.
+
+        what and where are normalized first ("Python Developers jobs" in "toronto, ON"
+        is searched as "python developer" in "Toronto"), so phrasings of one search
+        share a cache entry and an upstream request.
+        """
+        what, where = self.reference.normalizer.normalize(what, where)
+        key = search_cache_key(country, what, where, page, results_per_page)
+        result = await self.cache.get_or_fetch(
+            key,
+            lambda: self._fetch_and_index(what, where, country, results_per_page, page, priority),
+            bypass=not use_cache
+        )
+        # Callers get their own copy of the dict, jobs list and jobs; the cached entry stays untouched
+        return {**result, "jobs": [dict(job) for job in result.get("jobs", [])]}
+
+    async def _fetch_and_index(
+        self,
+        what: str,
+        where: str,
+        country: str,
+        results_per_page: int,
+        page: int,
+        priority: int
+    ) -> Dict:
+        result = await self._fetch_jobs(what, where, country, results_per_page, page, priority=priority)
+        if "error" not in result and self.dedup is not None:
+            result["jobs"], result["duplicates_collapsed"] = self.dedup.collapse(result["jobs"])
+        if "error" not in result and self.index is not None:
+            # Index off the request path so coalesced callers are not held up by the write
+            self._spawn(self._index_jobs(result["jobs"]))
+        if "error" not in result and self.ranker is not None:
+            self._spawn(self._embed_jobs(result["jobs"]))
+        return result
+
+    async def _index_jobs(self, jobs: List[Dict]) -> int:
+        """Best-effort upsert into the local index; a failure never fails the search."""
+        if self.index is None:
+            return 0
+        try:
+            return await self.index.upsert_jobs(jobs)
+        except Exception as e:
+            print(f"WARNING: job index upsert failed: {e}")
+            return 0
+
+    async def _embed_jobs(self, jobs: List[Dict]) -> int:
+        """Best-effort ranking vectors for a result page, so ranking it later skips the tokenizing."""
+        try:
+            return await self.ranker.embed_async(jobs)
+        except Exception as e:
+            print(f"WARNING: embedding jobs for ranking failed: {e}")
+            return 0
+
+    # ─── Index-backed Search ──────────────────────────────────────────────────
+
+    @instrumented("adzuna.search_indexed")
+    async def search_indexed(
+        self,
+        what: str = "",
+        where: str = "",
+        country: str = "ca",
+        salary_min: Optional[float] = None,
+        salary_max: Optional[float] = None,
+        results_per_page: int = 10,
+        page: int = 1
+    ) -> Dict:
+        """
+        Answer a search from the local job index instead of Adzuna.
+
+        If this what/where has never been fetched, it is fetched from upstream first.
+        If the indexed data is older than JOB_INDEX_MAX_AGE, the stale results are
+        served immediately and a refresh runs in the background.
+        """
+        if self.index is None:
+            return {"error": "Job index is disabled (JOB_INDEX_DB is empty)", "jobs": [], "count": 0}
+
+        what, where = self.reference.normalizer.normalize(what, where)
+        key = freshness_key(country, what, where)
+        refreshed_at = await self.index.refreshed_at(key)
+        if refreshed_at is None:
+            refresh = await self._refreshes.run(key, lambda: self.refresh_index(what, where, country, INTERACTIVE))
+            if "error" in refresh:
+                # Nothing indexed to fall back on, so report the upstream failure
+                return {"error": refresh["error"], "jobs": [], "count": 0}
+            refreshed_at = await self.index.refreshed_at(key)
+        elif time.time() - refreshed_at > self.index_max_age:
+            self._spawn(self._refreshes.run(key, lambda: self.refresh_index(what, where, country, BACKGROUND)))
+
+        result = await self.index.search(
+            what=what,
+            where=where,
+            salary_min=salary_min,
+            salary_max=salary_max,
+            page=page,
+            results_per_page=results_per_page
+        )
+        result["source"] = "index"
+        result["refreshed_at"] = refreshed_at
+        result["stale"] = refreshed_at is None or time.time() - refreshed_at > self.index_max_age
+        return result
+
+    @instrumented("adzuna.refresh_index")
+    async def refresh_index(self, what: str, where: str, country: str = "ca", priority: int = BACKGROUND) -> Dict:
+        """
+        Pull the newest upstream results for a query into the index.
+
+        Walks up to JOB_INDEX_REFRESH_PAGES pages of 50 and stops early once a page
+        brings nothing new, so routine refreshes usually cost one request.
         """
+        fetched, new = 0, 0
+        count = None
+        for page in range(1, self.index_refresh_pages + 1):
+            result = await self._fetch_jobs(what, where, country, 50, page, priority=priority)
+            if "error" in result:
+                return {"error": result["error"], "fetched": fetched, "new": new}
+            count = result.get("count", 0)
+            fetched += len(result["jobs"])
+            page_new = await self._index_jobs(result["jobs"])
+            new += page_new
+            if page_new == 0 or len(result["jobs"]) < 50:
+                break
+        await self.index.mark_refreshed(freshness_key(country, what, where), count)
+        return {"fetched": fetched, "new": new, "count": count}
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def _fetch_jobs(
+        self,
+        what: str,
+        where: str,
+        country: str,
+        results_per_page: int,
+        page: int,
+        priority: int = INTERACTIVE,
+        sort_by: Optional[str] = None
+    ) -> Dict:
+        """Fetch one page of results from Adzuna, bypassing the cache. sort_by="date" puts the newest first."""
         if not self.app_id or not self.app_key:
             return {
                 "error": "Adzuna API credentials not configured",
@@ -44,50 +355,56 @@ class AdzunaService:
                 "count": 0
             }
         
+        if results_per_page < 1:
+            return {
+                "error": "results_per_page must be at least 1",
+                "jobs": [],
+                "count": 0
+            }
+        # Adzuna never returns more than 50 a page, so pages are counted in what it sends
+        results_per_page = min(results_per_page, 50)
+
         url = f"{self.base_url}/{country}/search/{page}"
         
         params = {
             "app_id": self.app_id,
             "app_key": self.app_key,
-            "results_per_page": min(results_per_page, 50),
+            "results_per_page": results_per_page,
         }
         
         if what:
             params["what"] = what
         if where:
             params["where"] = where
+        if sort_by:
+            params["sort_by"] = sort_by
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params, timeout=10.0)
-                response.raise_for_status()
-                data = response.json()
-                
-                # Format the response
-                jobs = []
-                for job in data.get("results", []):
-                    jobs.append({
-                        "id": job.get("id"),
-                        "title": job.get("title"),
-                        "company": job.get("company", {}).get("display_name", "Unknown"),
-                        "location": job.get("location", {}).get("display_name", "Unknown"),
-                        "description": job.get("description", "")[:500] + "...",  # Truncate
-                        "salary_min": job.get("salary_min"),
-                        "salary_max": job.get("salary_max"),
-                        "contract_type": job.get("contract_type"),
-                        "created": job.get("created"),
-                        "redirect_url": job.get("redirect_url"),
-                        "category": job.get("category", {}).get("label", "Unknown")
-                    })
-                
-                return {
-                    "jobs": jobs,
-                    "count": data.get("count", 0),
-                    "page": page,
-                    "results_per_page": results_per_page,
-                    "total_pages": (data.get("count", 0) // results_per_page) + 1
-                }
-                
+            response = await self._get(url, params, priority)
+            response.raise_for_status()
+            data = response.json()
+            
+            # Format the response
+            records = [Job.from_adzuna(job) for job in data.get("results", [])]
+            for record in records:
+                # Full descriptions stay here for get_job; result lists carry a preview
+                self.details.set(str(record.id), record)
+            jobs = [record.to_dict(self.description_chars) for record in records]
+            
+            return {
+                "jobs": jobs,
+                "count": data.get("count", 0),
+                "page": page,
+                "results_per_page": results_per_page,
+                "total_pages": math.ceil(data.get("count", 0) / results_per_page)
+            }
+            
+        except UpstreamBusyError as e:
+            return {
+                "error": f"Adzuna is busy, please try again shortly ({e})",
+                "jobs": [],
+                "count": 0
+            }
         except httpx.HTTPStatusError as e:
             return {
                 "error": f"Adzuna API error: {e.response.status_code}",
@@ -101,8 +418,33 @@ class AdzunaService:
                 "count": 0
             }
     
+    async def get_job(self, job_id: str) -> Optional[Dict]:
+        """
+        One job with its full description, from jobs seen in recent searches or,
+        failing that, the local index (which keeps the preview only).
+        """
+        record = self.details.get(str(job_id))
+        if record is not None:
+            return record.to_dict()
+        if self.index is not None:
+            return await self.index.get_job(job_id)
+        return None
+
+    @instrumented("adzuna.get_job_categories")
     async def get_job_categories(self, country: str = "ca") -> List[Dict]:
-        """Get available job categories"""
+        """
+        Available job categories, from the on-disk snapshot that ReferenceData keeps
+        fresh in the background. Only a country with no snapshot at all is fetched live.
+        """
+        snapshot = self.reference.categories(country)
+        results = await asyncio.to_thread(snapshot.load)
+        if results is None:
+            await self.reference.refresh_categories(country, lambda c: self.fetch_job_categories(c, INTERACTIVE))
+            results = snapshot.results
+        return results or []
+
+    async def fetch_job_categories(self, country: str = "ca", priority: int = BACKGROUND) -> List[Dict]:
+        """Fetch the category list from Adzuna; [] on failure."""
         url = f"{self.base_url}/{country}/categories"
         
         params = {
@@ -111,10 +453,9 @@ class AdzunaService:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params, timeout=10.0)
-                response.raise_for_status()
-                return response.json().get("results", [])
+            response = await self._get(url, params, priority=priority)
+            response.raise_for_status()
+            return response.json().get("results", [])
         except Exception as e:
             print(f"Error fetching categories: {e}")
             return []
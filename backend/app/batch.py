@@ -0,0 +1,213 @@
+import os
+import time
+import uuid
+import asyncio
+import hashlib
+from typing import AsyncIterator, Dict, List, Optional
+from app.cache import SingleFlight, TTLCache
+from app.claude_service import ClaudeService, claude_service
+
+
+def resume_hash(text: str) -> str:
+    """Content hash of a resume, ignoring whitespace differences (re-exported files)."""
+    return hashlib.sha256(" ".join((text or "").split()).encode("utf-8")).hexdigest()
+
+
+class BatchJob:
+    """One submitted batch: its items, and their results in completion order."""
+
+    def __init__(self, job_id: str, items: List[Dict]):
+        self.id = job_id
+        self.items = items
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._started = time.perf_counter()
+        self.results: List[Dict] = []
+        self.changed = asyncio.Condition()
+
+    @property
+    def done(self) -> bool:
+        return len(self.results) == len(self.items)
+
+    async def record(self, result: Dict):
+        async with self.changed:
+            self.results.append(result)
+            if self.done:
+                self.finished_at = time.time()
+            self.changed.notify_all()
+
+    def status(self) -> Dict:
+        succeeded = sum(1 for r in self.results if r["status"] == "ok")
+        return {
+            "job_id": self.id,
+            "status": "completed" if self.done else ("running" if self.results else "queued"),
+            "total": len(self.items),
+            "unique": len({item["hash"] for item in self.items}),
+            "completed": len(self.results),
+            "succeeded": succeeded,
+            "failed": len(self.results) - succeeded,
+            "cached": sum(1 for r in self.results if r["cached"]),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "elapsed_ms": round((time.perf_counter() - self._started) * 1000, 1),
+        }
+
+
+class BatchAnalysisService:
+    """
+    Runs many resumes through ClaudeService.analyze_resume in the background.
+
+    Work is bounded by a shared worker limit, failed items are retried with
+    backoff, and analyses are cached by resume content hash, so duplicates within
+    a batch or across batches only cost one LLM call.
+    """
+
+    def __init__(
+        self,
+        claude: ClaudeService,
+        max_workers: int = 4,
+        max_retries: int = 2,
+        retry_backoff: float = 1.0,
+        result_cache_size: int = 5000,
+        result_ttl: float = 86400.0,
+        job_ttl: float = 3600.0,
+    ):
+        self.claude = claude
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.results = TTLCache(max_entries=result_cache_size, ttl=result_ttl)
+        self.jobs = TTLCache(max_entries=1000, ttl=job_ttl)
+        self._in_flight = SingleFlight()
+        self._workers: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._background: set = set()
+        self._stats = {"jobs": 0, "items": 0, "llm_calls": 0, "retries": 0, "failed": 0}
+
+    @classmethod
+    def from_env(cls, claude: ClaudeService) -> "BatchAnalysisService":
+        return cls(
+            claude,
+            max_workers=int(os.getenv("BATCH_MAX_WORKERS", "4")),
+            max_retries=int(os.getenv("BATCH_MAX_RETRIES", "2")),
+            result_cache_size=int(os.getenv("BATCH_RESULT_CACHE_SIZE", "5000")),
+            result_ttl=float(os.getenv("BATCH_RESULT_TTL", "86400")),
+            job_ttl=float(os.getenv("BATCH_JOB_TTL", "3600")),
+        )
+
+    def _worker_limit(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._workers = asyncio.Semaphore(self.max_workers)
+        return self._workers
+
+    def submit(self, resumes: List[Dict]) -> BatchJob:
+        """
+        Queue a batch of {"id", "resume_text"} items and return its job right away.
+
+        Items with the same content hash are analyzed once and share the result.
+        """
+        items = [
+            {"index": i, "id": resume.get("id") or str(i), "hash": resume_hash(resume["resume_text"])}
+            for i, resume in enumerate(resumes)
+        ]
+        job = BatchJob(uuid.uuid4().hex, items)
+        self.jobs.set(job.id, job)
+        self._stats["jobs"] += 1
+        self._stats["items"] += len(items)
+
+        groups: Dict[str, List[Dict]] = {}
+        texts: Dict[str, str] = {}
+        for item, resume in zip(items, resumes):
+            groups.setdefault(item["hash"], []).append(item)
+            texts.setdefault(item["hash"], resume["resume_text"])
+        for content_hash, members in groups.items():
+            self._spawn(self._process(job, content_hash, texts[content_hash], members))
+        return job
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        return self.jobs.get(job_id)
+
+    async def _process(self, job: BatchJob, content_hash: str, text: str, members: List[Dict]):
+        start = time.perf_counter()
+        outcome = self.results.get(content_hash)
+        cached = outcome is not None
+        if outcome is None:
+            try:
+                outcome = await self._in_flight.run(content_hash, lambda: self._analyze(content_hash, text))
+            except Exception as e:
+                # Every member still needs an outcome, or the job never completes and its stream hangs
+                self._stats["failed"] += 1
+                print(f"WARNING: batch analysis of {content_hash[:12]} failed: {e}")
+                outcome = {"error": str(e) or type(e).__name__, "attempts": 0}
+
+        latency_ms = round((time.perf_counter() - start) * 1000, 1)
+        for position, item in enumerate(members):
+            await job.record({
+                "index": item["index"],
+                "id": item["id"],
+                "status": "error" if "error" in outcome else "ok",
+                **outcome,
+                # Only the first copy in a batch paid for the analysis
+                "cached": cached or position > 0,
+                "latency_ms": latency_ms,
+            })
+
+    async def _analyze(self, content_hash: str, text: str) -> Dict:
+        attempts = 0
+        error = None
+        while attempts <= self.max_retries:
+            if attempts:
+                # Back off without holding a worker
+                self._stats["retries"] += 1
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempts - 1))
+            attempts += 1
+            async with self._worker_limit():
+                self._stats["llm_calls"] += 1
+                try:
+                    profile = await self.claude.analyze_resume(text, endpoint="batch_analyze_resume")
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+                    continue
+            outcome = {"result": profile, "attempts": attempts}
+            self.results.set(content_hash, outcome)
+            return outcome
+        self._stats["failed"] += 1
+        # Failures are not cached, so resubmitting retries them
+        return {"error": error, "attempts": attempts}
+
+    async def stream(self, job: BatchJob) -> AsyncIterator[Dict]:
+        """Yield results in completion order: those already finished, then each new one as it lands."""
+        sent = 0
+        while sent < len(job.items):
+            async with job.changed:
+                await job.changed.wait_for(lambda: len(job.results) > sent)
+                pending = job.results[sent:]
+            for result in pending:
+                yield result
+            sent += len(pending)
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def shutdown(self):
+        for task in list(self._background):
+            task.cancel()
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "max_workers": self.max_workers,
+            "active_tasks": len(self._background),
+            "result_cache": self.results.stats(),
+        }
+
+
+# Singleton instance
+batch_service = BatchAnalysisService.from_env(claude_service)
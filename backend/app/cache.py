@@ -0,0 +1,392 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import aiosqlite
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from app.workers import SHARED_SEARCH_CACHE_DB, worker_count
+
+
+async def open_sqlite(path: str, isolation_level: Optional[str] = "IMMEDIATE") -> aiosqlite.Connection:
+    """
+    Open an aiosqlite connection, creating the parent directory if needed.
+
+    aiosqlite runs each connection on its own thread; mark it as a daemon so a
+    connection that is never closed (scripts, tests, no lifespan) cannot keep
+    the interpreter from exiting.
+
+    File databases are switched to WAL so several worker processes can read
+    while one writes. Write transactions begin IMMEDIATE: a deferred transaction
+    that turns into a write after another process committed fails with "database
+    is locked" at once, while an immediate one waits up to the busy timeout.
+    isolation_level=None gives autocommit, one transaction per statement.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    connection = aiosqlite.connect(
+        path, timeout=float(os.getenv("SQLITE_BUSY_TIMEOUT", "5")), isolation_level=isolation_level
+    )
+    connection.daemon = True
+    db = await connection
+    if path != ":memory:":
+        await db.execute("PRAGMA journal_mode=WAL")
+        # Safe with WAL: a power loss can drop the last commits, never corrupt the file
+        await db.execute("PRAGMA synchronous=NORMAL")
+    return db
+
+
+class TTLCache:
+    """In-memory LRU cache with a per-entry time-to-live and a size bound."""
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: str) -> Optional[Any]:
+        entry = self._data.pop(key, None)
+        return entry[1] if entry else None
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key: str) -> bool:
+        """Whether a fresh entry exists; not counted as a lookup and does not touch LRU order."""
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one execution.
+
+    The first caller starts the work as its own task; later callers for the same key
+    await that task instead of starting another. Cancelling one caller does not cancel
+    the shared work for the others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+class SqliteCacheStore:
+    """
+    Persistent key/value tier on SQLite, for results that should survive restarts.
+
+    The same file is shared by every worker process, and also holds short leases
+    so that only one worker at a time fetches a given key. Every write is a single
+    autocommitted statement, so no worker holds the write lock across an await.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.owner = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._db: Optional[aiosqlite.Connection] = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self) -> aiosqlite.Connection:
+        async with self._lock:
+            if self._db is None:
+                self._db = await open_sqlite(self.path, isolation_level=None)
+                await self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS cache_entries ("
+                    " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                await self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS cache_leases ("
+                    " key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+        return self._db
+
+    async def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, seconds_left) for a live entry, or None."""
+        db = await self._connect()
+        async with db.execute(
+            "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        remaining = row[1] - time.time()
+        if remaining <= 0:
+            await db.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            return None
+        return json.loads(row[0]), remaining
+
+    async def set(self, key: str, value: Any, ttl: float):
+        db = await self._connect()
+        await db.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time() + ttl),
+        )
+
+    async def purge_expired(self) -> int:
+        db = await self._connect()
+        cursor = await db.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+        await db.execute("DELETE FROM cache_leases WHERE expires_at <= ?", (time.time(),))
+        return cursor.rowcount
+
+    # ─── Leases ───────────────────────────────────────────────────────────────
+
+    async def acquire_lease(self, key: str, ttl: float) -> bool:
+        """Take the fetch lease for key unless another owner holds a live one."""
+        db = await self._connect()
+        now = time.time()
+        # One statement: insert, or take over a lease that has run out
+        cursor = await db.execute(
+            """INSERT INTO cache_leases (key, owner, expires_at) VALUES (?, ?, ?)
+               ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+               WHERE cache_leases.expires_at <= ?""",
+            (key, self.owner, now + ttl, now),
+        )
+        return cursor.rowcount == 1
+
+    async def lease_held(self, key: str) -> bool:
+        db = await self._connect()
+        async with db.execute(
+            "SELECT 1 FROM cache_leases WHERE key = ? AND expires_at > ?", (key, time.time())
+        ) as cursor:
+            return await cursor.fetchone() is not None
+
+    async def release_lease(self, key: str):
+        db = await self._connect()
+        await db.execute("DELETE FROM cache_leases WHERE key = ? AND owner = ?", (key, self.owner))
+
+    async def close(self):
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+
+def search_cache_key(country: str, what: str, where: str, page: int, results_per_page: int) -> str:
+    """Normalize search parameters so trivially different spellings share one entry."""
+    def norm(value: str) -> str:
+        return " ".join((value or "").lower().split())
+
+    return json.dumps(
+        [norm(country), norm(what), norm(where), int(page), min(int(results_per_page), 50)],
+        separators=(",", ":"),
+    )
+
+
+class SearchCache:
+    """
+    Two-tier cache for Adzuna search results with single-flight coalescing.
+
+    Lookups check the in-memory LRU first, then the optional SQLite tier. On a miss,
+    concurrent callers for the same key share one upstream fetch. Results carrying an
+    "error" key are never stored.
+
+    With the SQLite tier, a miss also takes a lease on the key in the shared file.
+    A worker process that finds the lease held waits for the holder's result to
+    appear instead of fetching the same page itself.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl: float = 600.0,
+        db_path: Optional[str] = None,
+        persistent_ttl: float = 3600.0,
+        lease_ttl: float = 20.0,
+        lease_poll: float = 0.05,
+    ):
+        self.memory = TTLCache(max_entries=max_entries, ttl=ttl)
+        self.store = SqliteCacheStore(db_path) if db_path else None
+        self.persistent_ttl = persistent_ttl
+        self.lease_ttl = lease_ttl
+        self.lease_poll = lease_poll
+        self.flight = SingleFlight()
+        self._stats = {
+            "persistent_hits": 0,
+            "upstream_fetches": 0,
+            "bypasses": 0,
+            "store_errors": 0,
+            "lease_waits": 0,
+            "lease_wait_hits": 0,
+        }
+
+    @classmethod
+    def from_env(cls) -> "SearchCache":
+        # Several workers share one cache file; a single worker keeps the memory tier only by default
+        default_db = SHARED_SEARCH_CACHE_DB if worker_count() > 1 else ""
+        db_path = os.getenv("SEARCH_CACHE_DB", default_db)
+        if not db_path and worker_count() > 1:
+            print("WARNING: SEARCH_CACHE_DB is empty with several workers; each worker caches searches on its own")
+        return cls(
+            max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1000")),
+            ttl=float(os.getenv("SEARCH_CACHE_TTL", "600")),
+            db_path=db_path or None,
+            persistent_ttl=float(os.getenv("SEARCH_CACHE_PERSISTENT_TTL", "3600")),
+            lease_ttl=float(os.getenv("SEARCH_CACHE_LEASE_TTL", "20")),
+        )
+
+    async def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Dict]],
+        bypass: bool = False,
+    ) -> Dict:
+        """
+        Return the cached result for key, fetching it once on a miss.
+
+        Args:
+            key: normalized cache key, see search_cache_key
+            fetch: coroutine factory that calls upstream
+            bypass: skip cached reads and fetch fresh; the fresh result is still stored
+        """
+        if bypass:
+            self._stats["bypasses"] += 1
+            return await self._fetch_and_store(key, fetch)
+
+        cached = self.memory.get(key)
+        if cached is not None:
+            return cached
+
+        return await self.flight.run(key, lambda: self._load(key, fetch))
+
+    async def _load(self, key: str, fetch: Callable[[], Awaitable[Dict]]) -> Dict:
+        if self.store is None:
+            return await self._fetch_and_store(key, fetch)
+        value = await self._read_store(key)
+        if value is not None:
+            return value
+
+        leased = await self._store_call("lease", self.store.acquire_lease(key, self.lease_ttl))
+        if leased is False:
+            value = await self._wait_for_lease_holder(key)
+            if value is not None:
+                return value
+        try:
+            if leased:
+                # The previous holder may have stored and released between our read and the lease
+                value = await self._read_store(key)
+                if value is not None:
+                    return value
+            return await self._fetch_and_store(key, fetch)
+        finally:
+            if leased:
+                await self._store_call("lease release", self.store.release_lease(key))
+
+    async def _read_store(self, key: str) -> Optional[Dict]:
+        found = await self._store_call("read", self.store.get(key))
+        if found is None:
+            return None
+        value, remaining = found
+        self._stats["persistent_hits"] += 1
+        self.memory.set(key, value, ttl=min(self.memory.ttl, remaining))
+        return value
+
+    async def _wait_for_lease_holder(self, key: str) -> Optional[Dict]:
+        """
+        Another worker is fetching key: poll the store for its result.
+
+        Returns None if the holder finished without storing anything (an upstream
+        error) or its lease ran out, and the caller then fetches for itself.
+        """
+        self._stats["lease_waits"] += 1
+        deadline = time.monotonic() + self.lease_ttl
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.lease_poll)
+            value = await self._read_store(key)
+            if value is not None:
+                self._stats["lease_wait_hits"] += 1
+                return value
+            if not await self._store_call("lease", self.store.lease_held(key)):
+                # The holder may have stored and released since the read above
+                value = await self._read_store(key)
+                if value is not None:
+                    self._stats["lease_wait_hits"] += 1
+                return value
+        return None
+
+    async def _store_call(self, action: str, call: Awaitable) -> Any:
+        """Await a store operation; a store failure is logged and reads as None, never failing the search."""
+        try:
+            return await call
+        except Exception as e:
+            self._stats["store_errors"] += 1
+            print(f"WARNING: search cache store {action} failed: {e}")
+            return None
+
+    async def _fetch_and_store(self, key: str, fetch: Callable[[], Awaitable[Dict]]) -> Dict:
+        self._stats["upstream_fetches"] += 1
+        result = await fetch()
+        if "error" in result:
+            return result
+        self.memory.set(key, result)
+        if self.store is not None:
+            await self._store_call("write", self.store.set(key, result, self.persistent_ttl))
+        return result
+
+    async def close(self):
+        if self.store is not None:
+            await self.store.close()
+
+    def stats(self) -> Dict:
+        return {
+            "memory": self.memory.stats(),
+            "persistent": self.store is not None,
+            **self._stats,
+            "coalesced": self.flight.coalesced,
+            "in_flight": len(self.flight),
+        }
@@ -1,29 +1,86 @@
 import os
 import json
-from groq import Groq
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 from dotenv import load_dotenv
+from app.llm_client import LLMClient
+from app.cache import TTLCache
+from app.query_parser import fast_parse, normalize_message
+from app.prompt_budget import PromptCompactor, clip_text, compact_json, compact_resume, estimate_tokens
+from app.metrics import instrumented
+from app.market_stats import prompt_facts
+from app.structured_output import JobSearchQuery, JobTitleSuggestions, ResumeAnalysis, StructuredOutput
 
 load_dotenv()
 
 class ClaudeService:
-    """Service for using Groq (LLaMA) for all AI/NLP tasks."""
+    """Service for all AI/NLP tasks, on the LLM providers configured by LLM_PROVIDERS (Groq by default)."""
+
+    def __init__(self, llm: LLMClient = None, compactor: PromptCompactor = None, structured: StructuredOutput = None):
+        self.llm = llm or LLMClient.from_env()
+        # JSON replies are validated against app.structured_output models, repaired or retried
+        self.structured = structured or StructuredOutput.from_env(self.llm)
+        # Every prompt is fit to a per-endpoint token budget before it is sent
+        self.compactor = compactor or PromptCompactor.from_env()
+
+        # Rule-based fast path and memoization in front of parse_job_search_query
+        self.fast_path_min_confidence = float(os.getenv("QUERY_FAST_PATH_MIN_CONFIDENCE", "0.8"))
+        self._parse_cache = TTLCache(
+            max_entries=int(os.getenv("QUERY_PARSE_CACHE_SIZE", "2048")),
+            ttl=float(os.getenv("QUERY_PARSE_CACHE_TTL", "3600")),
+        )
+        self._parse_stats = {"fast_path": 0, "llm": 0}
 
-    def __init__(self):
-        api_key = os.getenv("GROQ_API_KEY")
-        if not api_key:
-            print("WARNING: GROQ_API_KEY not found in environment variables")
-        self.client = Groq(api_key=api_key)
-        self.model = "llama-3.1-8b-instant"
+    def parser_stats(self) -> Dict:
+        return {
+            **self._parse_stats,
+            "fast_path_min_confidence": self.fast_path_min_confidence,
+            "memo": self._parse_cache.stats(),
+        }
 
     # ─── Job Search ───────────────────────────────────────────────────────────
 
+    @instrumented("claude.parse_job_search_query")
     async def parse_job_search_query(self, user_message: str) -> dict:
         """
         Parse natural language into structured job search parameters.
         Returns: { is_job_search, what, where }
+
+        Messages the local parser handles confidently never reach the LLM, and
+        results are memoized on the normalized message text.
         """
-        prompt = f"""You are a job search assistant. Analyze the user's message and extract job search parameters.
+        key = normalize_message(user_message)
+        cached = self._parse_cache.get(key)
+        if cached is not None:
+            return dict(cached)
+
+        parsed, confidence = fast_parse(user_message)
+        if confidence >= self.fast_path_min_confidence:
+            self._parse_stats["fast_path"] += 1
+            self._parse_cache.set(key, parsed)
+            return dict(parsed)
+
+        self._parse_stats["llm"] += 1
+        parsed = await self._parse_with_llm(user_message)
+        self._parse_cache.set(key, parsed)
+        return dict(parsed)
+
+    async def _parse_with_llm(self, user_message: str) -> dict:
+        original = self._parse_prompt(user_message)
+        room = self.compactor.budget("parse_job_search_query") - estimate_tokens(self._parse_prompt(""))
+        prompt = self.compactor.record(
+            "parse_job_search_query", original, self._parse_prompt(clip_text(user_message, max(room, 50)))
+        )
+
+        parsed = await self.structured.complete(
+            "parse_job_search_query",
+            max_tokens=256,
+            messages=[{"role": "user", "content": prompt}],
+            model=JobSearchQuery,
+        )
+        return parsed.model_dump()
+
+    def _parse_prompt(self, user_message: str) -> str:
+        return f"""You are a job search assistant. Analyze the user's message and extract job search parameters.
 
 User message: "{user_message}"
 
@@ -41,26 +98,44 @@ Rules:
 - If location is "remote" or "work from home", set where to "remote"
 - If no location is mentioned, leave where as empty string"""
 
-        response = self.client.chat.completions.create(
-            model=self.model,
+    @instrumented("claude.format_job_results")
+    async def format_job_results(
+        self, what: str, where: str, jobs: List[Dict], total_count: int, market: Optional[Dict] = None
+    ) -> str:
+        """
+        Generate a natural conversational summary of job search results.
+
+        market is a MarketStatsService result for the same query; when given, the
+        summary is written from its statistics over many pages instead of the jobs.
+        """
+        return await self.llm.complete(
+            "format_job_results",
             max_tokens=256,
-            messages=[{"role": "user", "content": prompt}]
+            messages=[{"role": "user", "content": self._job_results_prompt(what, where, jobs, total_count, market)}]
         )
 
-        raw = response.choices[0].message.content.strip()
-
-        if raw.startswith("```"):
-            raw = raw.split("```")[1]
-            if raw.startswith("json"):
-                raw = raw[4:]
-            raw = raw.strip()
-
-        return json.loads(raw)
-
-    async def format_job_results(self, what: str, where: str, jobs: List[Dict], total_count: int) -> str:
+    @instrumented("claude.stream_job_results")
+    async def stream_job_results(
+        self, what: str, where: str, jobs: List[Dict], total_count: int, market: Optional[Dict] = None
+    ) -> AsyncIterator[str]:
         """
-        Generate a natural conversational summary of job search results.
+        Same summary as format_job_results, yielded as text chunks while the model writes it.
         """
+        async for chunk in self.llm.stream(
+            "format_job_results",
+            max_tokens=256,
+            messages=[{"role": "user", "content": self._job_results_prompt(what, where, jobs, total_count, market)}]
+        ):
+            yield chunk
+
+    def _job_results_prompt(
+        self, what: str, where: str, jobs: List[Dict], total_count: int, market: Optional[Dict] = None
+    ) -> str:
+        if market is not None:
+            # A few numbers over hundreds of postings beat the first ten postings verbatim
+            prompt = self._results_prompt(what, where, compact_json(prompt_facts(market)), total_count, "Market statistics")
+            return self.compactor.record("format_job_results", prompt, prompt)
+
         job_summaries = [
             {
                 "title": job.get("title"),
@@ -71,30 +146,39 @@ Rules:
             }
             for job in jobs[:10]
         ]
-
-        prompt = f"""You are a friendly job search assistant. A user searched for jobs and got results.
+        original = self._results_prompt(what, where, json.dumps(job_summaries, indent=2), total_count)
+
+        # Unknown salaries are left out rather than sent as nulls
+        compact = [{k: v for k, v in job.items() if v is not None} for job in job_summaries]
+        budget = self.compactor.budget("format_job_results")
+        prompt = self._results_prompt(what, where, compact_json(compact), total_count)
+        while len(compact) > 3 and estimate_tokens(prompt) > budget:
+            compact.pop()
+            prompt = self._results_prompt(what, where, compact_json(compact), total_count)
+        return self.compactor.record("format_job_results", original, prompt)
+
+    def _results_prompt(
+        self, what: str, where: str, top_results: str, total_count: int, label: str = "Top results"
+    ) -> str:
+        return f"""You are a friendly job search assistant. A user searched for jobs and got results.
 Write a brief, natural, conversational summary of what was found (2-3 sentences max).
 Mention the total count, highlight anything interesting like salary ranges or variety of companies.
 Do not list all the jobs — just give a helpful overview. End with a light encouragement.
 
 Search: "{what}" in "{where if where else 'any location'}"
 Total results found: {total_count}
-Top results: {json.dumps(job_summaries, indent=2)}"""
-
-        response = self.client.chat.completions.create(
-            model=self.model,
-            max_tokens=256,
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        return response.choices[0].message.content.strip()
+{label}: {top_results}"""
 
     # ─── Career Advisor ───────────────────────────────────────────────────────
 
-    async def analyze_resume(self, resume_text: str) -> dict:
+    @instrumented("claude.analyze_resume")
+    async def analyze_resume(self, resume_text: str, endpoint: str = "analyze_resume") -> dict:
         """
         Analyze a resume and return a candidate profile + clarifying questions.
 
+        endpoint names the call for LLM limits, priority and stats; batch jobs pass
+        "batch_analyze_resume" so they queue behind interactive analysis.
+
         Returns:
         {
             "profile": {
@@ -109,7 +193,35 @@ Top results: {json.dumps(job_summaries, indent=2)}"""
             ]
         }
         """
-        prompt = f"""You are a career advisor. Analyze the following resume and return a structured JSON response.
+        analysis = await self.structured.complete(
+            endpoint,
+            max_tokens=1024,
+            messages=self._analyze_messages(endpoint, resume_text),
+            model=ResumeAnalysis,
+        )
+        return analysis.model_dump()
+
+    @instrumented("claude.stream_resume_analysis")
+    async def stream_resume_analysis(self, resume_text: str) -> AsyncIterator[Tuple[str, dict]]:
+        """
+        Same analysis as analyze_resume, as ("partial", dict) snapshots while the model
+        writes it (profile.summary arrives well before the questions), then ("done", dict).
+        """
+        async for event, data in self.structured.stream(
+            "analyze_resume",
+            max_tokens=1024,
+            messages=self._analyze_messages("analyze_resume", resume_text),
+            model=ResumeAnalysis,
+        ):
+            yield event, data.model_dump() if event == "done" else data
+
+    def _analyze_messages(self, endpoint: str, resume_text: str) -> List[Dict]:
+        prompt, original = self.compactor.fit_resume(endpoint, self._analyze_prompt, resume_text)
+        self.compactor.record(endpoint, original, prompt)
+        return [{"role": "user", "content": prompt}]
+
+    def _analyze_prompt(self, resume_text: str) -> str:
+        return f"""You are a career advisor. Analyze the following resume and return a structured JSON response.
 
 Resume:
 {resume_text}
@@ -136,22 +248,7 @@ Rules for questions:
 - Keep questions short and conversational
 - Do not ask for information already clearly stated in the resume"""
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            max_tokens=1024,
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        raw = response.choices[0].message.content.strip()
-
-        if raw.startswith("```"):
-            raw = raw.split("```")[1]
-            if raw.startswith("json"):
-                raw = raw[4:]
-            raw = raw.strip()
-
-        return json.loads(raw)
-
+    @instrumented("claude.suggest_job_titles")
     async def suggest_job_titles(self, profile: dict, answers: List[Dict]) -> dict:
         """
         Based on resume profile and clarifying answers, suggest job titles to search for.
@@ -169,14 +266,33 @@ Rules for questions:
             "intro": "conversational intro message to show the user"
         }
         """
-        prompt = f"""You are a career advisor. Based on a candidate's profile and their answers to clarifying questions,
+        original = self._suggest_prompt(json.dumps(profile, indent=2), json.dumps(answers, indent=2))
+        # Free-text answers are the only unbounded input here
+        answer_budget = max(self.compactor.budget("suggest_job_titles") // 8, 50)
+        answers = [
+            {**answer, "answer": clip_text(str(answer.get("answer", "")), answer_budget)} for answer in answers
+        ]
+        prompt = self.compactor.record(
+            "suggest_job_titles", original, self._suggest_prompt(compact_json(profile), compact_json(answers))
+        )
+
+        suggestions = await self.structured.complete(
+            "suggest_job_titles",
+            max_tokens=1024,
+            messages=[{"role": "user", "content": prompt}],
+            model=JobTitleSuggestions,
+        )
+        return suggestions.model_dump()
+
+    def _suggest_prompt(self, profile_json: str, answers_json: str) -> str:
+        return f"""You are a career advisor. Based on a candidate's profile and their answers to clarifying questions,
 suggest the best job titles to search for.
 
 Candidate profile:
-{json.dumps(profile, indent=2)}
+{profile_json}
 
 Clarifying question answers:
-{json.dumps(answers, indent=2)}
+{answers_json}
 
 Respond with a JSON object only, no explanation. Use this exact structure:
 {{
@@ -193,21 +309,64 @@ Rules:
 - Reflect both breadth (different directions) and the preferences expressed in their answers
 - Keep the intro friendly and specific to this candidate"""
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            max_tokens=1024,
-            messages=[{"role": "user", "content": prompt}]
-        )
+    # ─── Cover Letters ────────────────────────────────────────────────────────
+
+    def cover_letter_context(self, resume_text: str, profile: Optional[Dict] = None) -> str:
+        """
+        The candidate half of every cover letter prompt: the analyze_resume profile (if
+        any) and the resume compacted to the "cover_letter_context" budget.
+        """
+        lines = []
+        if profile:
+            lines.append(f"Summary: {profile.get('summary', '')}")
+            lines.append(f"Experience level: {profile.get('experience_level', '')}")
+            lines.append(f"Key skills: {', '.join(profile.get('key_skills', []))}")
+        header = "\n".join(lines)
+        room = max(self.compactor.budget("cover_letter_context") - estimate_tokens(header), 100)
+
+        def build(resume: str) -> str:
+            return "\n\n".join(part for part in (header, "Resume:\n" + resume) if part)
+
+        return self.compactor.record("cover_letter_context", build(resume_text), build(compact_resume(resume_text, room)))
+
+    @instrumented("claude.stream_cover_letter")
+    async def stream_cover_letter(self, context: str, job: Dict) -> AsyncIterator[str]:
+        """
+        A cover letter for one job, yielded as text chunks while the model writes it.
+
+        context comes from cover_letter_context and leads the prompt, so letters for
+        several jobs from one resume share a prompt prefix.
+        """
+        async for chunk in self.llm.stream(
+            "cover_letter",
+            max_tokens=700,
+            messages=[{"role": "user", "content": self._cover_letter_messages(context, job)}]
+        ):
+            yield chunk
+
+    def _cover_letter_messages(self, context: str, job: Dict) -> str:
+        fields = {k: job.get(k) for k in ("title", "company", "location", "contract_type") if job.get(k)}
+        description = job.get("description") or ""
+        original = self._cover_letter_prompt(context, compact_json({**fields, "description": description}))
 
-        raw = response.choices[0].message.content.strip()
+        room = self.compactor.budget("cover_letter") - estimate_tokens(self._cover_letter_prompt(context, compact_json(fields)))
+        job_text = compact_json({**fields, "description": clip_text(description, max(room, 100))})
+        return self.compactor.record("cover_letter", original, self._cover_letter_prompt(context, job_text))
 
-        if raw.startswith("```"):
-            raw = raw.split("```")[1]
-            if raw.startswith("json"):
-                raw = raw[4:]
-            raw = raw.strip()
+    def _cover_letter_prompt(self, context: str, job_json: str) -> str:
+        return f"""You are a career advisor writing cover letters for a candidate.
 
-        return json.loads(raw)
+Candidate:
+{context}
+
+Write a cover letter for this job:
+{job_json}
+
+Rules:
+- 3-4 short paragraphs, under 350 words, ready to paste into an application
+- Connect the candidate's most relevant experience and skills to what the job asks for
+- Do not invent employers, titles, degrees or numbers that are not in the candidate details
+- Plain text only: no markdown and no placeholders like [Your Name]"""
 
 
 # Singleton instance
@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from app.adzuna_service import AdzunaService, adzuna_service
+from app.batch import batch_service, resume_hash
+from app.cache import SingleFlight, TTLCache
+from app.claude_service import ClaudeService, claude_service
+from app.prompt_budget import estimate_tokens
+
+
+def profile_digest(profile: Optional[Dict]) -> str:
+    if not profile:
+        return "none"
+    return hashlib.sha256(json.dumps(profile, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class CoverLetterService:
+    """
+    Cover letters for many selected jobs from one resume, streamed over one connection.
+
+    The resume is condensed once per content hash into a context (the analyze_resume
+    profile plus the compacted resume) that leads every letter's prompt, so ten
+    letters cost ten small prompts instead of ten full resumes. The profile is the
+    one the client sends, else one already in the batch analysis cache, else a fresh
+    analysis (which then lands in that cache too); if analysis fails the context is
+    the resume alone.
+
+    All letters start at once. How many reach the model together is left to the
+    LLMClient's provider and per-endpoint limits (LLM_ENDPOINT_CONCURRENCY=cover_letter=N),
+    and their chunks are interleaved into one event stream tagged by job.
+    """
+
+    def __init__(
+        self,
+        claude: ClaudeService,
+        adzuna: AdzunaService,
+        analyses: Optional[TTLCache] = None,
+        max_jobs: int = 20,
+        context_cache_size: int = 500,
+        context_ttl: float = 3600.0,
+    ):
+        self.claude = claude
+        self.adzuna = adzuna
+        # Shared with BatchAnalysisService: {"result": analysis, ...} by resume hash
+        self.analyses = analyses if analyses is not None else TTLCache(max_entries=context_cache_size, ttl=86400.0)
+        self.max_jobs = max_jobs
+        self.contexts = TTLCache(max_entries=context_cache_size, ttl=context_ttl)
+        self._analyzing = SingleFlight()
+        self._stats = {"batches": 0, "letters": 0, "failed": 0, "analyses": 0, "analysis_failures": 0}
+
+    @classmethod
+    def from_env(cls, claude: ClaudeService, adzuna: AdzunaService, analyses: Optional[TTLCache] = None) -> "CoverLetterService":
+        return cls(
+            claude,
+            adzuna,
+            analyses=analyses,
+            max_jobs=int(os.getenv("COVER_LETTER_MAX_JOBS", "20")),
+            context_ttl=float(os.getenv("COVER_LETTER_CONTEXT_TTL", "3600")),
+        )
+
+    # ─── Resume Context ───────────────────────────────────────────────────────
+
+    async def context(self, resume_text: str, profile: Optional[Dict] = None) -> Dict:
+        """
+        The condensed resume context for a batch of letters, cached by resume hash and profile.
+
+        Returns:
+            { resume_hash, text, tokens, profile_source ("request", "cached", "analyzed", "none"), cached }
+        """
+        content_hash = resume_hash(resume_text)
+        profile, source = await self._profile(content_hash, resume_text, profile)
+        key = f"{content_hash}:{profile_digest(profile)}"
+        context = self.contexts.get(key)
+        if context is not None:
+            return {**context, "profile_source": source, "cached": True}
+
+        # Compacting a long resume takes tens of milliseconds; keep it off the event loop
+        text = await asyncio.to_thread(self.claude.cover_letter_context, resume_text, profile)
+        context = {"resume_hash": content_hash, "text": text, "tokens": estimate_tokens(text)}
+        self.contexts.set(key, context)
+        return {**context, "profile_source": source, "cached": False}
+
+    async def _profile(self, content_hash: str, resume_text: str, profile: Optional[Dict]) -> Tuple[Optional[Dict], str]:
+        if profile:
+            return profile, "request"
+        cached = self.analyses.get(content_hash)
+        if cached is not None:
+            return cached["result"]["profile"], "cached"
+        analysis = await self._analyzing.run(content_hash, lambda: self._analyze(content_hash, resume_text))
+        if analysis is None:
+            return None, "none"
+        return analysis["profile"], "analyzed"
+
+    async def _analyze(self, content_hash: str, resume_text: str) -> Optional[Dict]:
+        self._stats["analyses"] += 1
+        try:
+            analysis = await self.claude.analyze_resume(resume_text)
+        except Exception as e:
+            # A letter without the profile is still a letter
+            self._stats["analysis_failures"] += 1
+            print(f"WARNING: resume analysis for cover letters failed: {e}")
+            return None
+        self.analyses.set(content_hash, {"result": analysis, "attempts": 1})
+        return analysis
+
+    # ─── Generation ───────────────────────────────────────────────────────────
+
+    async def generate(self, resume_text: str, jobs: List[Dict], profile: Optional[Dict] = None) -> AsyncIterator[Dict]:
+        """
+        Write a letter per job concurrently, yielding events from all of them as they happen:
+
+            {"event": "context", resume_hash, tokens, profile_source, cached, jobs}
+            {"event": "delta", job_id, index, text}        many per letter, interleaved across jobs
+            {"event": "letter", job_id, index, letter, first_chunk_ms, latency_ms}
+            {"event": "error", job_id, index, detail}
+            {"event": "done", total, succeeded, failed, elapsed_ms}
+
+        Closing the generator (the client went away) cancels the letters still being written.
+        """
+        start = time.perf_counter()
+        self._stats["batches"] += 1
+        context = await self.context(resume_text, profile)
+        yield {"event": "context", **{k: v for k, v in context.items() if k != "text"}, "jobs": len(jobs)}
+
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks = [
+            asyncio.ensure_future(self._write(queue, context["text"], index, job, start))
+            for index, job in enumerate(jobs)
+        ]
+        finished, succeeded = 0, 0
+        try:
+            while finished < len(tasks):
+                event = await queue.get()
+                if event["event"] != "delta":
+                    finished += 1
+                    succeeded += event["event"] == "letter"
+                yield event
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        yield {
+            "event": "done",
+            "total": len(jobs),
+            "succeeded": succeeded,
+            "failed": len(jobs) - succeeded,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+
+    async def _write(self, queue: asyncio.Queue, context: str, index: int, job: Dict, batch_start: float):
+        job_id = str(job.get("id") or index)
+        first_chunk_ms = None
+        parts = []
+        try:
+            job = await self._full_job(job)
+            async for chunk in self.claude.stream_cover_letter(context, job):
+                if first_chunk_ms is None:
+                    first_chunk_ms = round((time.perf_counter() - batch_start) * 1000, 1)
+                parts.append(chunk)
+                queue.put_nowait({"event": "delta", "job_id": job_id, "index": index, "text": chunk})
+        except Exception as e:
+            self._stats["failed"] += 1
+            queue.put_nowait({"event": "error", "job_id": job_id, "index": index, "detail": str(e) or type(e).__name__})
+            return
+        self._stats["letters"] += 1
+        queue.put_nowait({
+            "event": "letter",
+            "job_id": job_id,
+            "index": index,
+            "letter": "".join(parts).strip(),
+            "first_chunk_ms": first_chunk_ms,
+            "latency_ms": round((time.perf_counter() - batch_start) * 1000, 1),
+        })
+
+    async def _full_job(self, job: Dict) -> Dict:
+        """Result lists carry a description preview; use the full posting when it is still known."""
+        if not job.get("id"):
+            return job
+        try:
+            full = await self.adzuna.get_job(str(job["id"]))
+        except Exception as e:
+            print(f"WARNING: could not load job {job['id']} for its cover letter: {e}")
+            full = None
+        return {**job, **full} if full else job
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "max_jobs": self.max_jobs,
+            "context_cache": self.contexts.stats(),
+        }
+
+
+# Singleton instance
+cover_letter_service = CoverLetterService.from_env(claude_service, adzuna_service, analyses=batch_service.results)
@@ -0,0 +1,208 @@
+import os
+import re
+import zlib
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+
+# Near-duplicate detection for job postings. The same job is often posted several
+# times with a reworded title or through different recruiters; MinHash signatures
+# over title + company + description estimate Jaccard similarity, and LSH banding
+# finds candidate matches without comparing against every job seen so far.
+
+TAG_RE = re.compile(r"<[^>]+>")
+NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+# Mersenne prime for the universal hash family; values stay below 2**62 in uint64
+PRIME = (1 << 31) - 1
+
+# Mixes a band's rows into one key
+BAND_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop HTML tags, punctuation and the "..." Adzuna truncation marker."""
+    text = TAG_RE.sub(" ", (text or "").lower())
+    return " ".join(NON_WORD_RE.sub(" ", text).split())
+
+
+# Word n-gram size per field; shingling fields separately keeps a reworded title
+# or a different recruiter from disturbing the description shingles
+SHINGLE_FIELDS = (("title", 2), ("company", 1), ("description", 3))
+
+
+def shingles(job: Dict) -> np.ndarray:
+    """Hashed word n-grams over title, company and description."""
+    grams = []
+    for field, size in SHINGLE_FIELDS:
+        words = normalize_text(job.get(field) or "").split()
+        if 0 < len(words) < size:
+            grams.append(f"{field}:{' '.join(words)}")
+        grams.extend(f"{field}:{' '.join(words[i:i + size])}" for i in range(len(words) - size + 1))
+    return np.unique(np.fromiter(
+        (zlib.crc32(gram.encode("utf-8")) % PRIME for gram in grams), dtype=np.uint64, count=len(grams)
+    ))
+
+
+def choose_bands(num_perm: int, threshold: float, recall: float = 0.95) -> Tuple[int, int]:
+    """
+    Pick (bands, rows) for LSH banding.
+
+    Uses the most rows per band (fewest false candidates) that still makes a pair at
+    exactly the threshold a candidate with at least the given probability.
+    """
+    for rows in range(num_perm, 0, -1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            return bands, rows
+    return num_perm, 1
+
+
+class DuplicateDetector:
+    """
+    MinHash/LSH index of recently seen jobs.
+
+    Every job is assigned to a cluster: its own id, or the cluster of an earlier job
+    whose estimated similarity is at least the threshold. Clusters are global, so the
+    same posting collapses consistently across pages and across searches. Lookups only
+    touch the LSH buckets a job falls into, so cost does not grow with the number of
+    jobs tracked; the oldest entries are evicted past max_tracked.
+
+    Each tracked job costs about 3 KB with the default 128 permutations (32 bands of
+    4 rows): a 512-byte signature, and its key in the seen list and in one LSH bucket
+    per band, which is most of the rest. The default of 20,000 jobs is about 60 MB a
+    process, several hours of searches; reposts mostly land within that window.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, max_tracked: int = 20000, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.max_tracked = max_tracked
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, PRIME, size=(num_perm, 1), dtype=np.uint64)
+        # job key -> (signature, cluster id), oldest first
+        self._seen: "OrderedDict[str, Tuple[np.ndarray, str]]" = OrderedDict()
+        self._buckets: List[Dict[int, Union[str, List[str]]]] = [{} for _ in range(self.bands)]
+        self._stats = {"checked": 0, "collapsed": 0, "signature_hits": 0, "evicted": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["DuplicateDetector"]:
+        if os.getenv("DEDUP_ENABLED", "true").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            threshold=float(os.getenv("DEDUP_THRESHOLD", "0.8")),
+            num_perm=int(os.getenv("DEDUP_NUM_PERM", "128")),
+            max_tracked=int(os.getenv("DEDUP_MAX_TRACKED", "20000")),
+        )
+
+    @staticmethod
+    def job_key(job: Dict) -> str:
+        job_id = job.get("id")
+        if job_id:
+            return str(job_id)
+        return f"{job.get('title')}|{job.get('company')}|{job.get('location')}"
+
+    def signature(self, job: Dict) -> np.ndarray:
+        values = shingles(job)
+        if values.size == 0:
+            return np.full(self.num_perm, PRIME, dtype=np.uint64)
+        return ((self._a * values + self._b) % PRIME).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[int]:
+        # One 64-bit int per band rather than a bytes object of its rows; a collision
+        # only adds a candidate, and candidates are checked on the full signature
+        rows = signature.reshape(self.bands, self.rows).astype(np.uint64)
+        keys = np.zeros(self.bands, dtype=np.uint64)
+        for column in rows.T:
+            keys = keys * BAND_MULTIPLIER ^ column
+        return keys.tolist()
+
+    def _evict_oldest(self):
+        key, (signature, _) = self._seen.popitem(last=False)
+        for band, band_key in zip(self._buckets, self._band_keys(signature)):
+            members = band.get(band_key)
+            if members == key:
+                del band[band_key]
+            elif isinstance(members, list):
+                members.remove(key)
+                if len(members) == 1:
+                    band[band_key] = members[0]
+        self._stats["evicted"] += 1
+
+    def cluster_of(self, job: Dict) -> str:
+        """Cluster id for a job, indexing it if it has not been seen before."""
+        key = self.job_key(job)
+        entry = self._seen.get(key)
+        if entry is not None:
+            self._seen.move_to_end(key)
+            self._stats["signature_hits"] += 1
+            return entry[1]
+
+        # Values are below PRIME < 2**32, so the stored copy takes half the memory
+        signature = self.signature(job).astype(np.uint32)
+        band_keys = self._band_keys(signature)
+        cluster = key
+        best = self.threshold
+        candidates = set()
+        for band, band_key in zip(self._buckets, band_keys):
+            members = band.get(band_key)
+            if isinstance(members, list):
+                candidates.update(members)
+            elif members is not None:
+                candidates.add(members)
+        for other in candidates:
+            other_signature, other_cluster = self._seen[other]
+            similarity = float(np.count_nonzero(other_signature == signature)) / self.num_perm
+            if similarity >= best:
+                best, cluster = similarity, other_cluster
+
+        self._seen[key] = (signature, cluster)
+        for band, band_key in zip(self._buckets, band_keys):
+            # Most buckets only ever hold one job; it is stored bare until a second arrives
+            members = band.get(band_key)
+            if members is None:
+                band[band_key] = key
+            elif isinstance(members, list):
+                members.append(key)
+            else:
+                band[band_key] = [members, key]
+        while len(self._seen) > self.max_tracked:
+            self._evict_oldest()
+        return cluster
+
+    def group(self, jobs: List[Dict]) -> "OrderedDict[str, List[int]]":
+        """Job indices keyed by cluster id, in first-seen order; the first index represents the group."""
+        groups: "OrderedDict[str, List[int]]" = OrderedDict()
+        for i, job in enumerate(jobs):
+            groups.setdefault(self.cluster_of(job), []).append(i)
+        self._stats["checked"] += len(jobs)
+        self._stats["collapsed"] += len(jobs) - len(groups)
+        return groups
+
+    def collapse(self, jobs: List[Dict]) -> Tuple[List[Dict], int]:
+        """
+        Keep the first job of each near-duplicate group. Returns (jobs, collapsed count).
+
+        A kept job that duplicates one seen in an earlier result set (another page or
+        search) is returned as a copy with "duplicate_of" set to that job's id.
+        """
+        kept = []
+        for cluster, members in self.group(jobs).items():
+            job = jobs[members[0]]
+            kept.append(job if cluster == self.job_key(job) else {**job, "duplicate_of": cluster})
+        return kept, len(jobs) - len(kept)
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "tracked": len(self._seen),
+            "threshold": self.threshold,
+            "num_perm": self.num_perm,
+            "bands": self.bands,
+            "rows": self.rows,
+        }
+
@@ -0,0 +1,206 @@
+import os
+import re
+import math
+import time
+import asyncio
+import aiosqlite
+from typing import Dict, Iterable, Optional
+from app.cache import open_sqlite
+
+JOB_COLUMNS = [
+    "id", "title", "company", "location", "category", "salary_min", "salary_max",
+    "contract_type", "created", "redirect_url", "description",
+]
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS jobs (
+        rowid INTEGER PRIMARY KEY,
+        id TEXT NOT NULL UNIQUE,
+        title TEXT, company TEXT, location TEXT, category TEXT,
+        salary_min REAL, salary_max REAL, contract_type TEXT, created TEXT,
+        redirect_url TEXT, description TEXT,
+        indexed_at REAL NOT NULL
+    )""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+        title, company, location, category, description,
+        content='jobs', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS jobs_ai AFTER INSERT ON jobs BEGIN
+        INSERT INTO jobs_fts(rowid, title, company, location, category, description)
+        VALUES (new.rowid, new.title, new.company, new.location, new.category, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS jobs_ad AFTER DELETE ON jobs BEGIN
+        INSERT INTO jobs_fts(jobs_fts, rowid, title, company, location, category, description)
+        VALUES ('delete', old.rowid, old.title, old.company, old.location, old.category, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS jobs_au AFTER UPDATE ON jobs BEGIN
+        INSERT INTO jobs_fts(jobs_fts, rowid, title, company, location, category, description)
+        VALUES ('delete', old.rowid, old.title, old.company, old.location, old.category, old.description);
+        INSERT INTO jobs_fts(rowid, title, company, location, category, description)
+        VALUES (new.rowid, new.title, new.company, new.location, new.category, new.description);
+    END""",
+    """CREATE TABLE IF NOT EXISTS query_freshness (
+        key TEXT PRIMARY KEY,
+        refreshed_at REAL NOT NULL,
+        upstream_count INTEGER
+    )""",
+]
+
+# Column weights for bm25(): title matters most, then location and company
+BM25_WEIGHTS = "10.0, 2.0, 3.0, 1.0, 1.0"
+
+TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_phrase(text: str) -> str:
+    """Turn free text into an FTS5 query of quoted terms (implicit AND), safe from query syntax."""
+    return " ".join(f'"{term}"' for term in TERM_RE.findall(text or ""))
+
+
+def freshness_key(country: str, what: str, where: str) -> str:
+    return "|".join(" ".join((v or "").lower().split()) for v in (country, what, where))
+
+
+class JobIndex:
+    """Local SQLite FTS5 index of every job received from Adzuna."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db: Optional[aiosqlite.Connection] = None
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["JobIndex"]:
+        path = os.getenv("JOB_INDEX_DB", "database/job_index.db")
+        return cls(path) if path else None
+
+    async def _connect(self) -> aiosqlite.Connection:
+        async with self._lock:
+            if self._db is None:
+                self._db = await open_sqlite(self.path)
+                self._db.row_factory = aiosqlite.Row
+                for statement in SCHEMA:
+                    await self._db.execute(statement)
+                await self._db.commit()
+        return self._db
+
+    async def close(self):
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+    # ─── Writes ───────────────────────────────────────────────────────────────
+
+    async def upsert_jobs(self, jobs: Iterable[Dict]) -> int:
+        """Insert or update jobs by Adzuna id. Returns how many ids were new to the index."""
+        rows = [job for job in jobs if job.get("id")]
+        if not rows:
+            return 0
+        db = await self._connect()
+
+        ids = [str(job["id"]) for job in rows]
+        placeholders = ",".join("?" * len(ids))
+        async with db.execute(f"SELECT id FROM jobs WHERE id IN ({placeholders})", ids) as cursor:
+            known = {row[0] for row in await cursor.fetchall()}
+
+        now = time.time()
+        await db.executemany(
+            f"""INSERT INTO jobs ({", ".join(JOB_COLUMNS)}, indexed_at)
+                VALUES ({", ".join("?" * (len(JOB_COLUMNS) + 1))})
+                ON CONFLICT(id) DO UPDATE SET
+                {", ".join(f"{c} = excluded.{c}" for c in JOB_COLUMNS[1:])},
+                indexed_at = excluded.indexed_at""",
+            [[str(job["id"])] + [job.get(c) for c in JOB_COLUMNS[1:]] + [now] for job in rows],
+        )
+        await db.commit()
+        return len(set(ids) - known)
+
+    async def mark_refreshed(self, key: str, upstream_count: Optional[int] = None):
+        db = await self._connect()
+        await db.execute(
+            "INSERT OR REPLACE INTO query_freshness (key, refreshed_at, upstream_count) VALUES (?, ?, ?)",
+            (key, time.time(), upstream_count),
+        )
+        await db.commit()
+
+    # ─── Reads ────────────────────────────────────────────────────────────────
+
+    async def refreshed_at(self, key: str) -> Optional[float]:
+        db = await self._connect()
+        async with db.execute("SELECT refreshed_at FROM query_freshness WHERE key = ?", (key,)) as cursor:
+            row = await cursor.fetchone()
+        return row[0] if row else None
+
+    async def search(
+        self,
+        what: str = "",
+        where: str = "",
+        salary_min: Optional[float] = None,
+        salary_max: Optional[float] = None,
+        page: int = 1,
+        results_per_page: int = 10,
+    ) -> Dict:
+        """
+        Keyword + location + salary-range search over the index, ranked by BM25.
+
+        Returns the same shape as AdzunaService.search_jobs.
+        """
+        page = max(page, 1)
+        results_per_page = max(1, min(results_per_page, 50))
+
+        match_parts = []
+        if fts_phrase(what):
+            match_parts.append(f"({fts_phrase(what)})")
+        if fts_phrase(where):
+            # "remote" is rarely in the location field, so let it match anywhere
+            column = "" if where.strip().lower() == "remote" else "location : "
+            match_parts.append(f"{column}({fts_phrase(where)})")
+
+        filters, params = [], []
+        if match_parts:
+            filters.append("jobs_fts MATCH ?")
+            params.append(" AND ".join(match_parts))
+        if salary_min is not None:
+            filters.append("COALESCE(j.salary_max, j.salary_min) >= ?")
+            params.append(salary_min)
+        if salary_max is not None:
+            filters.append("COALESCE(j.salary_min, j.salary_max) <= ?")
+            params.append(salary_max)
+
+        source = "jobs_fts JOIN jobs j ON j.rowid = jobs_fts.rowid" if match_parts else "jobs j"
+        where_sql = f"WHERE {' AND '.join(filters)}" if filters else ""
+        order_sql = f"bm25(jobs_fts, {BM25_WEIGHTS}), j.created DESC" if match_parts else "j.created DESC"
+
+        db = await self._connect()
+        async with db.execute(f"SELECT COUNT(*) FROM {source} {where_sql}", params) as cursor:
+            count = (await cursor.fetchone())[0]
+        async with db.execute(
+            f"SELECT {', '.join('j.' + c for c in JOB_COLUMNS)} FROM {source} {where_sql} "
+            f"ORDER BY {order_sql} LIMIT ? OFFSET ?",
+            params + [results_per_page, (page - 1) * results_per_page],
+        ) as cursor:
+            jobs = [dict(row) for row in await cursor.fetchall()]
+
+        return {
+            "jobs": jobs,
+            "count": count,
+            "page": page,
+            "results_per_page": results_per_page,
+            "total_pages": math.ceil(count / results_per_page),
+        }
+
+    async def get_job(self, job_id: str) -> Optional[Dict]:
+        db = await self._connect()
+        async with db.execute(
+            f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE id = ?", (str(job_id),)
+        ) as cursor:
+            row = await cursor.fetchone()
+        return dict(row) if row else None
+
+    async def stats(self) -> Dict:
+        db = await self._connect()
+        async with db.execute("SELECT COUNT(*) FROM jobs") as cursor:
+            jobs = (await cursor.fetchone())[0]
+        async with db.execute("SELECT COUNT(*) FROM query_freshness") as cursor:
+            queries = (await cursor.fetchone())[0]
+        return {"jobs": jobs, "tracked_queries": queries}
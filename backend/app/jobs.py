@@ -0,0 +1,74 @@
+from typing import Dict, Iterable, List, Optional
+
+# Fields of a job as returned by the API, in response order
+JOB_FIELDS = (
+    "id", "title", "company", "location", "description", "salary_min", "salary_max",
+    "contract_type", "created", "redirect_url", "category",
+)
+
+
+def truncate_description(text: str, limit: int) -> str:
+    """Cut at a word boundary and mark the cut; short descriptions are returned unchanged."""
+    text = (text or "").strip()
+    if limit <= 0 or len(text) <= limit:
+        return text
+    cut = text[:limit].rsplit(" ", 1)[0] if " " in text[:limit] else text[:limit]
+    return cut.rstrip(" ,.;:") + "…"
+
+
+class Job:
+    """One Adzuna posting, built once from the upstream JSON and kept with its full description."""
+
+    __slots__ = JOB_FIELDS
+
+    def __init__(self, **fields):
+        for name in JOB_FIELDS:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def from_adzuna(cls, raw: Dict) -> "Job":
+        return cls(
+            id=raw.get("id"),
+            title=raw.get("title"),
+            company=(raw.get("company") or {}).get("display_name", "Unknown"),
+            location=(raw.get("location") or {}).get("display_name", "Unknown"),
+            description=raw.get("description") or "",
+            salary_min=raw.get("salary_min"),
+            salary_max=raw.get("salary_max"),
+            contract_type=raw.get("contract_type"),
+            created=raw.get("created"),
+            redirect_url=raw.get("redirect_url"),
+            category=(raw.get("category") or {}).get("label", "Unknown"),
+        )
+
+    def to_dict(self, description_chars: Optional[int] = None) -> Dict:
+        """API shape; description_chars truncates the description for result lists."""
+        job = {name: getattr(self, name) for name in JOB_FIELDS}
+        if description_chars is not None:
+            job["description"] = truncate_description(self.description, description_chars)
+        return job
+
+
+def parse_fields(spec: Optional[str]) -> Optional[List[str]]:
+    """
+    Validate a fields= projection ("title,company,salary_min").
+
+    Returns None for no projection. "id" is always included so clients can fetch
+    the full job later.
+
+    Raises:
+        ValueError: naming the unknown fields
+    """
+    if not spec:
+        return None
+    fields = [f.strip() for f in spec.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in JOB_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} (available: {', '.join(JOB_FIELDS)})")
+    return ["id"] + [f for f in fields if f != "id"]
+
+
+def project(jobs: Iterable[Dict], fields: Optional[List[str]]) -> List[Dict]:
+    if fields is None:
+        return list(jobs)
+    return [{f: job.get(f) for f in fields} for job in jobs]
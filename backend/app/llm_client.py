@@ -0,0 +1,353 @@
+import os
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+from dotenv import load_dotenv
+from app.llm_providers import GroqProvider, LLMProvider, providers_from_env
+from app.scheduler import ADVISOR, BACKGROUND, INTERACTIVE, UpstreamBusyError, UpstreamScheduler, parse_priority
+
+load_dotenv()
+
+
+class LLMTimeoutError(Exception):
+    """Raised when an LLM call does not finish before its deadline."""
+
+
+# Hedges allowed per this many recent calls is LLM_HEDGE_MAX_RATE x HEDGE_WINDOW
+HEDGE_WINDOW = 200
+
+
+# Chat replies outrank Career Advisor work when quota is short
+ENDPOINT_PRIORITIES = {
+    "parse_job_search_query": INTERACTIVE,
+    "format_job_results": INTERACTIVE,
+    "analyze_resume": ADVISOR,
+    "suggest_job_titles": ADVISOR,
+    "batch_analyze_resume": BACKGROUND,
+    "cover_letter": ADVISOR,
+}
+
+
+def parse_endpoint_settings(spec: str, cast=int) -> Dict:
+    """
+    Parse "endpoint=value,endpoint=value" env strings into a dict.
+
+    Example: "analyze_resume=2,suggest_job_titles=2" -> {"analyze_resume": 2, "suggest_job_titles": 2}
+    """
+    settings = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        name, value = item.split("=", 1)
+        try:
+            settings[name.strip()] = cast(value.strip())
+        except ValueError:
+            print(f"WARNING: ignoring invalid LLM setting '{item.strip()}'")
+    return settings
+
+
+class LLMClient:
+    """
+    Non-blocking chat-completion client shared by every ClaudeService method.
+
+    Calls go to the primary LLM provider (see app.llm_providers) so the event loop
+    stays free during the round trip. Each call holds a slot in its provider's
+    semaphore and, if one is configured, a per-endpoint semaphore, and the whole
+    call (queueing included) must finish inside its deadline. With a scheduler,
+    calls also wait for the provider's quota at their endpoint's priority, and
+    429s are retried.
+
+    With a second provider and a hedge rate, a completion the primary has not
+    answered by its rolling p95 latency for that endpoint is also sent to the
+    secondary, and whichever answers first wins. At most hedge_rate of recent
+    calls are hedged, so a slow primary cannot double the load on both.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        model: str = "",
+        max_concurrency: int = 8,
+        endpoint_limits: Optional[Dict[str, int]] = None,
+        timeout: float = 30.0,
+        endpoint_timeouts: Optional[Dict[str, float]] = None,
+        scheduler: Optional[UpstreamScheduler] = None,
+        endpoint_priorities: Optional[Dict[str, int]] = None,
+        providers: Optional[List[LLMProvider]] = None,
+        hedge_rate: float = 0.0,
+        hedge_min_samples: int = 20,
+    ):
+        # A bare client means a single OpenAI-compatible (Groq) provider
+        self.providers = providers or [
+            GroqProvider(client, model, timeout=timeout, max_concurrency=max_concurrency, scheduler=scheduler)
+        ]
+        self.primary = self.providers[0]
+        self.secondary = self.providers[1] if len(self.providers) > 1 else None
+        self.endpoint_priorities = {**ENDPOINT_PRIORITIES, **(endpoint_priorities or {})}
+        self.endpoint_timeouts = endpoint_timeouts or {}
+        self.endpoint_limits = endpoint_limits or {}
+        self._endpoint_limits = {
+            name: asyncio.Semaphore(limit) for name, limit in self.endpoint_limits.items()
+        }
+        self.hedge_rate = hedge_rate
+        self.hedge_min_samples = hedge_min_samples
+        self._hedged = deque(maxlen=HEDGE_WINDOW)
+        self._hedge_stats = {"hedged": 0, "hedge_wins": 0, "capped": 0}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def from_env(cls) -> "LLMClient":
+        return cls(
+            providers=providers_from_env(),
+            endpoint_limits=parse_endpoint_settings(os.getenv("LLM_ENDPOINT_CONCURRENCY", "")),
+            endpoint_timeouts=parse_endpoint_settings(os.getenv("LLM_ENDPOINT_TIMEOUTS", ""), cast=float),
+            endpoint_priorities=parse_endpoint_settings(os.getenv("LLM_ENDPOINT_PRIORITY", ""), cast=parse_priority),
+            hedge_rate=float(os.getenv("LLM_HEDGE_MAX_RATE", "0.05")),
+            hedge_min_samples=int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20")),
+        )
+
+    @property
+    def model(self) -> str:
+        return self.primary.model
+
+    @property
+    def scheduler(self) -> Optional[UpstreamScheduler]:
+        return self.primary.scheduler
+
+    def _endpoint_stats(self, endpoint: str) -> Dict[str, int]:
+        if endpoint not in self._stats:
+            self._stats[endpoint] = {"calls": 0, "in_flight": 0, "waiting": 0, "timeouts": 0, "cancelled": 0, "errors": 0}
+        return self._stats[endpoint]
+
+    async def _admit(self, provider: LLMProvider, endpoint: str, expires_at: float, call):
+        """
+        Run call() once the provider's scheduler admits it, at the endpoint's priority.
+
+        429s are retried by the scheduler within the call's deadline; if the deadline
+        runs out first, the UpstreamBusyError surfaces as a timeout.
+        """
+        if provider.scheduler is None:
+            return await call()
+        priority = self.endpoint_priorities.get(endpoint, INTERACTIVE)
+        try:
+            return await provider.scheduler.run(call, priority, deadline=expires_at)
+        except UpstreamBusyError:
+            raise TimeoutError from None
+
+    def _deadline(self, endpoint: str, timeout: Optional[float]) -> float:
+        return timeout or self.endpoint_timeouts.get(endpoint, self.primary.timeout)
+
+    @asynccontextmanager
+    async def _slot(self, endpoint: str, provider: LLMProvider, expires_at: float, hedge: bool = False):
+        """
+        Hold the per-endpoint and provider concurrency slots for one call.
+
+        Time spent queueing for a slot counts against the call's deadline. A hedge is
+        the same call sent twice, so it takes only a slot at its own provider.
+        """
+        stats = self._endpoint_stats(endpoint)
+        endpoint_limit = None if hedge else self._endpoint_limits.get(endpoint)
+        acquired = []
+
+        if not hedge:
+            stats["calls"] += 1
+            stats["waiting"] += 1
+        try:
+            async with asyncio.timeout_at(expires_at):
+                if endpoint_limit:
+                    await endpoint_limit.acquire()
+                    acquired.append(endpoint_limit)
+                await provider.limit.acquire()
+                acquired.append(provider.limit)
+        except BaseException:
+            for semaphore in acquired:
+                semaphore.release()
+            raise
+        finally:
+            if not hedge:
+                stats["waiting"] -= 1
+
+        if not hedge:
+            stats["in_flight"] += 1
+        try:
+            yield stats
+        finally:
+            if not hedge:
+                stats["in_flight"] -= 1
+            for semaphore in acquired:
+                semaphore.release()
+
+    def _record_failure(self, endpoint: str, error: BaseException, deadline: float):
+        stats = self._endpoint_stats(endpoint)
+        if isinstance(error, TimeoutError):
+            stats["timeouts"] += 1
+            raise LLMTimeoutError(f"LLM call '{endpoint}' exceeded its {deadline:g}s deadline") from None
+        if isinstance(error, asyncio.CancelledError):
+            stats["cancelled"] += 1
+        else:
+            stats["errors"] += 1
+        raise error
+
+    async def _attempt(
+        self,
+        provider: LLMProvider,
+        endpoint: str,
+        expires_at: float,
+        messages: List[Dict],
+        max_tokens: int,
+        schema: Optional[Dict] = None,
+        hedge: bool = False,
+    ) -> str:
+        """One completion at one provider. A hedge is also bounded by its provider's own timeout."""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        if hedge:
+            expires_at = min(expires_at, started + provider.timeout)
+
+        async def attempt():
+            # Quota is granted before a concurrency slot is taken, so a low-priority call
+            # waiting on quota never holds a slot an interactive call could use
+            async with self._slot(endpoint, provider, expires_at, hedge=hedge):
+                async with asyncio.timeout_at(expires_at):
+                    return await provider.complete(messages, max_tokens, schema)
+
+        text = await self._admit(provider, endpoint, expires_at, attempt)
+        provider.record_latency(endpoint, loop.time() - started)
+        return text
+
+    # ─── Hedging ──────────────────────────────────────────────────────────────
+
+    def _hedge_delay(self, endpoint: str) -> Optional[float]:
+        """How long to give the primary before hedging, or None to never hedge this call."""
+        if self.secondary is None or self.hedge_rate <= 0:
+            return None
+        return self.primary.p95(endpoint, self.hedge_min_samples)
+
+    def _may_hedge(self) -> bool:
+        if sum(self._hedged) < self.hedge_rate * HEDGE_WINDOW:
+            return True
+        self._hedge_stats["capped"] += 1
+        return False
+
+    async def _hedged_complete(
+        self, endpoint: str, expires_at: float, messages: List[Dict], max_tokens: int, schema: Optional[Dict]
+    ) -> str:
+        primary = asyncio.ensure_future(self._attempt(self.primary, endpoint, expires_at, messages, max_tokens, schema))
+        tasks = [primary]
+        try:
+            delay = self._hedge_delay(endpoint)
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self._may_hedge():
+                    tasks.append(asyncio.ensure_future(
+                        self._attempt(self.secondary, endpoint, expires_at, messages, max_tokens, schema, hedge=True)
+                    ))
+                    self._hedge_stats["hedged"] += 1
+                self._hedged.append(len(tasks) > 1)
+
+            # First successful answer wins; if one attempt fails, wait for the other
+            errors = {}
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=tasks.index):
+                    if task.exception() is None:
+                        if task is not primary:
+                            self._hedge_stats["hedge_wins"] += 1
+                        return task.result()
+                    errors[task] = task.exception()
+            raise errors.get(primary) or next(iter(errors.values()))
+        finally:
+            # Wait for the loser to unwind so its slots are free before the caller moves on
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ─── Calls ────────────────────────────────────────────────────────────────
+
+    async def complete(
+        self,
+        endpoint: str,
+        messages: List[Dict],
+        max_tokens: int,
+        timeout: Optional[float] = None,
+        schema: Optional[Dict] = None,
+    ) -> str:
+        """
+        Run one chat completion and return the stripped message content.
+
+        Args:
+            endpoint: name of the calling ClaudeService method, used for limits and stats
+            messages: chat messages in OpenAI format
+            max_tokens: completion token cap
+            timeout: deadline in seconds, defaults to the endpoint or primary provider setting
+            schema: JSON schema the reply must follow; providers use JSON mode or tool
+                schemas for it where their API has them
+
+        Raises:
+            LLMTimeoutError: if the deadline passes while queued or in flight
+        """
+        deadline = self._deadline(endpoint, timeout)
+        expires_at = asyncio.get_running_loop().time() + deadline
+        try:
+            return await self._hedged_complete(endpoint, expires_at, messages, max_tokens, schema)
+        except BaseException as e:
+            self._record_failure(endpoint, e, deadline)
+
+    async def stream(
+        self,
+        endpoint: str,
+        messages: List[Dict],
+        max_tokens: int,
+        timeout: Optional[float] = None,
+        schema: Optional[Dict] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a chat completion from the primary provider, yielding text deltas as
+        the model produces them. Streams are not hedged.
+
+        The concurrency slot is held until the stream finishes or the consumer closes
+        the generator. The deadline covers the whole stream; it is enforced around each
+        upstream read so it never fires while the consumer is busy between chunks.
+        """
+        provider = self.primary
+        deadline = self._deadline(endpoint, timeout)
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + deadline
+        try:
+            async with self._slot(endpoint, provider, expires_at):
+                async with asyncio.timeout_at(expires_at):
+                    chunks = await self._admit(
+                        provider, endpoint, expires_at, lambda: provider.open_stream(messages, max_tokens, schema)
+                    )
+                try:
+                    while True:
+                        try:
+                            async with asyncio.timeout_at(expires_at):
+                                delta = await chunks.__anext__()
+                        except StopAsyncIteration:
+                            break
+                        yield delta
+                finally:
+                    await chunks.aclose()
+        except GeneratorExit:
+            raise
+        except BaseException as e:
+            self._record_failure(endpoint, e, deadline)
+
+    def stats(self) -> Dict:
+        return {
+            "model": self.model,
+            "max_concurrency": self.primary.max_concurrency,
+            "endpoint_limits": dict(self.endpoint_limits),
+            "endpoints": {name: dict(values) for name, values in self._stats.items()},
+            "scheduler": self.scheduler.stats() if self.scheduler else None,
+            "providers": [provider.stats() for provider in self.providers],
+            "hedging": {
+                "enabled": self.secondary is not None and self.hedge_rate > 0,
+                "max_rate": self.hedge_rate,
+                "recent_rate": round(sum(self._hedged) / len(self._hedged), 4) if self._hedged else None,
+                **self._hedge_stats,
+            },
+        }
@@ -0,0 +1,349 @@
+import os
+import re
+import json
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+from groq import AsyncGroq, RateLimitError
+from app.metrics import UPSTREAM_IN_FLIGHT, UPSTREAM_RESPONSES
+from app.query_parser import fast_parse
+from app.scheduler import RateLimited, UpstreamScheduler, parse_retry_after
+
+# Recent successful call latencies kept per endpoint, for the hedging p95
+LATENCY_WINDOW = 200
+
+# Tool Anthropic is made to call for schema-constrained replies
+STRUCTURED_TOOL = "structured_reply"
+
+
+class LLMProvider:
+    """
+    One chat-completion API: its client, model, per-call timeout, concurrency limit and quota.
+
+    Subclasses implement _complete and _open_stream with OpenAI-format messages in and
+    plain text out. Given a JSON schema, they ask for JSON in whatever way the API
+    supports (JSON mode, a forced tool call) and return the JSON text. The base class keeps metrics, maps the API's 429 error to
+    RateLimited for the scheduler, and tracks rolling latency per endpoint.
+    """
+
+    name = "provider"
+    rate_limit_errors: Tuple[type, ...] = ()
+
+    def __init__(
+        self,
+        client,
+        model: str,
+        timeout: float = 30.0,
+        max_concurrency: int = 8,
+        scheduler: Optional[UpstreamScheduler] = None,
+    ):
+        self.client = client
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.limit = asyncio.Semaphore(max_concurrency)
+        self.scheduler = scheduler
+        self._latencies: Dict[str, deque] = {}
+        self._stats = {"calls": 0, "errors": 0}
+
+    async def complete(self, messages: List[Dict], max_tokens: int, schema: Optional[Dict] = None) -> str:
+        return await self._observe(self._complete(messages, max_tokens, schema))
+
+    async def open_stream(
+        self, messages: List[Dict], max_tokens: int, schema: Optional[Dict] = None
+    ) -> AsyncIterator[str]:
+        """Open a streamed completion; the returned generator yields text deltas and closes the response."""
+        return await self._observe(self._open_stream(messages, max_tokens, schema))
+
+    async def _complete(self, messages: List[Dict], max_tokens: int, schema: Optional[Dict] = None) -> str:
+        raise NotImplementedError
+
+    async def _open_stream(
+        self, messages: List[Dict], max_tokens: int, schema: Optional[Dict] = None
+    ) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+    async def _observe(self, call):
+        self._stats["calls"] += 1
+        in_flight = UPSTREAM_IN_FLIGHT.labels(self.name)
+        in_flight.inc()
+        try:
+            result = await call
+        except self.rate_limit_errors as e:
+            self._stats["errors"] += 1
+            UPSTREAM_RESPONSES.labels(self.name, 429).inc()
+            raise RateLimited(parse_retry_after(e.response.headers.get("retry-after"))) from e
+        except Exception as e:
+            self._stats["errors"] += 1
+            UPSTREAM_RESPONSES.labels(self.name, getattr(e, "status_code", None) or "error").inc()
+            raise
+        finally:
+            in_flight.dec()
+        UPSTREAM_RESPONSES.labels(self.name, 200).inc()
+        return result
+
+    # ─── Latency ──────────────────────────────────────────────────────────────
+
+    def record_latency(self, endpoint: str, seconds: float):
+        if endpoint not in self._latencies:
+            self._latencies[endpoint] = deque(maxlen=LATENCY_WINDOW)
+        self._latencies[endpoint].append(seconds)
+
+    def p95(self, endpoint: str, min_samples: int = 20) -> Optional[float]:
+        """Rolling p95 latency in seconds, or None until there are min_samples calls."""
+        samples = self._latencies.get(endpoint)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def stats(self) -> Dict:
+        return {
+            "name": self.name,
+            "model": self.model,
+            "timeout_seconds": self.timeout,
+            "max_concurrency": self.max_concurrency,
+            **self._stats,
+            "p95_ms": {
+                endpoint: round(p95 * 1000, 1)
+                for endpoint in self._latencies
+                if (p95 := self.p95(endpoint, min_samples=1)) is not None
+            },
+        }
+
+
+class GroqProvider(LLMProvider):
+    """
+    Groq, or any client with the OpenAI chat.completions interface.
+
+    Structured calls use JSON mode, which guarantees a JSON object but not the
+    schema; the prompt describes the structure and the caller validates it.
+    """
+
+    name = "groq"
+    rate_limit_errors = (RateLimitError,)
+
+    @staticmethod
+    def _format(schema: Optional[Dict]) -> Dict:
+        return {"response_format": {"type": "json_object"}} if schema else {}
+
+    async def _complete(self, messages: List[Dict], max_tokens: int, schema: Optional[Dict] = None) -> str:
+        response = await self.client.chat.completions.create(
+            model=self.model, max_tokens=max_tokens, messages=messages, **self._format(schema)
+        )
+        return response.choices[0].message.content.strip()
+
+    async def _open_stream(
+        self, messages: List[Dict], max_tokens: int, schema: Optional[Dict] = None
+    ) -> AsyncIterator[str]:
+        response = await self.client.chat.completions.create(
+            model=self.model, max_tokens=max_tokens, messages=messages, stream=True, **self._format(schema)
+        )
+
+        async def deltas():
+            try:
+                async for chunk in response:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        yield delta
+            finally:
+                close = getattr(response, "close", None)
+                if close is not None:
+                    await close()
+
+        return deltas()
+
+
+class AnthropicProvider(LLMProvider):
+    """
+    Anthropic's Messages API. System messages move to the separate system parameter.
+
+    Structured calls force a tool whose input schema is the requested schema, and
+    return the tool input as JSON text.
+    """
+
+    name = "anthropic"
+
+    def __init__(self, client, model: str, **kwargs):
+        import anthropic
+
+        super().__init__(client, model, **kwargs)
+        self.rate_limit_errors = (anthropic.RateLimitError,)
+
+    @staticmethod
+    def _split_system(messages: List[Dict]) -> Dict:
+        system = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+        params = {"messages": [m for m in messages if m["role"] != "system"]}
+        if system:
+            params["system"] = system
+        return params
+
+    @staticmethod
+    def _tools(schema: Optional[Dict]) -> Dict:
+        if not schema:
+            return {}
+        tool = {"name": STRUCTURED_TOOL, "description": "Reply with the requested structure.", "input_schema": schema}
+        return {"tools": [tool], "tool_choice": {"type": "tool", "name": STRUCTURED_TOOL}}
+
+    async def _complete(self, messages: List[Dict], max_tokens: int, schema: Optional[Dict] = None) -> str:
+        response = await self.client.messages.create(
+            model=self.model, max_tokens=max_tokens, **self._split_system(messages), **self._tools(schema)
+        )
+        for block in response.content:
+            if block.type == "tool_use":
+                return json.dumps(block.input)
+        return "".join(block.text for block in response.content if block.type == "text").strip()
+
+    async def _open_stream(
+        self, messages: List[Dict], max_tokens: int, schema: Optional[Dict] = None
+    ) -> AsyncIterator[str]:
+        response = await self.client.messages.create(
+            model=self.model, max_tokens=max_tokens, stream=True, **self._split_system(messages), **self._tools(schema)
+        )
+
+        async def deltas():
+            try:
+                async for event in response:
+                    if event.type != "content_block_delta":
+                        continue
+                    if event.delta.type == "text_delta":
+                        yield event.delta.text
+                    elif event.delta.type == "input_json_delta":
+                        yield event.delta.partial_json
+            finally:
+                await response.close()
+
+        return deltas()
+
+
+# ─── Stub ─────────────────────────────────────────────────────────────────────
+
+USER_MESSAGE = re.compile(r'User message: "(.*)"')
+
+
+def stub_completion(prompt: str) -> str:
+    """A plausible, deterministic answer for each ClaudeService prompt, recognised by its wording."""
+    if "extract job search parameters" in prompt:
+        match = USER_MESSAGE.search(prompt)
+        # A real model is more forgiving than the local parser; take its best guess regardless of confidence
+        parsed, _ = fast_parse(match.group(1) if match else "")
+        return json.dumps(parsed)
+    if "Analyze the following resume" in prompt:
+        return json.dumps({
+            "profile": {
+                "summary": "Experienced engineer with a background in backend services and data pipelines.",
+                "experience_level": "senior",
+                "key_skills": ["Python", "AWS", "PostgreSQL", "Kafka"],
+                "possible_directions": ["Backend Engineer", "Data Engineer", "Engineering Manager"],
+            },
+            "questions": [
+                {"id": "q1", "text": "Do you prefer hands-on or leadership roles?"},
+                {"id": "q2", "text": "Where would you like to work?"},
+                {"id": "q3", "text": "Any industries you want to focus on?"},
+            ],
+        })
+    if "suggest the best job titles" in prompt:
+        return json.dumps({
+            "intro": "Based on your background, here are some directions worth searching.",
+            "searches": [
+                {"title": "Senior Backend Engineer", "rationale": "Matches your core experience."},
+                {"title": "Data Engineer", "rationale": "Builds on your pipeline work."},
+                {"title": "Engineering Manager", "rationale": "Fits your leadership answers."},
+            ],
+        })
+    if "writing cover letters" in prompt:
+        return ("Dear Hiring Manager,\n\nI am writing to apply for this role. My background in backend services "
+                "and data pipelines matches what your team is looking for.\n\nI would welcome the chance to talk "
+                "about how I can contribute.\n\nSincerely,\nThe Candidate")
+    return ("I found a solid set of openings for you, with a good spread of companies and salaries. "
+            "Have a look through the top results below, and good luck with your search!")
+
+
+class StubProvider(LLMProvider):
+    """Local deterministic answers (stub_completion), for tests and offline use. No network, no quota."""
+
+    name = "stub"
+
+    def __init__(self, model: str = "stub", latency: float = 0.0, **kwargs):
+        super().__init__(None, model, **kwargs)
+        self.latency = latency
+
+    async def _complete(self, messages: List[Dict], max_tokens: int, schema: Optional[Dict] = None) -> str:
+        await asyncio.sleep(self.latency)
+        return stub_completion(messages[-1]["content"])
+
+    async def _open_stream(
+        self, messages: List[Dict], max_tokens: int, schema: Optional[Dict] = None
+    ) -> AsyncIterator[str]:
+        await asyncio.sleep(self.latency)
+        words = stub_completion(messages[-1]["content"]).split(" ")
+
+        async def deltas():
+            for i, word in enumerate(words):
+                yield word if i == len(words) - 1 else word + " "
+
+        return deltas()
+
+
+# ─── Registry ─────────────────────────────────────────────────────────────────
+
+def groq_provider() -> GroqProvider:
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        print("WARNING: GROQ_API_KEY not found in environment variables")
+    return GroqProvider(
+        # Retries on 429 are left to the scheduler so they respect priorities and deadlines
+        AsyncGroq(api_key=api_key, max_retries=0),
+        model=os.getenv("LLM_MODEL", "llama-3.1-8b-instant"),
+        timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", "30")),
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+        # Groq's free tier allows 30 requests a minute
+        scheduler=UpstreamScheduler.from_env("groq", "LLM", rate=0.5, burst=10),
+    )
+
+
+def anthropic_provider() -> AnthropicProvider:
+    from anthropic import AsyncAnthropic
+
+    api_key = os.getenv("ANTHROPIC_API_KEY")
+    if not api_key:
+        print("WARNING: ANTHROPIC_API_KEY not found in environment variables")
+    return AnthropicProvider(
+        AsyncAnthropic(api_key=api_key, max_retries=0),
+        model=os.getenv("ANTHROPIC_MODEL", "claude-3-5-haiku-latest"),
+        timeout=float(os.getenv("ANTHROPIC_TIMEOUT_SECONDS", "30")),
+        max_concurrency=int(os.getenv("ANTHROPIC_MAX_CONCURRENCY", "8")),
+        # Anthropic's first usage tier allows 50 requests a minute
+        scheduler=UpstreamScheduler.from_env("anthropic", "ANTHROPIC", rate=0.8, burst=5),
+    )
+
+
+def stub_provider() -> StubProvider:
+    return StubProvider(
+        latency=float(os.getenv("STUB_LATENCY_MS", "0")) / 1000,
+        max_concurrency=int(os.getenv("STUB_MAX_CONCURRENCY", "64")),
+    )
+
+
+PROVIDERS: Dict[str, Callable[[], LLMProvider]] = {
+    "groq": groq_provider,
+    "anthropic": anthropic_provider,
+    "stub": stub_provider,
+}
+
+
+def providers_from_env() -> List[LLMProvider]:
+    """
+    Build LLM_PROVIDERS ("groq", "groq,anthropic", "stub", ...) in order: the first is
+    the primary, the second is used for hedged requests.
+    """
+    providers = []
+    for name in os.getenv("LLM_PROVIDERS", "groq").split(","):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in PROVIDERS:
+            print(f"WARNING: unknown LLM provider '{name}' (available: {', '.join(PROVIDERS)})")
+            continue
+        providers.append(PROVIDERS[name]())
+    return providers or [groq_provider()]
@@ -1,11 +1,42 @@
-from fastapi import FastAPI, HTTPException
+import os
+import json
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.requests import ClientDisconnect
 from pydantic import BaseModel
 from typing import Optional, List
 from app.adzuna_service import adzuna_service
 from app.claude_service import claude_service
+from app.multi_search import multi_search_service
+from app.ranking import job_ranker
+from app.batch import batch_service
+from app.cover_letters import cover_letter_service
+from app.resume_ingest import ResumeRejected, resume_ingest_service
+from app.sessions import ChatSession, session_store
+from app.pagination import InvalidCursor, decode_cursor, page_cursors, page_prefetcher
+from app.jobs import parse_fields, project
+from app.saved_searches import saved_search_poller
+from app.market_stats import market_stats_service
+from app.workers import worker_info
+from app.responses import CompressionMiddleware, FastJSONResponse
+from app import metrics
 
-app = FastAPI(title="Job Search AI API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled Adzuna client for the whole process, closed on shutdown
+    await adzuna_service.startup()
+    saved_search_poller.start()
+    yield
+    await saved_search_poller.shutdown()
+    await batch_service.shutdown()
+    resume_ingest_service.shutdown()
+    page_prefetcher.shutdown()
+    await adzuna_service.shutdown()
+
+app = FastAPI(title="Job Search AI API", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Configure CORS
 app.add_middleware(
@@ -14,23 +45,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
+)
+# gzip/brotli for complete responses; streams (SSE, NDJSON) pass through uncompressed
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_BYTES", "1000")),
+    gzip_level=int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),
+    brotli_quality=int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4")),
 )
+# Outermost, so request latency and Server-Timing cover everything below it
+app.add_middleware(metrics.MetricsMiddleware)
 
 # ─── Models ──────────────────────────────────────────────────────────────────
 
 class ChatMessage(BaseModel):
     message: str
+    session_id: Optional[str] = None
 
 class ChatResponse(BaseModel):
     response: str
     jobs: Optional[list] = []
     job_count: Optional[int] = 0
+    session_id: Optional[str] = None
 
 class JobSearchQuery(BaseModel):
     what: Optional[str] = ""
     where: Optional[str] = ""
     page: Optional[int] = 1
     results_per_page: Optional[int] = 10
+    no_cache: Optional[bool] = False
+    mode: Optional[str] = "live"
+    salary_min: Optional[float] = None
+    salary_max: Optional[float] = None
+    cursor: Optional[str] = None
+    fields: Optional[str] = None
+
+class SavedSearchRequest(BaseModel):
+    what: str
+    where: Optional[str] = ""
+    interval_minutes: Optional[float] = None
 
 class ResumeAnalysisRequest(BaseModel):
     resume_text: str
@@ -44,6 +98,81 @@ class JobSuggestionsRequest(BaseModel):
     profile: dict
     answers: List[AdvisorAnswer]
 
+class SuggestedSearch(BaseModel):
+    title: str
+    rationale: Optional[str] = ""
+
+class MultiSearchRequest(BaseModel):
+    searches: List[SuggestedSearch]
+    where: Optional[str] = ""
+    results_per_page: Optional[int] = 10
+    profile: Optional[dict] = None
+
+class JobRankRequest(BaseModel):
+    profile: dict
+    jobs: List[dict]
+
+class BatchResume(BaseModel):
+    id: Optional[str] = None
+    resume_text: str
+
+class BatchAnalysisRequest(BaseModel):
+    resumes: List[BatchResume]
+
+class CoverLetterRequest(BaseModel):
+    resume_text: str
+    jobs: List[dict]
+    profile: Optional[dict] = None
+
+MAX_MULTI_SEARCH_TITLES = 10
+MAX_BATCH_RESUMES = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+# Longer resumes are compacted to the prompt budget anyway; this only stops abuse
+MAX_RESUME_CHARS = int(os.getenv("MAX_RESUME_CHARS", "50000"))
+MAX_RANK_JOBS = 5000
+
+# ─── Helpers ─────────────────────────────────────────────────────────────────
+
+DISCONNECT_POLL_SECONDS = 0.25
+
+async def cancel_on_disconnect(request: Request, coro):
+    """
+    Await coro, cancelling it if the HTTP client goes away first.
+
+    Keeps abandoned requests from holding LLM concurrency slots until their deadline.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
+
+def sse_event(event: str, data) -> str:
+    """Encode one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# ─── Chat Replies ─────────────────────────────────────────────────────────────
+
+NOT_A_SEARCH_REPLY = "I'm your job search assistant! Try asking me something like: 'Find senior cybersecurity jobs in remote' or 'Show me React developer roles in Toronto'."
+
+def parse_error_reply(error: Exception) -> str:
+    return f"Sorry, I had trouble understanding that. Could you rephrase? (Error: {str(error)})"
+
+def search_error_reply(error: str) -> str:
+    return f"I understood your search but ran into an issue fetching results: {error}"
+
+def no_results_reply(what: str, where: str) -> str:
+    return f"I searched for '{what}'{' in ' + where if where else ''} but found no results. Try broader keywords or a different location."
+
+def fallback_summary(count: int, what: str, where: str) -> str:
+    return f"Found {count} jobs for \"{what}\"{' in ' + where if where else ''}. Here are the top results:"
+
 # ─── General Routes ───────────────────────────────────────────────────────────
 
 @app.get("/")
@@ -59,22 +188,102 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/api/stats")
+async def stats():
+    """Runtime counters for the upstream clients, for the worker process that answers."""
+    return {
+        "worker": worker_info(),
+        "llm": claude_service.llm.stats(),
+        "query_parser": claude_service.parser_stats(),
+        "prompts": claude_service.compactor.stats(),
+        "structured_output": claude_service.structured.stats(),
+        "adzuna": adzuna_service.stats(),
+        "search_cache": adzuna_service.cache.stats(),
+        "job_index": await adzuna_service.index.stats() if adzuna_service.index else None,
+        "ranking": job_ranker.stats(),
+        "dedup": adzuna_service.dedup.stats() if adzuna_service.dedup else None,
+        "reference_data": adzuna_service.reference.stats(),
+        "batch": batch_service.stats(),
+        "cover_letters": cover_letter_service.stats(),
+        "resume_ingest": resume_ingest_service.stats(),
+        "chat_sessions": session_store.stats(),
+        "prefetch": page_prefetcher.stats(),
+        "saved_searches": saved_search_poller.stats(),
+        "market_stats": market_stats_service.stats(),
+    }
+
+def cache_stats():
+    prefetch = page_prefetcher.stats()
+    return {
+        "search": adzuna_service.cache.stats()["memory"],
+        "query_parse": claude_service.parser_stats()["memo"],
+        "job_vectors": job_ranker.stats()["vector_cache"],
+        "batch_results": batch_service.stats()["result_cache"],
+        "resume_text": resume_ingest_service.stats()["text_cache"],
+        "resume_profile": resume_ingest_service.stats()["profile_cache"],
+        # Pages taken while still in flight count as hits: the request did not go upstream
+        "page_prefetch": {"hits": prefetch["hits"] + prefetch["in_flight_hits"], "misses": prefetch["misses"]},
+    }
+
+metrics.registry.register_collector(lambda: metrics.cache_metrics(cache_stats()))
+
+def session_metrics():
+    stats = session_store.stats()
+    sessions = metrics.Gauge("jobsfinder_chat_sessions", "Chat sessions held in memory.")
+    held = metrics.Gauge("jobsfinder_chat_session_bytes", "Approximate bytes held by chat sessions.")
+    sessions.labels().set(stats["sessions"])
+    held.labels().set(stats["bytes"])
+    return [sessions, held]
+
+metrics.registry.register_collector(session_metrics)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus text exposition: request/stage latency histograms, upstream status codes, cache hit ratios."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # ─── Job Search Routes ────────────────────────────────────────────────────────
 
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat(message: ChatMessage):
+async def chat(message: ChatMessage, request: Request):
     """
     Handle chat messages using Claude for natural language understanding and response generation.
+
+    Pass back the returned session_id so follow-ups ("how about remote instead?")
+    are resolved against the previous search.
     """
+    return await cancel_on_disconnect(request, run_chat(message.message, message.session_id))
+
+async def run_chat(message: str, session_id: Optional[str] = None) -> ChatResponse:
+    session = session_store.open(session_id)
+    response = await chat_turn(message, session)
+    response.session_id = session.id
+    return response
+
+async def resolve_intent(message: str, session: ChatSession) -> dict:
+    """
+    Intent for a chat message. Follow-ups are resolved locally against the
+    session's last search; anything else goes through the full parse.
+    """
+    intent = session.follow_up(message)
+    if intent is not None:
+        session_store.count("follow_ups")
+        return intent
+
+    parsed = await claude_service.parse_job_search_query(message)
+    if parsed.get("is_job_search") and not parsed.get("what") and session.what:
+        # "any jobs in Ottawa?" names only a place; keep the title from the last search
+        parsed["what"] = session.what
+    return parsed
+
+async def chat_turn(message: str, session: ChatSession) -> ChatResponse:
     try:
-        parsed = await claude_service.parse_job_search_query(message.message)
+        parsed = await resolve_intent(message, session)
     except Exception as e:
-        return ChatResponse(response=f"Sorry, I had trouble understanding that. Could you rephrase? (Error: {str(e)})")
+        return ChatResponse(response=parse_error_reply(e))
 
     if not parsed.get("is_job_search"):
-        return ChatResponse(
-            response="I'm your job search assistant! Try asking me something like: 'Find senior cybersecurity jobs in remote' or 'Show me React developer roles in Toronto'."
-        )
+        return ChatResponse(response=NOT_A_SEARCH_REPLY)
 
     what = parsed.get("what", "")
     where = parsed.get("where", "")
@@ -86,93 +295,515 @@ async def chat(message: ChatMessage):
     )
 
     if "error" in result:
-        return ChatResponse(response=f"I understood your search but ran into an issue fetching results: {result['error']}")
+        return ChatResponse(response=search_error_reply(result["error"]))
 
     jobs = result.get("jobs", [])
     count = result.get("count", 0)
 
     if not jobs:
-        return ChatResponse(
-            response=f"I searched for '{what}'{' in ' + where if where else ''} but found no results. Try broader keywords or a different location."
-        )
+        reply = no_results_reply(what, where)
+        # Remembered anyway, so "how about remote instead?" can widen the search
+        session_store.record(session, message, what, where, jobs, count, reply)
+        return ChatResponse(response=reply)
 
-    try:
-        summary = await claude_service.format_job_results(
-            what=what,
-            where=where,
-            jobs=jobs,
-            total_count=count
-        )
-    except Exception:
-        summary = f"Found {count} jobs for \"{what}\"{' in ' + where if where else ''}. Here are the top results:"
+    if session.same_results(what, where, jobs):
+        # Same search, same jobs (from the result cache): the last summary still applies
+        session_store.count("reused_replies")
+        summary = session.reply
+    else:
+        try:
+            summary = await claude_service.format_job_results(
+                what=what,
+                where=where,
+                jobs=jobs,
+                total_count=count,
+                market=market_stats_service.cached(what, where)
+            )
+        except Exception:
+            summary = fallback_summary(count, what, where)
 
+    session_store.record(session, message, what, where, jobs, count, summary)
     return ChatResponse(response=summary, jobs=jobs, job_count=count)
 
+@app.post("/api/chat/stream")
+async def chat_stream(message: ChatMessage):
+    """
+    Streaming variant of /api/chat over Server-Sent Events.
+
+    Events, in order: "intent" once the message is parsed, "jobs" as soon as Adzuna
+    returns, "token" for each chunk of the summary as the LLM writes it, and a final
+    "done" carrying the full reply and the session_id. Replies that end early skip
+    straight to "done". If the summary stream fails after tokens were sent, "done"
+    also carries "error".
+    """
+    return StreamingResponse(
+        stream_chat(message.message, message.session_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def stream_chat(message: str, session_id: Optional[str] = None):
+    session = session_store.open(session_id)
+    async for event, data in stream_turn(message, session):
+        if event == "done":
+            data["session_id"] = session.id
+        yield sse_event(event, data)
+
+async def stream_turn(message: str, session: ChatSession):
+    try:
+        parsed = await resolve_intent(message, session)
+    except Exception as e:
+        yield "done", {"response": parse_error_reply(e), "job_count": 0}
+        return
+
+    yield "intent", parsed
+
+    if not parsed.get("is_job_search"):
+        yield "done", {"response": NOT_A_SEARCH_REPLY, "job_count": 0}
+        return
+
+    what = parsed.get("what", "")
+    where = parsed.get("where", "")
+
+    result = await adzuna_service.search_jobs(what=what, where=where, results_per_page=10)
+
+    if "error" in result:
+        yield "done", {"response": search_error_reply(result["error"]), "job_count": 0}
+        return
+
+    jobs = result.get("jobs", [])
+    count = result.get("count", 0)
+
+    if not jobs:
+        reply = no_results_reply(what, where)
+        session_store.record(session, message, what, where, jobs, count, reply)
+        yield "done", {"response": reply, "job_count": 0}
+        return
+
+    yield "jobs", {"jobs": jobs, "job_count": count}
+
+    if session.same_results(what, where, jobs):
+        session_store.count("reused_replies")
+        session_store.record(session, message, what, where, jobs, count, session.reply)
+        yield "token", {"text": session.reply}
+        yield "done", {"response": session.reply, "job_count": count}
+        return
+
+    parts = []
+    error = None
+    try:
+        market = market_stats_service.cached(what, where)
+        async for chunk in claude_service.stream_job_results(
+            what=what, where=where, jobs=jobs, total_count=count, market=market
+        ):
+            parts.append(chunk)
+            yield "token", {"text": chunk}
+    except Exception as e:
+        if not parts:
+            parts.append(fallback_summary(count, what, where))
+            yield "token", {"text": parts[0]}
+        else:
+            # Tokens already went out, so tell the client the summary is incomplete
+            error = f"Summary interrupted: {e}"
+
+    done = {"response": "".join(parts).strip(), "job_count": count}
+    if error:
+        done["error"] = error
+    else:
+        session_store.record(session, message, what, where, jobs, count, done["response"])
+    yield "done", done
+
+@app.get("/api/chat/sessions/{session_id}")
+async def get_chat_session(session_id: str):
+    """The state kept for a chat session: last search, result ids, recent turns and its size in bytes."""
+    session = session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    return session.to_dict()
+
+SEARCH_MODES = ("live", "index")
+
+async def run_job_search(
+    what: str,
+    where: str,
+    page: int,
+    results_per_page: int,
+    no_cache: bool,
+    mode: str,
+    salary_min: Optional[float],
+    salary_max: Optional[float],
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+) -> dict:
+    try:
+        projection = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    query = {
+        "what": what,
+        "where": where,
+        "page": page,
+        "results_per_page": results_per_page,
+        "mode": mode,
+        "salary_min": salary_min,
+        "salary_max": salary_max,
+    }
+    if cursor:
+        # A cursor replaces every search parameter it carries
+        try:
+            decoded = decode_cursor(cursor)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query.update({"what": "", "where": "", "mode": "live", "salary_min": None, "salary_max": None})
+        query.update({field: value for field, value in decoded.items() if value is not None})
+
+    if query["mode"] not in SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of: {', '.join(SEARCH_MODES)}")
+    if (query["results_per_page"] or 0) < 1:
+        raise HTTPException(status_code=400, detail="results_per_page must be at least 1")
+
+    if query["mode"] == "index":
+        result = await adzuna_service.search_indexed(
+            what=query["what"],
+            where=query["where"],
+            salary_min=query["salary_min"],
+            salary_max=query["salary_max"],
+            page=query["page"],
+            results_per_page=query["results_per_page"]
+        )
+    else:
+        # Pages ahead are fetched in the background, so "next page" is usually instant
+        result = await page_prefetcher.search(
+            what=query["what"],
+            where=query["where"],
+            page=query["page"],
+            results_per_page=query["results_per_page"],
+            use_cache=not no_cache
+        )
+    if "error" in result:
+        raise HTTPException(status_code=500, detail=result["error"])
+    result.update(page_cursors(query, result.get("total_pages", 0)))
+    result["jobs"] = project(result.get("jobs", []), projection)
+    return result
+
 @app.get("/api/jobs/search")
 async def search_jobs(
     what: str = "",
     where: str = "",
     page: int = 1,
-    results_per_page: int = 10
+    results_per_page: int = 10,
+    no_cache: bool = False,
+    mode: str = "live",
+    salary_min: Optional[float] = None,
+    salary_max: Optional[float] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
 ):
-    result = await adzuna_service.search_jobs(
-        what=what,
-        where=where,
-        page=page,
-        results_per_page=results_per_page
-    )
-    if "error" in result:
-        raise HTTPException(status_code=500, detail=result["error"])
-    return result
+    """
+    Search jobs. mode=live queries Adzuna (through the result cache); mode=index answers
+    from the local full-text index with BM25 ranking and optional salary range filters.
+
+    Responses carry next_cursor/prev_cursor; pass one back as cursor to get that page
+    with the same search parameters. fields=title,company,salary_min limits each job
+    to those fields (plus id); GET /api/jobs/{id} has the full description.
+    """
+    # Already plain JSON types, so skip FastAPI's encoder pass and render directly
+    return FastJSONResponse(await run_job_search(
+        what, where, page, results_per_page, no_cache, mode, salary_min, salary_max, cursor, fields
+    ))
 
 @app.post("/api/jobs/search")
 async def search_jobs_post(query: JobSearchQuery):
-    result = await adzuna_service.search_jobs(
-        what=query.what,
-        where=query.where,
-        page=query.page,
-        results_per_page=query.results_per_page
-    )
-    if "error" in result:
-        raise HTTPException(status_code=500, detail=result["error"])
-    return result
+    return FastJSONResponse(await run_job_search(
+        query.what,
+        query.where,
+        query.page,
+        query.results_per_page,
+        query.no_cache,
+        query.mode,
+        query.salary_min,
+        query.salary_max,
+        query.cursor,
+        query.fields
+    ))
 
 @app.get("/api/jobs/categories")
 async def get_categories():
     categories = await adzuna_service.get_job_categories()
     return {"categories": categories}
 
+@app.get("/api/jobs/stats")
+async def job_market_stats(what: str = "", where: str = "", pages: Optional[int] = None, no_cache: bool = False):
+    """
+    Salary percentiles and histogram, counts by company, category and contract type,
+    and posting age for a query, over up to `pages` result pages of 50 (default and
+    cap: MARKET_STATS_MAX_PAGES). Cached per query; chat summaries use the cached
+    statistics when there are some.
+    """
+    if pages is not None and pages < 1:
+        raise HTTPException(status_code=400, detail="pages must be at least 1")
+    result = await market_stats_service.get(what.strip(), where.strip(), pages=pages, use_cache=not no_cache)
+    if "error" in result:
+        raise HTTPException(status_code=500, detail=result["error"])
+    return FastJSONResponse(result)
+
+# Declared after /api/jobs/search, /categories and /stats so those paths are not read as job ids
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """One job with its full description (search results carry a preview)."""
+    job = await adzuna_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found; it may have expired, search again")
+    return job
+
+# ─── Saved Search Routes ──────────────────────────────────────────────────────
+
+def require_saved_searches():
+    if saved_search_poller.store is None:
+        raise HTTPException(status_code=503, detail="Saved searches are disabled (SAVED_SEARCH_DB is empty)")
+
+@app.post("/api/searches", status_code=201)
+async def create_saved_search(request: SavedSearchRequest):
+    """Save a search; it is polled in the background and new jobs are kept for /new."""
+    require_saved_searches()
+    if not request.what.strip():
+        raise HTTPException(status_code=400, detail="A saved search needs keywords.")
+    interval = request.interval_minutes * 60 if request.interval_minutes else None
+    try:
+        return await saved_search_poller.create(request.what.strip(), (request.where or "").strip(), interval=interval)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/api/searches")
+async def list_saved_searches():
+    require_saved_searches()
+    return {"searches": await saved_search_poller.store.list()}
+
+@app.get("/api/searches/{search_id}/new")
+async def new_saved_search_jobs(search_id: str, mark_checked: bool = True):
+    """Jobs found since the last check, served from storage without calling Adzuna."""
+    require_saved_searches()
+    result = await saved_search_poller.check(search_id, mark_checked=mark_checked)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Saved search not found")
+    return FastJSONResponse(result)
+
+@app.delete("/api/searches/{search_id}")
+async def delete_saved_search(search_id: str):
+    require_saved_searches()
+    if not await saved_search_poller.store.delete(search_id):
+        raise HTTPException(status_code=404, detail="Saved search not found")
+    return {"deleted": search_id}
+
 # ─── Career Advisor Routes ────────────────────────────────────────────────────
 
+def check_resume_text(resume_text: str):
+    if not resume_text or len(resume_text.strip()) < 100:
+        raise HTTPException(status_code=400, detail="Resume text is too short.")
+    if len(resume_text) > MAX_RESUME_CHARS:
+        raise HTTPException(status_code=413, detail=f"Resume text is limited to {MAX_RESUME_CHARS} characters.")
+
 @app.post("/api/advisor/analyze")
-async def analyze_resume(request: ResumeAnalysisRequest):
+async def analyze_resume(request: ResumeAnalysisRequest, http_request: Request):
     """
     Analyze a resume and return a candidate profile + clarifying questions.
     """
-    if not request.resume_text or len(request.resume_text.strip()) < 100:
-        raise HTTPException(status_code=400, detail="Resume text is too short.")
-
+    check_resume_text(request.resume_text)
     try:
-        result = await claude_service.analyze_resume(request.resume_text)
+        result = await cancel_on_disconnect(
+            http_request,
+            claude_service.analyze_resume(request.resume_text)
+        )
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing resume: {str(e)}")
 
+@app.post("/api/advisor/analyze/stream")
+async def analyze_resume_stream(request: ResumeAnalysisRequest):
+    """
+    Streaming variant of /api/advisor/analyze over Server-Sent Events.
+
+    "partial" events carry the analysis parsed so far, so the profile summary can be
+    shown while the questions are still being written; the last string in a partial
+    may be incomplete. "done" carries the validated result, or "error" if there is none.
+    """
+    check_resume_text(request.resume_text)
+
+    async def events():
+        try:
+            async for event, data in claude_service.stream_resume_analysis(request.resume_text):
+                yield sse_event(event, data)
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Error analyzing resume: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/advisor/upload")
+async def upload_resume(http_request: Request, analyze: bool = True):
+    """
+    Analyze a PDF resume sent as multipart/form-data in a "file" field.
+
+    Returns the same profile + questions as /api/advisor/analyze, plus the
+    extracted resume_text for the rest of the advisor flow. Pass analyze=false
+    to only extract the text.
+    """
+    try:
+        # No disconnect polling while the body streams in: is_disconnected() would consume
+        # body chunks, and stream() raises ClientDisconnect by itself
+        upload = await resume_ingest_service.ingest(http_request.headers, http_request.stream(), analyze=False)
+        if not analyze:
+            return upload
+        return await cancel_on_disconnect(http_request, resume_ingest_service.add_analysis(upload))
+    except ClientDisconnect:
+        raise HTTPException(status_code=499, detail="Client closed request")
+    except ResumeRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error analyzing resume: {str(e)}")
+
+@app.post("/api/advisor/batch", status_code=202)
+async def submit_batch_analysis(request: BatchAnalysisRequest):
+    """
+    Queue many resumes for analysis and return a job id right away.
+
+    Progress: GET /api/advisor/batch/{job_id}. Results: GET /api/advisor/batch/{job_id}/results,
+    streamed as NDJSON in completion order.
+    """
+    if not request.resumes:
+        raise HTTPException(status_code=400, detail="At least one resume is required.")
+    if len(request.resumes) > MAX_BATCH_RESUMES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_RESUMES} resumes per batch.")
+    for i, resume in enumerate(request.resumes):
+        if len(resume.resume_text.strip()) < 100:
+            raise HTTPException(status_code=400, detail=f"Resume {resume.id or i} is too short.")
+        if len(resume.resume_text) > MAX_RESUME_CHARS:
+            raise HTTPException(status_code=413, detail=f"Resume {resume.id or i} is over {MAX_RESUME_CHARS} characters.")
+
+    job = batch_service.submit([r.model_dump() for r in request.resumes])
+    return {
+        **job.status(),
+        "status_url": f"/api/advisor/batch/{job.id}",
+        "results_url": f"/api/advisor/batch/{job.id}/results",
+    }
+
+def get_batch_job(job_id: str):
+    job = batch_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found or expired.")
+    return job
+
+@app.get("/api/advisor/batch/{job_id}")
+async def batch_analysis_status(job_id: str):
+    return get_batch_job(job_id).status()
+
+@app.get("/api/advisor/batch/{job_id}/results")
+async def batch_analysis_results(job_id: str):
+    """One JSON object per line, per resume, as each analysis finishes."""
+    job = get_batch_job(job_id)
+
+    async def lines():
+        async for result in batch_service.stream(job):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.post("/api/advisor/cover-letters")
+async def cover_letters(request: CoverLetterRequest, format: str = "sse"):
+    """
+    Write a cover letter for each selected job, all at once, over one streamed response.
+
+    jobs are job objects from search results (their id is used to look up the full
+    description). The resume is condensed once and shared by every letter; pass the
+    profile from /api/advisor/analyze to skip re-analyzing it. format=sse (default)
+    sends Server-Sent Events named after each event; format=ndjson sends one JSON
+    object per line with an "event" key. Chunks of different letters are interleaved
+    and tagged with job_id; see CoverLetterService.generate for the events.
+    """
+    check_resume_text(request.resume_text)
+    if not request.jobs:
+        raise HTTPException(status_code=400, detail="Select at least one job.")
+    if len(request.jobs) > cover_letter_service.max_jobs:
+        raise HTTPException(status_code=400, detail=f"At most {cover_letter_service.max_jobs} cover letters per request.")
+    if format not in ("sse", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'.")
+
+    async def events():
+        try:
+            async for event in cover_letter_service.generate(request.resume_text, request.jobs, request.profile):
+                if format == "ndjson":
+                    yield json.dumps(event) + "\n"
+                else:
+                    yield sse_event(event["event"], {k: v for k, v in event.items() if k != "event"})
+        except Exception as e:
+            detail = f"Error writing cover letters: {str(e)}"
+            yield json.dumps({"event": "error", "detail": detail}) + "\n" if format == "ndjson" else sse_event("error", {"detail": detail})
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson" if format == "ndjson" else "text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/api/advisor/suggest")
-async def suggest_jobs(request: JobSuggestionsRequest):
+async def suggest_jobs(request: JobSuggestionsRequest, http_request: Request):
     """
     Based on resume profile + clarifying answers, suggest job titles to search for.
     """
     try:
         answers = [a.dict() for a in request.answers]
-        result = await claude_service.suggest_job_titles(
-            profile=request.profile,
-            answers=answers
+        result = await cancel_on_disconnect(
+            http_request,
+            claude_service.suggest_job_titles(profile=request.profile, answers=answers)
         )
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error suggesting jobs: {str(e)}")
 
+@app.post("/api/advisor/search")
+async def advisor_search(request: MultiSearchRequest):
+    """
+    Run the suggested job title searches concurrently and return merged,
+    de-duplicated results grouped by category, with per-title timings.
+    """
+    titles = []
+    for search in request.searches:
+        title = search.title.strip()
+        if title and title.lower() not in (t.lower() for t in titles):
+            titles.append(title)
+
+    if not titles:
+        raise HTTPException(status_code=400, detail="At least one search title is required.")
+    if len(titles) > MAX_MULTI_SEARCH_TITLES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_MULTI_SEARCH_TITLES} search titles are allowed.")
+
+    return await multi_search_service.search(
+        titles,
+        where=request.where,
+        results_per_page=request.results_per_page,
+        profile=request.profile
+    )
+
+@app.post("/api/advisor/rank")
+async def rank_jobs(request: JobRankRequest):
+    """
+    Re-order a list of jobs by relevance to a candidate profile from /api/advisor/analyze.
+    Scoring is local (hashed TF-IDF, no network); each job gets a "relevance" score.
+    """
+    if len(request.jobs) > MAX_RANK_JOBS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_RANK_JOBS} jobs can be ranked at once.")
+    return {"jobs": await job_ranker.rank_async(request.jobs, request.profile)}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
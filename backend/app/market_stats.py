@@ -0,0 +1,284 @@
+import os
+import json
+import time
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import numpy as np
+from app.adzuna_service import AdzunaService, adzuna_service
+from app.cache import SingleFlight, TTLCache
+from app.metrics import instrumented
+from app.reference_data import reference_data
+from app.scheduler import ADVISOR
+
+# Adzuna's largest page
+PAGE_SIZE = 50
+SALARY_PERCENTILES = (10, 25, 50, 75, 90)
+SALARY_BINS = 10
+# Histogram edges are multiples of this, in dollars
+SALARY_STEP = 5000
+# Posting age buckets, in days
+AGE_BUCKETS = (("under 1 day", 0, 1), ("1-3 days", 1, 3), ("3-7 days", 3, 7),
+               ("1-2 weeks", 7, 14), ("2-4 weeks", 14, 30), ("over 30 days", 30, np.inf))
+TOP_COUNTS = 10
+# Seconds a result with failed pages is cached, so a later request can fill them in
+PARTIAL_TTL = 60
+
+
+# ─── Columnar Aggregation ─────────────────────────────────────────────────────
+
+def parse_created(values: List[Optional[str]]) -> np.ndarray:
+    """ISO timestamps ("2026-10-01T08:00:00Z") as datetime64[s]; missing or unreadable ones are NaT."""
+    cleaned = [v[:-1] if v and v.endswith("Z") else (v or "NaT") for v in values]
+    try:
+        # NumPy parses naive UTC timestamps in one call; UTC offsets go the slow way
+        if any("+" in v[10:] or "-" in v[10:] for v in cleaned):
+            raise ValueError("timestamps with UTC offsets")
+        return np.array(cleaned, dtype="datetime64[s]")
+    except ValueError:
+        # One odd value (an offset, a typo) should not cost the whole column
+        def one(value: str):
+            try:
+                parsed = datetime.fromisoformat(value)
+            except ValueError:
+                return np.datetime64("NaT")
+            if parsed.tzinfo is not None:
+                parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+            return np.datetime64(parsed, "s")
+
+        return np.array([one(v) for v in cleaned], dtype="datetime64[s]")
+
+
+class JobColumns:
+    """The fields market statistics read, one NumPy array per field."""
+
+    def __init__(self, jobs: List[Dict]):
+        self.size = len(jobs)
+        self.salary_min = np.fromiter((j.get("salary_min") or np.nan for j in jobs), dtype=float, count=self.size)
+        self.salary_max = np.fromiter((j.get("salary_max") or np.nan for j in jobs), dtype=float, count=self.size)
+        self.created = parse_created([j.get("created") for j in jobs])
+        self.company = np.array([j.get("company") or "Unknown" for j in jobs], dtype=str)
+        self.category = np.array([j.get("category") or "Unknown" for j in jobs], dtype=str)
+        self.contract_type = np.array([j.get("contract_type") or "unspecified" for j in jobs], dtype=str)
+
+    def salaries(self) -> np.ndarray:
+        """One salary per job that has one: the midpoint of its range, or whichever end is known."""
+        has_min, has_max = np.isfinite(self.salary_min), np.isfinite(self.salary_max)
+        salary = np.where(
+            has_min & has_max, (self.salary_min + self.salary_max) / 2, np.where(has_min, self.salary_min, self.salary_max)
+        )
+        return salary[np.isfinite(salary)]
+
+    def ages_in_days(self, now: float) -> np.ndarray:
+        known = self.created[~np.isnat(self.created)]
+        ages = (np.datetime64(int(now), "s") - known) / np.timedelta64(1, "D")
+        return np.clip(ages, 0, None)
+
+
+def salary_histogram(salary: np.ndarray, bins: int = SALARY_BINS) -> List[Dict]:
+    """
+    Equal-width bins on round numbers, spanning the 1st to 99th percentile; the
+    first and last bins also hold the outliers beyond them.
+    """
+    low, high = np.percentile(salary, [1, 99])
+    start = np.floor(low / SALARY_STEP) * SALARY_STEP
+    width = max(np.ceil((high - start) / bins / SALARY_STEP) * SALARY_STEP, SALARY_STEP)
+    edges = start + width * np.arange(bins + 1)
+    counts, _ = np.histogram(np.clip(salary, edges[0], edges[-1]), bins=edges)
+    return [
+        {"from": int(edges[i]), "to": int(edges[i + 1]), "count": int(count)}
+        for i, count in enumerate(counts)
+    ]
+
+
+def value_counts(values: np.ndarray, top: int = TOP_COUNTS) -> Dict:
+    if values.size == 0:
+        return {"distinct": 0, "top": []}
+    labels, counts = np.unique(values, return_counts=True)
+    order = np.argsort(-counts, kind="stable")[:top]
+    return {
+        "distinct": int(labels.size),
+        "top": [{"name": str(labels[i]), "count": int(counts[i])} for i in order],
+    }
+
+
+def aggregate(jobs: List[Dict], now: Optional[float] = None) -> Dict:
+    """Salary, company, category, contract type and posting age statistics for a list of jobs."""
+    columns = JobColumns(jobs)
+    salary = columns.salaries()
+    ages = columns.ages_in_days(time.time() if now is None else now)
+
+    salary_stats = {"count": int(salary.size)}
+    if salary.size:
+        salary_stats.update({
+            "min": round(float(salary.min())),
+            "max": round(float(salary.max())),
+            "mean": round(float(salary.mean())),
+            "percentiles": {
+                f"p{p}": round(float(v)) for p, v in zip(SALARY_PERCENTILES, np.percentile(salary, SALARY_PERCENTILES))
+            },
+            "histogram": salary_histogram(salary),
+        })
+
+    age_stats = {"count": int(ages.size)}
+    if ages.size:
+        counts, _ = np.histogram(ages, bins=[low for _, low, _ in AGE_BUCKETS] + [np.inf])
+        age_stats.update({
+            "median": round(float(np.median(ages)), 1),
+            "p90": round(float(np.percentile(ages, 90)), 1),
+            "buckets": [{"label": label, "count": int(c)} for (label, _, _), c in zip(AGE_BUCKETS, counts)],
+        })
+
+    return {
+        "sample_size": columns.size,
+        "salary": salary_stats,
+        "companies": value_counts(columns.company),
+        "categories": value_counts(columns.category),
+        "contract_types": value_counts(columns.contract_type),
+        "posting_age_days": age_stats,
+    }
+
+
+def prompt_facts(stats: Dict) -> Dict:
+    """The few numbers an LLM summary needs from a market stats result, kept small for the prompt."""
+    facts = {
+        "postings_analyzed": stats["sample_size"],
+        "total_postings": stats["total_count"],
+        "postings_with_salary": stats["salary"]["count"],
+    }
+    if stats["salary"]["count"]:
+        percentiles = stats["salary"]["percentiles"]
+        facts["median_salary"] = percentiles["p50"]
+        facts["middle_half_salary_range"] = [percentiles["p25"], percentiles["p75"]]
+    facts["top_companies"] = [c["name"] for c in stats["companies"]["top"][:5]]
+    facts["top_categories"] = [c["name"] for c in stats["categories"]["top"][:3]]
+    facts["contract_types"] = {c["name"]: c["count"] for c in stats["contract_types"]["top"]}
+    buckets = stats["posting_age_days"].get("buckets", [])
+    facts["posted_in_last_week"] = sum(b["count"] for b in buckets[:3])
+    return facts
+
+
+# ─── Service ──────────────────────────────────────────────────────────────────
+
+class MarketStatsService:
+    """
+    Salary and market statistics for a what/where query, over many result pages.
+
+    Walks up to max_pages pages of 50 through AdzunaService.search_jobs, so pages
+    share the search cache, dedup and the Adzuna quota (at advisor priority); at
+    most `concurrency` pages are in flight at once. Results are cached per query
+    for `ttl` seconds, and concurrent requests for one query share the walk. A
+    failed page leaves the others standing (and the result is cached only briefly);
+    only a failed first page is an error.
+    """
+
+    def __init__(
+        self,
+        adzuna: AdzunaService,
+        max_pages: int = 10,
+        concurrency: int = 3,
+        ttl: float = 1800.0,
+        max_entries: int = 256,
+    ):
+        self.adzuna = adzuna
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.cache = TTLCache(max_entries=max_entries, ttl=ttl)
+        self._walks = SingleFlight()
+        self._stats = {"computed": 0, "pages_fetched": 0, "pages_failed": 0, "last_aggregate_ms": None}
+
+    @classmethod
+    def from_env(cls, adzuna: AdzunaService) -> "MarketStatsService":
+        return cls(
+            adzuna,
+            max_pages=int(os.getenv("MARKET_STATS_MAX_PAGES", "10")),
+            concurrency=int(os.getenv("MARKET_STATS_CONCURRENCY", "3")),
+            ttl=float(os.getenv("MARKET_STATS_CACHE_TTL", "1800")),
+        )
+
+    @staticmethod
+    def _key(what: str, where: str, country: str) -> str:
+        # Keyed like the search cache, so "Nurses" in "halifax, NS" shares "nurse" in "Halifax"
+        what, where = reference_data.normalizer.normalize(what, where, count=False)
+        return json.dumps([" ".join((v or "").lower().split()) for v in (country, what, where)])
+
+    def cached(self, what: str, where: str = "", country: str = "ca") -> Optional[Dict]:
+        """Stats already computed for this query, without fetching anything."""
+        if self._key(what, where, country) not in self.cache:
+            return None
+        return self.cache.get(self._key(what, where, country))
+
+    @instrumented("market_stats.get")
+    async def get(
+        self, what: str, where: str = "", country: str = "ca", pages: Optional[int] = None, use_cache: bool = True
+    ) -> Dict:
+        """
+        Market statistics for a query over up to `pages` pages (default and cap: max_pages).
+
+        A cached result is reused if it covered at least as many pages, or every page
+        there was. Results carrying an "error" key are never cached.
+        """
+        pages = max(1, min(pages or self.max_pages, self.max_pages))
+        key = self._key(what, where, country)
+        if use_cache:
+            cached = self.cache.get(key)
+            if cached is not None and (cached["pages_requested"] >= pages or cached["pages_fetched"] >= cached["total_pages"]):
+                return cached
+        return await self._walks.run(f"{key}:{pages}", lambda: self._compute(key, what, where, country, pages))
+
+    async def _compute(self, key: str, what: str, where: str, country: str, pages: int) -> Dict:
+        first = await self._page(what, where, country, 1)
+        if "error" in first:
+            return {"error": first["error"]}
+
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(page: int) -> Dict:
+            async with limit:
+                return await self._page(what, where, country, page)
+
+        total_pages = max(1, first.get("total_pages") or 1)
+        rest = await asyncio.gather(*(fetch(page) for page in range(2, min(pages, total_pages) + 1)))
+        results = [first, *rest]
+        failed = [r["page"] for r in results if "error" in r]
+        # Postings can move between pages while they are walked; count each once
+        jobs = list({job["id"]: job for r in results for job in r.get("jobs", [])}.values())
+
+        start = time.perf_counter()
+        stats = aggregate(jobs)
+        self._stats["last_aggregate_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        self._stats["computed"] += 1
+        self._stats["pages_fetched"] += len(results) - len(failed)
+        self._stats["pages_failed"] += len(failed)
+
+        stats.update({
+            "what": what,
+            "where": where,
+            "total_count": first.get("count", 0),
+            "total_pages": total_pages,
+            "pages_requested": pages,
+            "pages_fetched": len(results) - len(failed),
+            "pages_failed": failed,
+            "computed_at": time.time(),
+        })
+        self.cache.set(key, stats, ttl=min(self.cache.ttl, PARTIAL_TTL) if failed else None)
+        return stats
+
+    async def _page(self, what: str, where: str, country: str, page: int) -> Dict:
+        result = await self.adzuna.search_jobs(
+            what=what, where=where, country=country, results_per_page=PAGE_SIZE, page=page, priority=ADVISOR
+        )
+        return {**result, "page": page}
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "max_pages": self.max_pages,
+            "concurrency": self.concurrency,
+            "cache": self.cache.stats(),
+            "coalesced": self._walks.coalesced,
+        }
+
+
+# Singleton instance
+market_stats_service = MarketStatsService.from_env(adzuna_service)
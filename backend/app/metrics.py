@@ -0,0 +1,314 @@
+import os
+import time
+import functools
+import inspect
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; covers a cached lookup (ms) up to a slow LLM call (tens of seconds)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+# ─── Metric types ─────────────────────────────────────────────────────────────
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+    _new_child = _Value
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(child.value)}"]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        # One bisect and three increments: cheap enough for every request and stage
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _render_child(self, key, child):
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            le = 'le="' + _number(bound) + '"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(round(child.sum, 6))}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {child.count}")
+        return lines
+
+
+class Registry:
+    """Metrics for the Prometheus text format (version 0.0.4), without a client library."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], List[_Metric]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collect: Callable[[], List[_Metric]]):
+        """collect() builds extra metrics at scrape time, e.g. from a service's stats()."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            try:
+                for metric in collect():
+                    lines.extend(metric.render())
+            except Exception as e:
+                print(f"WARNING: metrics collector failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+def cache_metrics(caches: Dict[str, Optional[Dict]]) -> List[_Metric]:
+    """Hit/miss counters and hit ratio gauges from TTLCache.stats()-shaped dicts."""
+    hits = Counter("jobsfinder_cache_hits_total", "Cache lookups that found a fresh entry.", ["cache"])
+    misses = Counter("jobsfinder_cache_misses_total", "Cache lookups that missed or found an expired entry.", ["cache"])
+    ratio = Gauge("jobsfinder_cache_hit_ratio", "Hits over lookups since startup.", ["cache"])
+    for name, stats in caches.items():
+        if not stats:
+            continue
+        hits.labels(name).set(stats["hits"])
+        misses.labels(name).set(stats["misses"])
+        lookups = stats["hits"] + stats["misses"]
+        ratio.labels(name).set(stats["hits"] / lookups if lookups else 0.0)
+    return [hits, misses, ratio]
+
+
+# ─── Application metrics ──────────────────────────────────────────────────────
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+registry = Registry()
+REQUEST_LATENCY = registry.histogram(
+    "jobsfinder_http_request_duration_seconds", "API request latency (until the response is complete).",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = registry.gauge("jobsfinder_http_requests_in_flight", "API requests being handled.", ["method"])
+STAGE_LATENCY = registry.histogram(
+    "jobsfinder_stage_duration_seconds", "Latency of each ClaudeService method and Adzuna call.", ["stage", "outcome"]
+)
+STAGES_IN_FLIGHT = registry.gauge("jobsfinder_stage_in_flight", "Stage calls currently running.", ["stage"])
+UPSTREAM_RESPONSES = registry.counter(
+    "jobsfinder_upstream_responses_total", "Upstream HTTP responses by status code ('error' if none).",
+    ["upstream", "status"],
+)
+UPSTREAM_IN_FLIGHT = registry.gauge("jobsfinder_upstream_requests_in_flight", "Upstream HTTP requests in flight.", ["upstream"])
+
+
+# ─── Stages and Server-Timing ─────────────────────────────────────────────────
+
+# Stage timings of the current request; child tasks share the list through their copied context
+_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("server_timings", default=None)
+
+
+class stage:
+    """
+    Time a block as a named stage: a latency histogram sample, plus a Server-Timing
+    entry when it runs inside an API request.
+
+        with stage("adzuna.search_jobs"):
+            ...
+    """
+
+    __slots__ = ("name", "children", "start")
+    _children: Dict[str, tuple] = {}
+
+    def __init__(self, name: str):
+        self.name = name
+        children = self._children.get(name)
+        if children is None:
+            # Resolve the labelled children once per stage name, not on every call
+            children = self._children[name] = (
+                STAGES_IN_FLIGHT.labels(name), STAGE_LATENCY.labels(name, "ok"), STAGE_LATENCY.labels(name, "error")
+            )
+        self.children = children
+
+    def __enter__(self):
+        self.children[0].value += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        in_flight, ok, error = self.children
+        in_flight.value -= 1
+        (ok if exc_type is None else error).observe(elapsed)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((self.name, elapsed))
+        return False
+
+
+def instrumented(name: str):
+    """Decorate an async function or async generator so each call is timed as a stage."""
+    def decorate(fn):
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with stage(name):
+                    async for item in fn(*args, **kwargs):
+                        yield item
+        else:
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with stage(name):
+                    return await fn(*args, **kwargs)
+        return wrapper if METRICS_ENABLED else fn
+    return decorate
+
+
+def server_timing(timings: List[Tuple[str, float]], total: float) -> bytes:
+    """Server-Timing header value; repeated stages (e.g. concurrent searches) are summed."""
+    merged: Dict[str, List[float]] = {}
+    for name, elapsed in timings:
+        entry = merged.setdefault(name, [0.0, 0])
+        entry[0] += elapsed
+        entry[1] += 1
+    parts = [
+        f"{name};dur={elapsed * 1000:.1f}" + (f';desc="x{count}"' if count > 1 else "")
+        for name, (elapsed, count) in merged.items()
+    ]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts).encode("latin-1")
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware: request latency, in-flight gauge and a Server-Timing header.
+
+    The header lists the stages that finished before the response started, so a
+    streaming response only shows what ran before its first byte; the histograms
+    still see every stage.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        timings: List[Tuple[str, float]] = []
+        token = _timings.set(timings)
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(timings, time.perf_counter() - start)))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            in_flight.dec()
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(method, getattr(route, "path", "unmatched"), status[0]).observe(
+                time.perf_counter() - start
+            )
+            _timings.reset(token)
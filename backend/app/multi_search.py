@@ -0,0 +1,151 @@
+import os
+import time
+import asyncio
+from typing import Dict, List, Optional
+from app.adzuna_service import AdzunaService, adzuna_service
+from app.ranking import JobRanker, job_ranker
+from app.scheduler import ADVISOR
+
+
+class MultiSearchService:
+    """Runs several Adzuna searches concurrently and merges them (Career Advisor Phase C)."""
+
+    def __init__(
+        self,
+        adzuna: AdzunaService,
+        max_concurrency: int = 5,
+        timeout: float = 8.0,
+        ranker: Optional[JobRanker] = None
+    ):
+        self.adzuna = adzuna
+        self.ranker = ranker
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+
+    @classmethod
+    def from_env(cls, adzuna: AdzunaService, ranker: Optional[JobRanker] = None) -> "MultiSearchService":
+        return cls(
+            adzuna,
+            max_concurrency=int(os.getenv("MULTI_SEARCH_CONCURRENCY", "5")),
+            timeout=float(os.getenv("MULTI_SEARCH_TIMEOUT", "8")),
+            ranker=ranker,
+        )
+
+    async def _search_one(self, title: str, where: str, results_per_page: int, limit: asyncio.Semaphore) -> Dict:
+        report = {"title": title, "status": "ok", "result_count": 0, "total_count": 0, "latency_ms": None}
+        jobs: List[Dict] = []
+        async with limit:
+            start = time.perf_counter()
+            try:
+                async with asyncio.timeout(self.timeout):
+                    result = await self.adzuna.search_jobs(
+                        what=title,
+                        where=where,
+                        results_per_page=results_per_page,
+                        priority=ADVISOR
+                    )
+                if "error" in result:
+                    report["status"] = "error"
+                    report["error"] = result["error"]
+                else:
+                    jobs = result.get("jobs", [])
+                    report["result_count"] = len(jobs)
+                    report["total_count"] = result.get("count", 0)
+            except TimeoutError:
+                report["status"] = "timeout"
+                report["error"] = f"Search timed out after {self.timeout:g}s"
+            report["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return {"report": report, "jobs": jobs}
+
+    async def search(
+        self,
+        titles: List[str],
+        where: str = "",
+        results_per_page: int = 10,
+        max_concurrency: Optional[int] = None,
+        profile: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Search every title concurrently, then merge the results.
+
+        Jobs are de-duplicated by Adzuna id, keeping the first occurrence in title
+        order, then near-duplicate postings are collapsed, and the rest are grouped
+        by category. A title that times out or errors is reported
+        in "searches" and the other titles' results are still returned. When a
+        candidate profile is given, jobs (and the jobs inside each group) are ordered
+        by relevance to it instead of by title order.
+
+        Returns:
+        {
+            "jobs": [...],                      # merged, each with "matched_searches" (and "relevance")
+            "groups": [{ "category", "count", "jobs" }, ...],
+            "searches": [{ "title", "status", "latency_ms", "result_count", "total_count" }, ...],
+            "total_unique": int,
+            "duplicates_removed": int,          # same Adzuna id in several searches
+            "duplicates_collapsed": int,        # near-duplicate postings with different ids
+            "partial": bool,
+            "ranked": bool,
+            "elapsed_ms": float
+        }
+        """
+        limit = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(*[
+            self._search_one(title, where, results_per_page, limit) for title in titles
+        ])
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        merged: Dict[str, Dict] = {}
+        duplicates = 0
+        for title, outcome in zip(titles, outcomes):
+            for job in outcome["jobs"]:
+                key = job.get("id") or f"{job.get('title')}|{job.get('company')}|{job.get('location')}"
+                if key in merged:
+                    duplicates += 1
+                    if title not in merged[key]["matched_searches"]:
+                        merged[key]["matched_searches"].append(title)
+                    continue
+                # Copy so cached search results are never mutated
+                merged[key] = {**job, "matched_searches": [title]}
+
+        jobs = list(merged.values())
+        collapsed = 0
+        dedup = getattr(self.adzuna, "dedup", None)
+        if dedup is not None:
+            # The same posting under another id (reworded title, different recruiter)
+            kept = []
+            for members in dedup.group(jobs).values():
+                job = jobs[members[0]]
+                for other in members[1:]:
+                    for title in jobs[other]["matched_searches"]:
+                        if title not in job["matched_searches"]:
+                            job["matched_searches"].append(title)
+                kept.append(job)
+            collapsed = len(jobs) - len(kept)
+            jobs = kept
+        ranked = bool(profile) and self.ranker is not None
+        if ranked:
+            jobs = await self.ranker.rank_async(jobs, profile)
+        groups: Dict[str, List[Dict]] = {}
+        for job in jobs:
+            groups.setdefault(job.get("category") or "Unknown", []).append(job)
+
+        reports = [outcome["report"] for outcome in outcomes]
+        return {
+            "jobs": jobs,
+            "groups": [
+                {"category": category, "count": len(items), "jobs": items}
+                for category, items in sorted(groups.items(), key=lambda item: -len(item[1]))
+            ],
+            "searches": reports,
+            "total_unique": len(jobs),
+            "duplicates_removed": duplicates,
+            "duplicates_collapsed": collapsed,
+            "partial": any(r["status"] != "ok" for r in reports),
+            "ranked": ranked,
+            "elapsed_ms": elapsed_ms,
+        }
+
+
+# Singleton instance
+multi_search_service = MultiSearchService.from_env(adzuna_service, ranker=job_ranker)
@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import base64
+import asyncio
+from typing import Dict, Optional
+from app.adzuna_service import AdzunaService, adzuna_service
+from app.cache import TTLCache, search_cache_key
+from app.scheduler import BACKGROUND
+
+# ─── Cursors ──────────────────────────────────────────────────────────────────
+
+CURSOR_FIELDS = ("what", "where", "page", "results_per_page", "mode", "salary_min", "salary_max")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(query: Dict) -> str:
+    """Opaque token for a search page; carries every parameter needed to serve it."""
+    state = {field: query[field] for field in CURSOR_FIELDS if query.get(field) not in (None, "")}
+    raw = json.dumps(state, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        state = json.loads(raw)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}") from e
+    if not isinstance(state, dict) or not isinstance(state.get("page"), int) or state["page"] < 1:
+        raise InvalidCursor("Invalid cursor: missing page")
+    return {field: state.get(field) for field in CURSOR_FIELDS}
+
+
+def page_cursors(query: Dict, total_pages: int) -> Dict:
+    """next_cursor/prev_cursor for a served page (None at either end)."""
+    page = query["page"]
+    return {
+        "next_cursor": encode_cursor({**query, "page": page + 1}) if page < total_pages else None,
+        "prev_cursor": encode_cursor({**query, "page": page - 1}) if page > 1 else None,
+    }
+
+
+# ─── Prefetch ─────────────────────────────────────────────────────────────────
+
+class PagePrefetcher:
+    """
+    Speculative prefetch of the next pages of a live search.
+
+    Serving page N starts background fetches of pages N+1..N+depth at BACKGROUND
+    priority, so they only spend quota interactive requests leave over. Prefetched
+    pages wait in a bounded buffer and move into the search cache when they are
+    requested. A search that nobody pages through for idle_seconds has its
+    outstanding prefetches cancelled.
+    """
+
+    def __init__(
+        self,
+        adzuna: AdzunaService,
+        depth: int = 2,
+        max_pages: int = 200,
+        ttl: float = 300.0,
+        idle_seconds: float = 60.0,
+    ):
+        self.adzuna = adzuna
+        self.depth = depth
+        self.buffer = TTLCache(max_entries=max_pages, ttl=ttl)
+        self.idle_seconds = idle_seconds
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._last_access: Dict[str, float] = {}
+        self._stats = {"hits": 0, "in_flight_hits": 0, "misses": 0, "prefetched": 0, "failed": 0, "cancelled_idle": 0}
+
+    @classmethod
+    def from_env(cls, adzuna: AdzunaService) -> "PagePrefetcher":
+        return cls(
+            adzuna,
+            depth=int(os.getenv("PREFETCH_PAGES", "2")),
+            max_pages=int(os.getenv("PREFETCH_BUFFER_PAGES", "200")),
+            ttl=float(os.getenv("PREFETCH_TTL", "300")),
+            idle_seconds=float(os.getenv("PREFETCH_IDLE_SECONDS", "60")),
+        )
+
+    async def search(
+        self,
+        what: str,
+        where: str,
+        page: int = 1,
+        results_per_page: int = 10,
+        country: str = "ca",
+        use_cache: bool = True,
+    ) -> Dict:
+        """AdzunaService.search_jobs, answered from the prefetch buffer when possible."""
+        # The keys and prefetches must use the what/where search_jobs caches under,
+        # or a page asked for as "Nurses" in "toronto" never finds its prefetch
+        what, where = self.adzuna.reference.normalizer.normalize(what, where, count=False)
+        search = search_cache_key(country, what, where, 0, results_per_page)
+        self._touch(search)
+        key = search_cache_key(country, what, where, page, results_per_page)
+
+        result = await self._take(key) if use_cache and page > 1 else None
+        if result is None:
+            result = await self.adzuna.search_jobs(
+                what=what, where=where, country=country, page=page,
+                results_per_page=results_per_page, use_cache=use_cache,
+            )
+        else:
+            # Paging back to this page is now an ordinary cache hit
+            self.adzuna.cache.memory.set(key, result)
+            result = {**result, "jobs": [dict(job) for job in result.get("jobs", [])]}
+
+        if "error" not in result and self.depth > 0:
+            last = min(page + self.depth, result.get("total_pages", 0))
+            for ahead in range(page + 1, last + 1):
+                self._schedule(search, what, where, country, ahead, results_per_page)
+        return result
+
+    async def _take(self, key: str) -> Optional[Dict]:
+        result = self.buffer.get(key)
+        if result is not None:
+            self.buffer.pop(key)
+            self._stats["hits"] += 1
+            return result
+        task = self._in_flight.get(key)
+        if task is not None:
+            try:
+                # Shielded: this caller giving up must not cancel the prefetch for others
+                result = await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise
+                result = None
+            if result is not None and "error" not in result:
+                self.buffer.pop(key)
+                self._stats["in_flight_hits"] += 1
+                return result
+        self._stats["misses"] += 1
+        return None
+
+    def _touch(self, search: str):
+        now = time.monotonic()
+        self._last_access[search] = now
+        if len(self._last_access) > 4 * self.buffer.max_entries:
+            idle = now - self.idle_seconds
+            self._last_access = {s: t for s, t in self._last_access.items() if t > idle}
+
+    def _schedule(self, search: str, what: str, where: str, country: str, page: int, results_per_page: int):
+        key = search_cache_key(country, what, where, page, results_per_page)
+        if key in self._in_flight or key in self.buffer or key in self.adzuna.cache.memory:
+            return
+        fetch = asyncio.ensure_future(
+            self.adzuna._fetch_and_index(what, where, country, results_per_page, page, BACKGROUND)
+        )
+        self._in_flight[key] = fetch
+        fetch.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        watch = asyncio.ensure_future(self._watch(search, key, fetch))
+        self.adzuna._background.add(watch)
+        watch.add_done_callback(self.adzuna._background.discard)
+
+    async def _watch(self, search: str, key: str, fetch: asyncio.Task):
+        """Buffer the prefetched page, or cancel it once its search has gone idle."""
+        while not fetch.done():
+            remaining = self._last_access.get(search, 0.0) + self.idle_seconds - time.monotonic()
+            if remaining <= 0:
+                fetch.cancel()
+                self._stats["cancelled_idle"] += 1
+                return
+            await asyncio.wait({fetch}, timeout=remaining)
+        if fetch.cancelled():
+            return
+        try:
+            result = fetch.result()
+        except Exception as e:
+            result = {"error": str(e)}
+        if "error" in result:
+            self._stats["failed"] += 1
+            return
+        self._stats["prefetched"] += 1
+        if key not in self.adzuna.cache.memory:
+            # Unless a request already took it while it was in flight
+            self.buffer.set(key, result)
+
+    def shutdown(self):
+        for task in list(self._in_flight.values()):
+            task.cancel()
+
+    def stats(self) -> Dict:
+        lookups = self._stats["hits"] + self._stats["in_flight_hits"] + self._stats["misses"]
+        served = self._stats["hits"] + self._stats["in_flight_hits"]
+        return {
+            **self._stats,
+            "hit_ratio": round(served / lookups, 4) if lookups else None,
+            "in_flight": len(self._in_flight),
+            "buffer": self.buffer.stats(),
+            "depth": self.depth,
+            "idle_seconds": self.idle_seconds,
+        }
+
+
+# Singleton instance
+page_prefetcher = PagePrefetcher.from_env(adzuna_service)
@@ -0,0 +1,281 @@
+import os
+import re
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.llm_client import parse_endpoint_settings
+
+# ─── Token estimation ─────────────────────────────────────────────────────────
+
+# Roughly how a BPE tokenizer splits text: words, short digit groups, each
+# punctuation mark, and each newline with the indentation that follows it.
+TOKEN_PIECE = re.compile(r"[A-Za-z]+|\d{1,3}|\n[ \t]*|[^\sA-Za-z\d]")
+LONG_WORD = re.compile(r"[A-Za-z]{10,}")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local estimate of the prompt tokens text will cost; no tokenizer download or API call.
+
+    Common words are one token; long words are charged about one token per six letters.
+    """
+    if not text:
+        return 0
+    pieces = len(TOKEN_PIECE.findall(text))
+    extra = sum((len(word) - 4) // 6 for word in LONG_WORD.findall(text))
+    return pieces + extra
+
+
+def compact_json(value: Any) -> str:
+    """JSON for prompts: no indentation or spaces after separators."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def clip_text(text: str, max_tokens: int) -> str:
+    """Cut text to about max_tokens, on a word boundary."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    kept, used = [], 1  # the trailing ellipsis
+    for word in text.split(" "):
+        cost = estimate_tokens(word)
+        if used + cost > max_tokens:
+            break
+        kept.append(word)
+        used += cost
+    return " ".join(kept) + " …"
+
+
+# ─── Resume sections ──────────────────────────────────────────────────────────
+
+# Lower numbers are kept longer when a resume has to be cut to fit
+SECTION_PRIORITY = {
+    "summary": 0, "profile": 0, "professional summary": 0, "objective": 1,
+    "experience": 0, "work experience": 0, "professional experience": 0, "employment": 0,
+    "employment history": 0, "work history": 0,
+    "skills": 0, "technical skills": 0, "core competencies": 0, "key skills": 0,
+    "education": 1, "certifications": 1, "certificates": 1, "licenses": 1, "projects": 1, "languages": 1,
+    "publications": 2, "awards": 2, "achievements": 2, "volunteer": 2, "volunteering": 2,
+    "volunteer experience": 2, "activities": 2,
+    "interests": 3, "hobbies": 3, "personal interests": 3,
+    "references": 4,
+}
+DEFAULT_SECTION_PRIORITY = 1
+DROPPED_SECTION_PRIORITY = 4  # never worth prompt tokens
+
+BOILERPLATE = re.compile(
+    r"^(references|referees)?\s*(are\s+)?(available\s+)?(up)?on\s+request\.?$"
+    r"|^page\s+\d+(\s+of\s+\d+)?$"
+    r"|^(curriculum\s+vitae|resume|résumé|cv)$",
+    re.IGNORECASE,
+)
+CONTACT = re.compile(
+    r"[\w.+-]+@[\w-]+\.[\w.]+"
+    r"|(https?://|www\.)\S+|\b(linkedin|github)\.com/\S*"
+    r"|\(?\+?\d{0,3}\)?[\s.-]?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]\d{4}\b"
+    r"|\b(email|e-mail|phone|tel|mobile|cell)\s*:?",
+    re.IGNORECASE,
+)
+BULLET = re.compile(r"^[\s\-*•●▪◦·‣–—]+")
+SENTENCE_END = re.compile(r"(?<=[.!?;])\s+(?=[A-Z•\-*])")
+LONG_LINE_CHARS = 400
+
+
+class Section:
+    __slots__ = ("heading", "priority", "lines")
+
+    def __init__(self, heading: Optional[str], priority: int):
+        self.heading = heading
+        self.priority = priority
+        self.lines: List[str] = []
+
+
+def _heading_key(line: str) -> str:
+    return re.sub(r"[^a-z ]", "", line.lower()).strip()
+
+
+def section_heading(line: str) -> Optional[int]:
+    """The section priority if line looks like a resume heading, else None."""
+    if len(line) > 40 or line.endswith((".", ",")):
+        return None
+    key = _heading_key(line)
+    if key in SECTION_PRIORITY:
+        return SECTION_PRIORITY[key]
+    words = line.rstrip(":").split()
+    if 0 < len(words) <= 4 and line.rstrip(":").isupper() and any(c.isalpha() for c in line):
+        return DEFAULT_SECTION_PRIORITY
+    return None
+
+
+def _lines(text: str) -> List[str]:
+    lines = []
+    for raw in text.splitlines():
+        line = " ".join(raw.split())
+        if len(line) > LONG_LINE_CHARS:
+            # Pasted or extracted text often arrives as one paragraph per job
+            lines.extend(SENTENCE_END.split(line))
+        elif line:
+            lines.append(line)
+    return lines
+
+
+def split_sections(text: str) -> List[Section]:
+    """Cut a resume into sections at its headings; text before the first heading is its own section."""
+    sections = [Section(None, 0)]
+    for line in _lines(text):
+        priority = section_heading(line)
+        if priority is not None:
+            sections.append(Section(line.rstrip(":"), priority))
+        else:
+            sections[-1].lines.append(line)
+    return [section for section in sections if section.heading or section.lines]
+
+
+def _is_boilerplate(line: str) -> bool:
+    if BOILERPLATE.match(line.strip(" -–—|")):
+        return True
+    # Contact lines (email, phone, profile links) carry nothing the advisor uses
+    remainder = CONTACT.sub("", line)
+    return remainder != line and sum(c.isalpha() for c in remainder) < 3
+
+
+def compact_resume(text: str, max_tokens: int) -> str:
+    """
+    Shrink a resume to fit max_tokens while keeping what the advisor needs.
+
+    Always drops boilerplate (contact details, "references on request", page
+    numbers), the references section and repeated bullet lines. If the result is
+    still over budget, lines are cut from the end of the lowest-priority sections
+    first (interests before education before experience), so the most recent roles
+    and the skills list survive longest.
+    """
+    seen = set()
+    sections = []
+    for section in split_sections(text):
+        if section.priority >= DROPPED_SECTION_PRIORITY:
+            continue
+        kept = []
+        for line in section.lines:
+            bullet = BULLET.match(line) is not None
+            if bullet:
+                line = BULLET.sub("- ", line)
+            words = re.findall(r"[a-z0-9+#]+", line.lower())
+            if not words or _is_boilerplate(line):
+                continue
+            # Repeated bullets are dropped; short lines such as job titles may repeat legitimately
+            if bullet or len(words) >= 5:
+                key = " ".join(words)
+                if key in seen:
+                    continue
+                seen.add(key)
+            kept.append(line)
+        section.lines = kept
+        if kept:
+            sections.append(section)
+
+    # Each line pays for its newline; each section for its heading and the blank line after it
+    costs = [[estimate_tokens(line) + 1 for line in section.lines] for section in sections]
+    overhead = [estimate_tokens(section.heading or "") + 2 for section in sections]
+    total = sum(overhead) + sum(map(sum, costs))
+    while total > max_tokens:
+        trimmable = [i for i, section in enumerate(sections) if section.lines]
+        if not trimmable:
+            break
+        # Least important section first, then the longest one
+        i = max(trimmable, key=lambda i: (sections[i].priority, sum(costs[i])))
+        if len(trimmable) == 1 and len(sections[i].lines) == 1:
+            # One line left: shorten it instead of dropping everything
+            sections[i].lines[0] = clip_text(sections[i].lines[0], max(costs[i][0] - (total - max_tokens), 1))
+            break
+        sections[i].lines.pop()
+        total -= costs[i].pop()
+        if not sections[i].lines:
+            total -= overhead[i]
+
+    blocks = []
+    for section in sections:
+        if section.lines:
+            blocks.append("\n".join(([section.heading.upper()] if section.heading else []) + section.lines))
+    return "\n\n".join(blocks)
+
+
+# ─── Per-endpoint budgets ─────────────────────────────────────────────────────
+
+# Prompt budgets in estimated tokens, template included
+DEFAULT_BUDGETS = {
+    "parse_job_search_query": 400,
+    "format_job_results": 800,
+    "analyze_resume": 3000,
+    "batch_analyze_resume": 3000,
+    "suggest_job_titles": 1500,
+    # Condensed resume shared by a batch of letters, and each letter's whole prompt
+    "cover_letter_context": 1200,
+    "cover_letter": 2000,
+}
+
+
+class PromptCompactor:
+    """
+    Fits each prompt to its endpoint's token budget and records the savings.
+
+    Every prompt is logged with its estimated token count before and after
+    compaction; the running totals per endpoint are in /api/stats next to the
+    LLM latency stats for the same endpoint.
+    """
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None, log: bool = True):
+        self.budgets = {**DEFAULT_BUDGETS, **(budgets or {})}
+        self.log = log
+        self._stats: Dict[str, Dict] = {}
+
+    @classmethod
+    def from_env(cls) -> "PromptCompactor":
+        return cls(
+            budgets=parse_endpoint_settings(os.getenv("PROMPT_TOKEN_BUDGETS", "")),
+            log=os.getenv("PROMPT_LOG_TOKENS", "true").lower() == "true",
+        )
+
+    def budget(self, endpoint: str) -> int:
+        return self.budgets.get(endpoint, 2000)
+
+    def fit_resume(self, endpoint: str, build: Callable[[str], str], resume_text: str) -> Tuple[str, str]:
+        """
+        Build a resume prompt within the endpoint's budget; build(resume) returns the full prompt.
+
+        Returns:
+            (compacted prompt, the prompt the raw resume would have produced)
+        """
+        budget = self.budget(endpoint)
+        room = max(budget - estimate_tokens(build("")), 100)
+        prompt = build(compact_resume(resume_text, room))
+        overshoot = estimate_tokens(prompt) - budget
+        if overshoot > 0:
+            # Joining the sections into the template can cost a few tokens more than estimated
+            prompt = build(compact_resume(resume_text, max(room - overshoot, 50)))
+        return prompt, build(resume_text)
+
+    def record(self, endpoint: str, original: str, compacted: str) -> str:
+        """Log and count one prompt; returns compacted for convenience."""
+        before, after = estimate_tokens(original), estimate_tokens(compacted)
+        stats = self._stats.setdefault(endpoint, {"prompts": 0, "tokens_before": 0, "tokens_after": 0, "over_budget": 0})
+        stats["prompts"] += 1
+        stats["tokens_before"] += before
+        stats["tokens_after"] += after
+        if after > self.budget(endpoint):
+            stats["over_budget"] += 1
+        if self.log:
+            saved = (1 - after / before) if before else 0.0
+            print(f"PROMPT {endpoint}: {before} -> {after} tokens ({saved:.0%} saved, budget {self.budget(endpoint)})")
+        return compacted
+
+    def stats(self) -> Dict:
+        endpoints = {}
+        for endpoint, values in self._stats.items():
+            prompts = values["prompts"]
+            endpoints[endpoint] = {
+                **values,
+                "budget": self.budget(endpoint),
+                "avg_tokens_before": round(values["tokens_before"] / prompts, 1),
+                "avg_tokens_after": round(values["tokens_after"] / prompts, 1),
+                "saved_ratio": round(1 - values["tokens_after"] / values["tokens_before"], 4)
+                if values["tokens_before"] else None,
+            }
+        return {"endpoints": endpoints}
@@ -0,0 +1,328 @@
+import re
+from typing import Dict, List, Optional, Tuple
+from app.reference_data import reference_data
+
+# Fast-path parser for the common, rigidly structured chat searches
+# ("Find Python developer jobs in Toronto", "remote data analyst roles").
+# Anything it is not sure about is left to the LLM in ClaudeService.
+
+# ─── Gazetteer ────────────────────────────────────────────────────────────────
+
+# Place names come from the shared gazetteer (app/data/gazetteer_ca.tsv)
+gazetteer = reference_data.gazetteer
+
+REMOTE_PHRASES = ["work from home", "working from home", "wfh", "remote", "remotely", "telecommute", "anywhere"]
+
+# ─── Vocabulary ───────────────────────────────────────────────────────────────
+
+JOB_NOUNS = {
+    "job", "jobs", "role", "roles", "position", "positions", "opening", "openings",
+    "opportunity", "opportunities", "vacancy", "vacancies", "career", "careers",
+    "posting", "postings", "gig", "gigs", "listing", "listings",
+}
+
+SEARCH_VERBS = [
+    "are there any", "is there any", "i'm looking for", "im looking for", "i am looking for",
+    "looking for", "search for", "searching for", "look for", "find me", "show me", "get me",
+    "i want", "i need", "find", "show", "search", "list", "any",
+]
+
+# Courtesy words users put in front of the request ("hey, show me ...", "please find ...")
+LEADING_COURTESY = [
+    "hi there", "hello there", "thank you", "good morning", "good afternoon", "good evening",
+    "hi", "hello", "hey", "thanks", "please",
+]
+
+# Left over in a title, these mean a verb or greeting was not stripped cleanly
+NON_TITLE_WORDS = {
+    "find", "show", "search", "searching", "look", "looking", "want", "need", "get",
+    "hi", "hello", "hey", "thanks", "thank", "please", "to",
+    # Pronouns and possessives: the message is about someone, not a title
+    "i", "i'm", "im", "i've", "i'd", "me", "my", "mine", "myself", "we", "our", "you", "your",
+    "he", "him", "his", "she", "her", "they", "them", "their",
+}
+
+LOCATION_PREPOSITIONS = {"in", "near", "around", "at", "within"}
+
+EDGE_FILLER = {"a", "an", "the", "some", "any", "me", "for", "as", "of", "new", "open", "available", "please"}
+
+TRAILING_OK = {"area", "region", "please", "now", "today"}
+
+GREETINGS = {
+    "hi", "hello", "hey", "hi there", "hello there", "thanks", "thank you", "how are you",
+    "good morning", "good afternoon", "good evening", "what can you do", "help",
+}
+
+# Words that mean the message carries more than a plain title + place
+AMBIGUOUS = {
+    "how", "what", "why", "which", "should", "can", "could", "would", "does", "do", "is",
+    "are", "salary", "salaries", "pay", "paying", "resume", "cv", "cover", "letter",
+    "interview", "advice", "over", "under", "above", "below", "more", "less", "than",
+    "not", "except", "without", "but", "instead", "else", "about", "like", "similar",
+    "that", "who", "with", "no", "into", "change", "anything", "something", "pays", "well",
+    "experience", "degree", "or",
+    # Feelings and events around a job rather than a search for one
+    "hate", "hating", "love", "quit", "quitting", "leave", "leaving", "left", "lost", "fired",
+    "laid", "stuck", "tired", "sick", "bored", "stressed", "unhappy", "miserable",
+    # When, not what
+    "today", "tonight", "tomorrow", "yesterday", "later",
+}
+
+# A title of just one of these points back at something ("what about it?"); "IT" is a title
+REFERRING_WORDS = {"it", "this", "these", "those", "one", "ones"}
+
+TOKEN_RE = re.compile(r"[\w+#&'.\-/]+")
+
+HIGH_CONFIDENCE = 0.9
+REMOTE_SHAPE_CONFIDENCE = 0.85
+LOW_CONFIDENCE = 0.3
+
+
+def normalize_message(message: str) -> str:
+    """Canonical form used as the memoization key."""
+    return " ".join((message or "").lower().strip().rstrip("?!.").split())
+
+
+def _tokenize(message: str) -> List[str]:
+    tokens = []
+    for raw in TOKEN_RE.findall(message):
+        # Keep leading dots (".NET") but drop sentence punctuation ("Toronto.", "St.")
+        token = raw.rstrip(".,")
+        if token:
+            tokens.append(token)
+    return tokens
+
+
+def _match_place(lowered: List[str], start: int) -> Tuple[Optional[str], int]:
+    """Longest gazetteer match starting at start. Returns (canonical, tokens_used)."""
+    skipped = 1 if start < len(lowered) and lowered[start] == "the" else 0
+    start += skipped
+    for size in (4, 3, 2, 1):
+        if start + size > len(lowered):
+            continue
+        place = gazetteer.lookup(" ".join(lowered[start:start + size]))
+        if place is not None:
+            used = size
+            # Swallow a trailing province code: "Toronto, ON"
+            if start + used < len(lowered) and gazetteer.province(lowered[start + used]) is not None:
+                used += 1
+            return place.name, used + skipped
+    return None, 0
+
+
+def _strip_phrase(lowered: List[str], original: List[str], phrase: str) -> bool:
+    """Remove the first occurrence of a multi-word phrase in place."""
+    words = phrase.split()
+    for i in range(len(lowered) - len(words) + 1):
+        if lowered[i:i + len(words)] == words:
+            del lowered[i:i + len(words)]
+            del original[i:i + len(words)]
+            return True
+    return False
+
+
+def _strip_leading(lowered: List[str], original: List[str], phrases: List[str]):
+    """Repeatedly remove any of the phrases from the start of the message."""
+    stripped = True
+    while stripped:
+        stripped = False
+        for phrase in phrases:
+            words = phrase.split()
+            if lowered[:len(words)] == words:
+                del lowered[:len(words)]
+                del original[:len(words)]
+                stripped = True
+                break
+
+
+def _unclear_title(title: List[str]) -> bool:
+    """True when the words left as a title are not one ("I hate my", "how to change")."""
+    if len(title) == 1 and title[0].lower() in REFERRING_WORDS and not title[0].isupper():
+        return True
+    for i, token in enumerate(title):
+        lowered = token.lower()
+        if lowered == "i" and 0 < i == len(title) - 1:
+            # A level, not the pronoun: "Software Engineer I"
+            continue
+        if lowered in AMBIGUOUS or lowered in NON_TITLE_WORDS or lowered in LOCATION_PREPOSITIONS:
+            return True
+    return len(title) > 6
+
+
+def fast_parse(message: str) -> Tuple[Dict, float]:
+    """
+    Parse a chat message without calling the LLM.
+
+    Returns:
+        ({ is_job_search, what, where }, confidence) — confidence below the caller's
+        threshold means the result should be discarded in favour of the LLM.
+    """
+    normalized = normalize_message(message)
+    if normalized in GREETINGS:
+        return {"is_job_search": False, "what": "", "where": ""}, HIGH_CONFIDENCE
+    if "?" in (message or "").strip().rstrip("?"):
+        return {"is_job_search": False, "what": "", "where": ""}, LOW_CONFIDENCE
+
+    original = _tokenize(message or "")
+    lowered = [t.lower() for t in original]
+    if not lowered:
+        return {"is_job_search": False, "what": "", "where": ""}, LOW_CONFIDENCE
+
+    # Leading courtesy words, then a search verb ("hey, please show me ...")
+    _strip_leading(lowered, original, LEADING_COURTESY)
+    has_verb = False
+    for verb in SEARCH_VERBS:
+        words = verb.split()
+        if lowered[:len(words)] == words:
+            del lowered[:len(words)]
+            del original[:len(words)]
+            has_verb = True
+            break
+    _strip_leading(lowered, original, ["please"])
+
+    # Remote phrasing can appear anywhere ("remote python jobs", "python jobs, remote")
+    where = ""
+    remote = False
+    for phrase in REMOTE_PHRASES:
+        if _strip_phrase(lowered, original, phrase):
+            remote = True
+            where = "remote"
+            break
+
+    # Location: "<prep> <place>" or a trailing bare place name
+    leftover: List[str] = []
+    unknown_place = False
+    conflicting_place = False
+    for i, token in enumerate(lowered):
+        if token in LOCATION_PREPOSITIONS:
+            if i + 1 == len(lowered):
+                # "jobs in remote" leaves a dangling preposition once "remote" is stripped
+                if remote:
+                    del lowered[i:]
+                    del original[i:]
+                    break
+                continue
+            place, used = _match_place(lowered, i + 1)
+            if place:
+                conflicting_place = remote
+                where = where or place
+                leftover = lowered[i + 1 + used:]
+                del lowered[i:]
+                del original[i:]
+                break
+            if any(t in JOB_NOUNS for t in lowered[:i]):
+                # A location we do not know; let the LLM interpret it
+                unknown_place = True
+                break
+    else:
+        for start in range(len(lowered)):
+            place, used = _match_place(lowered, start)
+            if place and start + used == len(lowered) and start > 0:
+                conflicting_place = remote
+                where = where or place
+                del lowered[start:]
+                del original[start:]
+                break
+
+    has_job_noun = any(t in JOB_NOUNS for t in lowered)
+    title = [o for o, l in zip(original, lowered) if l not in JOB_NOUNS]
+    if len(title) > 1 and title[0].lower() == "work" and title[1].lower() == "as":
+        # "looking for work as a welder"
+        title.pop(0)
+    while title and title[0].lower() in EDGE_FILLER:
+        title.pop(0)
+    while title and title[-1].lower() in EDGE_FILLER | LOCATION_PREPOSITIONS:
+        title.pop()
+    what = " ".join(title)
+    result = {"is_job_search": True, "what": what, "where": where}
+
+    # "find me a job" names no title, so there is nothing to search for yet
+    if not what or unknown_place or conflicting_place:
+        return result, LOW_CONFIDENCE
+    if any(t not in TRAILING_OK for t in leftover):
+        return result, LOW_CONFIDENCE
+    if _unclear_title(title):
+        return result, LOW_CONFIDENCE
+    if has_job_noun:
+        return result, HIGH_CONFIDENCE
+    if remote and what and len(title) <= 4:
+        # "remote <title>" shape
+        return result, REMOTE_SHAPE_CONFIDENCE
+    if has_verb and what and where:
+        return result, REMOTE_SHAPE_CONFIDENCE
+    return result, LOW_CONFIDENCE
+
+
+# ─── Follow-ups ───────────────────────────────────────────────────────────────
+
+# Lead-ins and tails that mark a message as a change to the previous search
+FOLLOW_UP_LEADS = [
+    "how about", "what about", "what if", "same but", "same thing but", "same search but",
+    "and", "ok", "okay", "now", "but", "try", "maybe", "only",
+]
+FOLLOW_UP_TAILS = ["instead", "then", "too", "as well", "please"]
+# Asking for the previous search again
+REPEAT_PHRASES = {"again", "same", "same again", "same search", "show them again", "show me again", "the same"}
+
+
+def parse_follow_up(message: str) -> Optional[Dict]:
+    """
+    Read a message as a change to the previous search ("how about remote instead?").
+
+    Returns the fields that change ({ what?, where? }; empty for a plain repeat),
+    or None when the message does not read as a follow-up and needs a full parse.
+    """
+    normalized = normalize_message(message)
+    if normalized in REPEAT_PHRASES:
+        return {}
+
+    original = _tokenize(message or "")
+    lowered = [t.lower() for t in original]
+    _strip_leading(lowered, original, LEADING_COURTESY)
+    before = len(lowered)
+    _strip_leading(lowered, original, FOLLOW_UP_LEADS)
+    marked = len(lowered) < before
+    stripped = True
+    while stripped:
+        stripped = False
+        for phrase in FOLLOW_UP_TAILS:
+            words = phrase.split()
+            if len(lowered) > len(words) and lowered[-len(words):] == words:
+                del lowered[-len(words):]
+                del original[-len(words):]
+                marked = stripped = True
+                break
+    if not marked or not lowered:
+        return None
+    if " ".join(lowered) in REPEAT_PHRASES:
+        return {}
+
+    delta = {}
+    for phrase in REMOTE_PHRASES:
+        if _strip_phrase(lowered, original, phrase):
+            delta["where"] = "remote"
+            break
+    for start in range(len(lowered)):
+        place, used = _match_place(lowered, start)
+        # The place must end the message, optionally after a preposition ("data analyst in Ottawa")
+        if place and start + used == len(lowered) and "where" not in delta:
+            delta["where"] = place
+            cut = start - 1 if start and lowered[start - 1] in LOCATION_PREPOSITIONS else start
+            del lowered[cut:]
+            del original[cut:]
+            break
+    while lowered and lowered[-1] in LOCATION_PREPOSITIONS:
+        lowered.pop()
+        original.pop()
+
+    title = [o for o, l in zip(original, lowered) if l not in JOB_NOUNS]
+    while title and title[0].lower() in EDGE_FILLER:
+        title.pop(0)
+    while title and title[-1].lower() in EDGE_FILLER:
+        title.pop()
+    if _unclear_title(title):
+        # "what about something that pays more?" or "how about I quit instead?" needs the LLM
+        return None
+    if title:
+        delta["what"] = " ".join(title)
+    return delta or None
@@ -0,0 +1,306 @@
+import os
+import time
+import zlib
+import asyncio
+import numpy as np
+from typing import Dict, List, Tuple
+from app.cache import TTLCache
+
+# Local, network-free relevance ranking of jobs against a Career Advisor profile.
+# Texts are turned into hashed bag-of-words vectors (words + bigrams) with NumPy,
+# weighted by IDF over the batch being ranked, and scored by cosine similarity for
+# the whole batch at once.
+
+STOPWORDS = {
+    "a", "an", "and", "the", "of", "to", "in", "for", "on", "with", "at", "by", "or", "as",
+    "is", "are", "be", "we", "you", "our", "your", "will", "this", "that", "from", "job", "jobs",
+}
+
+# Job vectors are mostly zeros, so they are kept as (bucket indices, values) pairs
+SparseVector = Tuple[np.ndarray, np.ndarray]
+
+# How many times each field is counted, so a title match outweighs a passing mention
+JOB_FIELD_WEIGHTS = (("title", 3), ("category", 1), ("description", 1))
+
+
+# Words are runs of [a-z0-9+#.] after lower-casing. The table maps upper case to
+# lower case and every other byte, including each byte of a non-ASCII character,
+# to a space; NUL is kept as a word of its own that marks the end of a field.
+FIELD_END = b"\0"
+_WORD_BYTES = bytes(
+    i if chr(i) in "abcdefghijklmnopqrstuvwxyz0123456789+#.\0"
+    else i + 32 if 65 <= i <= 90
+    else 32
+    for i in range(256)
+)
+_STOPWORDS = {word.encode() for word in STOPWORDS}
+
+# Word -> crc32, -1 for a stopword, -2 for FIELD_END. Each distinct word is hashed
+# once per process; cleared at the cap so arbitrary text cannot grow it unbounded.
+_WORD_HASHES: Dict[bytes, int] = {FIELD_END: -2}
+MAX_WORD_HASHES = 200_000
+
+# Bigram buckets are mixed from the two word hashes rather than hashing "a b"; the
+# product's middle bits depend on all of the first word's hash, not just its bucket
+BIGRAM_MULTIPLIER = 0x9E3779B1
+BIGRAM_SHIFT = 16
+
+
+def _word_hash(raw: bytes) -> int:
+    # A word starts at a letter or digit and drops trailing dots (".NET" -> "net", "node.js." -> "node.js")
+    word = raw.lstrip(b"+#.").rstrip(b".")
+    if not word or word in _STOPWORDS:
+        return -1
+    # crc32 rather than hash(): stable across processes, so persisted vectors stay valid
+    return zlib.crc32(word)
+
+
+def _hash_words(words: List[bytes]) -> np.ndarray:
+    try:
+        return np.fromiter(map(_WORD_HASHES.__getitem__, words), dtype=np.int64, count=len(words))
+    except KeyError:
+        pass
+    unseen = set(words).difference(_WORD_HASHES)
+    if len(_WORD_HASHES) + len(unseen) > MAX_WORD_HASHES:
+        _WORD_HASHES.clear()
+        _WORD_HASHES[FIELD_END] = -2
+        unseen = set(words).difference(_WORD_HASHES)
+    _WORD_HASHES.update((word, _word_hash(word)) for word in unseen)
+    return np.fromiter(map(_WORD_HASHES.__getitem__, words), dtype=np.int64, count=len(words))
+
+
+def batch_text_counts(jobs: List[Dict], dim: int) -> List[SparseVector]:
+    """
+    Hashed, log-scaled term counts (words + bigrams, not yet IDF-weighted) for many jobs.
+
+    The batch is split into words in one pass and each word costs one dict lookup;
+    bigrams, field weights and counting are NumPy over the whole batch, ending in
+    one sort of (row, bucket) keys.
+    """
+    if not jobs:
+        return []
+    fields = [field for field, _ in JOB_FIELD_WEIGHTS]
+    text = " \0 ".join(str(job.get(field) or "").replace("\0", " ") for job in jobs for field in fields)
+    words = text.encode("utf-8", "replace").translate(_WORD_BYTES).split()
+    words.append(FIELD_END)
+    hashes = _hash_words(words)
+
+    # Segment n is field n % len(fields) of job n // len(fields); bigrams stay inside one
+    keep = hashes >= 0
+    segments = np.cumsum(hashes == -2)[keep]
+    hashes = hashes[keep]
+    row_base = segments // len(fields) * dim
+    same_segment = segments[1:] == segments[:-1]
+    bigrams = ((hashes[:-1] * BIGRAM_MULTIPLIER) >> BIGRAM_SHIFT) ^ hashes[1:]
+    keys = np.concatenate([row_base + hashes % dim, (row_base[:-1] + bigrams % dim)[same_segment]])
+
+    # A field weighted w counts each of its keys w times
+    field_of = segments % len(fields)
+    field_of = np.concatenate([field_of, field_of[:-1][same_segment]])
+    extra = [keys[field_of == n] for n, (_, weight) in enumerate(JOB_FIELD_WEIGHTS) for _ in range(weight - 1)]
+    keys = np.sort(np.concatenate([keys, *extra]))
+    starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]])) if len(keys) else keys
+    counts = np.diff(np.append(starts, len(keys)))
+    keys = keys[starts]
+
+    # Slices of two batch-wide arrays: holding any one job's vector keeps the batch's
+    # arrays alive, but together they are no larger than the vectors themselves
+    bounds = np.searchsorted(keys // dim, np.arange(1, len(jobs)))
+    indices = np.split((keys % dim).astype(np.int32), bounds)
+    values = np.split(np.log1p(counts).astype(np.float32), bounds)
+    return list(zip(indices, values))
+
+
+def job_text_counts(job: Dict, dim: int) -> SparseVector:
+    """Hashed, log-scaled term counts for one job (not yet IDF-weighted), as (buckets, values)."""
+    return batch_text_counts([job], dim)[0]
+
+
+def to_dense(vector: SparseVector, dim: int) -> np.ndarray:
+    dense = np.zeros(dim, dtype=np.float32)
+    dense[vector[0]] = vector[1]
+    return dense
+
+
+def to_sparse(dense: np.ndarray) -> SparseVector:
+    indices = np.flatnonzero(dense).astype(np.int32)
+    return indices, dense[indices].astype(np.float32)
+
+
+def profile_text(profile: Dict) -> str:
+    """Flatten an analyze_resume profile into the text that jobs are scored against."""
+    skills = profile.get("key_skills") or []
+    directions = profile.get("possible_directions") or []
+    # Skills and directions are what the candidate is looking for; count them twice
+    return " ".join([*skills, *skills, *directions, *directions, profile.get("summary") or ""])
+
+
+class ChromaVectorStore:
+    """
+    Optional persistent store for job vectors, backed by a chromadb collection.
+
+    The collection name carries the hashing scheme's version, so vectors bucketed
+    another way are never read back.
+    """
+
+    def __init__(self, path: str, collection: str = "job_vectors_v2"):
+        import chromadb
+
+        self.client = chromadb.PersistentClient(path=path)
+        self.collection = self.client.get_or_create_collection(collection, metadata={"hnsw:space": "cosine"})
+
+    def get(self, ids: List[str], dim: int) -> Dict[str, SparseVector]:
+        found = self.collection.get(ids=ids, include=["embeddings"])
+        return {
+            job_id: to_sparse(np.asarray(embedding, dtype=np.float32))
+            for job_id, embedding in zip(found["ids"], found["embeddings"] or [])
+            if len(embedding) == dim
+        }
+
+    def put(self, vectors: Dict[str, SparseVector], dim: int):
+        if vectors:
+            self.collection.upsert(
+                ids=list(vectors),
+                embeddings=[to_dense(vector, dim).tolist() for vector in vectors.values()],
+            )
+
+
+class JobRanker:
+    """Scores and re-orders job lists against a candidate profile."""
+
+    def __init__(self, dim: int = 4096, cache_size: int = 20000, cache_ttl: float = 86400.0, store=None):
+        self.dim = dim
+        self.vectors = TTLCache(max_entries=cache_size, ttl=cache_ttl)
+        self.store = store
+        self._stats = {"ranked_batches": 0, "jobs_scored": 0, "embedded": 0, "store_hits": 0, "last_ms": None}
+
+    @classmethod
+    def from_env(cls) -> "JobRanker":
+        store = None
+        path = os.getenv("RANKING_CHROMA_PATH", "")
+        if path:
+            try:
+                store = ChromaVectorStore(path)
+            except Exception as e:
+                # chromadb is heavy and version-sensitive; ranking works without it
+                print(f"WARNING: chromadb vector store unavailable, using in-memory cache only: {e}")
+        return cls(
+            dim=int(os.getenv("RANKING_DIM", "4096")),
+            cache_size=int(os.getenv("RANKING_VECTOR_CACHE_SIZE", "20000")),
+            store=store,
+        )
+
+    def job_vectors(self, jobs: List[Dict]) -> List[SparseVector]:
+        """Count vectors for a batch, embedding only jobs not seen before."""
+        vectors: List[SparseVector] = [None] * len(jobs)
+        missing = []
+        for row, job in enumerate(jobs):
+            job_id = job.get("id")
+            cached = self.vectors.get(str(job_id)) if job_id else None
+            if cached is not None:
+                vectors[row] = cached
+            else:
+                missing.append(row)
+
+        if missing and self.store is not None:
+            ids = [str(jobs[row]["id"]) for row in missing if jobs[row].get("id")]
+            stored = self.store.get(ids, self.dim) if ids else {}
+            still_missing = []
+            for row in missing:
+                vector = stored.get(str(jobs[row].get("id")))
+                if vector is not None:
+                    vectors[row] = vector
+                    self.vectors.set(str(jobs[row]["id"]), vector)
+                    self._stats["store_hits"] += 1
+                else:
+                    still_missing.append(row)
+            missing = still_missing
+
+        new_vectors = {}
+        counted = batch_text_counts([jobs[row] for row in missing], self.dim) if missing else []
+        for row, vector in zip(missing, counted):
+            vectors[row] = vector
+            job_id = jobs[row].get("id")
+            if job_id:
+                self.vectors.set(str(job_id), vectors[row])
+                new_vectors[str(job_id)] = vectors[row]
+        self._stats["embedded"] += len(missing)
+        if new_vectors and self.store is not None:
+            self.store.put(new_vectors, self.dim)
+        return vectors
+
+    def score(self, jobs: List[Dict], profile: Dict) -> np.ndarray:
+        """
+        Cosine similarity of every job to the profile.
+
+        The batch is laid out as one flat (row, bucket, value) array, so IDF weights,
+        norms and dot products are each a single vectorized pass over all jobs.
+        """
+        if not jobs:
+            return np.zeros(0, dtype=np.float32)
+        vectors = self.job_vectors(jobs)
+        rows = np.repeat(np.arange(len(jobs)), [len(v[0]) for v in vectors])
+        buckets = np.concatenate([v[0] for v in vectors])
+        values = np.concatenate([v[1] for v in vectors])
+        query = to_dense(job_text_counts({"title": profile_text(profile)}, self.dim), self.dim)
+
+        # Smoothed IDF over this batch plus the profile
+        document_freq = np.bincount(buckets, minlength=self.dim) + (query > 0)
+        idf = (np.log((len(jobs) + 2) / (document_freq + 1)) + 1).astype(np.float32)
+
+        weighted = values * idf[buckets]
+        query = query * idf
+        dots = np.bincount(rows, weights=weighted * query[buckets], minlength=len(jobs))
+        norms = np.sqrt(np.bincount(rows, weights=weighted * weighted, minlength=len(jobs)))
+        norms *= np.linalg.norm(query) or 1.0
+        norms[norms == 0] = 1.0
+        return dots / norms
+
+    def rank(self, jobs: List[Dict], profile: Dict) -> List[Dict]:
+        """
+        Return copies of the jobs sorted by relevance to the profile, best first.
+
+        Each job gets a "relevance" score in [0, 1]; ties keep the upstream order.
+        """
+        start = time.perf_counter()
+        scores = self.score(jobs, profile)
+        order = np.argsort(-scores, kind="stable")
+        ranked = [{**jobs[i], "relevance": round(float(scores[i]), 4)} for i in order]
+
+        self._stats["ranked_batches"] += 1
+        self._stats["jobs_scored"] += len(jobs)
+        self._stats["last_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return ranked
+
+    def embed(self, jobs: List[Dict]) -> int:
+        """
+        Count vectors for jobs ahead of ranking, e.g. as a search page arrives, so the
+        rank() that follows finds them cached. Returns how many were new.
+        """
+        embedded = self._stats["embedded"]
+        self.job_vectors([job for job in jobs if job.get("id")])
+        return self._stats["embedded"] - embedded
+
+    async def embed_async(self, jobs: List[Dict]) -> int:
+        """embed() off the event loop when a persistent store makes it do blocking I/O."""
+        if self.store is None:
+            return self.embed(jobs)
+        return await asyncio.to_thread(self.embed, jobs)
+
+    async def rank_async(self, jobs: List[Dict], profile: Dict) -> List[Dict]:
+        """rank() off the event loop when a persistent store makes it do blocking I/O."""
+        if self.store is None:
+            return self.rank(jobs, profile)
+        return await asyncio.to_thread(self.rank, jobs, profile)
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "dim": self.dim,
+            "persistent_store": self.store is not None,
+            "vector_cache": self.vectors.stats(),
+        }
+
+
+# Singleton instance
+job_ranker = JobRanker.from_env()
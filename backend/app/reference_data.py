@@ -0,0 +1,364 @@
+import os
+import json
+import time
+import asyncio
+import threading
+import unicodedata
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# Reference data shipped with the app; refreshed copies are written under REFERENCE_DATA_DIR
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+DEFAULT_GAZETTEER = os.path.join(DATA_DIR, "gazetteer_ca.tsv")
+
+REMOTE_FORMS = {
+    "remote", "remotely", "fully remote", "remote only", "remote work", "work from home",
+    "working from home", "wfh", "home based", "home-based", "telecommute", "anywhere",
+}
+
+# Trailing words that do not change what a search is for ("python developer jobs")
+GENERIC_JOB_WORDS = {
+    "job", "jobs", "role", "roles", "position", "positions", "opening", "openings",
+    "vacancy", "vacancies", "opportunity", "opportunities", "posting", "postings",
+}
+
+# A final "s" is dropped from words ending in these ("developers" -> "developer")
+SINGULAR_ENDINGS = (
+    "er", "or", "ist", "yst", "ian", "ant", "ent", "eer", "ect", "ive", "nurse", "aide", "clerk", "cook", "chef", "lead",
+)
+
+
+def place_key(text: str) -> str:
+    """Lookup form of a place name: lower case, no accents or periods, commas as spaces."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.lower().replace(".", "").replace(",", " ").split())
+
+
+# ─── Gazetteer ────────────────────────────────────────────────────────────────
+
+class Place:
+    __slots__ = ("name", "province", "kind")
+
+    def __init__(self, name: str, province: str, kind: str):
+        self.name = name
+        self.province = province
+        self.kind = kind
+
+
+class Gazetteer:
+    """
+    Canadian place names and their aliases, read from a TSV file.
+
+    The file is read on first use rather than at import, so starting the app costs
+    nothing; ReferenceData warms it off the event loop at startup and reloads it
+    when the file changes. A reload builds new tables and swaps them in whole.
+    """
+
+    def __init__(self, path: str = DEFAULT_GAZETTEER):
+        self.path = path
+        self._places: Optional[Dict[str, Place]] = None
+        self._codes: Dict[str, Place] = {}
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+        self.load_ms: Optional[float] = None
+
+    def load(self):
+        start = time.perf_counter()
+        places: Dict[str, Place] = {}
+        codes: Dict[str, Place] = {}
+        mtime = os.path.getmtime(self.path)
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                name, province, kind, aliases = (line.rstrip("\n").split("\t") + [""] * 4)[:4]
+                place = Place(name, province, kind)
+                for alias in [name, *aliases.split("|")]:
+                    # The first (largest) place keeps a shared name
+                    places.setdefault(place_key(alias), place)
+                if kind == "province":
+                    codes[province.lower()] = place
+        self._places, self._codes, self._mtime = places, codes, mtime
+        self.load_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    def _tables(self) -> Dict[str, Place]:
+        if self._places is None:
+            with self._lock:
+                if self._places is None:
+                    self.load()
+        return self._places
+
+    def reload_if_changed(self) -> bool:
+        try:
+            changed = os.path.getmtime(self.path) != self._mtime
+        except OSError:
+            return False
+        if changed:
+            with self._lock:
+                self.load()
+        return changed
+
+    def lookup(self, phrase: str) -> Optional[Place]:
+        return self._tables().get(place_key(phrase))
+
+    def province(self, code: str) -> Optional[Place]:
+        """A province or territory by its two-letter code ("ON", "bc")."""
+        self._tables()
+        return self._codes.get(place_key(code))
+
+    def canonical(self, where: str) -> Optional[str]:
+        """
+        Canonical name for a free-form location, or None if it is not a known place.
+
+        "toronto, ON", "Toronto Ontario", "the GTA" and "Toronto, Canada" are all
+        "Toronto"; "BC" is "British Columbia"; work-from-home phrasings are "remote".
+        A province that contradicts the place ("Windsor, NS") is not resolved.
+        """
+        places = self._tables()
+        words = place_key(where).split()
+        if words and words[0] == "the":
+            words = words[1:]
+        if len(words) > 1 and "canada" in (words[0], words[-1]):
+            words = words[1:] if words[0] == "canada" else words[:-1]
+        text = " ".join(words)
+        if not text:
+            return None
+        if text in REMOTE_FORMS:
+            return "remote"
+        if text in self._codes:
+            return self._codes[text].name
+
+        province = None
+        if len(words) > 1 and words[-1] in self._codes:
+            province, words = self._codes[words[-1]], words[:-1]
+        else:
+            for size in (3, 2, 1):
+                tail = places.get(" ".join(words[-size:])) if len(words) > size else None
+                if tail is not None and tail.kind == "province":
+                    province, words = tail, words[:-size]
+                    break
+
+        place = places.get(" ".join(words))
+        if place is None:
+            return None
+        if province is not None and place.kind != "province" and place.province != province.province:
+            return None
+        return place.name
+
+    def __len__(self) -> int:
+        return len(self._tables())
+
+    def stats(self) -> Dict:
+        return {
+            "path": self.path,
+            "loaded": self._places is not None,
+            "names": len(self._places) if self._places is not None else None,
+            "load_ms": self.load_ms,
+        }
+
+
+# ─── Query Normalization ──────────────────────────────────────────────────────
+
+def normalize_what(what: str) -> str:
+    """
+    Canonical search keywords: lower case, single spaces, no trailing "jobs"/"roles",
+    and a plural job title made singular ("Python Developers jobs" -> "python developer").
+    """
+    words = " ".join((what or "").lower().split()).strip(" \"'!?,;:").split()
+    while len(words) > 1 and words[-1] in GENERIC_JOB_WORDS:
+        words.pop()
+    if words and len(words[-1]) > 3 and words[-1].endswith("s") and words[-1][:-1].endswith(SINGULAR_ENDINGS):
+        words[-1] = words[-1][:-1]
+    return " ".join(words)
+
+
+class QueryNormalizer:
+    """Rewrites what/where into canonical keys before a search, counting the rewrites."""
+
+    def __init__(self, gazetteer: Gazetteer, enabled: bool = True):
+        self.gazetteer = gazetteer
+        self.enabled = enabled
+        self._stats = {"queries": 0, "what_rewritten": 0, "where_rewritten": 0, "where_unknown": 0}
+
+    def normalize_where(self, where: str) -> str:
+        """The gazetteer's name for a known place; anything else with whitespace tidied."""
+        cleaned = " ".join((where or "").split()).strip(" ,.")
+        return self.gazetteer.canonical(cleaned) or cleaned
+
+    def normalize(self, what: str, where: str, count: bool = True):
+        """(what, where) as searched; count=False for callers only building a cache key."""
+        if not self.enabled:
+            return what, where
+        canonical_what = normalize_what(what)
+        canonical_where = self.normalize_where(where)
+        if not count:
+            return canonical_what, canonical_where
+        self._stats["queries"] += 1
+        if canonical_what != what:
+            self._stats["what_rewritten"] += 1
+        if canonical_where != where:
+            self._stats["where_rewritten"] += 1
+        if canonical_where and self.gazetteer.canonical(canonical_where) is None:
+            self._stats["where_unknown"] += 1
+        return canonical_what, canonical_where
+
+    def stats(self) -> Dict:
+        return {"enabled": self.enabled, **self._stats}
+
+
+# ─── Categories Snapshot ──────────────────────────────────────────────────────
+
+class CategorySnapshot:
+    """
+    Adzuna's category list for one country, kept on disk.
+
+    Reads the refreshed copy under directory if there is one, else the snapshot
+    shipped in app/data. save() writes atomically, so a reader never sees half a file.
+    """
+
+    def __init__(self, country: str, directory: str):
+        self.country = country
+        self.path = os.path.join(directory, f"categories_{country}.json") if directory else ""
+        self.shipped_path = os.path.join(DATA_DIR, f"categories_{country}.json")
+        self.results: Optional[List[Dict]] = None
+        self.fetched_at: Optional[float] = None
+        self.source: Optional[str] = None
+        self._loaded = False
+
+    def load(self) -> Optional[List[Dict]]:
+        if not self._loaded:
+            self._loaded = True
+            for source, path in (("refreshed", self.path), ("shipped", self.shipped_path)):
+                if not path or not os.path.exists(path):
+                    continue
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        snapshot = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"WARNING: ignoring unreadable categories snapshot {path}: {e}")
+                    continue
+                self.results, self.fetched_at, self.source = snapshot["results"], snapshot["fetched_at"], source
+                break
+        return self.results
+
+    def age(self) -> Optional[float]:
+        self.load()
+        return None if self.fetched_at is None else time.time() - self.fetched_at
+
+    def save(self, results: List[Dict]):
+        self.results, self.fetched_at, self.source, self._loaded = results, time.time(), "refreshed", True
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"country": self.country, "fetched_at": self.fetched_at, "results": results}, f)
+        os.replace(tmp, self.path)
+
+    def stats(self) -> Dict:
+        age = self.age()
+        return {
+            "source": self.source,
+            "categories": len(self.results) if self.results is not None else None,
+            "age_seconds": round(age) if age is not None else None,
+        }
+
+
+# ─── Service ──────────────────────────────────────────────────────────────────
+
+class ReferenceData:
+    """
+    Slow-changing lookup data: the location gazetteer and Adzuna's category lists.
+
+    Both load lazily from disk, so startup does no I/O on the event loop. start()
+    runs a background loop that warms the gazetteer in a thread, reloads it when
+    the file changes, and refetches category snapshots older than categories_max_age
+    through the fetch callback; a failed fetch keeps the snapshot it has.
+    """
+
+    def __init__(
+        self,
+        gazetteer: Gazetteer,
+        directory: str = "database/reference",
+        refresh_interval: float = 3600.0,
+        categories_max_age: float = 7 * 86400.0,
+        normalize_queries: bool = True,
+    ):
+        self.gazetteer = gazetteer
+        self.directory = directory
+        self.refresh_interval = refresh_interval
+        self.categories_max_age = categories_max_age
+        self.normalizer = QueryNormalizer(gazetteer, enabled=normalize_queries)
+        self._snapshots: Dict[str, CategorySnapshot] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"refreshes": 0, "refresh_errors": 0, "gazetteer_reloads": 0}
+
+    @classmethod
+    def from_env(cls) -> "ReferenceData":
+        return cls(
+            Gazetteer(os.getenv("GAZETTEER_PATH", DEFAULT_GAZETTEER)),
+            directory=os.getenv("REFERENCE_DATA_DIR", "database/reference"),
+            refresh_interval=float(os.getenv("REFERENCE_REFRESH_SECONDS", "3600")),
+            categories_max_age=float(os.getenv("CATEGORIES_MAX_AGE", str(7 * 86400))),
+            normalize_queries=os.getenv("QUERY_NORMALIZATION", "true").lower() in ("1", "true", "yes"),
+        )
+
+    def categories(self, country: str) -> CategorySnapshot:
+        if country not in self._snapshots:
+            self._snapshots[country] = CategorySnapshot(country, self.directory)
+        return self._snapshots[country]
+
+    def categories_stale(self, country: str) -> bool:
+        age = self.categories(country).age()
+        return age is None or age > self.categories_max_age
+
+    async def refresh_categories(self, country: str, fetch: Callable[[str], Awaitable[List[Dict]]]) -> bool:
+        """Fetch and save one country's categories; an empty or failed fetch keeps the old snapshot."""
+        try:
+            results = await fetch(country)
+        except Exception as e:
+            results = None
+            print(f"WARNING: categories refresh for '{country}' failed: {e}")
+        if not results:
+            self._stats["refresh_errors"] += 1
+            return False
+        await asyncio.to_thread(self.categories(country).save, results)
+        self._stats["refreshes"] += 1
+        return True
+
+    # ─── Background Refresh ───────────────────────────────────────────────────
+
+    def start(self, fetch_categories: Callable[[str], Awaitable[List[Dict]]], countries=("ca",)):
+        if self.refresh_interval <= 0 or self._task is not None:
+            return
+        self._task = asyncio.ensure_future(self._run(fetch_categories, countries))
+
+    async def _run(self, fetch_categories, countries):
+        while True:
+            try:
+                if await asyncio.to_thread(self.gazetteer.reload_if_changed):
+                    self._stats["gazetteer_reloads"] += 1
+                for country in countries:
+                    if await asyncio.to_thread(self.categories_stale, country):
+                        await self.refresh_categories(country, fetch_categories)
+            except Exception as e:
+                print(f"WARNING: reference data refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    async def shutdown(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "gazetteer": self.gazetteer.stats(),
+            "categories": {country: snapshot.stats() for country, snapshot in self._snapshots.items()},
+            "normalizer": self.normalizer.stats(),
+        }
+
+
+# Singleton instance
+reference_data = ReferenceData.from_env()
@@ -0,0 +1,116 @@
+import gzip
+import importlib
+import importlib.util
+from typing import Optional
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+
+# ─── JSON ─────────────────────────────────────────────────────────────────────
+
+if importlib.util.find_spec("orjson") is not None:
+    import orjson
+
+    class FastJSONResponse(JSONResponse):
+        """JSONResponse rendered with orjson: several times faster on large job lists."""
+
+        def render(self, content) -> bytes:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+else:
+    print("WARNING: orjson is not installed; responses use the standard json encoder")
+    FastJSONResponse = JSONResponse
+
+# ─── Compression ──────────────────────────────────────────────────────────────
+
+brotli = importlib.import_module("brotli") if importlib.util.find_spec("brotli") is not None else None
+
+# Never compressed: events must reach the client as they are sent
+STREAMING_TYPES = ("text/event-stream", "application/x-ndjson")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Best of br (if the brotli package is installed) and gzip that the client accepts, by q-value."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name.strip():
+            accepted[name.strip().lower()] = q
+
+    offered = (["br"] if brotli is not None else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for encoding in offered:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware: gzip or brotli, negotiated per request from Accept-Encoding.
+
+    Only complete responses (a single body message) of at least minimum_size bytes
+    are compressed. Streaming responses pass through untouched, so SSE tokens and
+    NDJSON lines are not held back in a compressor buffer.
+    """
+
+    def __init__(self, app, minimum_size: int = 1000, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        pending = None
+
+        async def send_compressed(message):
+            nonlocal pending
+            if message["type"] == "http.response.start":
+                # Held until the first body message shows whether the response is complete
+                pending = message
+                return
+            if message["type"] != "http.response.body" or pending is None:
+                await send(message)
+                return
+
+            start, pending = pending, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=list(start.get("headers", [])))
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or "content-encoding" in headers
+                or headers.get("content-type", "").startswith(STREAMING_TYPES)
+            ):
+                await send(start)
+                await send(message)
+                return
+
+            compressed = self.compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send({**start, "headers": headers.raw})
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
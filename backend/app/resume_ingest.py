@@ -0,0 +1,257 @@
+import os
+import asyncio
+import hashlib
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Dict, Optional, Tuple
+from starlette.datastructures import Headers, UploadFile
+from starlette.formparsers import MultiPartParser
+from app.cache import SingleFlight, TTLCache
+from app.claude_service import ClaudeService, claude_service
+
+CHUNK_SIZE = 256 * 1024
+# Room for the multipart boundaries and part headers on top of the file itself
+FORM_OVERHEAD = 64 * 1024
+MIN_RESUME_CHARS = 100
+
+
+class ResumeRejected(Exception):
+    """The upload is not a resume we can read; status_code is the HTTP status to answer with."""
+
+    def __init__(self, detail: str, status_code: int = 400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+    def __reduce__(self):
+        # Keep status_code when raised in a worker process
+        return type(self), (self.detail, self.status_code)
+
+
+def extract_pdf_text(path: str, max_pages: int) -> Tuple[str, int]:
+    """
+    Extract the text of a PDF. Runs in a worker process, so it must stay a
+    top-level function with picklable arguments and results.
+
+    Returns:
+        (text, page count)
+
+    Raises:
+        ResumeRejected: for encrypted, malformed or over-long PDFs
+    """
+    from pypdf import PdfReader
+    from pypdf.errors import PdfReadError
+
+    try:
+        reader = PdfReader(path)
+        if reader.is_encrypted and not reader.decrypt(""):
+            raise ResumeRejected("This PDF is password protected.")
+        pages = len(reader.pages)
+        if pages > max_pages:
+            raise ResumeRejected(f"Resumes are limited to {max_pages} pages (this one has {pages}).", 413)
+        text = "\n".join(page.extract_text() or "" for page in reader.pages)
+    except ResumeRejected:
+        raise
+    except (PdfReadError, ValueError, KeyError, TypeError) as e:
+        raise ResumeRejected(f"Could not read this PDF: {e}") from None
+    return text.strip(), pages
+
+
+class ResumeIngestService:
+    """
+    Turns uploaded PDF resumes into text and a candidate profile.
+
+    The multipart body is parsed as it streams in and the file part is written to
+    disk in chunks, so an upload never sits in memory whole and an oversized one
+    is cut off as soon as it crosses the limit. Text extraction is CPU-bound and
+    runs in a process pool instead of on the event loop. Both the extracted text
+    and the analyze_resume profile are cached by the file's SHA-256.
+    """
+
+    def __init__(
+        self,
+        claude: ClaudeService,
+        upload_dir: Optional[str] = None,
+        max_bytes: int = 5 * 1024 * 1024,
+        max_pages: int = 10,
+        workers: int = 2,
+        cache_size: int = 1000,
+        cache_ttl: float = 86400.0,
+    ):
+        self.claude = claude
+        self.upload_dir = upload_dir or os.path.join(tempfile.gettempdir(), "jobsfinder-uploads")
+        self.max_bytes = max_bytes
+        self.max_pages = max_pages
+        self.workers = workers
+        self.texts = TTLCache(max_entries=cache_size, ttl=cache_ttl)
+        self.profiles = TTLCache(max_entries=cache_size, ttl=cache_ttl)
+        self._extracting = SingleFlight()
+        self._analyzing = SingleFlight()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._stats = {"uploads": 0, "rejected": 0, "extractions": 0, "analyses": 0, "extract_ms": 0.0}
+
+    @classmethod
+    def from_env(cls, claude: ClaudeService) -> "ResumeIngestService":
+        return cls(
+            claude,
+            upload_dir=os.getenv("RESUME_UPLOAD_DIR") or None,
+            max_bytes=int(float(os.getenv("RESUME_MAX_UPLOAD_MB", "5")) * 1024 * 1024),
+            max_pages=int(os.getenv("RESUME_MAX_PAGES", "10")),
+            workers=int(os.getenv("RESUME_EXTRACT_WORKERS", "2")),
+            cache_size=int(os.getenv("RESUME_CACHE_SIZE", "1000")),
+            cache_ttl=float(os.getenv("RESUME_CACHE_TTL", "86400")),
+        )
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    # ─── Upload ───────────────────────────────────────────────────────────────
+
+    async def _limited(self, stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        received = 0
+        async for chunk in stream:
+            received += len(chunk)
+            if received > self.max_bytes + FORM_OVERHEAD:
+                raise ResumeRejected(f"Resumes are limited to {self.max_bytes // (1024 * 1024)} MB.", 413)
+            yield chunk
+
+    async def receive(self, headers: Headers, stream: AsyncIterator[bytes]) -> Tuple[str, str]:
+        """
+        Read a multipart upload with a "file" part and store it under upload_dir.
+
+        Returns:
+            (path of the stored file, SHA-256 of its contents)
+        """
+        if not headers.get("content-type", "").startswith("multipart/form-data"):
+            raise ResumeRejected("Upload the resume as multipart/form-data with a 'file' field.")
+        content_length = headers.get("content-length")
+        if content_length and int(content_length) > self.max_bytes + FORM_OVERHEAD:
+            raise ResumeRejected(f"Resumes are limited to {self.max_bytes // (1024 * 1024)} MB.", 413)
+
+        form = await MultiPartParser(headers, self._limited(stream), max_files=1, max_fields=5).parse()
+        try:
+            upload = form.get("file")
+            if not isinstance(upload, UploadFile):
+                raise ResumeRejected("Upload the resume as multipart/form-data with a 'file' field.")
+            return await self._store(upload)
+        finally:
+            await form.close()
+
+    async def _store(self, upload: UploadFile) -> Tuple[str, str]:
+        os.makedirs(self.upload_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.NamedTemporaryFile(dir=self.upload_dir, suffix=".pdf", delete=False) as f:
+            try:
+                while chunk := await upload.read(CHUNK_SIZE):
+                    if size == 0 and not chunk.startswith(b"%PDF-"):
+                        raise ResumeRejected("Only PDF resumes are supported.", 415)
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ResumeRejected(f"Resumes are limited to {self.max_bytes // (1024 * 1024)} MB.", 413)
+                    digest.update(chunk)
+                    await asyncio.to_thread(f.write, chunk)
+                if size == 0:
+                    raise ResumeRejected("The uploaded file is empty.")
+            except BaseException:
+                f.close()
+                os.unlink(f.name)
+                raise
+        return f.name, digest.hexdigest()
+
+    # ─── Extraction and analysis ──────────────────────────────────────────────
+
+    async def extract(self, path: str, file_hash: str) -> Tuple[Dict, bool]:
+        """
+        Extract text from a stored upload (deleting it afterwards).
+
+        Returns:
+            ({"resume_text", "pages"}, whether it came from the cache)
+        """
+        try:
+            cached = self.texts.get(file_hash)
+            if cached is not None:
+                return cached, True
+            return await self._extracting.run(file_hash, lambda: self._extract(path, file_hash)), False
+        finally:
+            await asyncio.to_thread(_remove, path)
+
+    async def _extract(self, path: str, file_hash: str) -> Dict:
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        text, pages = await loop.run_in_executor(self._executor(), extract_pdf_text, path, self.max_pages)
+        self._stats["extractions"] += 1
+        self._stats["extract_ms"] += (time.perf_counter() - start) * 1000
+        if len(text) < MIN_RESUME_CHARS:
+            raise ResumeRejected("No text found in this PDF. Scanned resumes are not supported yet; try pasting the text.")
+        result = {"resume_text": text, "pages": pages}
+        self.texts.set(file_hash, result)
+        return result
+
+    async def analyze(self, file_hash: str, text: str) -> Tuple[Dict, bool]:
+        """analyze_resume for an uploaded file, cached by its content hash."""
+        cached = self.profiles.get(file_hash)
+        if cached is not None:
+            return cached, True
+        return await self._analyzing.run(file_hash, lambda: self._analyze(file_hash, text)), False
+
+    async def _analyze(self, file_hash: str, text: str) -> Dict:
+        self._stats["analyses"] += 1
+        result = await self.claude.analyze_resume(text)
+        self.profiles.set(file_hash, result)
+        return result
+
+    async def ingest(self, headers: Headers, stream: AsyncIterator[bytes], analyze: bool = True) -> Dict:
+        """
+        Upload, extract and (optionally) analyze a PDF resume.
+
+        Returns the analyze_resume result (when analyze is set) plus resume_text,
+        pages, file_hash and which steps were served from the cache.
+        """
+        self._stats["uploads"] += 1
+        try:
+            path, file_hash = await self.receive(headers, stream)
+            extracted, text_cached = await self.extract(path, file_hash)
+        except ResumeRejected:
+            self._stats["rejected"] += 1
+            raise
+        result = {**extracted, "file_hash": file_hash, "cached": {"text": text_cached}}
+        if analyze:
+            result = await self.add_analysis(result)
+        return result
+
+    async def add_analysis(self, upload: Dict) -> Dict:
+        """An ingest(analyze=False) result with the analyze_resume result merged in."""
+        analysis, profile_cached = await self.analyze(upload["file_hash"], upload["resume_text"])
+        return {**analysis, **upload, "cached": {**upload["cached"], "profile": profile_cached}}
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict:
+        extractions = self._stats["extractions"]
+        return {
+            **{k: v for k, v in self._stats.items() if k != "extract_ms"},
+            "avg_extract_ms": round(self._stats["extract_ms"] / extractions, 1) if extractions else None,
+            "workers": self.workers,
+            "max_bytes": self.max_bytes,
+            "max_pages": self.max_pages,
+            "text_cache": self.texts.stats(),
+            "profile_cache": self.profiles.stats(),
+        }
+
+
+def _remove(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+# Singleton instance
+resume_ingest_service = ResumeIngestService.from_env(claude_service)
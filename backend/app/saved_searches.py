@@ -0,0 +1,415 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import aiosqlite
+from typing import Dict, Iterable, List, Optional
+from app.adzuna_service import AdzunaService, adzuna_service
+from app.cache import open_sqlite
+from app.scheduler import BACKGROUND
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS saved_searches (
+        id TEXT PRIMARY KEY,
+        what TEXT NOT NULL,
+        location TEXT NOT NULL,
+        country TEXT NOT NULL,
+        interval_seconds REAL NOT NULL,
+        created_at REAL NOT NULL,
+        next_poll_at REAL NOT NULL,
+        last_polled_at REAL,
+        last_checked_at REAL,
+        newest_created TEXT,
+        polls INTEGER NOT NULL DEFAULT 0,
+        upstream_requests INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS saved_searches_due ON saved_searches(next_poll_at)",
+    """CREATE TABLE IF NOT EXISTS seen_jobs (
+        search_id TEXT NOT NULL,
+        job_id TEXT NOT NULL,
+        first_seen REAL NOT NULL,
+        PRIMARY KEY (search_id, job_id)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS new_jobs (
+        search_id TEXT NOT NULL,
+        job_id TEXT NOT NULL,
+        found_at REAL NOT NULL,
+        job TEXT NOT NULL,
+        PRIMARY KEY (search_id, job_id)
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS new_jobs_found ON new_jobs(search_id, found_at)",
+]
+
+# How long a worker holds a claimed search before another worker may poll it
+CLAIM_SECONDS = 600.0
+
+SEARCH_COLUMNS = [
+    "id", "what", "location", "country", "interval_seconds", "created_at", "next_poll_at",
+    "last_polled_at", "last_checked_at", "newest_created", "polls", "upstream_requests", "last_error",
+]
+
+
+def stagger(search_id: str, interval: float) -> float:
+    """Fixed offset within the interval, so searches saved together do not poll together."""
+    return (int(search_id[:8], 16) / 0xFFFFFFFF) * interval
+
+
+class SavedSearchStore:
+    """SQLite storage for saved searches, the job ids each has seen, and new-job deltas."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db: Optional[aiosqlite.Connection] = None
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["SavedSearchStore"]:
+        path = os.getenv("SAVED_SEARCH_DB", "database/saved_searches.db")
+        return cls(path) if path else None
+
+    async def _connect(self) -> aiosqlite.Connection:
+        async with self._lock:
+            if self._db is None:
+                self._db = await open_sqlite(self.path)
+                self._db.row_factory = aiosqlite.Row
+                for statement in SCHEMA:
+                    await self._db.execute(statement)
+                await self._db.commit()
+        return self._db
+
+    async def close(self):
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+    # ─── Saved searches ───────────────────────────────────────────────────────
+
+    async def create(self, what: str, where: str, country: str, interval: float) -> Dict:
+        db = await self._connect()
+        search_id = uuid.uuid4().hex
+        now = time.time()
+        await db.execute(
+            """INSERT INTO saved_searches (id, what, location, country, interval_seconds, created_at, next_poll_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            # The first poll records a baseline right away; later ones follow the staggered cadence
+            (search_id, what, where, country, interval, now, now),
+        )
+        await db.commit()
+        return await self.get(search_id)
+
+    async def get(self, search_id: str) -> Optional[Dict]:
+        db = await self._connect()
+        async with db.execute(
+            f"SELECT {', '.join(SEARCH_COLUMNS)} FROM saved_searches WHERE id = ?", (search_id,)
+        ) as cursor:
+            row = await cursor.fetchone()
+        return dict(row) if row else None
+
+    async def list(self) -> List[Dict]:
+        db = await self._connect()
+        async with db.execute(f"SELECT {', '.join(SEARCH_COLUMNS)} FROM saved_searches ORDER BY created_at") as cursor:
+            return [dict(row) for row in await cursor.fetchall()]
+
+    async def count(self) -> int:
+        db = await self._connect()
+        async with db.execute("SELECT COUNT(*) FROM saved_searches") as cursor:
+            return (await cursor.fetchone())[0]
+
+    async def delete(self, search_id: str) -> bool:
+        db = await self._connect()
+        cursor = await db.execute("DELETE FROM saved_searches WHERE id = ?", (search_id,))
+        await db.execute("DELETE FROM seen_jobs WHERE search_id = ?", (search_id,))
+        await db.execute("DELETE FROM new_jobs WHERE search_id = ?", (search_id,))
+        await db.commit()
+        return cursor.rowcount > 0
+
+    async def due(self, now: float, limit: int) -> List[Dict]:
+        db = await self._connect()
+        async with db.execute(
+            f"""SELECT {', '.join(SEARCH_COLUMNS)} FROM saved_searches
+                WHERE next_poll_at <= ? ORDER BY next_poll_at LIMIT ?""",
+            (now, limit),
+        ) as cursor:
+            return [dict(row) for row in await cursor.fetchall()]
+
+    async def claim(self, search: Dict, now: float) -> bool:
+        """
+        Take a due search for this worker by moving its next poll past the claim window.
+
+        Only one worker's update matches the next_poll_at it read, so each poll runs once
+        however many workers share the database.
+        """
+        db = await self._connect()
+        cursor = await db.execute(
+            "UPDATE saved_searches SET next_poll_at = ? WHERE id = ? AND next_poll_at = ?",
+            (now + CLAIM_SECONDS, search["id"], search["next_poll_at"]),
+        )
+        await db.commit()
+        return cursor.rowcount == 1
+
+    async def next_due_at(self) -> Optional[float]:
+        db = await self._connect()
+        async with db.execute("SELECT MIN(next_poll_at) FROM saved_searches") as cursor:
+            return (await cursor.fetchone())[0]
+
+    # ─── Poll results ─────────────────────────────────────────────────────────
+
+    async def known_ids(self, search_id: str, job_ids: List[str]) -> set:
+        if not job_ids:
+            return set()
+        db = await self._connect()
+        placeholders = ",".join("?" * len(job_ids))
+        async with db.execute(
+            f"SELECT job_id FROM seen_jobs WHERE search_id = ? AND job_id IN ({placeholders})",
+            [search_id, *job_ids],
+        ) as cursor:
+            return {row[0] for row in await cursor.fetchall()}
+
+    async def record_poll(
+        self,
+        search: Dict,
+        seen: Iterable[Dict],
+        new: List[Dict],
+        requests: int,
+        error: Optional[str],
+        next_poll_at: float,
+        retention: float,
+    ):
+        """
+        Store one poll: every job id seen, the new jobs, and the next poll time.
+        Returns how many of the new jobs were not already stored.
+        """
+        db = await self._connect()
+        now = time.time()
+        seen = list(seen)
+        await db.executemany(
+            "INSERT OR IGNORE INTO seen_jobs (search_id, job_id, first_seen) VALUES (?, ?, ?)",
+            [(search["id"], str(job["id"]), now) for job in seen],
+        )
+        inserted = await db.executemany(
+            "INSERT OR IGNORE INTO new_jobs (search_id, job_id, found_at, job) VALUES (?, ?, ?, ?)",
+            [(search["id"], str(job["id"]), now, json.dumps(job)) for job in new],
+        )
+        newest = max([job["created"] for job in seen if job.get("created")] + [search["newest_created"] or ""])
+        # last_polled_at is the last successful poll; until there is one, the next poll is a baseline
+        await db.execute(
+            """UPDATE saved_searches SET
+                   next_poll_at = ?, last_polled_at = COALESCE(?, last_polled_at), newest_created = ?,
+                   polls = polls + 1, upstream_requests = upstream_requests + ?, last_error = ?
+               WHERE id = ?""",
+            (next_poll_at, None if error else now, newest or None, requests, error, search["id"]),
+        )
+        # Ids older than the retention window can only come back behind newest_created
+        await db.execute("DELETE FROM seen_jobs WHERE search_id = ? AND first_seen < ?", (search["id"], now - retention))
+        await db.execute("DELETE FROM new_jobs WHERE search_id = ? AND found_at < ?", (search["id"], now - retention))
+        await db.commit()
+        return max(inserted.rowcount, 0)
+
+    async def new_since(self, search_id: str, since: float) -> List[Dict]:
+        db = await self._connect()
+        async with db.execute(
+            "SELECT job FROM new_jobs WHERE search_id = ? AND found_at > ? ORDER BY found_at DESC",
+            (search_id, since),
+        ) as cursor:
+            return [json.loads(row[0]) for row in await cursor.fetchall()]
+
+    async def mark_checked(self, search_id: str, checked_at: float):
+        db = await self._connect()
+        await db.execute("UPDATE saved_searches SET last_checked_at = ? WHERE id = ?", (checked_at, search_id))
+        await db.commit()
+
+
+class SavedSearchPoller:
+    """
+    Polls saved searches in the background and keeps the jobs each has not seen yet.
+
+    Every search is polled once per interval, offset by a fixed per-search stagger.
+    A poll asks Adzuna for the newest jobs first and stops at the first page that
+    reaches a job id or created timestamp already seen, so a routine poll costs one
+    request. Polls use BACKGROUND scheduler priority.
+    """
+
+    def __init__(
+        self,
+        adzuna: AdzunaService,
+        store: Optional[SavedSearchStore],
+        interval: float = 3600.0,
+        tick: float = 30.0,
+        max_pages: int = 5,
+        per_page: int = 50,
+        batch: int = 10,
+        max_searches: int = 1000,
+        retention: float = 14 * 86400,
+        enabled: bool = True,
+    ):
+        self.adzuna = adzuna
+        self.store = store
+        self.interval = interval
+        self.tick = tick
+        self.max_pages = max_pages
+        self.per_page = per_page
+        self.batch = batch
+        self.max_searches = max_searches
+        self.retention = retention
+        self.enabled = enabled and store is not None
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._stats = {"polls": 0, "upstream_requests": 0, "new_jobs": 0, "errors": 0, "incomplete": 0}
+
+    @classmethod
+    def from_env(cls, adzuna: AdzunaService) -> "SavedSearchPoller":
+        return cls(
+            adzuna,
+            SavedSearchStore.from_env(),
+            interval=float(os.getenv("SAVED_SEARCH_INTERVAL", "3600")),
+            tick=float(os.getenv("SAVED_SEARCH_TICK", "30")),
+            max_pages=int(os.getenv("SAVED_SEARCH_MAX_PAGES", "5")),
+            max_searches=int(os.getenv("SAVED_SEARCH_MAX", "1000")),
+            retention=float(os.getenv("SAVED_SEARCH_RETENTION_DAYS", "14")) * 86400,
+            enabled=os.getenv("SAVED_SEARCH_POLLING", "true").lower() == "true",
+        )
+
+    # ─── Lifecycle ────────────────────────────────────────────────────────────
+
+    def start(self):
+        """Start the polling loop. Called from the FastAPI lifespan."""
+        if self.enabled and self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def shutdown(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.store is not None:
+            await self.store.close()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll_due()
+                next_due = await self.store.next_due_at()
+            except Exception as e:
+                print(f"WARNING: saved search polling failed: {e}")
+                next_due = None
+            wait = self.tick if next_due is None else min(max(next_due - time.time(), 0.0), self.tick)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    # ─── Polling ──────────────────────────────────────────────────────────────
+
+    async def poll_due(self) -> int:
+        """Poll every saved search that is due, in batches. Returns how many were polled."""
+        polled = 0
+        while True:
+            due = await self.store.due(time.time(), self.batch)
+            if not due:
+                return polled
+            for search in due:
+                if not await self.store.claim(search, time.time()):
+                    continue  # another worker got there first
+                await self.poll(search)
+                polled += 1
+
+    async def poll(self, search: Dict) -> Dict:
+        """
+        Fetch a saved search's newest jobs down to the first one already seen.
+
+        The first poll of a search only records a baseline: the jobs it finds are
+        what the user saw when saving it, so none of them count as new.
+
+        A poll that stops before reaching a known job (an upstream error after the
+        first page, or max_pages used up) keeps the new jobs it found but does not
+        move the seen ids or newest_created forward. Otherwise the next poll would
+        stop at those ids and never read the pages this one missed.
+        """
+        baseline = search["last_polled_at"] is None
+        newest_created = search["newest_created"]
+        seen: List[Dict] = []
+        new: List[Dict] = []
+        requests = 0
+        error = None
+        complete = False
+
+        for page in range(1, (1 if baseline else self.max_pages) + 1):
+            result = await self.adzuna._fetch_jobs(
+                search["what"], search["location"], search["country"], self.per_page, page,
+                priority=BACKGROUND, sort_by="date",
+            )
+            requests += 1
+            if "error" in result:
+                error = result["error"]
+                break
+            jobs = [job for job in result["jobs"] if job.get("id")]
+            known = await self.store.known_ids(search["id"], [str(job["id"]) for job in jobs])
+            reached = False
+            for job in jobs:
+                older = newest_created and job.get("created") and job["created"] < newest_created
+                if str(job["id"]) in known or older:
+                    reached = True
+                    continue
+                seen.append(job)
+                if not baseline:
+                    new.append(job)
+            if reached or len(result["jobs"]) < self.per_page:
+                complete = True
+                break
+
+        interval = search["interval_seconds"]
+        # After the baseline, each search settles on its own offset within the interval
+        next_poll_at = time.time() + interval + (stagger(search["id"], interval) if baseline else 0.0)
+        if not complete and not baseline:
+            seen = []
+            self._stats["incomplete"] += 1
+        stored = await self.store.record_poll(search, seen, new, requests, error, next_poll_at, self.retention)
+        self._stats["polls"] += 1
+        self._stats["upstream_requests"] += requests
+        self._stats["new_jobs"] += stored
+        self._stats["errors"] += error is not None
+        return {"requests": requests, "new": stored, "error": error}
+
+    # ─── API ──────────────────────────────────────────────────────────────────
+
+    async def create(self, what: str, where: str, country: str = "ca", interval: Optional[float] = None) -> Dict:
+        """
+        Save a search. Its baseline poll runs on the next loop pass.
+
+        Raises:
+            ValueError: if the saved search limit is reached
+        """
+        if await self.store.count() >= self.max_searches:
+            raise ValueError(f"Saved search limit reached ({self.max_searches})")
+        search = await self.store.create(what, where, country, interval or self.interval)
+        self._wake.set()
+        return search
+
+    async def check(self, search_id: str, mark_checked: bool = True) -> Optional[Dict]:
+        """Jobs found since the last check, straight from storage (no upstream call)."""
+        search = await self.store.get(search_id)
+        if search is None:
+            return None
+        since = search["last_checked_at"] or 0.0
+        # Taken before the read: a job stored while it runs is in the next check, not lost between the two
+        checked_at = time.time()
+        jobs = await self.store.new_since(search_id, since)
+        if mark_checked:
+            await self.store.mark_checked(search_id, checked_at)
+        return {"search": search, "jobs": jobs, "new_count": len(jobs), "since": since or None, "checked_at": checked_at}
+
+    def stats(self) -> Dict:
+        polls = self._stats["polls"]
+        return {
+            **self._stats,
+            "enabled": self.enabled,
+            "requests_per_poll": round(self._stats["upstream_requests"] / polls, 2) if polls else None,
+            "interval_seconds": self.interval,
+        }
+
+
+# Singleton instance
+saved_search_poller = SavedSearchPoller.from_env(adzuna_service)
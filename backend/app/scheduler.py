@@ -0,0 +1,268 @@
+import os
+import time
+import heapq
+import random
+import asyncio
+import itertools
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.workers import worker_count
+
+# Priority classes, highest first. Lower numbers are served first.
+INTERACTIVE = 0  # /api/chat, /api/jobs/search
+ADVISOR = 1      # Career Advisor analysis and multi-title search
+BACKGROUND = 2   # prefetch, index refresh
+
+PRIORITIES = {"interactive": INTERACTIVE, "advisor": ADVISOR, "background": BACKGROUND}
+PRIORITY_NAMES = {value: name for name, value in PRIORITIES.items()}
+
+WAIT_WINDOW = 512
+
+
+class RateLimited(Exception):
+    """Raised by a scheduled call when the upstream answered 429."""
+
+    def __init__(self, retry_after: Optional[float] = None):
+        super().__init__(f"rate limited (retry after {retry_after}s)" if retry_after else "rate limited")
+        self.retry_after = retry_after
+
+
+class UpstreamBusyError(Exception):
+    """Raised when no quota becomes available before the request's deadline."""
+
+
+def parse_priority(value: str) -> int:
+    try:
+        return PRIORITIES[value.strip().lower()]
+    except KeyError:
+        raise ValueError(f"unknown priority '{value}'") from None
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After as seconds; accepts delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class UpstreamScheduler:
+    """
+    Token-bucket admission for one upstream API, shared by every caller.
+
+    Requests take a token before they are sent. When none is available they queue,
+    highest priority first, until a token refills or their deadline passes. A 429
+    stops the whole bucket for Retry-After (or a jittered exponential backoff) and
+    the request is retried instead of failed, as long as its deadline allows.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float = 0.0,
+        burst: int = 1,
+        max_wait: Optional[Dict[int, float]] = None,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+    ):
+        self.name = name
+        self.rate = rate  # tokens per second; 0 means no local limit (429 handling only)
+        self.burst = max(burst, 1)
+        self.max_wait = {INTERACTIVE: 10.0, ADVISOR: 30.0, BACKGROUND: 120.0, **(max_wait or {})}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._heap: List[list] = []
+        self._seq = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        self._stats = {"rate_limited": 0, "retries": 0, "gave_up": 0, "timeouts": 0, "max_queue_depth": 0}
+        self._granted = {p: 0 for p in PRIORITY_NAMES}
+        self._queued = {p: 0 for p in PRIORITY_NAMES}
+        self._waits = {p: deque(maxlen=WAIT_WINDOW) for p in PRIORITY_NAMES}
+
+    @classmethod
+    def from_env(cls, name: str, prefix: str, rate: float, burst: int) -> "UpstreamScheduler":
+        # The quota belongs to the API account, so each worker process gets an equal share of it
+        workers = worker_count()
+        return cls(
+            name,
+            rate=float(os.getenv(f"{prefix}_RATE_PER_SECOND", str(rate))) / workers,
+            burst=max(1, int(os.getenv(f"{prefix}_BURST", str(burst))) // workers),
+            max_wait={
+                INTERACTIVE: float(os.getenv(f"{prefix}_MAX_WAIT_INTERACTIVE", "10")),
+                ADVISOR: float(os.getenv(f"{prefix}_MAX_WAIT_ADVISOR", "30")),
+                BACKGROUND: float(os.getenv(f"{prefix}_MAX_WAIT_BACKGROUND", "120")),
+            },
+            max_retries=int(os.getenv(f"{prefix}_MAX_RETRIES", "4")),
+        )
+
+    # ─── Token bucket ─────────────────────────────────────────────────────────
+
+    def _refill(self, now: float):
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _delay_until_token(self, now: float) -> float:
+        """Seconds until a request could be admitted (0 if one can go now)."""
+        self._refill(now)
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        if self.rate <= 0 or self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def _take(self):
+        if self.rate > 0:
+            self._tokens -= 1
+
+    def note_rate_limited(self, delay: float):
+        """Hold every caller for delay seconds after a 429."""
+        now = time.monotonic()
+        self._blocked_until = max(self._blocked_until, now + delay)
+        self._tokens = min(self._tokens, 0.0)
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter, so callers that were rejected together do not retry together
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    # ─── Queueing ─────────────────────────────────────────────────────────────
+
+    def _bind(self, loop: asyncio.AbstractEventLoop):
+        # Waiters and the dispatcher belong to one event loop (tests create a new one each)
+        if self._loop is not loop:
+            self._loop = loop
+            self._heap = []
+            self._dispatcher = None
+            self._queued = {p: 0 for p in PRIORITY_NAMES}
+
+    async def _dispatch(self):
+        while self._heap:
+            if self._heap[0][2].done():
+                # The waiter gave up (deadline or client disconnect)
+                heapq.heappop(self._heap)
+                continue
+            delay = self._delay_until_token(time.monotonic())
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            self._take()
+            heapq.heappop(self._heap)[2].set_result(None)
+        self._dispatcher = None
+
+    async def acquire(self, priority: int = INTERACTIVE, deadline: Optional[float] = None):
+        """
+        Wait for a token. deadline is an event-loop time; it defaults to the priority's max wait.
+
+        Raises:
+            UpstreamBusyError: if no token is available before the deadline
+        """
+        loop = asyncio.get_running_loop()
+        self._bind(loop)
+        expires_at = deadline if deadline is not None else loop.time() + self.max_wait[priority]
+        start = time.monotonic()
+
+        if not self._heap and self._delay_until_token(start) <= 0:
+            self._take()
+            self._record_grant(priority, 0.0)
+            return
+
+        waiter = loop.create_future()
+        heapq.heappush(self._heap, [priority, next(self._seq), waiter])
+        self._queued[priority] += 1
+        self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], sum(self._queued.values()))
+        if self._dispatcher is None:
+            self._dispatcher = loop.create_task(self._dispatch())
+        try:
+            async with asyncio.timeout_at(expires_at):
+                await waiter
+        except TimeoutError:
+            self._stats["timeouts"] += 1
+            raise UpstreamBusyError(
+                f"{self.name} quota not available in time (waited {time.monotonic() - start:.1f}s)"
+            ) from None
+        finally:
+            self._queued[priority] -= 1
+        self._record_grant(priority, time.monotonic() - start)
+
+    def _record_grant(self, priority: int, waited: float):
+        self._granted[priority] += 1
+        self._waits[priority].append(waited * 1000)
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        priority: int = INTERACTIVE,
+        deadline: Optional[float] = None,
+    ) -> Any:
+        """
+        Run call() once a token is available, retrying it after a 429.
+
+        call signals a 429 by raising RateLimited. The retry waits for Retry-After if
+        the upstream sent one, otherwise for a jittered exponential backoff.
+
+        Raises:
+            UpstreamBusyError: if the deadline or the retry budget runs out
+        """
+        loop = asyncio.get_running_loop()
+        expires_at = deadline if deadline is not None else loop.time() + self.max_wait[priority]
+        attempt = 0
+        while True:
+            await self.acquire(priority, expires_at)
+            try:
+                return await call()
+            except RateLimited as e:
+                self._stats["rate_limited"] += 1
+                delay = e.retry_after if e.retry_after is not None else self._backoff(attempt)
+                self.note_rate_limited(delay)
+                attempt += 1
+                if attempt > self.max_retries or loop.time() + delay >= expires_at:
+                    self._stats["gave_up"] += 1
+                    raise UpstreamBusyError(f"{self.name} is rate limiting requests; retry after {delay:.1f}s") from e
+                self._stats["retries"] += 1
+
+    # ─── Metrics ──────────────────────────────────────────────────────────────
+
+    def stats(self) -> Dict:
+        def percentile(values: List[float], p: float) -> Optional[float]:
+            if not values:
+                return None
+            return round(values[min(len(values) - 1, int(p * len(values)))], 2)
+
+        priorities = {}
+        for priority, name in PRIORITY_NAMES.items():
+            waits = sorted(self._waits[priority])
+            priorities[name] = {
+                "granted": self._granted[priority],
+                "queued": self._queued[priority],
+                "wait_ms": {
+                    "p50": percentile(waits, 0.50),
+                    "p95": percentile(waits, 0.95),
+                    "max": round(waits[-1], 2) if waits else None,
+                },
+            }
+        now = time.monotonic()
+        self._refill(now)
+        return {
+            **self._stats,
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2) if self.rate > 0 else None,
+            "queue_depth": sum(self._queued.values()),
+            "blocked_for_s": round(max(self._blocked_until - now, 0.0), 2),
+            "priorities": priorities,
+        }
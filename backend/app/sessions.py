@@ -0,0 +1,188 @@
+import os
+import re
+import sys
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+
+from app.query_parser import parse_follow_up
+
+# Client-supplied ids are only accepted in this shape; anything else gets a fresh id
+SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+
+class ChatSession:
+    """
+    Compact state of one Job Search conversation.
+
+    Only what a follow-up needs is kept: the last intent, the ids of the jobs it
+    returned, the reply shown for them, and a bounded history of turns.
+    """
+
+    __slots__ = ("id", "what", "where", "job_ids", "job_count", "reply", "turns", "touched_at", "nbytes")
+
+    def __init__(self, session_id: str, max_turns: int = 20):
+        self.id = session_id
+        self.what = ""
+        self.where = ""
+        self.job_ids: List[str] = []
+        self.job_count = 0
+        self.reply = ""
+        # (message, what, where, job_count) per turn, oldest dropped first
+        self.turns = deque(maxlen=max_turns)
+        self.touched_at = time.monotonic()
+        self.nbytes = self.size()
+
+    def has_search(self) -> bool:
+        return bool(self.what or self.where)
+
+    def follow_up(self, message: str) -> Optional[Dict]:
+        """The full intent for a follow-up to the last search, or None if the message needs parsing."""
+        if not self.has_search():
+            return None
+        delta = parse_follow_up(message)
+        if delta is None:
+            return None
+        return {"is_job_search": True, "what": delta.get("what", self.what), "where": delta.get("where", self.where)}
+
+    def same_results(self, what: str, where: str, jobs: List[Dict]) -> bool:
+        """True when jobs are the ones the stored reply was written for."""
+        return bool(self.reply) and (what, where) == (self.what, self.where) and [
+            str(job.get("id")) for job in jobs
+        ] == self.job_ids
+
+    def remember(self, message: str, what: str, where: str, jobs: List[Dict], count: int, reply: str):
+        self.what = what
+        self.where = where
+        self.job_ids = [str(job.get("id")) for job in jobs]
+        self.job_count = count
+        self.reply = reply
+        self.turns.append((message, what, where, count))
+
+    def size(self) -> int:
+        """Approximate bytes held by this session."""
+        strings = [self.id, self.what, self.where, self.reply, *self.job_ids]
+        for turn in self.turns:
+            strings.extend((turn[0], turn[1], turn[2]))
+        return (
+            sys.getsizeof(self)
+            + sum(sys.getsizeof(s) for s in strings)
+            + sys.getsizeof(self.job_ids)
+            + sys.getsizeof(self.turns)
+            + sum(sys.getsizeof(turn) for turn in self.turns)
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "session_id": self.id,
+            "what": self.what,
+            "where": self.where,
+            "job_ids": self.job_ids,
+            "job_count": self.job_count,
+            "turns": [
+                {"message": message, "what": what, "where": where, "job_count": count}
+                for message, what, where, count in self.turns
+            ],
+            "bytes": self.nbytes,
+        }
+
+
+class SessionStore:
+    """
+    In-memory chat sessions with LRU eviction.
+
+    Sessions are dropped least recently used first once there are more than
+    max_sessions of them or they hold more than max_bytes together, and after
+    ttl seconds without a turn.
+    """
+
+    def __init__(self, max_sessions: int = 10000, max_bytes: int = 64 * 1024 * 1024, ttl: float = 1800.0, max_turns: int = 20):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_turns = max_turns
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self.total_bytes = 0
+        self._stats = {"created": 0, "evicted": 0, "expired": 0, "follow_ups": 0, "reused_replies": 0}
+
+    @classmethod
+    def from_env(cls) -> "SessionStore":
+        return cls(
+            max_sessions=int(os.getenv("CHAT_SESSION_MAX", "10000")),
+            max_bytes=int(float(os.getenv("CHAT_SESSION_MAX_MB", "64")) * 1024 * 1024),
+            ttl=float(os.getenv("CHAT_SESSION_TTL", "1800")),
+            max_turns=int(os.getenv("CHAT_SESSION_TURNS", "20")),
+        )
+
+    def get(self, session_id: Optional[str]) -> Optional[ChatSession]:
+        session = self._sessions.get(session_id) if session_id else None
+        if session is None:
+            return None
+        if session.touched_at + self.ttl <= time.monotonic():
+            self._drop(session_id)
+            self._stats["expired"] += 1
+            return None
+        return session
+
+    def open(self, session_id: Optional[str] = None) -> ChatSession:
+        """The live session with this id, or a new one (keeping the id if it is well formed)."""
+        session = self.get(session_id)
+        if session is not None:
+            return session
+        if not session_id or not SESSION_ID_RE.match(session_id):
+            session_id = uuid.uuid4().hex
+        session = ChatSession(session_id, self.max_turns)
+        self._sessions[session_id] = session
+        self.total_bytes += session.nbytes
+        self._stats["created"] += 1
+        self._evict()
+        return session
+
+    def record(self, session: ChatSession, message: str, what: str, where: str, jobs: List[Dict], count: int, reply: str):
+        """Store a finished turn and re-account the session's memory."""
+        session.remember(message, what, where, jobs, count, reply)
+        session.touched_at = time.monotonic()
+        if self._sessions.get(session.id) is not session:
+            # Evicted while the turn was running; the caller still holds it, so bring it back
+            self._sessions[session.id] = session
+            session.nbytes = 0
+        self._sessions.move_to_end(session.id)
+        nbytes = session.size()
+        self.total_bytes += nbytes - session.nbytes
+        session.nbytes = nbytes
+        self._evict()
+
+    def count(self, event: str):
+        self._stats[event] += 1
+
+    def _drop(self, session_id: str):
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self.total_bytes -= session.nbytes
+
+    def _evict(self):
+        while self._sessions and (len(self._sessions) > self.max_sessions or self.total_bytes > self.max_bytes):
+            session_id = next(iter(self._sessions))
+            self._drop(session_id)
+            self._stats["evicted"] += 1
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict:
+        sessions = len(self._sessions)
+        return {
+            **self._stats,
+            "sessions": sessions,
+            "max_sessions": self.max_sessions,
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "avg_bytes_per_session": round(self.total_bytes / sessions) if sessions else 0,
+            "max_bytes_per_session": max((s.nbytes for s in self._sessions.values()), default=0),
+            "ttl_seconds": self.ttl,
+        }
+
+
+# Singleton instance
+session_store = SessionStore.from_env()
@@ -0,0 +1,318 @@
+import os
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Type, TypeVar
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from app.llm_client import LLMClient
+
+M = TypeVar("M", bound=BaseModel)
+
+# Longest validation error quoted back to the model when asking for a corrected reply
+MAX_ERROR_CHARS = 500
+
+
+# ─── Schemas ──────────────────────────────────────────────────────────────────
+# The fields a reply is useless without are required, so a reply the repairer cut
+# back to an empty object fails validation and is retried instead of passing as
+# a default ("not a job search", a blank profile).
+
+class JobSearchQuery(BaseModel):
+    is_job_search: bool
+    what: str = ""
+    where: str = ""
+
+    @field_validator("what", "where", mode="before")
+    @classmethod
+    def _null_as_empty(cls, value):
+        return "" if value is None else value
+
+
+class CandidateProfile(BaseModel):
+    summary: str
+    experience_level: str = ""
+    key_skills: List[str] = []
+    possible_directions: List[str] = []
+
+
+class ClarifyingQuestion(BaseModel):
+    id: str
+    text: str
+
+
+class ResumeAnalysis(BaseModel):
+    profile: CandidateProfile
+    questions: List[ClarifyingQuestion] = []
+
+
+class JobTitleSuggestion(BaseModel):
+    title: str
+    rationale: str = ""
+
+
+class JobTitleSuggestions(BaseModel):
+    intro: str = ""
+    searches: List[JobTitleSuggestion] = Field(min_length=1)
+
+
+# ─── Parsing and Repair ───────────────────────────────────────────────────────
+
+class StructuredOutputError(ValueError):
+    """The model's reply could not be parsed or validated, even after repair and retries."""
+
+
+def strip_fences(raw: str) -> str:
+    """The JSON part of a reply: markdown code fences and any lead-in prose removed."""
+    text = raw.strip()
+    if text.startswith("```"):
+        text = text.split("```")[1]
+        if text.startswith("json"):
+            text = text[4:]
+    start = text.find("{")
+    return text[start:].strip() if start >= 0 else text.strip()
+
+
+class JSONRepairer:
+    """
+    Incremental scanner that turns a JSON prefix into the longest valid document it can.
+
+    Text is fed in chunks, as it streams; the scan state (open containers, whether a
+    string is open, the points where the document could be cut) carries over, so each
+    chunk is scanned once. close() finishes a copy of the state: it closes an open
+    string and every open container, drops trailing commas, and if the tail is still
+    not valid (a dangling key, half a number), cuts back to the last complete value.
+    Trailing commas before a closing bracket are dropped as they are seen.
+    """
+
+    def __init__(self):
+        self._out: List[str] = []
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._done = False
+        # (length of output, open containers) at points where the prefix is complete
+        self._cuts: List[Tuple[int, Tuple[str, ...]]] = []
+
+    def feed(self, text: str):
+        for ch in text:
+            if self._done:
+                return
+            if self._in_string:
+                self._out.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._stack.append("}" if ch == "{" else "]")
+                self._out.append(ch)
+                self._cuts.append((len(self._out), tuple(self._stack)))
+                continue
+            elif ch in "}]":
+                self._trim()
+                if self._stack:
+                    self._stack.pop()
+                self._out.append(ch)
+                self._cuts.append((len(self._out), tuple(self._stack)))
+                # Anything after the outermost object is prose, not JSON
+                self._done = not self._stack
+                continue
+            elif ch == ",":
+                self._cuts.append((len(self._out), tuple(self._stack)))
+            self._out.append(ch)
+
+    def _trim(self):
+        while self._out and self._out[-1] in " \t\r\n,":
+            self._out.pop()
+
+    def close(self) -> Optional[Any]:
+        """The repaired document parsed, or None if no prefix of it is valid JSON."""
+        tail = "".join(self._out)
+        if self._in_string:
+            tail = (tail[:-1] if self._escape else tail) + '"'
+        candidates = [(tail.rstrip(" \t\r\n,"), self._stack)]
+        candidates += [("".join(self._out[:n]).rstrip(" \t\r\n,"), stack) for n, stack in reversed(self._cuts)]
+        for text, stack in candidates:
+            if not text:
+                continue
+            try:
+                return json.loads(text + "".join(reversed(stack)))
+            except ValueError:
+                continue
+        return None
+
+
+def repair_json(text: str) -> Optional[Any]:
+    repairer = JSONRepairer()
+    repairer.feed(text)
+    return repairer.close()
+
+
+def loads_json(raw: str) -> Tuple[Any, bool]:
+    """
+    Parse a model reply as JSON. Returns (data, repaired).
+
+    Strict parsing comes first; prose after the object is ignored. A truncated or
+    malformed reply goes through the repairer, which raises ValueError if nothing
+    usable is left.
+    """
+    text = strip_fences(raw)
+    try:
+        data, _ = json.JSONDecoder().raw_decode(text)
+        return data, False
+    except ValueError:
+        data = repair_json(text)
+        if data is None:
+            raise ValueError(f"reply is not JSON: {raw[:80]!r}") from None
+        return data, True
+
+
+class PartialJSON:
+    """
+    Best-effort snapshots of a JSON object while it streams, e.g. profile.summary
+    before the questions have been written. The last string in a snapshot may still
+    be growing.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._repairer = JSONRepairer()
+        self._started = False
+        self._last: Optional[Any] = None
+
+    def feed(self, chunk: str) -> Optional[Dict]:
+        """Add a chunk; returns the new snapshot, or None if it has not changed."""
+        self.text += chunk
+        if not self._started:
+            # Skip a code fence or lead-in until the object starts
+            start = self.text.find("{")
+            if start < 0:
+                return None
+            self._started = True
+            chunk = self.text[start:]
+        self._repairer.feed(chunk)
+        snapshot = self._repairer.close()
+        if not isinstance(snapshot, dict) or snapshot == self._last:
+            return None
+        self._last = snapshot
+        return snapshot
+
+
+# ─── Service ──────────────────────────────────────────────────────────────────
+
+class StructuredOutput:
+    """
+    JSON replies from the LLM, validated against a Pydantic model.
+
+    The schema goes to the provider, which uses JSON mode or tool schemas where its
+    API has them. A reply that does not parse is repaired locally first (code fences,
+    truncation, trailing commas); only a reply that still fails parsing or validation
+    costs another round trip, with the error quoted back to the model.
+    """
+
+    def __init__(self, llm: LLMClient, retries: int = 1):
+        self.llm = llm
+        self.retries = retries
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def from_env(cls, llm: LLMClient) -> "StructuredOutput":
+        return cls(llm, retries=int(os.getenv("STRUCTURED_OUTPUT_RETRIES", "1")))
+
+    def _endpoint_stats(self, endpoint: str) -> Dict[str, int]:
+        if endpoint not in self._stats:
+            self._stats[endpoint] = {"calls": 0, "parse_failures": 0, "repaired": 0, "retries": 0, "failed": 0}
+        return self._stats[endpoint]
+
+    def validate(self, endpoint: str, raw: str, model: Type[M]) -> M:
+        """Parse, repair if needed and validate one reply, counting what it took."""
+        stats = self._endpoint_stats(endpoint)
+        try:
+            data, repaired = loads_json(raw)
+        except ValueError:
+            stats["parse_failures"] += 1
+            raise
+        if repaired:
+            stats["parse_failures"] += 1
+            stats["repaired"] += 1
+        return model.model_validate(data)
+
+    async def complete(self, endpoint: str, messages: List[Dict], model: Type[M], max_tokens: int) -> M:
+        """
+        One completion parsed into model.
+
+        Raises:
+            StructuredOutputError: if no reply validates within the retries
+        """
+        self._endpoint_stats(endpoint)["calls"] += 1
+        raw = await self.llm.complete(
+            endpoint, messages=messages, max_tokens=max_tokens, schema=model.model_json_schema()
+        )
+        try:
+            return self.validate(endpoint, raw, model)
+        except ValueError as e:
+            return await self._retry(endpoint, self._correction(messages, raw, e), model, max_tokens, e)
+
+    async def stream(
+        self, endpoint: str, messages: List[Dict], model: Type[M], max_tokens: int
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream a completion as ("partial", dict) snapshots while it is written, then
+        ("done", model). A streamed reply that fails validation is retried like a
+        complete() reply, without streaming.
+        """
+        self._endpoint_stats(endpoint)["calls"] += 1
+        partial = PartialJSON()
+        async for chunk in self.llm.stream(
+            endpoint, messages=messages, max_tokens=max_tokens, schema=model.model_json_schema()
+        ):
+            snapshot = partial.feed(chunk)
+            if snapshot is not None:
+                yield "partial", snapshot
+        try:
+            result = self.validate(endpoint, partial.text, model)
+        except ValueError as e:
+            result = await self._retry(endpoint, self._correction(messages, partial.text, e), model, max_tokens, e)
+        yield "done", result
+
+    async def _retry(self, endpoint: str, messages: List[Dict], model: Type[M], max_tokens: int, error: Exception) -> M:
+        stats = self._endpoint_stats(endpoint)
+        schema = model.model_json_schema()
+        for _ in range(self.retries):
+            stats["retries"] += 1
+            raw = await self.llm.complete(endpoint, messages=messages, max_tokens=max_tokens, schema=schema)
+            try:
+                return self.validate(endpoint, raw, model)
+            except ValueError as e:
+                error = e
+                messages = self._correction(messages, raw, e)
+        stats["failed"] += 1
+        raise StructuredOutputError(f"{endpoint}: invalid structured reply ({error})") from error
+
+    @staticmethod
+    def _correction(messages: List[Dict], raw: str, error: Exception) -> List[Dict]:
+        if isinstance(error, ValidationError):
+            detail = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+        else:
+            detail = str(error)
+        return [
+            *messages,
+            {"role": "assistant", "content": raw},
+            {"role": "user", "content": (
+                f"That reply could not be used ({detail[:MAX_ERROR_CHARS]}). "
+                "Respond with the corrected JSON object only, in the structure asked for."
+            )},
+        ]
+
+    def stats(self) -> Dict:
+        totals = {key: sum(s[key] for s in self._stats.values()) for key in ("calls", "parse_failures", "repaired", "failed")}
+        calls = totals["calls"] or 1
+        return {
+            "endpoints": self._stats,
+            "parse_failure_rate": round(totals["parse_failures"] / calls, 4),
+            "repair_rate": round(totals["repaired"] / calls, 4),
+            "failure_rate": round(totals["failed"] / calls, 4),
+        }
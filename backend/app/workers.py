@@ -0,0 +1,25 @@
+import os
+from typing import Dict
+
+# Default location of the search cache every worker reads when there is more than one
+SHARED_SEARCH_CACHE_DB = "database/search_cache.db"
+
+
+def worker_count() -> int:
+    """
+    Number of worker processes serving the app.
+
+    Read from WEB_CONCURRENCY, which both `uvicorn --workers` and gunicorn use as
+    their default worker count; set it rather than passing --workers so the app
+    can size per-process quotas and turn on the shared cache.
+    """
+    try:
+        return max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+    except ValueError:
+        print(f"WARNING: WEB_CONCURRENCY={os.getenv('WEB_CONCURRENCY')!r} is not a number; assuming 1 worker")
+        return 1
+
+
+def worker_info() -> Dict:
+    """Which process answered: /api/stats and /metrics describe one worker, not the whole server."""
+    return {"pid": os.getpid(), "workers": worker_count()}
@@ -0,0 +1,87 @@
+"""
+Benchmark hedged LLM completions against a slow upstream tail.
+
+Two local stub providers answer with the same latency distribution: mostly fast,
+with a small share of calls that stall (--tail-ms). The same stream of concurrent
+format_job_results calls runs through LLMClient with hedging off and on, and the
+p50/p95/p99 latency and hedge rate of each run are reported.
+
+Usage (from backend/):
+    python -m benchmarks.bench_hedging
+    python -m benchmarks.bench_hedging --calls 2000 --tail-share 0.02 --hedge-rate 0.05
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from app.llm_client import LLMClient
+from app.llm_providers import StubProvider
+
+MESSAGES = [{"role": "user", "content": "Summarize these jobs"}]
+
+
+class TailStub(StubProvider):
+    """A stub whose latency is drawn from a fast body and a slow tail."""
+
+    def __init__(self, rng: random.Random, body_ms: float, tail_ms: float, tail_share: float, **kwargs):
+        super().__init__(max_concurrency=1024, **kwargs)
+        self.rng = rng
+        self.body = body_ms / 1000
+        self.tail = tail_ms / 1000
+        self.tail_share = tail_share
+
+    async def _complete(self, messages, max_tokens, schema=None):
+        slow = self.rng.random() < self.tail_share
+        await asyncio.sleep(self.tail if slow else self.rng.uniform(0.5, 1.5) * self.body)
+        return "ok"
+
+
+async def run(args, hedge_rate: float):
+    rng = random.Random(args.seed)
+    providers = [
+        TailStub(rng, args.body_ms, args.tail_ms, args.tail_share, model=name) for name in ("primary", "secondary")
+    ]
+    llm = LLMClient(providers=providers, max_concurrency=1024, hedge_rate=hedge_rate)
+    latencies = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def call():
+        async with semaphore:
+            start = time.perf_counter()
+            await llm.complete("format_job_results", MESSAGES, max_tokens=50)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(call() for _ in range(args.calls)))
+    # Skip the warm-up calls made before the primary has a p95 to hedge on
+    latencies = sorted(latencies[llm.hedge_min_samples:])
+    hedging = llm.stats()["hedging"]
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(0.95 * len(latencies))],
+        "p99": latencies[int(0.99 * len(latencies))],
+        "hedged": hedging["hedged"] / args.calls,
+        "wins": hedging["hedge_wins"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--body-ms", type=float, default=40.0)
+    parser.add_argument("--tail-ms", type=float, default=1000.0)
+    parser.add_argument("--tail-share", type=float, default=0.03)
+    parser.add_argument("--hedge-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'hedging':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'hedged':>10}{'wins':>8}")
+    for label, rate in (("off", 0.0), (f"{args.hedge_rate:.0%} cap", args.hedge_rate)):
+        r = asyncio.run(run(args, rate))
+        print(f"{label:<10}{r['p50']:>10.1f}{r['p95']:>10.1f}{r['p99']:>10.1f}{r['hedged']:>10.1%}{r['wins']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark the cost of request metrics and Server-Timing.
+
+Measures the per-call cost of a timed stage, then sends the same in-process
+requests with the metrics middleware switched on and off and reports the
+difference per request. Upstream calls are replaced by a fixed delay
+(--upstream-ms) so the relative overhead reflects a request that does real work;
+pass --upstream-ms 0 for the worst case of a request that does nothing.
+
+Usage (from backend/):
+    python -m benchmarks.bench_metrics
+    python -m benchmarks.bench_metrics --requests 2000 --upstream-ms 0
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from unittest.mock import patch
+
+import httpx
+
+from app import metrics
+
+
+def bench_stage(iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with metrics.stage("bench.stage"):
+            pass
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def bench_requests(args, enabled: bool, run: int = 0) -> float:
+    from app import main
+
+    async def fake_fetch(what, where, country, results_per_page, page, **kwargs):
+        await asyncio.sleep(args.upstream_ms / 1000)
+        return {"jobs": [{"id": str(i), "title": "Python Developer"} for i in range(results_per_page)], "count": 100}
+
+    metrics.METRICS_ENABLED = enabled
+    timings = []
+    with patch.object(main.adzuna_service, "_fetch_jobs", side_effect=fake_fetch):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as client:
+            for i in range(args.requests):
+                # Distinct queries in every run, so nothing is served from the search cache
+                params = {"what": f"python {enabled} {run} {i}", "mode": "live"}
+                start = time.perf_counter()
+                response = await client.get("/api/jobs/search", params=params)
+                timings.append((time.perf_counter() - start) * 1e6)
+                response.raise_for_status()
+    return statistics.median(timings)
+
+
+async def bench(args):
+    stage_us = bench_stage(args.iterations)
+    # Warm up imports, the connection pool and code paths before timing
+    await bench_requests(argparse.Namespace(requests=50, upstream_ms=0), True, -1)
+    # Alternate on and off rounds so drift (GC, cache growth) hits both equally
+    off, on = [], []
+    for run in range(args.rounds):
+        off.append(await bench_requests(args, False, run))
+        on.append(await bench_requests(args, True, run))
+    off, on = min(off), min(on)
+    metrics.METRICS_ENABLED = True
+
+    print(f"timed stage:            {stage_us:.2f} us per call")
+    print(f"request, metrics off:   median {off:.0f} us")
+    print(f"request, metrics on:    median {on:.0f} us")
+    print(f"overhead per request:   {on - off:.0f} us ({(on - off) / off:.2%}) with {args.upstream_ms} ms upstream")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--upstream-ms", type=float, default=50.0,
+                        help="simulated Adzuna latency per request (default: 50)")
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
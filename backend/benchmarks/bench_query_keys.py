@@ -0,0 +1,89 @@
+"""
+Measure how far what/where normalization cuts search cache key cardinality.
+
+Replays a search log (what<TAB>where per line) through search_cache_key, once as
+the search cache saw it before (lower case, single spaces) and once after
+QueryNormalizer, and reports distinct keys and the hit rate of an unbounded cache
+over the log. Also reports the gazetteer's cold load time and the cost of one
+normalization, since both sit on the startup or request path.
+
+Usage (from backend/):
+    python -m benchmarks.bench_query_keys
+    python -m benchmarks.bench_query_keys --log my_searches.tsv --show-unknown
+"""
+import argparse
+import os
+import statistics
+import time
+from collections import Counter
+
+from app.cache import search_cache_key
+from app.reference_data import DEFAULT_GAZETTEER, Gazetteer, QueryNormalizer
+
+DEFAULT_LOG = os.path.join(os.path.dirname(__file__), "data", "search_log.tsv")
+
+
+def load_log(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [
+            tuple((line.rstrip("\n").split("\t") + [""])[:2])
+            for line in f if line.strip() and not line.startswith("#")
+        ]
+
+
+def replay(keys):
+    """Distinct keys, and hits for a cache that keeps everything it has seen."""
+    distinct = len(set(keys))
+    return distinct, len(keys) - distinct
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", default=DEFAULT_LOG)
+    parser.add_argument("--gazetteer", default=DEFAULT_GAZETTEER)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--show-unknown", action="store_true", help="list locations the gazetteer did not resolve")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    gazetteer = Gazetteer(args.gazetteer)
+    construct_us = (time.perf_counter() - start) * 1e6
+    loads = []
+    for _ in range(args.repeat):
+        cold = Gazetteer(args.gazetteer)
+        t = time.perf_counter()
+        len(cold)
+        loads.append((time.perf_counter() - t) * 1000)
+
+    log = load_log(args.log)
+    normalizer = QueryNormalizer(gazetteer)
+    before = [search_cache_key("ca", what, where, 1, 10) for what, where in log]
+    timings_us, after = [], []
+    for what, where in log:
+        t = time.perf_counter()
+        canonical = normalizer.normalize(what, where)
+        timings_us.append((time.perf_counter() - t) * 1e6)
+        after.append(search_cache_key("ca", *canonical, 1, 10))
+
+    print(f"search log:             {len(log)} queries ({args.log})")
+    print(f"gazetteer:              {len(gazetteer)} names, cold load median {statistics.median(loads):.2f} ms, "
+          f"construct {construct_us:.0f} us (loaded lazily)")
+    print(f"normalize latency:      median {statistics.median(timings_us):.1f} us, max {max(timings_us):.1f} us")
+    print(f"{'':<24}{'distinct keys':>14}{'cache hits':>12}{'hit rate':>10}")
+    for label, keys in (("before (lower/space)", before), ("after (normalized)", after)):
+        distinct, hits = replay(keys)
+        print(f"{label:<24}{distinct:>14}{hits:>12}{hits / len(keys):>10.1%}")
+    reduction = 1 - len(set(after)) / len(set(before))
+    print(f"key cardinality cut:    {reduction:.1%}")
+    stats = normalizer.stats()
+    print(f"rewritten:              what {stats['what_rewritten']}, where {stats['where_rewritten']}, "
+          f"unknown where {stats['where_unknown']}")
+
+    if args.show_unknown:
+        unknown = Counter(where for _, where in log if where and gazetteer.canonical(where) is None)
+        for where, count in unknown.most_common():
+            print(f"  {count:>4}  {where}")
+
+
+if __name__ == "__main__":
+    main()
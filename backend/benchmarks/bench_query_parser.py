@@ -0,0 +1,71 @@
+"""
+Benchmark the rule-based fast path in front of parse_job_search_query.
+
+Runs app.query_parser.fast_parse over a corpus of real chat phrasings and reports
+how many skip the LLM, the fast-path latency, and the latency saved per hit
+against a given LLM round-trip time.
+
+Usage (from backend/):
+    python -m benchmarks.bench_query_parser
+    python -m benchmarks.bench_query_parser --llm-latency-ms 600 --show-misses
+"""
+import argparse
+import os
+import statistics
+import time
+
+from app.query_parser import fast_parse
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "data", "chat_queries.txt")
+
+
+def load_corpus(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--threshold", type=float, default=float(os.getenv("QUERY_FAST_PATH_MIN_CONFIDENCE", "0.8")))
+    parser.add_argument("--llm-latency-ms", type=float, default=450.0,
+                        help="median LLM round trip for parse_job_search_query (default: 450)")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--show-misses", action="store_true")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    hits, misses, timings_us, saved_ms = [], [], [], []
+
+    for message in corpus:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            parsed, confidence = fast_parse(message)
+        elapsed_us = (time.perf_counter() - start) / args.repeat * 1e6
+        timings_us.append(elapsed_us)
+        if confidence >= args.threshold:
+            hits.append((message, parsed))
+            saved_ms.append(args.llm_latency_ms - elapsed_us / 1000)
+        else:
+            # A miss still pays for the fast-path attempt before the LLM call
+            misses.append((message, parsed))
+            saved_ms.append(-elapsed_us / 1000)
+
+    hit_rate = len(hits) / len(corpus)
+    saved_per_hit = statistics.median(s for s in saved_ms if s > 0) if hits else 0.0
+
+    print(f"corpus:                 {len(corpus)} messages ({args.corpus})")
+    print(f"fast-path hit rate:     {hit_rate:.1%} ({len(hits)}/{len(corpus)}) at threshold {args.threshold}")
+    print(f"fast-path latency:      median {statistics.median(timings_us):.1f} us, max {max(timings_us):.1f} us")
+    print(f"median saved per hit:   {saved_per_hit:.1f} ms (LLM round trip {args.llm_latency_ms:.0f} ms)")
+    print(f"median saved per query: {statistics.median(saved_ms):.1f} ms")
+    print(f"mean saved per query:   {statistics.mean(saved_ms):.1f} ms")
+
+    if args.show_misses:
+        print("\nsent to LLM:")
+        for message, _ in misses:
+            print(f"  {message}")
+
+
+if __name__ == "__main__":
+    main()
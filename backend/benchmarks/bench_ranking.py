@@ -0,0 +1,96 @@
+"""
+Benchmark JobRanker on a batch of jobs the size of a multi-title search.
+
+Synthetic jobs (a three-word title, a category and a description preview about as
+long as Adzuna's) are ranked against a profile three ways:
+
+    cold        a fresh ranker: every job is tokenized and hashed during rank()
+    embedded    a fresh ranker that embedded the jobs page by page as they were
+                fetched, as AdzunaService does, so rank() only scores
+    warm        the same ranker again, every vector cached
+
+and the median and best wall time of each are reported.
+
+Usage (from backend/):
+    python -m benchmarks.bench_ranking
+    python -m benchmarks.bench_ranking --jobs 5000 --runs 20
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.ranking import JobRanker
+
+PROFILE = {
+    "summary": "Security leader with cloud and compliance background",
+    "experience_level": "senior",
+    "key_skills": ["cloud security", "ISO 27001", "risk management", "AWS", "Python"],
+    "possible_directions": ["Security Architect", "CISO", "Risk Manager"],
+}
+CATEGORIES = ["IT Jobs", "Healthcare & Nursing Jobs", "Accounting & Finance Jobs", "Engineering Jobs", "Sales Jobs"]
+
+
+def build_jobs(count: int, vocabulary: int, description_words: int, seed: int = 0):
+    rng = random.Random(seed)
+    words = [f"w{n}" for n in range(vocabulary)] + "python cloud security risk nurse senior manager aws sql".split()
+    return [
+        {
+            "id": str(n),
+            "title": " ".join(rng.choices(words, k=3)).title(),
+            "category": rng.choice(CATEGORIES),
+            "description": " ".join(rng.choices(words, k=description_words)) + ".",
+        }
+        for n in range(count)
+    ]
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def embedded_ranker(jobs, page_size: int) -> JobRanker:
+    ranker = JobRanker()
+    for page in range(0, len(jobs), page_size):
+        ranker.embed(jobs[page:page + page_size])
+    return ranker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--vocabulary", type=int, default=5000, help="distinct words across all jobs")
+    parser.add_argument("--description-words", type=int, default=80, help="about 500 characters, Adzuna's preview")
+    parser.add_argument("--page-size", type=int, default=50, help="jobs per fetched page in the embedded scenario")
+    args = parser.parse_args()
+
+    jobs = build_jobs(args.jobs, args.vocabulary, args.description_words)
+    # The first pass also fills the process-wide word hash table; report it on its own
+    first = timed(lambda: JobRanker().rank(jobs, PROFILE))
+
+    warm = JobRanker()
+    warm.rank(jobs, PROFILE)
+    rows = []
+    for label, setup in (
+        ("cold", lambda: JobRanker()),
+        ("embedded", lambda: embedded_ranker(jobs, args.page_size)),
+        ("warm", lambda: warm),
+    ):
+        timings = []
+        for _ in range(args.runs):
+            ranker = setup()
+            timings.append(timed(lambda: ranker.rank(jobs, PROFILE)))
+        rows.append((label, statistics.median(timings), min(timings)))
+
+    print(f"{args.jobs} jobs, {args.description_words} description words, {args.runs} runs")
+    print(f"first cold rank (new words): {first:.1f} ms")
+    print(f"{'scenario':<10}{'median ms':>11}{'best ms':>9}")
+    for label, median, best in rows:
+        print(f"{label:<10}{median:>11.1f}{best:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark PDF resume ingestion through POST /api/advisor/upload.
+
+Sends concurrent multipart uploads of generated multi-page PDFs through the app
+in-process and reports throughput and latency for the upload + text extraction
+path, cold (distinct files) and warm (same files again, served from the content
+hash cache). The LLM call is replaced by a fixed delay so only our own work is
+measured; while the uploads run, a probe task measures how late the event loop
+wakes up, which stays small as long as extraction stays off the loop.
+
+Usage (from backend/):
+    python -m benchmarks.bench_resume_upload
+    python -m benchmarks.bench_resume_upload --uploads 10 --pages 5 --workers 4
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from unittest.mock import patch
+
+import httpx
+
+RESUME_LINES = [
+    "Senior Software Engineer - Acme Corp, Toronto (2018 - present)",
+    "Built Python and Go services handling 20k requests per second on AWS.",
+    "Led a team of five engineers; introduced CI/CD with GitHub Actions and Terraform.",
+    "Designed PostgreSQL schemas and Kafka pipelines for real-time analytics.",
+    "Skills: Python, Go, TypeScript, React, Docker, Kubernetes, SQL, Airflow.",
+]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_pdf(pages: int = 5, lines_per_page: int = 40, seed: str = "") -> bytes:
+    """A plain-text PDF resume with the given number of pages (seed makes files distinct)."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        rows = [f"{seed} Page {page + 1}"] + [
+            RESUME_LINES[i % len(RESUME_LINES)] for i in range(page, page + lines_per_page)
+        ]
+        body = "BT /F1 10 Tf 12 TL 50 780 Td " + " ".join(f"({_escape(row)}) '" for row in rows) + " ET"
+        stream = body.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), pages
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+async def fake_analyze(resume_text, endpoint="analyze_resume"):
+    await asyncio.sleep(0.05)
+    return {"profile": {"summary": resume_text[:40]}, "questions": []}
+
+
+async def probe_loop_lag(stop: asyncio.Event, lags):
+    interval = 0.005
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - start - interval) * 1000)
+
+
+async def run_round(client, files):
+    async def upload(data):
+        start = time.perf_counter()
+        response = await client.post("/api/advisor/upload", files={"file": ("resume.pdf", data, "application/pdf")})
+        response.raise_for_status()
+        return (time.perf_counter() - start) * 1000
+
+    stop, lags = asyncio.Event(), []
+    probe = asyncio.create_task(probe_loop_lag(stop, lags))
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(upload(data) for data in files))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    return elapsed, sorted(latencies), max(lags) if lags else 0.0
+
+
+def report(label, uploads, elapsed, latencies, max_lag):
+    p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+    print(f"{label:<6} {uploads / elapsed:6.1f} uploads/s  wall {elapsed * 1000:7.1f} ms  "
+          f"p50 {statistics.median(latencies):7.1f} ms  p95 {p95:7.1f} ms  max loop lag {max_lag:5.1f} ms")
+
+
+async def bench(args):
+    from app import main
+    from app.resume_ingest import ResumeIngestService
+
+    service = ResumeIngestService(main.claude_service, workers=args.workers, max_pages=max(args.pages, 10))
+    files = [build_pdf(args.pages, seed=f"candidate-{i}") for i in range(args.uploads)]
+    print(f"{args.uploads} concurrent uploads, {args.pages} pages each "
+          f"({sum(map(len, files)) / len(files) / 1024:.1f} KB), {args.workers} extraction workers")
+
+    with patch.object(main, "resume_ingest_service", service), \
+         patch.object(main.claude_service, "analyze_resume", side_effect=fake_analyze):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as client:
+            # Start the worker processes so the cold round measures extraction, not process spawn
+            await run_round(client, [build_pdf(1, seed="warmup")])
+            report("cold", args.uploads, *await run_round(client, files))
+            report("warm", args.uploads, *await run_round(client, files))
+    stats = service.stats()
+    print(f"extractions {stats['extractions']}, avg extract {stats['avg_extract_ms']} ms, "
+          f"text cache hit ratio {stats['text_cache']['hit_ratio']}")
+    service.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
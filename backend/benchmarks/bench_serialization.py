@@ -0,0 +1,103 @@
+"""
+Benchmark job search payload size and serialization time for a 50-result page.
+
+Compares the previous response path (dicts with the description cut at 500
+characters plus "...", FastAPI's jsonable_encoder and the standard json encoder,
+no compression) with the current one (orjson, optional fields= projection,
+gzip or brotli).
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --results 50 --description-chars 2000
+"""
+import argparse
+import gzip
+import json
+import random
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from app.jobs import Job, parse_fields, project
+from app.responses import FastJSONResponse, brotli
+from benchmarks.standins import fake_jobs
+
+
+WORDS = (
+    "team build design maintain services python cloud data customers product platform experience "
+    "years required preferred skills knowledge we our you will with and the to of in for on benefits "
+    "salary remote hybrid office growth engineering support develop deliver quality reliable scalable"
+).split()
+
+
+def raw_page(results: int, description_chars: int):
+    # Seeded random prose: repeated text would make compression look better than it is
+    rng = random.Random(7)
+    page = fake_jobs("python developer", "Toronto", 1, results)["results"]
+    for raw in page:
+        words = []
+        while sum(len(w) + 1 for w in words) < description_chars:
+            words.append(rng.choice(WORDS))
+        raw["description"] = " ".join(words)[:description_chars]
+    return page
+
+
+def legacy_job(job):
+    # The dict AdzunaService built before the Job record
+    return {
+        "id": job.get("id"),
+        "title": job.get("title"),
+        "company": job.get("company", {}).get("display_name", "Unknown"),
+        "location": job.get("location", {}).get("display_name", "Unknown"),
+        "description": job.get("description", "")[:500] + "...",
+        "salary_min": job.get("salary_min"),
+        "salary_max": job.get("salary_max"),
+        "contract_type": job.get("contract_type"),
+        "created": job.get("created"),
+        "redirect_url": job.get("redirect_url"),
+        "category": job.get("category", {}).get("label", "Unknown"),
+    }
+
+
+def timed(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        out = fn()
+    return out, (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", type=int, default=50)
+    parser.add_argument("--description-chars", type=int, default=1500, help="length of upstream descriptions")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    page = raw_page(args.results, args.description_chars)
+    meta = {"count": 1234, "page": 1, "results_per_page": args.results, "total_pages": 25}
+
+    def before():
+        content = {"jobs": [legacy_job(job) for job in page], **meta}
+        return json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode()
+
+    def after(fields=None):
+        content = {"jobs": project([Job.from_adzuna(job).to_dict(500) for job in page], fields), **meta}
+        return FastJSONResponse(content).body
+
+    fields = parse_fields("title,company,salary_min,salary_max")
+    rows = [
+        ("before: json, no projection", *timed(before, args.iterations)),
+        ("after: orjson", *timed(after, args.iterations)),
+        ("after: orjson, fields=title,company,salary", *timed(lambda: after(fields), args.iterations)),
+    ]
+
+    print(f"{args.results}-result page, upstream descriptions of {args.description_chars} chars")
+    print(f"{'':44} {'build+encode':>13} {'bytes':>8} {'gzip':>7} {'br':>7}")
+    for name, body, us in rows:
+        gz = len(gzip.compress(body, compresslevel=6))
+        br = len(brotli.compress(body, quality=4)) if brotli is not None else None
+        print(f"{name:44} {us:10.0f} us {len(body):8} {gz:7} {br if br is not None else 'n/a':>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Throughput of the backend at 1, 2, 4 and 8 worker processes.
+
+Starts the Adzuna and Groq stand-ins, then for each worker count serves the real
+app with `uvicorn --workers N` (sized through WEB_CONCURRENCY, with a fresh
+shared search cache file) and drives it with the load harness workload.
+
+Usage (from backend/):
+    python -m benchmarks.bench_workers
+    python -m benchmarks.bench_workers --workers 1,2 --scenarios jobs_search --requests 400
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks import load_harness
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def start(args: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", *args], cwd=BACKEND_DIR, env={**os.environ, **env},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def stop(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=lambda v: [int(w) for w in v.split(",")], default=[1, 2, 4, 8])
+    parser.add_argument("--scenarios", default="", help="comma-separated load harness scenarios, default all")
+    parser.add_argument("--concurrency", type=lambda v: [int(c) for c in v.split(",")], default=[32])
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--adzuna-ms", type=float, default=120.0)
+    parser.add_argument("--groq-ms", type=float, default=400.0)
+    parser.add_argument("--json", default="", help="also write the results to this file")
+    args = parser.parse_args()
+
+    adzuna_port, groq_port = free_port(), free_port()
+    standins = start([
+        "benchmarks.standins", "--adzuna-port", str(adzuna_port), "--groq-port", str(groq_port),
+        "--adzuna-ms", str(args.adzuna_ms), "--groq-ms", str(args.groq_ms),
+    ], {})
+    results: Dict[int, Dict[str, Dict]] = {}
+    try:
+        wait_until_up(f"http://127.0.0.1:{adzuna_port}/v1/api/jobs/ca/categories")
+        for workers in args.workers:
+            port = free_port()
+            with tempfile.TemporaryDirectory() as tmp:
+                env = {
+                    **load_harness.STANDIN_ENV,
+                    "ADZUNA_BASE_URL": f"http://127.0.0.1:{adzuna_port}/v1/api/jobs",
+                    "GROQ_BASE_URL": f"http://127.0.0.1:{groq_port}",
+                    "WEB_CONCURRENCY": str(workers),
+                    "SEARCH_CACHE_DB": os.path.join(tmp, "search_cache.db"),
+                    "SAVED_SEARCH_DB": "",
+                }
+                server = start(["uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"], env)
+                try:
+                    wait_until_up(f"http://127.0.0.1:{port}/health")
+                    print(f"── {workers} worker{'s' if workers > 1 else ''} ──")
+                    run_args = argparse.Namespace(
+                        target=f"http://127.0.0.1:{port}", scenarios=args.scenarios,
+                        concurrency=args.concurrency, requests=args.requests, repeat=1,
+                    )
+                    results[workers] = asyncio.run(load_harness.run(run_args))
+                finally:
+                    stop(server)
+    finally:
+        stop(standins)
+
+    keys = list(next(iter(results.values())))
+    print(f"\n{'req/s':<22}" + "".join(f"{f'{w} workers':>12}" for w in results))
+    for key in keys:
+        print(f"{key:<22}" + "".join(f"{results[w][key]['throughput_rps']:>12.1f}" for w in results))
+    print(f"cpus: {os.cpu_count()}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"cpus": os.cpu_count(), "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
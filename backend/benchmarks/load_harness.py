@@ -0,0 +1,328 @@
+"""
+Load test the API against local Adzuna and Groq stand-ins, fully offline.
+
+Drives /api/chat, /api/jobs/search and the Career Advisor endpoints at each
+concurrency level with a closed loop of workers, and reports throughput and
+p50/p95/p99 latency per scenario. Results are compared with a stored baseline;
+the run exits with status 1 if any scenario regresses beyond the tolerance. Tail
+latency gets a wider tolerance than p50 and throughput, and p99 is only gated on
+runs of at least 1,000 requests; below that it is one or two samples and moves by
+more than any useful tolerance from run to run. Each metric is the median of
+--repeat runs of the workload, for the baseline and the check alike, so one
+unlucky run does not fail the gate.
+
+By default the app and both stand-ins run in this process (no sockets at all).
+With --target the harness drives an already running backend instead; start the
+stand-ins with `python -m benchmarks.standins` and point the backend at them.
+
+Usage (from backend/):
+    python -m benchmarks.load_harness
+    python -m benchmarks.load_harness --scenarios chat,jobs_search --concurrency 1,8,32 --requests 200
+    python -m benchmarks.load_harness --rate-limit-rate 0.05 --error-rate 0.01
+    python -m benchmarks.load_harness --update-baseline
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+DEFAULT_BASELINE = os.path.join(DATA_DIR, "load_baseline.json")
+# Untimed requests per scenario before the measured runs
+WARMUP_REQUESTS = 50
+
+# Settings for the in-process app; quotas are off so the numbers measure our code, not Groq's free tier
+STANDIN_ENV = {
+    "ADZUNA_APP_ID": "standin",
+    "ADZUNA_APP_KEY": "standin",
+    "ADZUNA_BASE_URL": "http://adzuna.standin/v1/api/jobs",
+    "GROQ_API_KEY": "standin",
+    "LLM_PROVIDERS": "groq",
+    "ADZUNA_RATE_PER_SECOND": "0",
+    "LLM_RATE_PER_SECOND": "0",
+    "JOB_INDEX_DB": "",
+    "SEARCH_CACHE_DB": "",
+    "PROMPT_LOG_TOKENS": "false",
+}
+
+WHERE = ["", "Toronto", "Vancouver", "remote", "Montreal"]
+TITLES = [
+    "python developer", "data engineer", "registered nurse", "accountant", "product manager",
+    "devops engineer", "welder", "project manager", "ux designer", "security analyst",
+]
+RESUME = """SUMMARY
+Backend engineer with {years} years of experience building APIs and data pipelines.
+
+EXPERIENCE
+Senior Software Engineer, Acme Corp — 2019 - present
+- Built Python and Go services handling 20k requests per second on AWS.
+- Designed PostgreSQL schemas and Kafka pipelines for real-time analytics.
+Software Engineer, Beta Inc — 2014 - 2019
+- Maintained a Java monolith and migrated billing to microservices.
+
+SKILLS
+Python, Go, SQL, Kafka, Docker, Kubernetes, Terraform, {skill}
+"""
+
+
+def load_chat_corpus() -> List[str]:
+    from benchmarks.bench_query_parser import DEFAULT_CORPUS, load_corpus
+    return load_corpus(DEFAULT_CORPUS)
+
+
+# ─── Scenarios ────────────────────────────────────────────────────────────────
+
+Request = Tuple[str, str, Dict]
+
+
+def scenarios() -> Dict[str, Callable[[int], Request]]:
+    """Scenario name -> function building the i-th request (method, path, httpx kwargs)."""
+    corpus = load_chat_corpus()
+
+    def title(i):
+        return TITLES[i % len(TITLES)]
+
+    return {
+        "chat": lambda i: ("POST", "/api/chat", {"json": {"message": corpus[i % len(corpus)]}}),
+        "jobs_search": lambda i: ("GET", "/api/jobs/search", {"params": {
+            "what": title(i), "where": WHERE[i % len(WHERE)], "page": i // len(TITLES) % 5 + 1,
+        }}),
+        "advisor_analyze": lambda i: ("POST", "/api/advisor/analyze", {"json": {
+            "resume_text": RESUME.format(years=5 + i % 20, skill=title(i)),
+        }}),
+        "advisor_suggest": lambda i: ("POST", "/api/advisor/suggest", {"json": {
+            "profile": {"summary": "Backend engineer", "experience_level": "senior", "key_skills": ["Python", title(i)]},
+            "answers": [
+                {"question_id": "q1", "question": "Role type?", "answer": "hands-on"},
+                {"question_id": "q2", "question": "Location?", "answer": WHERE[i % len(WHERE)] or "anywhere"},
+            ],
+        }}),
+        "advisor_search": lambda i: ("POST", "/api/advisor/search", {"json": {
+            "searches": [{"title": title(i + k)} for k in range(3)],
+            "where": WHERE[i % len(WHERE)],
+        }}),
+    }
+
+
+def percentile(values: List[float], p: float) -> float:
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+async def run_scenario(client: httpx.AsyncClient, build: Callable[[int], Request], concurrency: int, requests: int) -> Dict:
+    """Send requests through concurrency workers, each sending its next request as soon as the last returns."""
+    counter = itertools.count()
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while (i := next(counter)) < requests:
+            method, path, kwargs = build(i)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "error_rate": round(errors / requests, 4),
+        "throughput_rps": round(requests / duration, 2),
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "p99_ms": round(percentile(latencies, 0.99), 1),
+    }
+
+
+# ─── Baseline ─────────────────────────────────────────────────────────────────
+
+# Fewer requests than this leave p99 to the slowest one or two, which is noise
+P99_MIN_REQUESTS = 1000
+# A latency regression must also be this much slower; cache hits answer in about 1 ms
+LATENCY_SLACK_MS = 5.0
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float, tail_tolerance: Optional[float] = None) -> List[str]:
+    """
+    Regressions of results against baseline: slower p50, slower p95 (and p99 when both
+    runs had P99_MIN_REQUESTS) beyond tail_tolerance, lower throughput or more errors.
+    """
+    tail_tolerance = tolerance if tail_tolerance is None else tail_tolerance
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        metrics = [("p50_ms", tolerance), ("p95_ms", tail_tolerance)]
+        if min(result["requests"], base["requests"]) >= P99_MIN_REQUESTS:
+            metrics.append(("p99_ms", tail_tolerance))
+        for metric, allowed in metrics:
+            if result[metric] > max(base[metric] * (1 + allowed), base[metric] + LATENCY_SLACK_MS):
+                regressions.append(f"{key}: {metric} {result[metric]} > baseline {base[metric]} (+{allowed:.0%})")
+        if result["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{key}: throughput {result['throughput_rps']} < baseline {base['throughput_rps']} (-{tolerance:.0%})"
+            )
+        if result["error_rate"] > base["error_rate"] + 0.02:
+            regressions.append(f"{key}: error rate {result['error_rate']} > baseline {base['error_rate']} (+0.02)")
+    return regressions
+
+
+def median_results(runs: List[Dict[str, Dict]]) -> Dict[str, Dict]:
+    """Each scenario's metrics as the median over repeated runs of the workload."""
+    return {
+        key: {metric: round(statistics.median(run[key][metric] for run in runs), 4) for metric in result}
+        for key, result in runs[0].items()
+    }
+
+
+def run_config(args) -> Dict:
+    """The settings a baseline is only comparable under."""
+    return {
+        "requests": args.requests,
+        "repeat": args.repeat,
+        "adzuna_ms": args.adzuna_ms,
+        "groq_ms": args.groq_ms,
+        "sigma": args.sigma,
+        "error_rate": args.error_rate,
+        "rate_limit_rate": args.rate_limit_rate,
+        "target": args.target or "in-process",
+    }
+
+
+# ─── In-process wiring ────────────────────────────────────────────────────────
+
+def in_process_client(args):
+    """The app with Adzuna and Groq replaced by in-process stand-ins, and a client for it."""
+    for name, value in STANDIN_ENV.items():
+        os.environ.setdefault(name, value)
+    from groq import AsyncGroq
+    from app import main
+    from app.dedup import DuplicateDetector
+    from benchmarks.standins import UpstreamProfile, adzuna_app, groq_app
+
+    adzuna = main.adzuna_service
+    adzuna.client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=adzuna_app(UpstreamProfile(
+            args.adzuna_ms, args.sigma, args.error_rate, args.rate_limit_rate, seed=1
+        ))),
+        timeout=adzuna.timeout,
+    )
+    main.claude_service.llm.primary.client = AsyncGroq(
+        api_key="standin",
+        base_url="http://groq.standin",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=groq_app(UpstreamProfile(
+            args.groq_ms, args.sigma, args.error_rate, args.rate_limit_rate, seed=2
+        )))),
+    )
+
+    def reset_caches():
+        # Every run starts cold, so runs are comparable whatever ran before them
+        adzuna.cache.memory.clear()
+        adzuna.details.clear()
+        adzuna.dedup = DuplicateDetector.from_env()
+        main.page_prefetcher.buffer.clear()
+        main.job_ranker.vectors.clear()
+        main.claude_service._parse_cache.clear()
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://app", timeout=120)
+    return client, reset_caches
+
+
+async def run(args) -> Dict[str, Dict]:
+    """Run the workload --repeat times and return the median of each metric."""
+    if args.target:
+        client, reset_caches = httpx.AsyncClient(base_url=args.target, timeout=120), (lambda: None)
+    else:
+        client, reset_caches = in_process_client(args)
+
+    available = scenarios()
+    names = args.scenarios.split(",") if args.scenarios else list(available)
+    runs = []
+    async with client:
+        # The first requests of a process pay for lazy setup (imports, parsers, word tables);
+        # a short untimed pass keeps that out of the first run, so every run is alike
+        for name in names:
+            reset_caches()
+            await run_scenario(client, available[name], min(args.concurrency), WARMUP_REQUESTS)
+        for _ in range(args.repeat):
+            results = {}
+            for name in names:
+                for concurrency in args.concurrency:
+                    reset_caches()
+                    result = await run_scenario(client, available[name], concurrency, args.requests)
+                    key = f"{name}@{concurrency}"
+                    results[key] = result
+                    print(f"{key:<22} {result['throughput_rps']:8.2f} req/s  p50 {result['p50_ms']:8.1f} ms  "
+                          f"p95 {result['p95_ms']:8.1f} ms  p99 {result['p99_ms']:8.1f} ms  errors {result['error_rate']:.1%}")
+            runs.append(results)
+    return median_results(runs)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default="", help="comma-separated, default all")
+    parser.add_argument("--concurrency", type=lambda v: [int(c) for c in v.split(",")], default=[8, 32])
+    parser.add_argument("--requests", type=int, default=300, help="requests per scenario and concurrency level")
+    parser.add_argument("--adzuna-ms", type=float, default=120.0, help="median stand-in Adzuna latency")
+    parser.add_argument("--groq-ms", type=float, default=400.0, help="median stand-in Groq latency")
+    parser.add_argument("--sigma", type=float, default=0.5, help="log-normal spread of stand-in latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of upstream calls answering 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of upstream calls answering 429")
+    parser.add_argument("--target", default="", help="base URL of a running backend (default: in-process)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--tail-tolerance", type=float, default=0.5, help="allowed relative regression of p95/p99")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of the workload to take the median of")
+    parser.add_argument("--json", default="", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    config = run_config(args)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": config, "results": results}, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"config": config, "results": results}, f, indent=2)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["config"] != config:
+        print(f"baseline was recorded with different settings ({baseline['config']}); not comparing")
+        return 0
+
+    regressions = compare(results, baseline["results"], args.tolerance, args.tail_tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"no regressions against {args.baseline} (tolerance {args.tolerance:.0%}, tail {args.tail_tolerance:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
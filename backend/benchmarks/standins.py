@@ -0,0 +1,224 @@
+"""
+Local stand-ins for the Adzuna job search API and the Groq chat-completions API.
+
+Both are ASGI apps with configurable latency (log-normal around a median),
+error rate and 429 injection, so the backend can be exercised without network
+access or API keys. The load harness mounts them in-process; run this module to
+serve them on localhost for a separately started backend:
+
+    python -m benchmarks.standins --adzuna-port 8101 --groq-port 8102
+    ADZUNA_BASE_URL=http://127.0.0.1:8101/v1/api/jobs GROQ_BASE_URL=http://127.0.0.1:8102 \\
+        ADZUNA_APP_ID=standin ADZUNA_APP_KEY=standin GROQ_API_KEY=standin uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+from typing import Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.llm_providers import stub_completion
+
+
+class UpstreamProfile:
+    """
+    How a stand-in behaves: latency distribution and failure injection.
+
+    Latency is log-normal with the given median; sigma 0.5 puts p95 at about 2.3x
+    the median. error_rate answers 500, rate_limit_rate answers 429 with
+    Retry-After: retry_after.
+    """
+
+    def __init__(
+        self,
+        median_ms: float = 50.0,
+        sigma: float = 0.5,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 0.5,
+        seed: Optional[int] = 0,
+    ):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.counts = {"requests": 0, "errors": 0, "rate_limited": 0}
+
+    def latency(self) -> float:
+        """Seconds for one response."""
+        return self.median_ms / 1000 * math.exp(self.sigma * self.rng.gauss(0, 1)) if self.median_ms else 0.0
+
+    def failure(self) -> Optional[JSONResponse]:
+        """An injected error response, or None to answer normally."""
+        self.counts["requests"] += 1
+        roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            self.counts["rate_limited"] += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                status_code=429,
+                headers={"Retry-After": f"{self.retry_after:g}"},
+            )
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.counts["errors"] += 1
+            return JSONResponse({"error": {"message": "Internal error", "type": "server_error"}}, status_code=500)
+        return None
+
+
+# ─── Adzuna ───────────────────────────────────────────────────────────────────
+
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Health", "Hooli", "Stark Industries", "Wayne Enterprises"]
+CITIES = ["Toronto, Ontario", "Vancouver, British Columbia", "Montreal, Quebec", "Calgary, Alberta", "Remote"]
+CATEGORIES = ["IT Jobs", "Engineering Jobs", "Healthcare & Nursing Jobs", "Accounting & Finance Jobs"]
+SENIORITY = ["Junior", "", "Senior", "Lead", "Principal"]
+
+
+def _seed(*parts) -> int:
+    return int.from_bytes(hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=8).digest(), "big")
+
+
+def fake_jobs(what: str, where: str, page: int, per_page: int) -> Dict:
+    """Deterministic Adzuna-shaped results for a query: the same query always returns the same jobs."""
+    rng = random.Random(_seed(what.lower(), where.lower()))
+    count = rng.randint(0, 400) if what else rng.randint(500, 5000)
+    title = (what or "General Worker").title()
+    start = (page - 1) * per_page
+    results = []
+    for i in range(start, min(start + per_page, count)):
+        job_rng = random.Random(_seed(what, where, i))
+        salary = job_rng.randrange(45_000, 160_000, 5_000)
+        company = job_rng.choice(COMPANIES)
+        results.append({
+            "id": str(_seed(what, where, i) % 10**10),
+            "title": f"{job_rng.choice(SENIORITY)} {title}".strip(),
+            "company": {"display_name": company},
+            "location": {"display_name": where.title() if where else job_rng.choice(CITIES)},
+            "description": f"{company} is hiring a {title.lower()} to join a growing team. " * 6,
+            "salary_min": salary if job_rng.random() < 0.7 else None,
+            "salary_max": salary + 20_000 if job_rng.random() < 0.7 else None,
+            "contract_type": job_rng.choice(["permanent", "contract", None]),
+            "created": f"2024-0{job_rng.randint(1, 9)}-1{job_rng.randint(0, 9)}T00:00:00Z",
+            "redirect_url": f"https://example.com/jobs/{i}",
+            "category": {"label": job_rng.choice(CATEGORIES)},
+        })
+    return {"results": results, "count": count, "mean": 85_000}
+
+
+def adzuna_app(profile: Optional[UpstreamProfile] = None) -> FastAPI:
+    profile = profile or UpstreamProfile(median_ms=120)
+    app = FastAPI(title="Adzuna stand-in")
+    app.state.profile = profile
+
+    @app.get("/v1/api/jobs/{country}/search/{page}")
+    async def search(country: str, page: int, request: Request):
+        await asyncio.sleep(profile.latency())
+        failure = profile.failure()
+        if failure is not None:
+            return failure
+        params = request.query_params
+        return fake_jobs(params.get("what", ""), params.get("where", ""), page, int(params.get("results_per_page", 10)))
+
+    @app.get("/v1/api/jobs/{country}/categories")
+    async def categories(country: str):
+        await asyncio.sleep(profile.latency())
+        return {"results": [{"label": label, "tag": label.lower().replace(" ", "-")} for label in CATEGORIES]}
+
+    return app
+
+
+# ─── Groq ─────────────────────────────────────────────────────────────────────
+
+def _completion(model: str, content: str) -> Dict:
+    return {
+        "id": f"chatcmpl-{time.time_ns()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def _chunk(model: str, content: Optional[str], finish_reason: Optional[str] = None) -> str:
+    delta = {"content": content} if content is not None else {}
+    return "data: " + json.dumps({
+        "id": "chatcmpl-standin",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }) + "\n\n"
+
+
+def groq_app(profile: Optional[UpstreamProfile] = None) -> FastAPI:
+    profile = profile or UpstreamProfile(median_ms=400)
+    app = FastAPI(title="Groq stand-in")
+    app.state.profile = profile
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        latency = profile.latency()
+        failure = profile.failure()
+        if failure is not None:
+            await asyncio.sleep(latency / 10)
+            return failure
+
+        model = body.get("model", "standin")
+        content = stub_completion(body["messages"][-1]["content"])
+        if not body.get("stream"):
+            await asyncio.sleep(latency)
+            return _completion(model, content)
+
+        words = content.split(" ")
+
+        async def events():
+            # A third of the latency before the first token, the rest spread over the answer
+            await asyncio.sleep(latency / 3)
+            for i, word in enumerate(words):
+                await asyncio.sleep(latency * 2 / 3 / len(words))
+                yield _chunk(model, word if i == 0 else " " + word)
+            yield _chunk(model, None, "stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--adzuna-port", type=int, default=8101)
+    parser.add_argument("--groq-port", type=int, default=8102)
+    parser.add_argument("--adzuna-ms", type=float, default=120.0, help="median Adzuna latency")
+    parser.add_argument("--groq-ms", type=float, default=400.0, help="median Groq latency")
+    parser.add_argument("--sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    def profile(median_ms):
+        return UpstreamProfile(median_ms, args.sigma, args.error_rate, args.rate_limit_rate, seed=None)
+
+    async def serve():
+        servers = [
+            uvicorn.Server(uvicorn.Config(adzuna_app(profile(args.adzuna_ms)), host=args.host, port=args.adzuna_port)),
+            uvicorn.Server(uvicorn.Config(groq_app(profile(args.groq_ms)), host=args.host, port=args.groq_port)),
+        ]
+        await asyncio.gather(*(server.serve() for server in servers))
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
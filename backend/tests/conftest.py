@@ -0,0 +1,15 @@
+import os
+
+# Services are module-level singletons built at import time; give them dummy credentials
+# so importing app.main never needs a real .env.
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+os.environ.setdefault("ADZUNA_APP_ID", "test-id")
+os.environ.setdefault("ADZUNA_APP_KEY", "test-key")
+# Keep the job index in memory so tests never write into database/
+os.environ.setdefault("JOB_INDEX_DB", ":memory:")
+os.environ.setdefault("SAVED_SEARCH_DB", ":memory:")
+# No local request quota in tests; scheduler tests build their own
+os.environ.setdefault("ADZUNA_RATE_PER_SECOND", "0")
+os.environ.setdefault("LLM_RATE_PER_SECOND", "0")
+# No background reference data refresh; tests read the shipped snapshots
+os.environ.setdefault("REFERENCE_REFRESH_SECONDS", "0")
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import pytest
+import pytest_asyncio
+
+from app.adzuna_service import AdzunaService
+
+SAMPLE_RESULTS = {
+    "count": 25,
+    "results": [
+        {
+            "id": "101",
+            "title": "Python Developer",
+            "company": {"display_name": "Acme"},
+            "location": {"display_name": "Toronto, Ontario"},
+            "description": "Build APIs.",
+            "salary_min": 90000,
+            "salary_max": 120000,
+            "created": "2026-10-01T00:00:00Z",
+            "category": {"label": "IT Jobs"},
+        }
+    ],
+}
+
+
+@pytest_asyncio.fixture
+async def adzuna_server():
+    """Minimal keep-alive HTTP/1.1 server that answers every GET with SAMPLE_RESULTS."""
+    body = json.dumps(SAMPLE_RESULTS).encode()
+    accepted = []
+
+    async def handle(reader, writer):
+        accepted.append(writer)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                if not head:
+                    break
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}", accepted
+    server.close()
+
+
+@pytest_asyncio.fixture
+async def service(adzuna_server, monkeypatch):
+    base_url, _ = adzuna_server
+    monkeypatch.setenv("ADZUNA_BASE_URL", base_url)
+    svc = AdzunaService()
+    await svc.startup()
+    yield svc
+    await svc.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_search_reuses_pooled_connection(service, adzuna_server):
+    _, accepted = adzuna_server
+    for _ in range(5):
+        result = await service.search_jobs(what="python developer", where="toronto", use_cache=False)
+        assert result["jobs"][0]["company"] == "Acme"
+
+    stats = service.stats()
+    assert stats["requests"] == 5
+    assert stats["connections_opened"] == 1
+    assert stats["reused_connections"] == 4
+    assert stats["latency_ms"]["samples"] == 5
+    assert len(accepted) == 1
+
+
+@pytest.mark.asyncio
+async def test_categories_share_the_search_pool(service):
+    await service.search_jobs(what="python", use_cache=False)
+    await service.fetch_job_categories()
+    assert service.stats()["connections_opened"] == 1
+    assert service.stats()["clients_created"] == 1
+
+
+@pytest.mark.asyncio
+async def test_shutdown_closes_client_and_restarts_lazily(service):
+    await service.search_jobs(what="python", use_cache=False)
+    client = service.client
+    await service.shutdown()
+    assert client.is_closed
+    assert service.client is None
+
+    # Calls made outside the lifespan recreate the client on demand
+    await service.search_jobs(what="python", use_cache=False)
+    assert service.client is not None
+    assert service.stats()["clients_created"] == 2
+
+
+@pytest.mark.asyncio
+async def test_total_pages_use_the_clamped_page_size(service):
+    # Adzuna caps pages at 50, so 25 results asked for 200 at a time are one page of 50
+    result = await service.search_jobs(what="python", results_per_page=200, use_cache=False)
+    assert (result["results_per_page"], result["total_pages"]) == (50, 1)
+
+    result = await service.search_jobs(what="python", results_per_page=0, use_cache=False)
+    assert result["error"] == "results_per_page must be at least 1"
+    assert service.stats()["requests"] == 1
+
+
+def test_pool_settings_from_env(monkeypatch):
+    monkeypatch.setenv("ADZUNA_MAX_CONNECTIONS", "4")
+    monkeypatch.setenv("ADZUNA_MAX_KEEPALIVE", "2")
+    monkeypatch.setenv("ADZUNA_CONNECT_TIMEOUT", "1.5")
+    monkeypatch.setenv("ADZUNA_READ_TIMEOUT", "7")
+    svc = AdzunaService()
+    assert svc.limits.max_connections == 4
+    assert svc.limits.max_keepalive_connections == 2
+    assert svc.timeout.connect == 1.5
+    assert svc.timeout.read == 7
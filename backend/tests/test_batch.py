@@ -0,0 +1,149 @@
+import asyncio
+import json
+import httpx
+import pytest
+from unittest.mock import patch
+
+from app.batch import BatchAnalysisService, resume_hash
+
+RESUME = "Senior Python developer with ten years of experience building data pipelines, APIs and cloud services. " * 2
+
+
+def resume(n, text=None):
+    return {"id": f"r{n}", "resume_text": text or f"{RESUME} Candidate {n}."}
+
+
+class FakeClaude:
+    """Stands in for ClaudeService; counts calls and can fail or slow down per resume."""
+
+    def __init__(self, delays=None, failures=None):
+        self.delays = delays or {}
+        self.failures = failures or {}
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def analyze_resume(self, resume_text, endpoint="analyze_resume"):
+        self.calls.append((resume_text, endpoint))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delays.get(resume_text, 0.01))
+            if self.failures.get(resume_text, 0) > 0:
+                self.failures[resume_text] -= 1
+                raise ValueError("bad JSON from model")
+            return {"profile": {"summary": resume_text[-12:]}, "questions": []}
+        finally:
+            self.active -= 1
+
+
+async def collect(service, job):
+    return [result async for result in service.stream(job)]
+
+
+def test_resume_hash_ignores_whitespace():
+    assert resume_hash("Python  developer\n") == resume_hash(" Python developer")
+    assert resume_hash("Python developer") != resume_hash("Java developer")
+
+
+@pytest.mark.asyncio
+async def test_workers_are_bounded():
+    claude = FakeClaude()
+    service = BatchAnalysisService(claude, max_workers=3)
+
+    job = service.submit([resume(i) for i in range(10)])
+    results = await collect(service, job)
+
+    assert len(results) == 10 and all(r["status"] == "ok" for r in results)
+    assert claude.max_active == 3
+    assert {endpoint for _, endpoint in claude.calls} == {"batch_analyze_resume"}
+    assert job.status()["status"] == "completed"
+
+
+@pytest.mark.asyncio
+async def test_failed_items_are_retried_then_reported():
+    flaky, broken = resume(1), resume(2)
+    claude = FakeClaude(failures={flaky["resume_text"]: 1, broken["resume_text"]: 99})
+    service = BatchAnalysisService(claude, max_retries=2, retry_backoff=0)
+
+    results = {r["id"]: r for r in await collect(service, service.submit([flaky, broken]))}
+
+    assert results["r1"]["status"] == "ok" and results["r1"]["attempts"] == 2
+    assert results["r2"] == {**results["r2"], "status": "error", "error": "bad JSON from model", "attempts": 3}
+    assert service.stats()["retries"] == 3 and service.stats()["failed"] == 1
+
+    # Failures are not cached: resubmitting tries again
+    await collect(service, service.submit([broken]))
+    assert len(claude.calls) == 2 + 3 + 3
+
+
+@pytest.mark.asyncio
+async def test_unexpected_failure_is_reported_for_every_copy():
+    service = BatchAnalysisService(FakeClaude())
+    text = resume(1)["resume_text"]
+
+    async def broken(key, fetch):
+        raise RuntimeError("worker pool gone")
+
+    with patch.object(service._in_flight, "run", broken):
+        job = service.submit([resume(1), resume(2, text), resume(3)])
+        results = await asyncio.wait_for(collect(service, job), timeout=1)
+
+    assert len(results) == 3 and all(r["status"] == "error" and r["error"] == "worker pool gone" for r in results)
+    assert job.status()["status"] == "completed" and service.stats()["failed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_duplicates_within_and_across_batches_cost_one_call():
+    claude = FakeClaude()
+    service = BatchAnalysisService(claude)
+
+    first = await collect(service, service.submit([resume(1), resume(2, resume(1)["resume_text"] + "  ")]))
+    second = await collect(service, service.submit([resume(3, resume(1)["resume_text"])]))
+
+    assert len(claude.calls) == 1
+    assert sorted(r["cached"] for r in first) == [False, True]
+    assert second[0]["cached"] is True
+    assert first[0]["result"] == second[0]["result"]
+
+
+@pytest.mark.asyncio
+async def test_status_reports_progress():
+    slow = resume(2)
+    claude = FakeClaude(delays={slow["resume_text"]: 0.2})
+    service = BatchAnalysisService(claude)
+
+    job = service.submit([resume(1), slow])
+    assert job.status()["status"] == "queued"
+    await asyncio.sleep(0.1)
+
+    status = job.status()
+    assert status["status"] == "running"
+    assert status["completed"] == 1 and status["total"] == 2
+    await collect(service, job)
+    assert job.status()["finished_at"] is not None
+
+
+@pytest.mark.asyncio
+async def test_results_stream_as_ndjson_in_completion_order():
+    from app import main
+
+    slow, fast = resume(1), resume(2)
+    service = BatchAnalysisService(FakeClaude(delays={slow["resume_text"]: 0.1}))
+    with patch.object(main, "batch_service", service):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            submitted = await client.post("/api/advisor/batch", json={"resumes": [slow, fast]})
+            body = submitted.json()
+            response = await client.get(body["results_url"])
+            status = await client.get(body["status_url"])
+            missing = await client.get("/api/advisor/batch/nope")
+            short = await client.post("/api/advisor/batch", json={"resumes": [{"resume_text": "too short"}]})
+    await service.shutdown()
+
+    assert submitted.status_code == 202 and body["total"] == 2
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == ["r2", "r1"]
+    assert status.json()["succeeded"] == 2
+    assert missing.status_code == 404
+    assert short.status_code == 400
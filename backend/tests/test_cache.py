@@ -0,0 +1,229 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.cache import SearchCache, SingleFlight, TTLCache, search_cache_key
+from app.adzuna_service import AdzunaService
+
+
+def make_result(n: int = 1):
+    return {"jobs": [{"id": str(i)} for i in range(n)], "count": n}
+
+
+def test_cache_key_normalizes_parameters():
+    a = search_cache_key("ca", "  Python   Developer ", "Toronto", 1, 10)
+    b = search_cache_key("CA", "python developer", "toronto", 1, 10)
+    assert a == b
+    assert a != search_cache_key("ca", "python developer", "toronto", 2, 10)
+    # Adzuna caps results_per_page at 50, so larger requests share the 50 entry
+    assert search_cache_key("ca", "x", "", 1, 80) == search_cache_key("ca", "x", "", 1, 50)
+
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_expiry():
+    cache = TTLCache(max_entries=10, ttl=60)
+    with patch("app.cache.time.monotonic", return_value=1000.0):
+        cache.set("a", 1)
+    with patch("app.cache.time.monotonic", return_value=1061.0):
+        assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_single_flight_survives_one_caller_cancelling():
+    flight = SingleFlight()
+    started = asyncio.Event()
+
+    async def work():
+        started.set()
+        await asyncio.sleep(0.05)
+        return 42
+
+    first = asyncio.create_task(flight.run("k", work))
+    await started.wait()
+    second = asyncio.create_task(flight.run("k", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == 42
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_misses_make_one_upstream_call():
+    cache = SearchCache(max_entries=10, ttl=60)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return make_result()
+
+    key = search_cache_key("ca", "python developer", "toronto", 1, 10)
+    results = await asyncio.gather(*[cache.get_or_fetch(key, fetch) for _ in range(50)])
+
+    assert calls == 1
+    assert all(r == make_result() for r in results)
+    stats = cache.stats()
+    assert stats["coalesced"] == 49
+    assert stats["upstream_fetches"] == 1
+
+    await cache.get_or_fetch(key, fetch)
+    assert calls == 1
+    assert cache.stats()["memory"]["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached_and_bypass_refreshes():
+    cache = SearchCache(max_entries=10, ttl=60)
+    responses = [{"error": "Adzuna API error: 500", "jobs": [], "count": 0}, make_result(1), make_result(2)]
+
+    async def fetch():
+        return responses.pop(0)
+
+    assert "error" in await cache.get_or_fetch("k", fetch)
+    assert (await cache.get_or_fetch("k", fetch))["count"] == 1
+    assert (await cache.get_or_fetch("k", fetch))["count"] == 1  # served from memory
+    assert (await cache.get_or_fetch("k", fetch, bypass=True))["count"] == 2
+    assert (await cache.get_or_fetch("k", fetch))["count"] == 2
+    assert cache.stats()["bypasses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_persistent_tier_survives_restart(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        return make_result(3)
+
+    first = SearchCache(db_path=db_path)
+    await first.get_or_fetch("k", fetch)
+    await first.close()
+
+    second = SearchCache(db_path=db_path)
+    assert (await second.get_or_fetch("k", fetch))["count"] == 3
+    assert calls == 1
+    assert second.stats()["persistent_hits"] == 1
+    await second.close()
+
+
+@pytest.mark.asyncio
+async def test_workers_sharing_a_cache_file_fetch_each_key_once(tmp_path):
+    db_path = str(tmp_path / "shared.db")
+    # Two caches on one file stand in for two worker processes
+    workers = [SearchCache(db_path=db_path, lease_poll=0.01) for _ in range(2)]
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.1)
+        return make_result(2)
+
+    results = await asyncio.gather(*(worker.get_or_fetch("k", fetch) for worker in workers))
+    assert calls == 1 and results[0] == results[1]
+    # The second worker read the first one's result from the store, while waiting or right after the lease
+    assert sum(worker.stats()["persistent_hits"] for worker in workers) == 1
+
+    # A holder that gets an error stores nothing, so the waiting worker fetches for itself
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"error": "Adzuna API error: 500", "jobs": [], "count": 0}
+
+    first = asyncio.create_task(workers[0].get_or_fetch("other", failing))
+    await asyncio.sleep(0.02)
+    second = await workers[1].get_or_fetch("other", fetch)
+    assert "error" in await first and second["count"] == 2
+
+    db = await workers[0].store._connect()
+    async with db.execute("PRAGMA journal_mode") as cursor:
+        assert (await cursor.fetchone())[0] == "wal"
+    for worker in workers:
+        await worker.close()
+
+
+@pytest.mark.asyncio
+async def test_lease_released_between_polls_is_read_from_the_store(tmp_path):
+    db_path = str(tmp_path / "shared.db")
+    holder, waiter = (SearchCache(db_path=db_path, lease_poll=0.01) for _ in range(2))
+    fetch = AsyncMock(return_value=make_result(2))
+
+    # The holder stores and releases after the waiter's read but before its lease check
+    await holder.store.acquire_lease("k", 30)
+    lease_held = waiter.store.lease_held
+
+    async def finish_then_check(key):
+        await holder.store.set(key, make_result(3), 60)
+        await holder.store.release_lease(key)
+        return await lease_held(key)
+
+    waiter.store.lease_held = finish_then_check
+    assert (await waiter.get_or_fetch("k", fetch))["count"] == 3
+
+    # A lease won just after the previous holder stored: read, don't fetch again
+    await holder.store.set("j", make_result(4), 60)
+    read_store = waiter._read_store
+    misses = iter([None])
+
+    async def stale_first_read(key):
+        return next(misses, None) or await read_store(key)
+
+    waiter._read_store = stale_first_read
+    assert (await waiter.get_or_fetch("j", fetch))["count"] == 4
+    assert fetch.await_count == 0
+    for cache in (holder, waiter):
+        await cache.close()
+
+
+@pytest.mark.asyncio
+async def test_adzuna_search_uses_cache():
+    service = AdzunaService()
+    calls = []
+
+    async def fake_fetch(what, where, country, results_per_page, page, **kwargs):
+        calls.append((what, where, page))
+        return make_result()
+
+    with patch.object(service, "_fetch_jobs", side_effect=fake_fetch):
+        await service.search_jobs(what="Python Developer", where="Toronto")
+        result = await service.search_jobs(what="python developer", where="toronto")
+        result["jobs"] = []  # mutating a response must not corrupt the cache
+        again = await service.search_jobs(what="python developer", where="toronto")
+        await service.search_jobs(what="python developer", where="toronto", use_cache=False)
+    await service.shutdown()
+
+    assert len(calls) == 2
+    assert again["count"] == 1 and len(again["jobs"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_mutating_jobs_in_place_does_not_corrupt_cache():
+    service = AdzunaService()
+
+    async def fake_fetch(what, where, country, results_per_page, page, **kwargs):
+        return make_result()
+
+    with patch.object(service, "_fetch_jobs", side_effect=fake_fetch):
+        first = await service.search_jobs(what="python", where="toronto")
+        first["jobs"][0]["title"] = "changed"
+        first["jobs"].append({"id": "extra"})
+        again = await service.search_jobs(what="python", where="toronto")
+    await service.shutdown()
+
+    assert len(again["jobs"]) == 1
+    assert "title" not in again["jobs"][0]
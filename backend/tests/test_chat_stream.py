@@ -0,0 +1,177 @@
+import asyncio
+import json
+import time
+import pytest
+import httpx
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.llm_client import LLMClient, LLMTimeoutError
+
+SEARCH_LATENCY = 0.1
+TOKEN_DELAY = 0.05
+SUMMARY_TOKENS = ["Found ", "some ", "great ", "Python ", "roles."]
+
+SAMPLE_JOBS = [
+    {"id": "1", "title": "Python Developer", "company": "Acme", "location": "Toronto", "salary_min": 80000, "salary_max": 100000},
+]
+
+
+def make_chunk(text):
+    chunk = MagicMock()
+    chunk.choices = [MagicMock(delta=MagicMock(content=text))]
+    return chunk
+
+
+class FakeStream:
+    def __init__(self, tokens, delay):
+        self.tokens = list(tokens)
+        self.delay = delay
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.tokens:
+            raise StopAsyncIteration
+        await asyncio.sleep(self.delay)
+        return make_chunk(self.tokens.pop(0))
+
+    async def close(self):
+        self.closed = True
+
+
+class StreamingFakeGroq:
+    def __init__(self, tokens=SUMMARY_TOKENS, delay=TOKEN_DELAY):
+        self.tokens = tokens
+        self.delay = delay
+        self.streams = []
+        self.chat = MagicMock()
+        self.chat.completions.create = self.create
+
+    async def create(self, model, max_tokens, messages, stream=False):
+        assert stream, "summary should be streamed"
+        self.streams.append(FakeStream(self.tokens, self.delay))
+        return self.streams[-1]
+
+
+async def slow_search(**kwargs):
+    await asyncio.sleep(SEARCH_LATENCY)
+    return {"jobs": SAMPLE_JOBS, "count": 42}
+
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.fixture
+def fake_llm():
+    return StreamingFakeGroq()
+
+
+@pytest.fixture
+def patched(fake_llm):
+    from app import main
+    from app.claude_service import ClaudeService
+
+    service = ClaudeService(llm=LLMClient(fake_llm, model="test"))
+    with patch.object(main, "claude_service", service), \
+            patch.object(main.adzuna_service, "search_jobs", AsyncMock(side_effect=slow_search)):
+        yield main
+
+
+@pytest.mark.asyncio
+async def test_jobs_arrive_before_summary(patched):
+    start = time.perf_counter()
+    timeline = []
+    async for raw in patched.stream_chat("Find Python developer jobs in Toronto"):
+        timeline.append((parse_sse(raw)[0], time.perf_counter() - start))
+
+    names = [event for (event, _), _ in timeline]
+    assert names == ["intent", "jobs"] + ["token"] * len(SUMMARY_TOKENS) + ["done"]
+
+    jobs_at = next(t for (event, _), t in timeline if event == "jobs")
+    done_at = timeline[-1][1]
+    # Time to first job is parse + search; the summary only delays "done"
+    assert jobs_at < SEARCH_LATENCY + TOKEN_DELAY
+    assert done_at >= SEARCH_LATENCY + TOKEN_DELAY * len(SUMMARY_TOKENS)
+
+    (_, done), _ = timeline[-1]
+    assert done.pop("session_id")
+    assert done == {"response": "Found some great Python roles.", "job_count": 42}
+
+
+@pytest.mark.asyncio
+async def test_stream_endpoint_returns_event_stream(patched):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=patched.app), base_url="http://test") as client:
+        response = await client.post("/api/chat/stream", json={"message": "Find Python developer jobs in Toronto"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert events[0] == ("intent", {"is_job_search": True, "what": "Python developer", "where": "Toronto"})
+    assert events[1][1]["jobs"] == SAMPLE_JOBS
+
+
+@pytest.mark.asyncio
+async def test_non_search_message_skips_to_done(patched):
+    events = [parse_sse(raw)[0] async for raw in patched.stream_chat("hi")]
+    assert [name for name, _ in events] == ["intent", "done"]
+    assert events[-1][1]["response"] == patched.NOT_A_SEARCH_REPLY
+
+
+@pytest.mark.asyncio
+async def test_summary_failure_falls_back(patched, fake_llm):
+    async def broken(**kwargs):
+        raise RuntimeError("upstream down")
+
+    fake_llm.chat.completions.create = broken
+    events = [parse_sse(raw)[0] async for raw in patched.stream_chat("Find Python developer jobs in Toronto")]
+    assert events[-1][1]["response"] == patched.fallback_summary(42, "Python developer", "Toronto")
+
+
+@pytest.mark.asyncio
+async def test_summary_failure_mid_stream_is_reported(patched, fake_llm):
+    class BrokenStream(FakeStream):
+        async def __anext__(self):
+            if len(self.tokens) < len(SUMMARY_TOKENS) - 1:
+                raise RuntimeError("connection reset")
+            return await super().__anext__()
+
+    async def create(**kwargs):
+        return BrokenStream(SUMMARY_TOKENS, 0)
+
+    fake_llm.chat.completions.create = create
+    events = [parse_sse(raw)[0] async for raw in patched.stream_chat("Find Python developer jobs in Toronto")]
+
+    assert [name for name, _ in events] == ["intent", "jobs", "token", "token", "done"]
+    done = events[-1][1]
+    assert done["response"] == "Found some"
+    assert "connection reset" in done["error"]
+
+
+@pytest.mark.asyncio
+async def test_llm_stream_releases_slot_when_consumer_stops(fake_llm):
+    llm = LLMClient(fake_llm, model="test", max_concurrency=1)
+    stream = llm.stream("format_job_results", messages=[{"role": "user", "content": "hi"}], max_tokens=10)
+    assert await stream.__anext__() == SUMMARY_TOKENS[0]
+    await stream.aclose()
+
+    assert fake_llm.streams[0].closed
+    stats = llm.stats()["endpoints"]["format_job_results"]
+    assert stats["in_flight"] == 0
+    # The single slot is free again
+    chunks = [c async for c in llm.stream("format_job_results", messages=[{"role": "user", "content": "hi"}], max_tokens=10)]
+    assert "".join(chunks) == "".join(SUMMARY_TOKENS)
+
+
+@pytest.mark.asyncio
+async def test_llm_stream_deadline():
+    llm = LLMClient(StreamingFakeGroq(delay=0.2), model="test")
+    with pytest.raises(LLMTimeoutError):
+        async for _ in llm.stream("format_job_results", messages=[{"role": "user", "content": "hi"}], max_tokens=10, timeout=0.3):
+            pass
@@ -1,34 +1,35 @@
 import pytest
 import json
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 
 @pytest.fixture(autouse=True)
-def mock_anthropic(monkeypatch):
-    """Prevent real Anthropic client from being instantiated during tests."""
+def mock_groq(monkeypatch):
+    """Prevent real Groq client from being instantiated during tests."""
     mock_client = MagicMock()
-    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
-    with patch("anthropic.Anthropic", return_value=mock_client):
+    mock_client.chat.completions.create = AsyncMock()
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    # Send every query to the (mocked) LLM; the rule-based fast path has its own tests
+    monkeypatch.setenv("QUERY_FAST_PATH_MIN_CONFIDENCE", "1.1")
+    with patch("app.llm_providers.AsyncGroq", return_value=mock_client):
         yield mock_client
 
 
-def make_mock_response(payload: dict):
-    """Helper: build a mock Claude API response from a dict."""
+def make_mock_text_response(text: str):
+    """Helper: build a mock Groq chat completion from plain text."""
     mock_response = MagicMock()
-    mock_response.content = [MagicMock(text=json.dumps(payload))]
+    mock_response.choices = [MagicMock(message=MagicMock(content=text))]
     return mock_response
 
 
-def make_mock_text_response(text: str):
-    """Helper: build a mock Claude API response from plain text."""
-    mock_response = MagicMock()
-    mock_response.content = [MagicMock(text=text)]
-    return mock_response
+def make_mock_response(payload: dict):
+    """Helper: build a mock Groq chat completion from a dict."""
+    return make_mock_text_response(json.dumps(payload))
 
 
 @pytest.mark.asyncio
-async def test_senior_cybersecurity_remote(mock_anthropic):
-    mock_anthropic.messages.create.return_value = make_mock_response({
+async def test_senior_cybersecurity_remote(mock_groq):
+    mock_groq.chat.completions.create.return_value = make_mock_response({
         "is_job_search": True,
         "what": "senior cybersecurity engineer",
         "where": "remote"
@@ -44,8 +45,8 @@ async def test_senior_cybersecurity_remote(mock_anthropic):
 
 
 @pytest.mark.asyncio
-async def test_react_developer_toronto(mock_anthropic):
-    mock_anthropic.messages.create.return_value = make_mock_response({
+async def test_react_developer_toronto(mock_groq):
+    mock_groq.chat.completions.create.return_value = make_mock_response({
         "is_job_search": True,
         "what": "React developer",
         "where": "Toronto"
@@ -61,8 +62,8 @@ async def test_react_developer_toronto(mock_anthropic):
 
 
 @pytest.mark.asyncio
-async def test_non_job_search_message(mock_anthropic):
-    mock_anthropic.messages.create.return_value = make_mock_response({
+async def test_non_job_search_message(mock_groq):
+    mock_groq.chat.completions.create.return_value = make_mock_response({
         "is_job_search": False,
         "what": "",
         "where": ""
@@ -76,8 +77,8 @@ async def test_non_job_search_message(mock_anthropic):
 
 
 @pytest.mark.asyncio
-async def test_job_search_no_location(mock_anthropic):
-    mock_anthropic.messages.create.return_value = make_mock_response({
+async def test_job_search_no_location(mock_groq):
+    mock_groq.chat.completions.create.return_value = make_mock_response({
         "is_job_search": True,
         "what": "data scientist",
         "where": ""
@@ -93,13 +94,11 @@ async def test_job_search_no_location(mock_anthropic):
 
 
 @pytest.mark.asyncio
-async def test_response_with_markdown_fences(mock_anthropic):
+async def test_response_with_markdown_fences(mock_groq):
     """Claude sometimes wraps JSON in markdown code fences - make sure we handle it."""
-    mock_response = MagicMock()
-    mock_response.content = [MagicMock(
-        text='```json\n{"is_job_search": true, "what": "Python developer", "where": "Vancouver"}\n```'
-    )]
-    mock_anthropic.messages.create.return_value = mock_response
+    mock_groq.chat.completions.create.return_value = make_mock_text_response(
+        '```json\n{"is_job_search": true, "what": "Python developer", "where": "Vancouver"}\n```'
+    )
 
     from app.claude_service import ClaudeService
     service = ClaudeService()
@@ -120,9 +119,9 @@ SAMPLE_JOBS = [
 
 
 @pytest.mark.asyncio
-async def test_format_job_results_returns_string(mock_anthropic):
+async def test_format_job_results_returns_string(mock_groq):
     """format_job_results should return a non-empty string."""
-    mock_anthropic.messages.create.return_value = make_mock_text_response(
+    mock_groq.chat.completions.create.return_value = make_mock_text_response(
         "Great news! I found 45 cybersecurity roles available remotely across Canada. "
         "Salaries range from $70,000 to $150,000, with opportunities at both startups and established firms. "
         "Good luck with your search!"
@@ -142,9 +141,9 @@ async def test_format_job_results_returns_string(mock_anthropic):
 
 
 @pytest.mark.asyncio
-async def test_format_job_results_no_location(mock_anthropic):
+async def test_format_job_results_no_location(mock_groq):
     """format_job_results should work when no location is provided."""
-    mock_anthropic.messages.create.return_value = make_mock_text_response(
+    mock_groq.chat.completions.create.return_value = make_mock_text_response(
         "I found 20 data scientist positions across Canada. "
         "Roles span various industries with competitive salaries. Good luck!"
     )
@@ -163,9 +162,9 @@ async def test_format_job_results_no_location(mock_anthropic):
 
 
 @pytest.mark.asyncio
-async def test_format_job_results_empty_jobs(mock_anthropic):
+async def test_format_job_results_empty_jobs(mock_groq):
     """format_job_results should handle an empty jobs list gracefully."""
-    mock_anthropic.messages.create.return_value = make_mock_text_response(
+    mock_groq.chat.completions.create.return_value = make_mock_text_response(
         "I found 0 results for that search. Try broadening your keywords!"
     )
 
@@ -0,0 +1,146 @@
+import json
+import time
+import asyncio
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.adzuna_service import AdzunaService
+from app.claude_service import ClaudeService
+from app.cover_letters import CoverLetterService
+from app.llm_client import LLMClient
+from app.llm_providers import StubProvider
+
+PROFILE = {
+    "summary": "Backend engineer with ten years of Python.",
+    "experience_level": "senior",
+    "key_skills": ["Python", "AWS"],
+    "possible_directions": ["Backend Engineer"],
+}
+RESUME = "EXPERIENCE\n" + "\n".join(f"- Built service number {n} in Python on AWS for a payments team" for n in range(400))
+JOBS = [{"id": str(n), "title": f"Backend Engineer {n}", "company": "Acme", "description": "Python APIs."} for n in range(10)]
+
+
+class SlowLetters(StubProvider):
+    """Streams the stub letter a word at a time after a first-token delay, tracking concurrency."""
+
+    def __init__(self, latency=0.1, word_delay=0.002, failing_titles=(), **kwargs):
+        super().__init__(latency=latency, **kwargs)
+        self.word_delay = word_delay
+        self.failing_titles = set(failing_titles)
+        self.prompts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _open_stream(self, messages, max_tokens, schema=None):
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        if any(title in prompt for title in self.failing_titles):
+            raise RuntimeError("upstream 500")
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        chunks = await super()._open_stream(messages, max_tokens, schema)
+
+        async def deltas():
+            try:
+                async for chunk in chunks:
+                    await asyncio.sleep(self.word_delay)
+                    yield chunk
+            finally:
+                self.in_flight -= 1
+
+        return deltas()
+
+
+def service_with(provider: StubProvider, analyses=None) -> CoverLetterService:
+    claude = ClaudeService(llm=LLMClient(providers=[provider]))
+    claude.analyze_resume = AsyncMock(return_value={"profile": PROFILE, "questions": []})
+    adzuna = MagicMock(spec=AdzunaService)
+    adzuna.get_job = AsyncMock(return_value=None)
+    return CoverLetterService(claude, adzuna, analyses=analyses)
+
+
+async def collect(service, jobs=JOBS, profile=None):
+    return [event async for event in service.generate(RESUME, jobs, profile)]
+
+
+@pytest.mark.asyncio
+async def test_letters_are_written_concurrently_and_interleaved():
+    provider = SlowLetters(latency=0.1, max_concurrency=10)
+    service = service_with(provider)
+
+    start = time.perf_counter()
+    events = await collect(service)
+    elapsed = time.perf_counter() - start
+
+    letters = [e for e in events if e["event"] == "letter"]
+    assert len(letters) == 10 and all("Dear Hiring Manager" in e["letter"] for e in letters)
+    assert provider.max_in_flight == 10
+    # Ten letters take about as long as one, not ten times as long
+    assert elapsed < 0.5
+    deltas = [e["job_id"] for e in events if e["event"] == "delta"]
+    assert deltas[:10] != sorted(deltas[:10]) or len(set(deltas[:20])) > 1
+    assert events[0]["event"] == "context" and events[-1] == {**events[-1], "event": "done", "succeeded": 10, "failed": 0}
+
+
+@pytest.mark.asyncio
+async def test_llm_concurrency_limit_is_respected():
+    provider = SlowLetters(latency=0.02, max_concurrency=3)
+    service = service_with(provider)
+    events = await collect(service)
+    assert provider.max_in_flight == 3
+    assert sum(e["event"] == "letter" for e in events) == 10
+
+
+@pytest.mark.asyncio
+async def test_resume_context_is_built_once_and_shared():
+    provider = SlowLetters(latency=0)
+    service = service_with(provider)
+
+    first = (await collect(service, JOBS[:3]))[0]
+    second = (await collect(service, JOBS[3:6]))[0]
+    assert service.claude.analyze_resume.await_count == 1
+    assert (first["profile_source"], first["cached"]) == ("analyzed", False)
+    assert (second["profile_source"], second["cached"]) == ("cached", True)
+
+    # Every prompt leads with the same condensed context, far smaller than the resume
+    prefix = provider.prompts[0].split("Write a cover letter for this job:")[0]
+    assert all(p.startswith(prefix) for p in provider.prompts)
+    assert PROFILE["summary"] in prefix and len(prefix) < len(RESUME) / 3
+
+    # A profile sent by the client is used as is
+    third = (await collect(service, JOBS[:1], profile={**PROFILE, "experience_level": "mid"}))[0]
+    assert third["profile_source"] == "request" and service.claude.analyze_resume.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_one_failed_letter_does_not_stop_the_others():
+    service = service_with(SlowLetters(latency=0, failing_titles={"Backend Engineer 4"}))
+    service.adzuna.get_job = AsyncMock(side_effect=lambda job_id: {"description": "Full posting text."} if job_id == "2" else None)
+    events = await collect(service)
+
+    errors = [e for e in events if e["event"] == "error"]
+    assert [e["job_id"] for e in errors] == ["4"] and "upstream 500" in errors[0]["detail"]
+    assert events[-1]["succeeded"] == 9 and events[-1]["failed"] == 1
+    assert any("Full posting text." in p for p in service.claude.llm.primary.prompts)
+
+
+@pytest.mark.asyncio
+async def test_cover_letter_endpoint_streams_sse_and_ndjson():
+    from app import main
+
+    service = service_with(SlowLetters(latency=0))
+    body = {"resume_text": RESUME, "jobs": JOBS[:3], "profile": PROFILE}
+    with patch.object(main, "cover_letter_service", service):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            sse = await client.post("/api/advisor/cover-letters", json=body)
+            ndjson = await client.post("/api/advisor/cover-letters", params={"format": "ndjson"}, json=body)
+            empty = await client.post("/api/advisor/cover-letters", json={**body, "jobs": []})
+
+    assert sse.headers["content-type"].startswith("text/event-stream")
+    names = [block.split("\n")[0][len("event: "):] for block in sse.text.strip().split("\n\n")]
+    assert names[0] == "context" and names[-1] == "done" and names.count("letter") == 3
+
+    lines = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert {line["job_id"] for line in lines if line["event"] == "letter"} == {"0", "1", "2"}
+    assert empty.status_code == 400
@@ -0,0 +1,123 @@
+import random
+import tracemalloc
+import pytest
+from unittest.mock import patch
+
+from app.adzuna_service import AdzunaService
+from app.dedup import DuplicateDetector, choose_bands, normalize_text
+from app.multi_search import MultiSearchService
+from tests.test_multi_search import FakeAdzuna
+
+DESCRIPTION = (
+    "We are hiring a senior python developer to build data pipelines with airflow and aws. "
+    "You will work with our analytics team to design reliable ETL systems and mentor junior engineers. "
+    "The role is hybrid with two days a week in our downtown Toronto office. We offer a competitive "
+    "salary, health and dental benefits from day one, an RRSP match and a yearly learning budget."
+)
+
+
+def posting(job_id, title="Senior Python Developer", company="Acme", description=DESCRIPTION):
+    return {"id": job_id, "title": title, "company": company, "location": "Toronto", "description": description}
+
+
+ORIGINAL = posting("1")
+REPOST = posting("2", title="Sr. Python Developer", company="Hays Recruitment", description=DESCRIPTION + " Apply now...")
+OTHER = posting("3", title="Registered Nurse", description="Provide patient care on a busy hospital ward, RN licence required.")
+
+
+def test_normalize_text():
+    assert normalize_text("<b>Senior</b> Dev, C++... Apply!") == "senior dev c apply"
+
+
+def test_choose_bands_tracks_threshold():
+    assert choose_bands(128, 0.8) == (32, 4)
+    assert choose_bands(128, 0.5) == (64, 2)
+
+
+def test_reworded_repost_collapses():
+    jobs, collapsed = DuplicateDetector().collapse([ORIGINAL, REPOST, OTHER])
+    assert [j["id"] for j in jobs] == ["1", "3"]
+    assert collapsed == 1
+
+
+def test_duplicates_across_result_sets_are_marked():
+    detector = DuplicateDetector()
+    detector.collapse([ORIGINAL])
+    jobs, collapsed = detector.collapse([REPOST, OTHER])
+
+    assert collapsed == 0
+    assert jobs[0]["duplicate_of"] == "1"
+    assert "duplicate_of" not in REPOST and "duplicate_of" not in jobs[1]
+
+
+def test_signatures_are_cached_by_id():
+    detector = DuplicateDetector()
+    detector.collapse([ORIGINAL, OTHER])
+    with patch.object(detector, "signature", side_effect=AssertionError("re-signed")):
+        detector.collapse([ORIGINAL, OTHER])
+    assert detector.stats()["signature_hits"] == 2
+
+
+def test_tracked_jobs_are_bounded():
+    rng = random.Random(0)
+    vocab = [f"w{i}" for i in range(2000)]
+    detector = DuplicateDetector(max_tracked=100)
+    detector.collapse([
+        posting(str(i), title=" ".join(rng.choices(vocab, k=3)), description=" ".join(rng.choices(vocab, k=40)))
+        for i in range(300)
+    ])
+
+    stats = detector.stats()
+    assert stats["tracked"] == 100 and stats["evicted"] == 200
+    members = [m for band in detector._buckets for v in band.values() for m in (v if isinstance(v, list) else [v])]
+    assert len(members) == 100 * detector.bands and set(members) == set(detector._seen)
+
+
+def test_tracked_job_memory():
+    rng = random.Random(0)
+    vocab = [f"w{i}" for i in range(2000)]
+    jobs = [
+        posting(str(10**9 + i), title=" ".join(rng.choices(vocab, k=3)), description=" ".join(rng.choices(vocab, k=80)))
+        for i in range(1000)
+    ]
+    detector = DuplicateDetector()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        detector.collapse(jobs)
+        per_job = (tracemalloc.get_traced_memory()[0] - start) / len(jobs)
+    finally:
+        tracemalloc.stop()
+    # The cost DEDUP_MAX_TRACKED is sized by (about 3 KB a job)
+    assert per_job < 4000
+
+
+@pytest.mark.asyncio
+async def test_search_jobs_reports_collapsed_duplicates():
+    service = AdzunaService()
+    service.dedup = DuplicateDetector()
+
+    async def fake_fetch(what, where, country, results_per_page, page, **kwargs):
+        return {"jobs": [dict(ORIGINAL), dict(REPOST), dict(OTHER)], "count": 3}
+
+    with patch.object(service, "_fetch_jobs", side_effect=fake_fetch):
+        result = await service.search_jobs(what="python")
+    await service.shutdown()
+
+    assert [j["id"] for j in result["jobs"]] == ["1", "3"]
+    assert result["duplicates_collapsed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_multi_search_collapses_across_titles():
+    class DedupAdzuna(FakeAdzuna):
+        dedup = DuplicateDetector()
+
+        async def search_jobs(self, what="", **kwargs):
+            return {"jobs": {"Python Developer": [ORIGINAL], "Data Engineer": [REPOST, OTHER]}[what], "count": 2}
+
+    result = await MultiSearchService(DedupAdzuna()).search(["Python Developer", "Data Engineer"])
+
+    assert [j["id"] for j in result["jobs"]] == ["1", "3"]
+    assert result["duplicates_collapsed"] == 1
+    assert result["jobs"][0]["matched_searches"] == ["Python Developer", "Data Engineer"]
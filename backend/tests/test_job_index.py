@@ -0,0 +1,189 @@
+import asyncio
+import time
+import pytest
+import pytest_asyncio
+import httpx
+from unittest.mock import patch
+
+from app.adzuna_service import AdzunaService
+from app.job_index import JobIndex, fts_phrase, freshness_key
+
+
+def job(job_id, title, location="Toronto, Ontario", description="", salary_min=None, salary_max=None, created="2024-01-01T00:00:00Z"):
+    return {
+        "id": job_id,
+        "title": title,
+        "company": "Acme",
+        "location": location,
+        "category": "IT Jobs",
+        "description": description,
+        "salary_min": salary_min,
+        "salary_max": salary_max,
+        "contract_type": "permanent",
+        "created": created,
+        "redirect_url": f"https://example.com/{job_id}",
+    }
+
+
+JOBS = [
+    job("1", "Senior Python Developer", salary_min=90000, salary_max=120000),
+    job("2", "Data Analyst", description="Some Python scripting is a plus", salary_min=60000, salary_max=70000),
+    job("3", "Python Engineer", location="Vancouver, British Columbia", salary_min=100000),
+    job("4", "Nurse", location="Toronto, Ontario", salary_max=80000),
+    job("5", "Backend Developer (Python)", location="Remote", created="2024-02-01T00:00:00Z"),
+]
+
+
+@pytest_asyncio.fixture
+async def index():
+    index = JobIndex(":memory:")
+    await index.upsert_jobs(JOBS)
+    yield index
+    await index.close()
+
+
+@pytest_asyncio.fixture
+async def service():
+    service = AdzunaService()
+    service.index = JobIndex(":memory:")
+    yield service
+    await service.shutdown()
+
+
+def test_fts_phrase_quotes_terms():
+    assert fts_phrase('C++ "senior" dev') == '"C" "senior" "dev"'
+    assert fts_phrase("") == ""
+
+
+@pytest.mark.asyncio
+async def test_upsert_counts_only_new_ids(index):
+    assert await index.upsert_jobs([JOBS[0], job("6", "Welder")]) == 1
+    await index.upsert_jobs([job("1", "Staff Python Developer")])
+
+    assert (await index.get_job("1"))["title"] == "Staff Python Developer"
+    assert (await index.stats())["jobs"] == 6
+    # The FTS table follows the update
+    result = await index.search(what="staff")
+    assert [j["id"] for j in result["jobs"]] == ["1"]
+
+
+@pytest.mark.asyncio
+async def test_bm25_ranks_title_matches_above_description_matches(index):
+    result = await index.search(what="python")
+    ids = [j["id"] for j in result["jobs"]]
+
+    assert result["count"] == 4
+    assert ids[-1] == "2"  # only mentions Python in the description
+    assert set(ids[:3]) == {"1", "3", "5"}
+
+
+@pytest.mark.asyncio
+async def test_location_and_remote_filters(index):
+    toronto = await index.search(what="python", where="toronto")
+    remote = await index.search(what="python", where="remote")
+
+    assert {j["id"] for j in toronto["jobs"]} == {"1", "2"}
+    assert [j["id"] for j in remote["jobs"]] == ["5"]
+
+
+@pytest.mark.asyncio
+async def test_salary_range_filters(index):
+    high = await index.search(salary_min=95000)
+    capped = await index.search(what="python", salary_max=75000)
+
+    assert {j["id"] for j in high["jobs"]} == {"1", "3"}
+    assert {j["id"] for j in capped["jobs"]} == {"2"}
+
+
+@pytest.mark.asyncio
+async def test_pagination(index):
+    first = await index.search(what="python", results_per_page=3, page=1)
+    second = await index.search(what="python", results_per_page=3, page=2)
+
+    assert first["total_pages"] == 2
+    assert len(first["jobs"]) == 3 and len(second["jobs"]) == 1
+    assert not {j["id"] for j in first["jobs"]} & {j["id"] for j in second["jobs"]}
+
+
+@pytest.mark.asyncio
+async def test_live_search_indexes_in_background(service):
+    async def fake_fetch(what, where, country, results_per_page, page, **kwargs):
+        return {"jobs": JOBS[:2], "count": 2}
+
+    with patch.object(service, "_fetch_jobs", side_effect=fake_fetch):
+        await service.search_jobs(what="python", where="toronto")
+    await asyncio.gather(*service._background)
+
+    assert (await service.index.stats())["jobs"] == 2
+
+
+@pytest.mark.asyncio
+async def test_first_index_search_fetches_then_serves_from_index(service):
+    calls = []
+
+    async def fake_fetch(what, where, country, results_per_page, page, **kwargs):
+        calls.append(page)
+        return {"jobs": JOBS, "count": len(JOBS)}
+
+    with patch.object(service, "_fetch_jobs", side_effect=fake_fetch):
+        first = await service.search_indexed(what="python", where="toronto")
+        second = await service.search_indexed(what="python", where="toronto")
+
+    assert calls == [1]  # fewer than 50 results ends the walk after one page
+    assert first["source"] == "index" and first["stale"] is False
+    assert [j["id"] for j in second["jobs"]] == [j["id"] for j in first["jobs"]]
+
+
+@pytest.mark.asyncio
+async def test_first_index_search_reports_upstream_failure(service):
+    async def failing_fetch(what, where, country, results_per_page, page, **kwargs):
+        return {"error": "Adzuna API error: 429", "jobs": [], "count": 0}
+
+    with patch.object(service, "_fetch_jobs", side_effect=failing_fetch):
+        result = await service.search_indexed(what="python", where="toronto")
+
+    assert result["error"] == "Adzuna API error: 429"
+
+
+@pytest.mark.asyncio
+async def test_stale_results_are_served_while_refreshing(service):
+    await service.index.upsert_jobs(JOBS[:1])
+    key = freshness_key("ca", "python", "toronto")
+    await service.index.mark_refreshed(key)
+    service.index_max_age = 0
+    refreshed = asyncio.Event()
+
+    async def slow_fetch(what, where, country, results_per_page, page, **kwargs):
+        await asyncio.sleep(0.05)
+        refreshed.set()
+        return {"jobs": [job("7", "Python Team Lead")], "count": 1}
+
+    with patch.object(service, "_fetch_jobs", side_effect=slow_fetch):
+        start = time.perf_counter()
+        result = await service.search_indexed(what="python", where="toronto")
+        assert time.perf_counter() - start < 0.05
+        assert result["stale"] is True
+        assert [j["id"] for j in result["jobs"]] == ["1"]
+
+        await asyncio.wait_for(refreshed.wait(), 1)
+        await asyncio.gather(*service._background)
+
+    assert await service.index.get_job("7") is not None
+
+
+@pytest.mark.asyncio
+async def test_search_endpoint_index_mode(service):
+    from app import main
+
+    await service.index.upsert_jobs(JOBS)
+    await service.index.mark_refreshed(freshness_key("ca", "python", ""))
+    with patch.object(main, "adzuna_service", service):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            response = await client.get("/api/jobs/search", params={"what": "python", "mode": "index", "salary_min": 95000})
+            bad = await client.get("/api/jobs/search", params={"mode": "offline"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["source"] == "index"
+    assert {j["id"] for j in body["jobs"]} == {"1", "3"}
+    assert bad.status_code == 400
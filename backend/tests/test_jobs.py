@@ -0,0 +1,111 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from unittest.mock import patch
+
+from app.adzuna_service import AdzunaService
+from app.jobs import Job, parse_fields, project, truncate_description
+from app.pagination import PagePrefetcher
+from app.responses import CompressionMiddleware, brotli, negotiate_encoding
+
+LONG_DESCRIPTION = "Build and maintain Python services for our data platform. " * 30
+RAW_JOB = {
+    "id": "42",
+    "title": "Python Developer",
+    "company": {"display_name": "Acme"},
+    "location": {"display_name": "Toronto, Ontario"},
+    "description": LONG_DESCRIPTION,
+    "salary_min": 90000,
+    "category": {"label": "IT Jobs"},
+}
+
+
+def test_job_record_truncates_only_long_descriptions():
+    job = Job.from_adzuna(RAW_JOB)
+    preview = job.to_dict(description_chars=100)
+    assert len(preview["description"]) <= 101 and preview["description"].endswith("…")
+    assert job.to_dict()["description"] == LONG_DESCRIPTION
+    assert Job.from_adzuna({**RAW_JOB, "description": "Short."}).to_dict(500)["description"] == "Short."
+    assert preview["company"] == "Acme" and preview["salary_max"] is None
+    assert truncate_description("", 10) == ""
+
+
+def test_fields_projection():
+    assert parse_fields("") is None
+    assert parse_fields("title, company") == ["id", "title", "company"]
+    with pytest.raises(ValueError, match="bogus"):
+        parse_fields("title,bogus")
+    jobs = [Job.from_adzuna(RAW_JOB).to_dict(500)]
+    assert project(jobs, ["id", "salary_min"]) == [{"id": "42", "salary_min": 90000}]
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("*") == ("br" if brotli else "gzip")
+    assert negotiate_encoding("br;q=1.0, gzip;q=0.5") == ("br" if brotli else "gzip")
+
+
+@pytest.mark.asyncio
+async def test_only_complete_responses_are_compressed():
+    inner = FastAPI()
+
+    @inner.get("/big")
+    async def big():
+        return PlainTextResponse("x" * 5000)
+
+    @inner.get("/small")
+    async def small():
+        return PlainTextResponse("x")
+
+    @inner.get("/events")
+    async def events():
+        async def stream():
+            for i in range(3):
+                yield f"data: {'x' * 2000}\n\n"
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    app = CompressionMiddleware(inner, minimum_size=1000)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        big_response = await client.get("/big", headers={"Accept-Encoding": "gzip"})
+        small_response = await client.get("/small", headers={"Accept-Encoding": "gzip"})
+        events_response = await client.get("/events", headers={"Accept-Encoding": "gzip"})
+        plain = await client.get("/big", headers={"Accept-Encoding": "identity"})
+
+    assert big_response.headers["content-encoding"] == "gzip"
+    assert int(big_response.headers["content-length"]) < 100
+    assert big_response.text == "x" * 5000
+    assert "accept-encoding" in big_response.headers["vary"].lower()
+    assert "content-encoding" not in small_response.headers
+    assert "content-encoding" not in events_response.headers and events_response.text.count("data:") == 3
+    assert "content-encoding" not in plain.headers
+
+
+@pytest.mark.asyncio
+async def test_search_projection_and_full_job_on_demand():
+    from app import main
+
+    service = AdzunaService()
+    service.index = None
+    service.app_id = service.app_key = "test"
+    service.client = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, json={"results": [RAW_JOB], "count": 1})
+    ))
+    with patch.object(main, "adzuna_service", service), patch.object(main, "page_prefetcher", PagePrefetcher(service)):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            full = await client.get("/api/jobs/search", params={"what": "python"})
+            slim = await client.get("/api/jobs/search", params={"what": "python", "fields": "title,salary_min"})
+            bad = await client.get("/api/jobs/search", params={"what": "python", "fields": "nope"})
+            job = await client.get("/api/jobs/42")
+            missing = await client.get("/api/jobs/does-not-exist")
+            stats = await client.get("/api/stats")
+    await service.shutdown()
+
+    assert stats.headers["content-encoding"] == "gzip"
+    assert full.json()["jobs"][0]["description"].endswith("…")
+    assert slim.json()["jobs"] == [{"id": "42", "title": "Python Developer", "salary_min": 90000}]
+    assert bad.status_code == 400
+    assert job.json()["description"] == LONG_DESCRIPTION
+    assert missing.status_code == 404
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import time
+import pytest
+import httpx
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.llm_client import LLMClient, LLMTimeoutError, parse_endpoint_settings
+
+LLM_LATENCY = 0.2
+
+SAMPLE_JOBS = [
+    {"id": "1", "title": "Python Developer", "company": "Acme", "location": "Toronto", "salary_min": 80000, "salary_max": 100000},
+]
+
+
+def make_completion(text: str):
+    response = MagicMock()
+    response.choices = [MagicMock(message=MagicMock(content=text))]
+    return response
+
+
+class SlowFakeGroq:
+    """Async stand-in for the Groq client that sleeps like a real round trip."""
+
+    def __init__(self, latency: float = LLM_LATENCY):
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.chat = MagicMock()
+        self.chat.completions.create = self.create
+
+    async def create(self, model, max_tokens, messages, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        if "extract job search parameters" in messages[0]["content"]:
+            return make_completion(json.dumps({"is_job_search": True, "what": "python developer", "where": "Toronto"}))
+        return make_completion("Found some great Python roles in Toronto.")
+
+
+@pytest.fixture
+def fake_llm():
+    return SlowFakeGroq()
+
+
+@pytest.fixture
+def api(fake_llm):
+    """Patch the app singletons with a slow fake LLM and an instant Adzuna."""
+    from app import main
+    from app.claude_service import ClaudeService
+
+    service = ClaudeService(llm=LLMClient(fake_llm, model="test", max_concurrency=32))
+    search = AsyncMock(return_value={"jobs": SAMPLE_JOBS, "count": 1})
+    with patch.object(main, "claude_service", service), patch.object(main.adzuna_service, "search_jobs", search):
+        yield main.app
+
+
+def test_parse_endpoint_settings():
+    assert parse_endpoint_settings("analyze_resume=2, suggest_job_titles=3") == {
+        "analyze_resume": 2,
+        "suggest_job_titles": 3,
+    }
+    assert parse_endpoint_settings("analyze_resume=1.5", cast=float) == {"analyze_resume": 1.5}
+    assert parse_endpoint_settings("") == {}
+    assert parse_endpoint_settings("bogus,analyze_resume=x") == {}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_chat_requests_overlap(api):
+    """N concurrent /api/chat calls should take about one request's latency, not N."""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api), base_url="http://test") as client:
+        start = time.perf_counter()
+        response = await client.post("/api/chat", json={"message": "Find Python developer jobs in Toronto"})
+        single = time.perf_counter() - start
+        assert response.status_code == 200
+        assert response.json()["job_count"] == 1
+
+        n = 10
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[
+            client.post("/api/chat", json={"message": "Find Python developer jobs in Toronto"})
+            for _ in range(n)
+        ])
+        elapsed = time.perf_counter() - start
+
+    assert all(r.status_code == 200 for r in responses)
+    assert elapsed < single * 2, f"{n} concurrent requests took {elapsed:.2f}s vs {single:.2f}s for one"
+
+
+@pytest.mark.asyncio
+async def test_health_is_not_blocked_by_llm_call(api):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api), base_url="http://test") as client:
+        chat = asyncio.create_task(client.post("/api/chat", json={"message": "python jobs"}))
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        health = await client.get("/health")
+        assert time.perf_counter() - start < LLM_LATENCY / 2
+        assert health.status_code == 200
+        assert not chat.done()
+        await chat
+
+
+@pytest.mark.asyncio
+async def test_global_concurrency_limit(fake_llm):
+    llm = LLMClient(fake_llm, model="test", max_concurrency=2)
+    await asyncio.gather(*[
+        llm.complete("format_job_results", messages=[{"role": "user", "content": "hi"}], max_tokens=10)
+        for _ in range(6)
+    ])
+    assert fake_llm.max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_endpoint_concurrency_limit(fake_llm):
+    llm = LLMClient(fake_llm, model="test", max_concurrency=8, endpoint_limits={"analyze_resume": 1})
+    await asyncio.gather(*[
+        llm.complete("analyze_resume", messages=[{"role": "user", "content": "hi"}], max_tokens=10)
+        for _ in range(3)
+    ])
+    assert fake_llm.max_in_flight == 1
+    assert llm.stats()["endpoints"]["analyze_resume"]["calls"] == 3
+
+
+@pytest.mark.asyncio
+async def test_deadline_raises_timeout(fake_llm):
+    llm = LLMClient(fake_llm, model="test", endpoint_timeouts={"analyze_resume": 0.05})
+    with pytest.raises(LLMTimeoutError):
+        await llm.complete("analyze_resume", messages=[{"role": "user", "content": "hi"}], max_tokens=10)
+    stats = llm.stats()["endpoints"]["analyze_resume"]
+    assert stats["timeouts"] == 1
+    assert stats["in_flight"] == 0 and stats["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_deadline_includes_queue_time(fake_llm):
+    llm = LLMClient(fake_llm, model="test", max_concurrency=1)
+    first = asyncio.create_task(
+        llm.complete("format_job_results", messages=[{"role": "user", "content": "hi"}], max_tokens=10)
+    )
+    await asyncio.sleep(0)
+    with pytest.raises(LLMTimeoutError):
+        await llm.complete("format_job_results", messages=[{"role": "user", "content": "hi"}], max_tokens=10, timeout=0.05)
+    await first
+
+
+@pytest.mark.asyncio
+async def test_cancel_on_disconnect_cancels_work():
+    from fastapi import HTTPException
+    from app.main import cancel_on_disconnect
+
+    cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    request = MagicMock()
+    request.is_disconnected = AsyncMock(return_value=True)
+
+    with pytest.raises(HTTPException) as exc:
+        await cancel_on_disconnect(request, slow())
+    assert exc.value.status_code == 499
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
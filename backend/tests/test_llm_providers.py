@@ -0,0 +1,121 @@
+import asyncio
+import time
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from app.claude_service import ClaudeService
+from app.llm_client import LLMClient
+from app.llm_providers import AnthropicProvider, StubProvider, providers_from_env
+
+MESSAGES = [{"role": "user", "content": "Summarize these jobs"}]
+
+
+class ScriptedStub(StubProvider):
+    """A stub whose latency for each call is taken from a script."""
+
+    def __init__(self, latencies, **kwargs):
+        super().__init__(**kwargs)
+        self.latencies = list(latencies)
+        self.started = 0
+
+    async def _complete(self, messages, max_tokens, schema=None):
+        self.started += 1
+        await asyncio.sleep(self.latencies.pop(0) if self.latencies else 0.005)
+        return f"{self.model} answer"
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_at_its_p95():
+    primary = ScriptedStub([0.01] * 20 + [2.0], model="primary")
+    secondary = ScriptedStub([], model="secondary")
+    llm = LLMClient(providers=[primary, secondary], hedge_rate=0.1)
+
+    for _ in range(20):
+        assert await llm.complete("format_job_results", MESSAGES, max_tokens=50) == "primary answer"
+    assert secondary.started == 0
+
+    start = time.perf_counter()
+    assert await llm.complete("format_job_results", MESSAGES, max_tokens=50) == "secondary answer"
+    assert time.perf_counter() - start < 0.5
+
+    hedging = llm.stats()["hedging"]
+    assert hedging["hedged"] == 1 and hedging["hedge_wins"] == 1
+    assert llm.stats()["endpoints"]["format_job_results"] == {
+        "calls": 21, "in_flight": 0, "waiting": 0, "timeouts": 0, "cancelled": 0, "errors": 0
+    }
+
+
+@pytest.mark.asyncio
+async def test_hedge_rate_is_capped():
+    primary = ScriptedStub([0.01] * 20 + [0.3, 0.3], model="primary")
+    secondary = ScriptedStub([0.5, 0.5], model="secondary")
+    # A budget of one hedge per window
+    llm = LLMClient(providers=[primary, secondary], hedge_rate=1 / 200)
+    for _ in range(20):
+        await llm.complete("format_job_results", MESSAGES, max_tokens=50)
+
+    # The primary still wins the first hedged race; the second slow call is not hedged at all
+    assert await llm.complete("format_job_results", MESSAGES, max_tokens=50) == "primary answer"
+    assert await llm.complete("format_job_results", MESSAGES, max_tokens=50) == "primary answer"
+    hedging = llm.stats()["hedging"]
+    assert hedging["hedged"] == 1 and hedging["capped"] == 1 and hedging["hedge_wins"] == 0
+    assert secondary.started == 1
+
+
+@pytest.mark.asyncio
+async def test_stub_provider_answers_every_service_call_offline(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDERS", "stub, nonsense")
+    providers = providers_from_env()
+    assert [p.name for p in providers] == ["stub"]
+
+    service = ClaudeService(llm=LLMClient(providers=providers))
+    monkeypatch.setattr(service, "fast_path_min_confidence", 1.1)
+    parsed = await service.parse_job_search_query("data engineer jobs in Calgary")
+    assert parsed["what"] == "data engineer" and parsed["where"].lower() == "calgary"
+    analysis = await service.analyze_resume("Senior engineer, ten years of Python and AWS. " * 5)
+    assert analysis["profile"]["experience_level"] == "senior"
+    summary = "".join([chunk async for chunk in service.stream_job_results("python", "", [], 0)])
+    assert summary.startswith("I found")
+
+
+@pytest.mark.asyncio
+async def test_anthropic_provider_maps_messages_and_stream_events():
+    client = MagicMock()
+    client.messages.create = AsyncMock(return_value=SimpleNamespace(
+        content=[SimpleNamespace(type="text", text=" Hello "), SimpleNamespace(type="text", text="there ")]
+    ))
+    provider = AnthropicProvider(client, model="claude-test")
+    messages = [{"role": "system", "content": "Be brief."}, {"role": "user", "content": "Hi"}]
+
+    assert await provider.complete(messages, max_tokens=20) == "Hello there"
+    kwargs = client.messages.create.await_args.kwargs
+    assert kwargs["system"] == "Be brief." and kwargs["messages"] == [{"role": "user", "content": "Hi"}]
+
+    class Events:
+        closed = False
+
+        def __init__(self):
+            self.events = [
+                SimpleNamespace(type="message_start"),
+                SimpleNamespace(type="content_block_delta", delta=SimpleNamespace(type="text_delta", text="Hel")),
+                SimpleNamespace(type="content_block_delta", delta=SimpleNamespace(type="text_delta", text="lo")),
+                SimpleNamespace(type="message_stop"),
+            ]
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            if not self.events:
+                raise StopAsyncIteration
+            return self.events.pop(0)
+
+        async def close(self):
+            self.closed = True
+
+    events = Events()
+    client.messages.create = AsyncMock(return_value=events)
+    chunks = await provider.open_stream(messages, max_tokens=20)
+    assert [delta async for delta in chunks] == ["Hel", "lo"]
+    assert events.closed
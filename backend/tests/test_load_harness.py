@@ -0,0 +1,90 @@
+import httpx
+import pytest
+from groq import AsyncGroq
+from unittest.mock import patch
+
+from app.adzuna_service import AdzunaService
+from app.claude_service import ClaudeService
+from app.llm_client import LLMClient
+from app.scheduler import UpstreamScheduler
+from benchmarks.load_harness import compare, median_results, run_scenario, scenarios
+from benchmarks.standins import UpstreamProfile, adzuna_app, groq_app
+
+
+def standin_groq(profile: UpstreamProfile) -> AsyncGroq:
+    return AsyncGroq(
+        api_key="standin",
+        base_url="http://groq.standin",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=groq_app(profile))),
+    )
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    base = {"chat@8": {"requests": 100, "p50_ms": 50.0, "p95_ms": 100.0, "p99_ms": 200.0, "throughput_rps": 50.0, "error_rate": 0.0}}
+    within = {"chat@8": {"requests": 100, "p50_ms": 60.0, "p95_ms": 120.0, "p99_ms": 240.0, "throughput_rps": 40.0, "error_rate": 0.01}}
+    slower = {"chat@8": {"requests": 100, "p50_ms": 70.0, "p95_ms": 130.0, "p99_ms": 200.0, "throughput_rps": 30.0, "error_rate": 0.05}}
+
+    assert compare(within, base, tolerance=0.25) == []
+    regressions = compare(slower, base, tolerance=0.25)
+    assert [r.split(" ")[1] for r in regressions] == ["p50_ms", "p95_ms", "throughput", "error"]
+    # Scenarios missing from the baseline are not compared
+    assert compare({"new@8": slower["chat@8"]}, base, tolerance=0.25) == []
+    # Tail latency can be given more room than the median
+    assert compare(slower, base, tolerance=0.25, tail_tolerance=0.5)[0].split(" ")[1] == "p50_ms"
+    assert "p95_ms" not in " ".join(compare(slower, base, tolerance=0.25, tail_tolerance=0.5))
+    # A few milliseconds more on a cache hit is not a regression
+    fast = {"chat@8": {**base["chat@8"], "p50_ms": 0.8}}
+    assert compare({"chat@8": {**fast["chat@8"], "p50_ms": 1.4}}, fast, tolerance=0.25) == []
+
+
+def test_p99_is_only_gated_on_long_runs():
+    base = {"chat@8": {"requests": 100, "p50_ms": 50.0, "p95_ms": 100.0, "p99_ms": 200.0, "throughput_rps": 50.0, "error_rate": 0.0}}
+    tail = {"chat@8": {**base["chat@8"], "p99_ms": 400.0}}
+
+    # With 100 requests p99 is the second slowest request
+    assert compare(tail, base, tolerance=0.25) == []
+    long_base = {"chat@8": {**base["chat@8"], "requests": 1000}}
+    long_tail = {"chat@8": {**tail["chat@8"], "requests": 1000}}
+    assert [r.split(" ")[1] for r in compare(long_tail, long_base, tolerance=0.25)] == ["p99_ms"]
+
+
+def test_baseline_metrics_are_medians_of_repeated_runs():
+    runs = [{"chat@8": {"p50_ms": p50, "throughput_rps": rps}} for p50, rps in ((50.0, 10.0), (90.0, 12.0), (60.0, 11.0))]
+    assert median_results(runs) == {"chat@8": {"p50_ms": 60.0, "throughput_rps": 11.0}}
+
+
+@pytest.mark.asyncio
+async def test_injected_429s_are_retried_by_the_scheduler():
+    profile = UpstreamProfile(median_ms=1, rate_limit_rate=0.5, retry_after=0.01, seed=3)
+    llm = LLMClient(standin_groq(profile), model="test", scheduler=UpstreamScheduler("groq", max_retries=10))
+
+    results = [
+        await llm.complete("format_job_results", [{"role": "user", "content": "Summarize"}], max_tokens=50)
+        for _ in range(10)
+    ]
+
+    assert all(results)
+    assert profile.counts["rate_limited"] > 0
+    assert llm.scheduler.stats()["rate_limited"] == profile.counts["rate_limited"]
+
+
+@pytest.mark.asyncio
+async def test_chat_scenario_runs_offline_against_standins():
+    from app import main
+
+    adzuna = AdzunaService()
+    adzuna.app_id = adzuna.app_key = "standin"
+    adzuna.base_url = "http://adzuna.standin/v1/api/jobs"
+    adzuna.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=adzuna_app(UpstreamProfile(median_ms=1))))
+    claude = ClaudeService(llm=LLMClient(standin_groq(UpstreamProfile(median_ms=1)), model="test"))
+
+    with patch.object(main, "adzuna_service", adzuna), patch.object(main, "claude_service", claude):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            result = await run_scenario(client, scenarios()["chat"], concurrency=4, requests=20)
+    await adzuna.shutdown()
+
+    assert result["requests"] == 20
+    assert result["errors"] == 0
+    assert result["throughput_rps"] > 0
+    assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
@@ -0,0 +1,137 @@
+import asyncio
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.adzuna_service import AdzunaService
+from app.market_stats import MarketStatsService, aggregate, parse_created, prompt_facts
+
+# 2026-10-17T00:00:00Z
+NOW = 1792195200.0
+
+
+def job(n: int, salary=None, company="Acme", created="2026-10-16T00:00:00Z", contract_type="permanent") -> dict:
+    return {
+        "id": str(n), "title": f"Nurse {n}", "company": company, "category": "Healthcare & Nursing Jobs",
+        "salary_min": salary, "salary_max": salary + 10000 if salary else None,
+        "contract_type": contract_type, "created": created,
+    }
+
+
+class FakePages:
+    """search_jobs over a fixed result set, 50 per page, tracking concurrency."""
+
+    def __init__(self, jobs, latency=0.01, failing_pages=()):
+        self.jobs = jobs
+        self.latency = latency
+        self.failing_pages = set(failing_pages)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.search_jobs = AsyncMock(side_effect=self._search)
+
+    async def _search(self, what, where, country, results_per_page, page, priority):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        if page in self.failing_pages:
+            return {"error": "Adzuna API error: 503", "jobs": [], "count": 0}
+        start = (page - 1) * results_per_page
+        return {
+            "jobs": self.jobs[start:start + results_per_page],
+            "count": len(self.jobs),
+            "total_pages": -(-len(self.jobs) // results_per_page),
+        }
+
+
+def service_over(pages: FakePages, **kwargs) -> MarketStatsService:
+    adzuna = MagicMock(spec=AdzunaService)
+    adzuna.search_jobs = pages.search_jobs
+    return MarketStatsService(adzuna, **kwargs)
+
+
+def test_aggregate_salaries_counts_and_ages():
+    jobs = [job(n, salary=50000 + 1000 * n, company=f"Co {n % 3}") for n in range(100)]
+    jobs += [job(100, company="Co 0", created="2026-09-01T00:00:00Z", contract_type=None)]
+    jobs += [job(101, salary=None, created="not a date")]
+
+    stats = aggregate(jobs, now=NOW)
+
+    assert stats["sample_size"] == 102
+    salary = stats["salary"]
+    assert salary["count"] == 100
+    assert salary["percentiles"]["p50"] == 104500 and salary["min"] == 55000 and salary["max"] == 154000
+    assert sum(b["count"] for b in salary["histogram"]) == 100
+    assert all(b["from"] % 5000 == 0 for b in salary["histogram"])
+
+    assert stats["companies"]["distinct"] == 4
+    assert stats["companies"]["top"][0] == {"name": "Co 0", "count": 35}
+    assert {"name": "unspecified", "count": 1} in stats["contract_types"]["top"]
+
+    ages = stats["posting_age_days"]
+    assert ages["count"] == 101 and ages["median"] == 1.0
+    assert [b["count"] for b in ages["buckets"]] == [0, 100, 0, 0, 0, 1]
+
+
+def test_parse_created_survives_odd_values():
+    parsed = parse_created(["2026-10-01T08:00:00Z", "2026-10-01T10:00:00+02:00", "", "yesterday"])
+    assert str(parsed[0]) == str(parsed[1]) == "2026-10-01T08:00:00"
+    assert str(parsed[2]) == str(parsed[3]) == "NaT"
+
+
+@pytest.mark.asyncio
+async def test_pages_are_walked_concurrently_within_the_limit():
+    pages = FakePages([job(n, salary=60000) for n in range(230)])
+    service = service_over(pages, max_pages=10, concurrency=2)
+
+    stats = await service.get("nurse", "Halifax")
+
+    assert pages.search_jobs.await_count == 5 and pages.max_in_flight == 2
+    assert {call.kwargs["results_per_page"] for call in pages.search_jobs.await_args_list} == {50}
+    assert stats["sample_size"] == 230 and stats["pages_fetched"] == 5 and stats["total_count"] == 230
+
+    # Cached per query, and a smaller walk is answered from the bigger one
+    assert await service.get("Nurse ", "halifax", pages=3) is stats
+    assert pages.search_jobs.await_count == 5
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_walk_and_failed_pages_are_reported():
+    pages = FakePages([job(n) for n in range(150)], failing_pages={3})
+    service = service_over(pages, max_pages=3)
+
+    first, second = await asyncio.gather(service.get("nurse"), service.get("nurse"))
+    assert first is second and pages.search_jobs.await_count == 3
+    assert first["pages_failed"] == [3] and first["sample_size"] == 100
+    assert service.stats()["coalesced"] == 1
+
+    pages.failing_pages = {1}
+    assert "error" in await service.get("welder")
+    assert service.cached("welder") is None
+
+
+@pytest.mark.asyncio
+async def test_stats_endpoint_and_summary_prompt():
+    from app import main
+    from app.claude_service import ClaudeService
+
+    pages = FakePages([job(n, salary=70000 + 500 * n) for n in range(60)])
+    service = service_over(pages)
+    with patch.object(main, "market_stats_service", service):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            response = await client.get("/api/jobs/stats", params={"what": "nurse", "pages": 2})
+            bad = await client.get("/api/jobs/stats", params={"what": "nurse", "pages": 0})
+
+    assert response.status_code == 200 and bad.status_code == 400
+    stats = response.json()
+    assert stats["pages_fetched"] == 2 and stats["salary"]["count"] == 60
+
+    llm = MagicMock()
+    llm.complete = AsyncMock(return_value="Nurses are in demand.")
+    claude = ClaudeService(llm=llm)
+    await claude.format_job_results("nurse", "", [job(1)], 60, market=service.cached("nurse"))
+    prompt = llm.complete.await_args.kwargs["messages"][0]["content"]
+    assert "Market statistics" in prompt and "Nurse 1" not in prompt
+    assert str(prompt_facts(stats)["median_salary"]) in prompt
@@ -0,0 +1,102 @@
+import httpx
+import pytest
+from unittest.mock import patch
+
+from app import metrics
+from app.adzuna_service import AdzunaService
+from app.metrics import Registry, instrumented, server_timing
+from app.pagination import PagePrefetcher
+
+
+def sample(text, line_prefix, default=None):
+    """Value of the first exposition line starting with line_prefix."""
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    if default is None:
+        raise AssertionError(f"no line starting with {line_prefix}")
+    return default
+
+
+def test_histogram_exposition():
+    registry = Registry()
+    latency = registry.histogram("test_seconds", "Test latency.", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.labels("parse").observe(value)
+    text = registry.render()
+
+    assert "# TYPE test_seconds histogram" in text
+    assert 'test_seconds_bucket{stage="parse",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{stage="parse",le="1"} 3' in text
+    assert 'test_seconds_bucket{stage="parse",le="+Inf"} 4' in text
+    assert 'test_seconds_count{stage="parse"} 4' in text
+    assert 'test_seconds_sum{stage="parse"} 4.05' in text
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.counter("test_total", "Test.", ["path"]).labels('a"b\\c').inc()
+    assert 'test_total{path="a\\"b\\\\c"} 1' in registry.render()
+
+
+def test_server_timing_merges_repeated_stages():
+    header = server_timing([("adzuna.search_jobs", 0.1), ("claude.format_job_results", 0.25), ("adzuna.search_jobs", 0.2)], 0.5)
+    assert header == b'adzuna.search_jobs;dur=300.0;desc="x2", claude.format_job_results;dur=250.0, total;dur=500.0'
+
+
+@pytest.mark.asyncio
+async def test_instrumented_times_coroutines_and_generators():
+    @instrumented("test.coroutine")
+    async def coroutine():
+        return 1
+
+    @instrumented("test.generator")
+    async def generator():
+        yield 1
+        yield 2
+
+    @instrumented("test.failing")
+    async def failing():
+        raise ValueError("boom")
+
+    assert await coroutine() == 1
+    assert [item async for item in generator()] == [1, 2]
+    with pytest.raises(ValueError):
+        await failing()
+
+    assert metrics.STAGE_LATENCY.labels("test.coroutine", "ok").count >= 1
+    assert metrics.STAGE_LATENCY.labels("test.generator", "ok").count >= 1
+    assert metrics.STAGE_LATENCY.labels("test.failing", "error").count >= 1
+    assert metrics.STAGES_IN_FLIGHT.labels("test.generator").value == 0
+
+
+@pytest.mark.asyncio
+async def test_responses_carry_server_timing_and_metrics_are_exposed():
+    from app import main
+
+    service = AdzunaService()
+    service.client = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, json={"results": [{"id": "1", "title": "Welder"}], "count": 1})
+    ))
+    adzuna_ok = 'jobsfinder_upstream_responses_total{upstream="adzuna",status="200"}'
+    before = sample(metrics.registry.render(), adzuna_ok, default=0)
+
+    with patch.object(main, "adzuna_service", service), patch.object(main, "page_prefetcher", PagePrefetcher(service)):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            response = await client.get("/api/jobs/search", params={"what": "welder", "mode": "live"})
+            await client.get("/api/jobs/search", params={"what": "welder", "mode": "live"})
+            exposed = await client.get("/metrics")
+    await service.shutdown()
+
+    timing = response.headers["server-timing"]
+    assert "adzuna.search_jobs;dur=" in timing and "adzuna.http;dur=" in timing
+    assert timing.split(", ")[-1].startswith("total;dur=")
+
+    text = exposed.text
+    assert exposed.headers["content-type"].startswith("text/plain; version=0.0.4")
+    # The second search is a cache hit and never reaches Adzuna
+    assert sample(text, adzuna_ok) == before + 1
+    assert sample(text, 'jobsfinder_http_request_duration_seconds_count{method="GET",route="/api/jobs/search",status="200"}') >= 2
+    assert sample(text, 'jobsfinder_stage_duration_seconds_count{stage="adzuna.search_jobs",outcome="ok"}') >= 2
+    assert 'jobsfinder_http_requests_in_flight{method="GET"}' in text
+    assert sample(text, 'jobsfinder_cache_hit_ratio{cache="search"}') > 0
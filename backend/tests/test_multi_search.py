@@ -0,0 +1,120 @@
+import asyncio
+import time
+import pytest
+import httpx
+from unittest.mock import patch
+
+from app.multi_search import MultiSearchService
+
+SEARCH_LATENCY = 0.1
+
+
+def job(job_id, title, category):
+    return {"id": job_id, "title": title, "company": "Acme", "location": "Toronto", "category": category}
+
+
+RESULTS = {
+    "Security Manager": [job("1", "Security Manager", "IT Jobs"), job("2", "CISO", "IT Jobs")],
+    "Security Architect": [job("2", "CISO", "IT Jobs"), job("3", "Cloud Security Architect", "IT Jobs")],
+    "Risk Manager": [job("4", "Risk Manager", "Accounting & Finance Jobs")],
+    "Compliance Lead": [job("5", "Compliance Lead", "Legal Jobs")],
+    "GRC Analyst": [job("1", "Security Manager", "IT Jobs"), job("6", "GRC Analyst", "IT Jobs")],
+}
+
+
+class FakeAdzuna:
+    def __init__(self, latencies=None, errors=None):
+        self.latencies = latencies or {}
+        self.errors = errors or {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def search_jobs(self, what="", where="", results_per_page=10, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latencies.get(what, SEARCH_LATENCY))
+        finally:
+            self.in_flight -= 1
+        if what in self.errors:
+            return {"error": self.errors[what], "jobs": [], "count": 0}
+        jobs = RESULTS.get(what, [])
+        return {"jobs": jobs, "count": len(jobs) * 10}
+
+
+@pytest.mark.asyncio
+async def test_five_titles_take_about_one_search():
+    service = MultiSearchService(FakeAdzuna(), max_concurrency=5, timeout=2)
+    start = time.perf_counter()
+    result = await service.search(list(RESULTS))
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < SEARCH_LATENCY * 2
+    assert [r["status"] for r in result["searches"]] == ["ok"] * 5
+    assert all(r["latency_ms"] >= SEARCH_LATENCY * 1000 * 0.9 for r in result["searches"])
+    assert result["searches"][0]["result_count"] == 2
+    assert result["searches"][0]["total_count"] == 20
+
+
+@pytest.mark.asyncio
+async def test_results_are_deduplicated_and_grouped():
+    result = await MultiSearchService(FakeAdzuna()).search(list(RESULTS))
+
+    ids = [j["id"] for j in result["jobs"]]
+    assert ids == ["1", "2", "3", "4", "5", "6"]
+    assert result["duplicates_removed"] == 2
+    assert result["total_unique"] == 6
+
+    ciso = next(j for j in result["jobs"] if j["id"] == "2")
+    assert ciso["matched_searches"] == ["Security Manager", "Security Architect"]
+    assert "matched_searches" not in RESULTS["Security Manager"][1]
+
+    groups = {g["category"]: g["count"] for g in result["groups"]}
+    assert groups == {"IT Jobs": 4, "Accounting & Finance Jobs": 1, "Legal Jobs": 1}
+    assert result["groups"][0]["category"] == "IT Jobs"
+
+
+@pytest.mark.asyncio
+async def test_slow_and_failing_titles_return_partial_results():
+    adzuna = FakeAdzuna(latencies={"Risk Manager": 1.0}, errors={"Compliance Lead": "Adzuna API error: 500"})
+    service = MultiSearchService(adzuna, timeout=0.3)
+    start = time.perf_counter()
+    result = await service.search(list(RESULTS))
+
+    assert time.perf_counter() - start < 0.6
+    statuses = {r["title"]: r["status"] for r in result["searches"]}
+    assert statuses["Risk Manager"] == "timeout"
+    assert statuses["Compliance Lead"] == "error"
+    assert result["partial"] is True
+    assert {j["id"] for j in result["jobs"]} == {"1", "2", "3", "6"}
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    adzuna = FakeAdzuna()
+    await MultiSearchService(adzuna, max_concurrency=2).search(list(RESULTS))
+    assert adzuna.max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_advisor_search_endpoint():
+    from app import main
+
+    service = MultiSearchService(FakeAdzuna())
+    with patch.object(main, "multi_search_service", service):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            response = await client.post("/api/advisor/search", json={
+                "searches": [
+                    {"title": "Security Manager", "rationale": "fits"},
+                    {"title": "security manager"},
+                    {"title": "Risk Manager"},
+                ],
+                "where": "Toronto",
+            })
+            empty = await client.post("/api/advisor/search", json={"searches": []})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [s["title"] for s in body["searches"]] == ["Security Manager", "Risk Manager"]
+    assert body["total_unique"] == 3
+    assert empty.status_code == 400
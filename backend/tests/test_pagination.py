@@ -0,0 +1,132 @@
+import asyncio
+import httpx
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.adzuna_service import AdzunaService
+from app.pagination import InvalidCursor, PagePrefetcher, decode_cursor, encode_cursor, page_cursors
+from app.scheduler import BACKGROUND, INTERACTIVE
+
+
+def fake_page(delay: float = 0.0, count: int = 100):
+    async def fetch(what, where, country, results_per_page, page, priority=INTERACTIVE):
+        await asyncio.sleep(delay)
+        jobs = [
+            {"id": f"{page}-{i}", "title": f"{what} {page}-{i}", "company": f"Company {page}-{i}", "location": where}
+            for i in range(results_per_page)
+        ]
+        return {"jobs": jobs, "count": count, "page": page, "results_per_page": results_per_page,
+                "total_pages": -(-count // results_per_page)}
+    return AsyncMock(side_effect=fetch)
+
+
+@pytest.fixture
+def adzuna():
+    service = AdzunaService()
+    service.index = None
+    return service
+
+
+def test_cursor_round_trip():
+    query = {"what": "nurse", "where": "", "page": 3, "results_per_page": 20, "mode": "live", "salary_min": None}
+    decoded = decode_cursor(encode_cursor(query))
+    assert decoded["what"] == "nurse" and decoded["page"] == 3 and decoded["results_per_page"] == 20
+    assert decoded["where"] is None and decoded["salary_min"] is None
+
+    assert page_cursors({**query, "page": 1}, total_pages=1) == {"next_cursor": None, "prev_cursor": None}
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not a cursor!")
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor({"what": "nurse"}))
+
+
+@pytest.mark.asyncio
+async def test_total_pages_rounds_up(adzuna):
+    adzuna.app_id = adzuna.app_key = "test"
+    adzuna.client = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, json={"results": [], "count": 20})
+    ))
+    result = await adzuna._fetch_jobs("nurse", "", "ca", 10, 1)
+    await adzuna.shutdown()
+    assert result["total_pages"] == 2
+
+
+@pytest.mark.asyncio
+async def test_next_pages_are_prefetched_at_background_priority(adzuna):
+    fetch = fake_page()
+    prefetcher = PagePrefetcher(adzuna, depth=2)
+    with patch.object(adzuna, "_fetch_jobs", fetch):
+        await prefetcher.search("welder", "Calgary", page=1)
+        await asyncio.sleep(0.01)
+        assert [call.args[4] for call in fetch.await_args_list] == [1, 2, 3]
+        assert [call.kwargs["priority"] for call in fetch.await_args_list[1:]] == [BACKGROUND, BACKGROUND]
+
+        page2 = await prefetcher.search("welder", "Calgary", page=2)
+        assert page2["jobs"][0]["id"] == "2-0"
+        await asyncio.sleep(0.01)
+        # Page 3 was already buffered; only page 4 is new
+        assert [call.args[4] for call in fetch.await_args_list] == [1, 2, 3, 4]
+
+        # Paging back is a search cache hit, not a second upstream call
+        await prefetcher.search("welder", "Calgary", page=2)
+        assert fetch.await_count == 4
+
+    stats = prefetcher.stats()
+    assert stats["hits"] == 1 and stats["prefetched"] == 3 and stats["hit_ratio"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_prefetches_use_the_normalized_query(adzuna):
+    fetch = fake_page()
+    prefetcher = PagePrefetcher(adzuna, depth=1)
+    with patch.object(adzuna, "_fetch_jobs", fetch):
+        await prefetcher.search("Welders jobs", "calgary,  ab", page=1)
+        await asyncio.sleep(0.01)
+        assert {call.args[:2] for call in fetch.await_args_list} == {("welder", "Calgary")}
+
+        # Another phrasing of the same search is served from the prefetch
+        page2 = await prefetcher.search("welder", "Calgary", page=2)
+        assert page2["jobs"][0]["id"] == "2-0" and prefetcher.stats()["hits"] == 1
+        await asyncio.sleep(0.01)
+        assert [call.args[4] for call in fetch.await_args_list] == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_in_flight_prefetch_is_shared_and_idle_searches_are_cancelled(adzuna):
+    fetch = fake_page(delay=0.1)
+    prefetcher = PagePrefetcher(adzuna, depth=1, idle_seconds=0.15)
+    with patch.object(adzuna, "_fetch_jobs", fetch):
+        await prefetcher.search("welder", "", page=1)
+        # Page 2 is still being prefetched; the request waits for it instead of fetching again
+        await prefetcher.search("welder", "", page=2)
+        await asyncio.sleep(0)
+        assert fetch.await_count == 3
+        assert prefetcher.stats()["in_flight_hits"] == 1
+
+        # Nobody asks for page 3, so its prefetch is dropped once the search goes idle
+        await asyncio.sleep(0.3)
+    stats = prefetcher.stats()
+    assert stats["cancelled_idle"] == 1 and stats["in_flight"] == 0
+    assert len(prefetcher.buffer) == 0
+
+
+@pytest.mark.asyncio
+async def test_search_endpoint_follows_cursors(adzuna):
+    from app import main
+
+    prefetcher = PagePrefetcher(adzuna, depth=0)
+    with patch.object(adzuna, "_fetch_jobs", fake_page(count=25)), \
+            patch.object(main, "adzuna_service", adzuna), patch.object(main, "page_prefetcher", prefetcher):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            first = (await client.get("/api/jobs/search", params={"what": "nurse", "where": "Halifax"})).json()
+            second = (await client.get("/api/jobs/search", params={"cursor": first["next_cursor"]})).json()
+            third = (await client.get("/api/jobs/search", params={"cursor": second["next_cursor"]})).json()
+            bad = await client.get("/api/jobs/search", params={"cursor": "garbage"})
+            empty_page = await client.get("/api/jobs/search", params={"what": "nurse", "results_per_page": 0})
+
+    assert first["total_pages"] == 3 and first["prev_cursor"] is None
+    assert second["page"] == 2 and second["jobs"][0]["location"] == "Halifax"
+    assert third["page"] == 3 and third["next_cursor"] is None
+    assert decode_cursor(third["prev_cursor"])["page"] == 2
+    assert bad.status_code == 400
+    assert empty_page.status_code == 400 and "results_per_page" in empty_page.json()["detail"]
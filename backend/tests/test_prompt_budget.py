@@ -0,0 +1,118 @@
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.llm_client import LLMClient
+from app.prompt_budget import (
+    PromptCompactor, compact_json, compact_resume, estimate_tokens, section_heading, split_sections
+)
+
+RESUME = """JANE DOE
+jane.doe@example.com | (416) 555-0199 | linkedin.com/in/janedoe
+
+SUMMARY
+Senior software engineer with 12 years of experience building data platforms and APIs.
+
+EXPERIENCE
+Senior Software Engineer, Acme Corp — 2019 - present
+• Built Python and Go services handling 20k requests per second on AWS.
+• Designed PostgreSQL schemas and Kafka pipelines for real-time analytics.
+Software Engineer, Beta Inc — 2014 - 2019
+• Built Python and Go services handling 20k requests per second on AWS.
+• Maintained a legacy Java monolith and migrated billing to microservices.
+Page 1 of 2
+
+Education:
+B.Sc. Computer Science, University of Toronto, 2011
+
+INTERESTS
+Rock climbing, chess, travel
+
+REFERENCES
+John Smith, Director of Engineering, 416-555-0100
+References available upon request
+"""
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("Senior Python developer") == 3
+    # Indentation costs tokens; compact JSON is cheaper than indent=2
+    value = {"key_skills": ["Python", "Go"], "experience_level": "senior"}
+    assert estimate_tokens(compact_json(value)) < estimate_tokens(json.dumps(value, indent=2))
+    # Within a reasonable distance of the usual four-characters-per-token rule
+    assert 0.7 < estimate_tokens(RESUME) / (len(RESUME) / 4) < 1.3
+
+
+def test_section_headings():
+    assert section_heading("EXPERIENCE") == 0
+    assert section_heading("Education:") == 1
+    assert section_heading("REFERENCES") == 4
+    assert section_heading("Built Python and Go services.") is None
+    assert [s.heading for s in split_sections(RESUME)][1:] == [
+        "SUMMARY", "EXPERIENCE", "Education", "INTERESTS", "REFERENCES"
+    ]
+
+
+def test_compact_resume_drops_boilerplate_and_duplicates():
+    compacted = compact_resume(RESUME, max_tokens=10_000)
+
+    assert "jane.doe@example.com" not in compacted
+    assert "Page 1 of 2" not in compacted
+    assert "John Smith" not in compacted and "upon request" not in compacted
+    assert compacted.count("20k requests per second") == 1
+    # Job titles are short lines and may repeat; they are kept
+    assert "Software Engineer, Beta Inc — 2014 - 2019" in compacted
+    assert "- Maintained a legacy Java monolith" in compacted
+    assert estimate_tokens(compacted) < estimate_tokens(RESUME) * 0.8
+
+
+def test_compact_resume_cuts_low_priority_sections_first():
+    compacted = compact_resume(RESUME, max_tokens=80)
+
+    assert estimate_tokens(compacted) <= 80
+    assert "Rock climbing" not in compacted
+    assert "Senior Software Engineer, Acme Corp" in compacted
+    assert "SUMMARY" in compacted
+
+
+def test_compact_resume_clips_a_single_paragraph():
+    paragraph = " ".join(f"Delivered project {i} on time and under budget for a major client." for i in range(200))
+    compacted = compact_resume(paragraph, max_tokens=200)
+
+    assert 150 < estimate_tokens(compacted) <= 200
+
+
+@pytest.mark.asyncio
+async def test_prompts_are_compacted_and_recorded():
+    from app.claude_service import ClaudeService
+
+    response = MagicMock()
+    response.choices = [MagicMock(message=MagicMock(content='{"profile": {"summary": "Engineer"}, "questions": [], "searches": [{"title": "Engineer"}]}'))]
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(return_value=response)
+    compactor = PromptCompactor(budgets={"analyze_resume": 600}, log=False)
+    service = ClaudeService(llm=LLMClient(client, model="test"), compactor=compactor)
+
+    await service.analyze_resume(RESUME * 5)
+    await service.suggest_job_titles({"summary": "Engineer", "key_skills": ["Python"]}, [{"answer": "remote " * 500}])
+
+    prompt = client.chat.completions.create.call_args_list[0].kwargs["messages"][0]["content"]
+    assert estimate_tokens(prompt) <= 600
+    stats = compactor.stats()["endpoints"]
+    assert stats["analyze_resume"]["prompts"] == 1
+    assert stats["analyze_resume"]["avg_tokens_after"] < stats["analyze_resume"]["avg_tokens_before"] / 2
+    assert stats["analyze_resume"]["over_budget"] == 0
+    assert stats["suggest_job_titles"]["saved_ratio"] > 0.3
+
+
+def test_results_prompt_uses_compact_json():
+    from app.claude_service import ClaudeService
+
+    compactor = PromptCompactor(log=False)
+    service = ClaudeService(llm=MagicMock(), compactor=compactor)
+    jobs = [{"title": "Dev", "company": "Acme", "location": "Toronto", "salary_min": None, "salary_max": None}]
+    prompt = service._job_results_prompt("dev", "", jobs, 1)
+
+    assert 'Top results: [{"title":"Dev","company":"Acme","location":"Toronto"}]' in prompt
+    assert compactor.stats()["endpoints"]["format_job_results"]["saved_ratio"] > 0
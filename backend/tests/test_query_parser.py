@@ -0,0 +1,115 @@
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.query_parser import HIGH_CONFIDENCE, fast_parse, normalize_message, parse_follow_up
+from app.llm_client import LLMClient
+from app.claude_service import ClaudeService
+
+
+@pytest.mark.parametrize("message, what, where", [
+    ("Find Python developer jobs in Toronto", "Python developer", "Toronto"),
+    ("Find Software Engineer jobs in Vancouver", "Software Engineer", "Vancouver"),
+    ("Find Data Scientist jobs in Ontario", "Data Scientist", "Ontario"),
+    ("Find senior cybersecurity jobs in remote", "senior cybersecurity", "remote"),
+    ("show me React developer roles in Toronto", "React developer", "Toronto"),
+    ("registered nurse positions near Halifax", "registered nurse", "Halifax"),
+    ("nurse jobs in Toronto, ON", "nurse", "Toronto"),
+    ("entry level marketing jobs in the GTA", "entry level marketing", "Toronto"),
+    ("data science jobs", "data science", ""),
+    ("remote data analyst", "data analyst", "remote"),
+    ("work from home customer service jobs", "customer service", "remote"),
+    (".NET developer jobs Mississauga", ".NET developer", "Mississauga"),
+    ("hey, show me nurse jobs in Toronto", "nurse", "Toronto"),
+    ("please find python jobs in Ottawa", "python", "Ottawa"),
+    ("thanks! any welder jobs in Calgary", "welder", "Calgary"),
+    ("good morning, please show me React developer roles", "React developer", ""),
+    ("Software Engineer I jobs in Toronto", "Software Engineer I", "Toronto"),
+    ("IT jobs in Ottawa", "IT", "Ottawa"),
+])
+def test_fast_path_handles_common_shapes(message, what, where):
+    parsed, confidence = fast_parse(message)
+    assert confidence >= 0.8
+    assert parsed == {"is_job_search": True, "what": what, "where": where}
+
+
+@pytest.mark.parametrize("message", [
+    "Python developer jobs in Toronto that pay over 100k",
+    "accountant jobs in Smalltown",
+    "how about remote instead?",
+    "what should I apply for with my background",
+    "I want to become a nurse",
+    "remote python jobs in Toronto",
+    "I want to work in Toronto",
+    "Find jobs",
+    "find me a job",
+    "I need a job in Vancouver",
+    "I hate my job in Toronto",
+    "quit my job in Toronto",
+    "find jobs for my son in Toronto",
+    "show me jobs my wife could do in Ottawa",
+    "got fired from my nursing job in Halifax",
+])
+def test_fast_path_defers_ambiguous_messages(message):
+    _, confidence = fast_parse(message)
+    assert confidence < 0.8
+
+
+def test_greeting_is_not_a_job_search():
+    parsed, confidence = fast_parse("Hello!")
+    assert parsed["is_job_search"] is False
+    assert confidence == HIGH_CONFIDENCE
+
+
+@pytest.mark.parametrize("message, delta", [
+    ("how about remote instead?", {"where": "remote"}),
+    ("what about Vancouver?", {"where": "Vancouver"}),
+    ("and in the GTA", {"where": "Toronto"}),
+    ("how about data analyst roles instead", {"what": "data analyst"}),
+    ("what about nurse jobs in Halifax?", {"what": "nurse", "where": "Halifax"}),
+    ("same again", {}),
+    ("Find Python developer jobs in Toronto", None),
+    ("what about something that pays more?", None),
+    ("and what about you?", None),
+    ("what about it?", None),
+    ("how about tomorrow?", None),
+    ("how about I quit instead?", None),
+    ("what about IT?", {"what": "IT"}),
+    ("thanks!", None),
+])
+def test_parse_follow_up(message, delta):
+    assert parse_follow_up(message) == delta
+
+
+def test_normalize_message():
+    assert normalize_message("  Find Python   jobs in Toronto?? ") == "find python jobs in toronto"
+
+
+def make_service(payload: dict):
+    client = MagicMock()
+    response = MagicMock()
+    response.choices = [MagicMock(message=MagicMock(content=json.dumps(payload)))]
+    client.chat.completions.create = AsyncMock(return_value=response)
+    return ClaudeService(llm=LLMClient(client, model="test")), client
+
+
+@pytest.mark.asyncio
+async def test_fast_path_skips_llm():
+    service, client = make_service({})
+    result = await service.parse_job_search_query("Find Python developer jobs in Toronto")
+    assert result == {"is_job_search": True, "what": "Python developer", "where": "Toronto"}
+    client.chat.completions.create.assert_not_called()
+    assert service.parser_stats()["fast_path"] == 1
+
+
+@pytest.mark.asyncio
+async def test_llm_results_are_memoized():
+    service, client = make_service({"is_job_search": True, "what": "python developer", "where": "Toronto"})
+    message = "Python developer jobs in Toronto that pay over 100k"
+    first = await service.parse_job_search_query(message)
+    second = await service.parse_job_search_query("  python developer jobs in toronto that pay over 100K ")
+    assert first == second
+    assert client.chat.completions.create.await_count == 1
+    stats = service.parser_stats()
+    assert stats["llm"] == 1
+    assert stats["memo"]["hits"] == 1
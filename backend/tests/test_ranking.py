@@ -0,0 +1,138 @@
+import random
+import asyncio
+import time
+import pytest
+import httpx
+from unittest.mock import patch
+
+from app.adzuna_service import AdzunaService
+from app.ranking import JobRanker, batch_text_counts, job_text_counts
+from app.multi_search import MultiSearchService
+from tests.test_multi_search import FakeAdzuna, RESULTS
+
+PROFILE = {
+    "summary": "Security leader with cloud and compliance background",
+    "experience_level": "senior",
+    "key_skills": ["cloud security", "ISO 27001", "risk management"],
+    "possible_directions": ["Security Architect", "CISO"],
+}
+
+JOBS = [
+    {"id": "1", "title": "Line Cook", "category": "Hospitality", "description": "Prepare food in a busy kitchen."},
+    {"id": "2", "title": "Cloud Security Architect", "category": "IT Jobs", "description": "Design cloud security controls."},
+    {"id": "3", "title": "IT Risk Manager", "category": "IT Jobs", "description": "Own risk management and ISO 27001 audits."},
+    {"id": "4", "title": "Warehouse Associate", "category": "Logistics", "description": "Pick and pack orders."},
+]
+
+
+def test_rank_orders_by_relevance():
+    ranked = JobRanker(dim=1024).rank(JOBS, PROFILE)
+
+    assert [j["id"] for j in ranked[:2]] == ["2", "3"]
+    assert ranked[0]["relevance"] > ranked[2]["relevance"]
+    assert ranked[-1]["relevance"] == 0.0
+    assert "relevance" not in JOBS[0]  # inputs are not mutated
+
+
+def test_job_vectors_are_cached_by_id():
+    ranker = JobRanker(dim=1024)
+    ranker.rank(JOBS, PROFILE)
+    ranker.rank(JOBS + [{"id": "5", "title": "CISO"}], PROFILE)
+
+    stats = ranker.stats()
+    assert stats["embedded"] == 5
+    assert stats["vector_cache"]["hits"] == 4
+
+
+def test_empty_and_textless_jobs():
+    ranker = JobRanker(dim=256)
+    assert ranker.rank([], PROFILE) == []
+    assert ranker.rank([{"title": None}], {})[0]["relevance"] == 0.0
+
+
+def thousand_jobs():
+    rng = random.Random(0)
+    words = "python java cloud security nurse welder analyst manager data senior sql aws risk".split()
+    return [
+        {"id": str(i), "title": " ".join(rng.choices(words, k=3)), "description": " ".join(rng.choices(words, k=80))}
+        for i in range(1000)
+    ]
+
+
+def best_of(runs, rank) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        rank()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def test_batch_counts_match_one_job_at_a_time():
+    jobs = JOBS + [{"title": "C++ .NET node.js.", "description": "Café staff\0 wanted"}, {}]
+    batch = batch_text_counts(jobs, 1024)
+
+    assert len(batch) == len(jobs)
+    for job, (indices, values) in zip(jobs, batch):
+        single = job_text_counts(job, 1024)
+        assert indices.tolist() == single[0].tolist() and values.tolist() == single[1].tolist()
+    # Leading "+#." and trailing dots are not part of a word, and text never leaks between jobs
+    assert batch[4][0].tolist() == job_text_counts({"title": "c++ net node.js", "description": "café staff wanted"}, 1024)[0].tolist()
+    assert len(batch[5][0]) == 0
+
+
+def test_ranking_a_thousand_jobs_is_fast():
+    jobs = thousand_jobs()
+    # Cold: every job is new to the ranker and is tokenized on the spot
+    assert best_of(3, lambda: JobRanker().rank(jobs, PROFILE)) < 0.1
+
+    # Jobs embedded as their search pages arrived, as AdzunaService does
+    rankers = [JobRanker() for _ in range(3)]
+    for ranker in rankers:
+        for page in range(0, len(jobs), 50):
+            ranker.embed(jobs[page:page + 50])
+    assert best_of(3, lambda: rankers.pop().rank(jobs, PROFILE)) < 0.05
+
+
+@pytest.mark.asyncio
+async def test_fetched_pages_are_embedded_for_ranking():
+    service = AdzunaService()
+    service.ranker = JobRanker(dim=1024)
+
+    async def fake_fetch(what, where, country, results_per_page, page, **kwargs):
+        return {"jobs": [dict(job) for job in JOBS], "count": len(JOBS)}
+
+    with patch.object(service, "_fetch_jobs", side_effect=fake_fetch):
+        await service.search_jobs(what="security")
+    await asyncio.sleep(0)
+    await service.shutdown()
+
+    service.ranker.rank(JOBS, PROFILE)
+    assert service.ranker.stats()["embedded"] == len(JOBS)
+    assert service.ranker.stats()["vector_cache"]["hits"] == len(JOBS)
+
+
+@pytest.mark.asyncio
+async def test_multi_search_ranks_with_profile():
+    service = MultiSearchService(FakeAdzuna(), ranker=JobRanker(dim=1024))
+    result = await service.search(list(RESULTS), profile=PROFILE)
+
+    assert result["ranked"] is True
+    assert result["jobs"][0]["title"] == "Cloud Security Architect"
+    it_jobs = next(g for g in result["groups"] if g["category"] == "IT Jobs")["jobs"]
+    assert it_jobs[0]["title"] == "Cloud Security Architect"
+
+    unranked = await service.search(list(RESULTS))
+    assert unranked["ranked"] is False and [j["id"] for j in unranked["jobs"]][0] == "1"
+
+
+@pytest.mark.asyncio
+async def test_rank_endpoint():
+    from app import main
+
+    with patch.object(main, "job_ranker", JobRanker(dim=1024)):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            response = await client.post("/api/advisor/rank", json={"profile": PROFILE, "jobs": JOBS})
+
+    assert response.status_code == 200
+    assert response.json()["jobs"][0]["id"] == "2"
@@ -0,0 +1,108 @@
+import os
+import json
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from app.adzuna_service import AdzunaService
+from app.cache import search_cache_key
+from app.reference_data import DEFAULT_GAZETTEER, Gazetteer, QueryNormalizer, ReferenceData, normalize_what
+
+CATEGORIES = [{"tag": "it-jobs", "label": "IT Jobs"}]
+
+
+@pytest.fixture
+def gazetteer():
+    return Gazetteer(DEFAULT_GAZETTEER)
+
+
+@pytest.mark.parametrize("where, expected", [
+    ("toronto", "Toronto"),
+    ("Toronto, ON", "Toronto"),
+    ("toronto ontario", "Toronto"),
+    ("the GTA", "Toronto"),
+    ("Montréal, QC", "Montreal"),
+    ("trois rivieres", "Trois-Rivières"),
+    ("st. john's, NL", "St. John's"),
+    ("BC", "British Columbia"),
+    ("Vancouver, Canada", "Vancouver"),
+    ("work from home", "remote"),
+    ("Windsor, NS", None),
+    ("Springfield", None),
+])
+def test_gazetteer_canonical_names(gazetteer, where, expected):
+    assert gazetteer.canonical(where) == expected
+
+
+def test_gazetteer_loads_lazily_and_reloads_when_the_file_changes(tmp_path):
+    path = tmp_path / "places.tsv"
+    path.write_text("# name\tprovince\tkind\taliases\nOntario\tON\tprovince\t\nToronto\tON\tcity\tgta\n")
+    gazetteer = Gazetteer(str(path))
+    assert gazetteer.stats()["loaded"] is False
+    assert gazetteer.canonical("GTA") == "Toronto" and gazetteer.stats()["loaded"] is True
+    assert gazetteer.reload_if_changed() is False
+
+    path.write_text("Ontario\tON\tprovince\t\nToronto\tON\tcity\tgta|hogtown\n")
+    os.utime(path, (1, 1))
+    assert gazetteer.reload_if_changed() is True
+    assert gazetteer.canonical("Hogtown") == "Toronto"
+
+
+@pytest.mark.parametrize("what, expected", [
+    ("Python Developers", "python developer"),
+    ("  python   developer jobs ", "python developer"),
+    ("Registered Nurses roles", "registered nurse"),
+    ("data analytics", "data analytics"),
+    ("sales", "sales"),
+    ("jobs", "jobs"),
+])
+def test_normalize_what(what, expected):
+    assert normalize_what(what) == expected
+
+
+def test_normalizer_can_be_switched_off(gazetteer):
+    assert QueryNormalizer(gazetteer, enabled=False).normalize("Nurses", "toronto, ON") == ("Nurses", "toronto, ON")
+    normalizer = QueryNormalizer(gazetteer)
+    assert normalizer.normalize("Nurses", "Halifax NS") == ("nurse", "Halifax")
+    assert normalizer.normalize("nurse", "Gotham") == ("nurse", "Gotham")
+    assert normalizer.stats() == {
+        "enabled": True, "queries": 2, "what_rewritten": 1, "where_rewritten": 1, "where_unknown": 1
+    }
+
+
+@pytest.mark.asyncio
+async def test_search_phrasings_share_one_upstream_request():
+    service = AdzunaService()
+    service._fetch_jobs = AsyncMock(return_value={"jobs": [], "count": 0})
+    try:
+        await service.search_jobs(what="Python Developers jobs", where="toronto, ON")
+        await service.search_jobs(what="python developer", where="Toronto")
+    finally:
+        await service.shutdown()
+    assert service._fetch_jobs.await_count == 1
+    assert service._fetch_jobs.await_args.args[:2] == ("python developer", "Toronto")
+    assert search_cache_key("ca", "python developer", "Toronto", 1, 10) in service.cache.memory
+
+
+@pytest.mark.asyncio
+async def test_categories_come_from_the_snapshot_and_refresh_in_the_background(tmp_path):
+    reference = ReferenceData(Gazetteer(), directory=str(tmp_path), refresh_interval=0.01, categories_max_age=60)
+    snapshot = reference.categories("ca")
+    assert snapshot.load() and snapshot.source == "shipped"
+    assert reference.categories_stale("ca")
+
+    fetch = AsyncMock(return_value=CATEGORIES)
+    reference.start(fetch)
+    for _ in range(100):
+        if snapshot.source == "refreshed":
+            break
+        await asyncio.sleep(0.01)
+    await reference.shutdown()
+
+    assert snapshot.results == CATEGORIES and snapshot.source == "refreshed"
+    assert json.loads((tmp_path / "categories_ca.json").read_text())["results"] == CATEGORIES
+    assert not reference.categories_stale("ca") and reference.gazetteer.stats()["loaded"]
+
+    # A failed refresh keeps the snapshot it has
+    assert await reference.refresh_categories("ca", AsyncMock(return_value=[])) is False
+    assert snapshot.results == CATEGORIES and reference.stats()["refresh_errors"] == 1
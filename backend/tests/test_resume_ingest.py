@@ -0,0 +1,123 @@
+import asyncio
+import os
+import httpx
+import pytest
+import pytest_asyncio
+from unittest.mock import patch
+
+from app.resume_ingest import ResumeIngestService, ResumeRejected, extract_pdf_text
+from benchmarks.bench_resume_upload import build_pdf
+
+
+class FakeClaude:
+    def __init__(self):
+        self.calls = 0
+
+    async def analyze_resume(self, resume_text, endpoint="analyze_resume"):
+        self.calls += 1
+        return {"profile": {"summary": resume_text.splitlines()[0]}, "questions": []}
+
+
+@pytest_asyncio.fixture
+async def upload(tmp_path):
+    """Post a file to /api/advisor/upload against a fresh ingest service."""
+    from app import main
+
+    service = ResumeIngestService(FakeClaude(), upload_dir=str(tmp_path), max_bytes=64 * 1024, max_pages=5, workers=1)
+
+    async def post(data, name="resume.pdf", **params):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            return await client.post("/api/advisor/upload", params=params, files={"file": (name, data, "application/pdf")})
+
+    with patch.object(main, "resume_ingest_service", service):
+        post.service = service
+        yield post
+    service.shutdown()
+
+
+def test_extract_enforces_page_limit(tmp_path):
+    path = tmp_path / "long.pdf"
+    path.write_bytes(build_pdf(pages=3))
+
+    text, pages = extract_pdf_text(str(path), max_pages=3)
+    assert pages == 3 and "Senior Software Engineer" in text
+    with pytest.raises(ResumeRejected) as e:
+        extract_pdf_text(str(path), max_pages=2)
+    assert e.value.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_upload_extracts_and_analyzes_then_caches(upload, tmp_path):
+    pdf = build_pdf(pages=2, seed="Jane Doe")
+    first = await upload(pdf)
+    second = await upload(pdf, name="copy-of-resume.pdf")
+
+    assert first.status_code == 200
+    body = first.json()
+    assert body["pages"] == 2
+    assert body["profile"]["summary"] == "Jane Doe Page 1"
+    assert "Kafka pipelines" in body["resume_text"]
+    assert body["cached"] == {"text": False, "profile": False}
+    assert second.json()["cached"] == {"text": True, "profile": True}
+    assert upload.service.claude.calls == 1
+    assert upload.service.stats()["extractions"] == 1
+    # Stored uploads are removed once extracted
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_extract_only(upload):
+    response = await upload(build_pdf(pages=1), analyze="false")
+
+    assert response.status_code == 200
+    assert "profile" not in response.json()
+    assert upload.service.claude.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_rejects_non_pdf_large_and_long_files(upload, tmp_path):
+    not_pdf = await upload(b"Jane Doe, Python developer" * 10, name="resume.txt")
+    too_big = await upload(b"%PDF-1.4\n" + b"0" * 200 * 1024)
+    too_long = await upload(build_pdf(pages=6))
+
+    assert not_pdf.status_code == 415
+    assert too_big.status_code == 413
+    # Raised in the worker process; the status survives the trip back
+    assert too_long.status_code == 413 and "5 pages" in too_long.json()["detail"]
+    assert upload.service.stats()["rejected"] == 3
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_missing_file_field(upload):
+    from app import main
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+        response = await client.post("/api/advisor/upload", data={"resume": "text"}, files={"other": ("a.pdf", b"%PDF-")})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_slow_chunked_upload_arrives_intact(upload):
+    from app import main
+
+    pdf = build_pdf(pages=2, seed="Slow Upload")
+    request = httpx.Request("POST", "http://test/api/advisor/upload", files={"file": ("resume.pdf", pdf, "application/pdf")})
+    body = request.read()
+
+    async def chunks():
+        for i in range(0, len(body), 512):
+            # Slower than the disconnect poll, so a poll would land while the body is streaming
+            await asyncio.sleep(0.01)
+            yield body[i:i + 512]
+
+    with patch.object(main, "DISCONNECT_POLL_SECONDS", 0.001):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            response = await client.post(
+                "/api/advisor/upload", content=chunks(), headers={"content-type": request.headers["content-type"]}
+            )
+
+    assert response.status_code == 200
+    assert response.json()["profile"]["summary"] == "Slow Upload Page 1"
+    assert "Kafka pipelines" in response.json()["resume_text"]
@@ -0,0 +1,157 @@
+import asyncio
+import httpx
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, patch
+
+from app.adzuna_service import AdzunaService
+from app.saved_searches import SavedSearchPoller, SavedSearchStore, stagger
+from app.scheduler import BACKGROUND
+
+
+def job(n: int) -> dict:
+    return {"id": str(n), "title": f"Nurse {n}", "created": f"2026-10-{n:02d}T08:00:00Z"}
+
+
+class FakeFeed:
+    """Adzuna sorted by date: the newest postings first, paged."""
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.fetch = AsyncMock(side_effect=self._fetch)
+
+    async def _fetch(self, what, where, country, results_per_page, page, priority=None, sort_by=None):
+        ordered = sorted(self.jobs, key=lambda j: j["created"], reverse=True)
+        start = (page - 1) * results_per_page
+        return {"jobs": ordered[start:start + results_per_page], "count": len(ordered)}
+
+
+@pytest_asyncio.fixture
+async def poller():
+    adzuna = AdzunaService()
+    adzuna.index = None
+    poller = SavedSearchPoller(adzuna, SavedSearchStore(":memory:"), per_page=3)
+    yield poller
+    await poller.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_polls_stop_at_the_first_job_already_seen(poller):
+    feed = FakeFeed([job(n) for n in range(1, 8)])
+    with patch.object(poller.adzuna, "_fetch_jobs", feed.fetch):
+        search = await poller.create("nurse", "Halifax")
+        assert await poller.poll_due() == 1
+        # The baseline reads one page and counts nothing as new
+        assert (await poller.check(search["id"]))["jobs"] == []
+        stored = await poller.store.get(search["id"])
+        assert stored["newest_created"] == job(7)["created"]
+        assert stored["next_poll_at"] >= stored["last_polled_at"] + poller.interval
+
+        feed.jobs += [job(8), job(9)]
+        result = await poller.poll(await poller.store.get(search["id"]))
+        assert result == {"requests": 1, "new": 2, "error": None}
+        assert feed.fetch.await_args.kwargs == {"priority": BACKGROUND, "sort_by": "date"}
+
+        first = await poller.check(search["id"])
+        assert [j["id"] for j in first["jobs"]] == ["9", "8"]
+        assert (await poller.check(search["id"]))["jobs"] == []
+
+    assert poller.stats()["requests_per_poll"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_poll_cut_short_does_not_skip_the_pages_it_missed(poller):
+    feed = FakeFeed([job(n) for n in range(1, 8)])
+    with patch.object(poller.adzuna, "_fetch_jobs", feed.fetch):
+        search = await poller.create("nurse", "Halifax")
+        await poller.poll_due()
+
+        # More new postings than max_pages reads: jobs 10-11 are still unread after this poll
+        feed.jobs += [job(n) for n in range(10, 18)]
+        poller.max_pages = 2
+        assert await poller.poll(await poller.store.get(search["id"])) == {"requests": 2, "new": 6, "error": None}
+        assert (await poller.store.get(search["id"]))["newest_created"] == job(7)["created"]
+
+        poller.max_pages = 5
+        assert await poller.poll(await poller.store.get(search["id"])) == {"requests": 3, "new": 2, "error": None}
+        assert sorted(int(j["id"]) for j in (await poller.check(search["id"]))["jobs"]) == list(range(10, 18))
+
+        # An upstream error after the first page is the same: the next poll reads on past it
+        feed.jobs += [job(n) for n in range(18, 25)]
+        fetch = feed.fetch.side_effect
+
+        async def failing_page_2(*args, **kwargs):
+            return {"error": "Adzuna API error: 503"} if args[4] == 2 else await fetch(*args, **kwargs)
+
+        feed.fetch.side_effect = failing_page_2
+        result = await poller.poll(await poller.store.get(search["id"]))
+        assert result["error"] == "Adzuna API error: 503" and result["new"] == 3
+        feed.fetch.side_effect = fetch
+        assert (await poller.poll(await poller.store.get(search["id"])))["new"] == 4
+        assert len((await poller.check(search["id"]))["jobs"]) == 7
+
+    assert poller.stats()["incomplete"] == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_baseline_is_retried_as_a_baseline(poller):
+    failing = AsyncMock(return_value={"error": "Adzuna API error: 503"})
+    search = await poller.create("nurse", "")
+    with patch.object(poller.adzuna, "_fetch_jobs", failing):
+        await poller.poll_due()
+    stored = await poller.store.get(search["id"])
+    assert stored["last_polled_at"] is None and stored["last_error"] == "Adzuna API error: 503"
+
+    feed = FakeFeed([job(1), job(2)])
+    with patch.object(poller.adzuna, "_fetch_jobs", feed.fetch):
+        await poller.poll(stored)
+    assert (await poller.check(search["id"]))["jobs"] == []
+
+
+@pytest.mark.asyncio
+async def test_each_due_search_is_polled_by_one_worker(tmp_path):
+    adzuna = AdzunaService()
+    adzuna.index = None
+    path = str(tmp_path / "saved.db")
+    pollers = [SavedSearchPoller(adzuna, SavedSearchStore(path), per_page=3) for _ in range(2)]
+    feed = FakeFeed([job(1)])
+    with patch.object(adzuna, "_fetch_jobs", feed.fetch):
+        for i in range(4):
+            await pollers[0].create(f"nurse {i}", "")
+        polled = await asyncio.gather(*(poller.poll_due() for poller in pollers))
+    assert sum(polled) == 4 and feed.fetch.await_count == 4
+    for poller in pollers:
+        await poller.shutdown()
+
+
+def test_stagger_spreads_searches_over_the_interval():
+    assert stagger("00000000" + "0" * 24, 3600) == 0
+    assert 1799 < stagger("80000000" + "0" * 24, 3600) < 1801
+
+
+@pytest.mark.asyncio
+async def test_saved_search_api(poller):
+    from app import main
+
+    feed = FakeFeed([job(1), job(2)])
+    poller.max_searches = 1
+    with patch.object(main, "saved_search_poller", poller), patch.object(poller.adzuna, "_fetch_jobs", feed.fetch):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            created = await client.post("/api/searches", json={"what": "nurse", "where": "Halifax", "interval_minutes": 30})
+            over_limit = await client.post("/api/searches", json={"what": "welder"})
+            search_id = created.json()["id"]
+            await poller.poll_due()
+            feed.jobs.append(job(3))
+            await poller.poll(await poller.store.get(search_id))
+
+            peek = await client.get(f"/api/searches/{search_id}/new", params={"mark_checked": "false"})
+            new = await client.get(f"/api/searches/{search_id}/new")
+            listed = await client.get("/api/searches")
+            deleted = await client.delete(f"/api/searches/{search_id}")
+            missing = await client.get(f"/api/searches/{search_id}/new")
+
+    assert created.status_code == 201 and created.json()["interval_seconds"] == 1800
+    assert over_limit.status_code == 409
+    assert peek.json()["new_count"] == 1 and new.json()["jobs"][0]["id"] == "3"
+    assert listed.json()["searches"][0]["polls"] == 2
+    assert deleted.status_code == 200 and missing.status_code == 404
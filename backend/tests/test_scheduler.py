@@ -0,0 +1,180 @@
+import asyncio
+import time
+import httpx
+import groq
+import pytest
+from unittest.mock import MagicMock
+
+from app.adzuna_service import AdzunaService
+from app.llm_client import LLMClient
+from app.scheduler import (
+    ADVISOR, BACKGROUND, INTERACTIVE, RateLimited, UpstreamBusyError, UpstreamScheduler, parse_retry_after
+)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0  # already past
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_quota_is_split_between_workers(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    monkeypatch.setenv("TEST_RATE_PER_SECOND", "0.4")
+    monkeypatch.setenv("TEST_BURST", "5")
+    scheduler = UpstreamScheduler.from_env("test", "TEST", rate=1, burst=1)
+    assert scheduler.rate == pytest.approx(0.1) and scheduler.burst == 1
+
+
+@pytest.mark.asyncio
+async def test_burst_then_refill_rate():
+    scheduler = UpstreamScheduler("test", rate=20, burst=2)
+    start = time.perf_counter()
+    for _ in range(4):
+        await scheduler.acquire()
+    elapsed = time.perf_counter() - start
+
+    # Two tokens are free, the other two refill at 50 ms each
+    assert 0.09 <= elapsed < 0.2
+    stats = scheduler.stats()
+    assert stats["priorities"]["interactive"]["granted"] == 4
+    assert stats["priorities"]["interactive"]["wait_ms"]["max"] >= 45
+
+
+@pytest.mark.asyncio
+async def test_higher_priority_is_served_first():
+    scheduler = UpstreamScheduler("test", rate=50, burst=1)
+    await scheduler.acquire()  # drain the bucket
+    order = []
+
+    async def request(priority, name):
+        await scheduler.acquire(priority)
+        order.append(name)
+
+    tasks = [
+        asyncio.create_task(request(BACKGROUND, "refresh")),
+        asyncio.create_task(request(ADVISOR, "advisor")),
+        asyncio.create_task(request(INTERACTIVE, "chat")),
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.stats()["queue_depth"] == 3
+    await asyncio.gather(*tasks)
+
+    assert order == ["chat", "advisor", "refresh"]
+    assert scheduler.stats()["max_queue_depth"] == 3
+    assert scheduler.stats()["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_gives_up_at_deadline():
+    scheduler = UpstreamScheduler("test", rate=0.1, burst=1)
+    await scheduler.acquire()
+    loop = asyncio.get_running_loop()
+
+    with pytest.raises(UpstreamBusyError):
+        await scheduler.acquire(INTERACTIVE, deadline=loop.time() + 0.05)
+    stats = scheduler.stats()
+    assert stats["timeouts"] == 1 and stats["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honoured():
+    scheduler = UpstreamScheduler("test")
+    calls = []
+
+    async def call():
+        calls.append(time.perf_counter())
+        if len(calls) == 1:
+            raise RateLimited(retry_after=0.1)
+        return "ok"
+
+    assert await scheduler.run(call) == "ok"
+    assert calls[1] - calls[0] >= 0.1
+    stats = scheduler.stats()
+    assert stats["rate_limited"] == 1 and stats["retries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_backoff_without_retry_after_and_retry_budget():
+    scheduler = UpstreamScheduler("test", max_retries=2, backoff_base=0.01)
+
+    async def always_limited():
+        raise RateLimited()
+
+    with pytest.raises(UpstreamBusyError):
+        await scheduler.run(always_limited)
+    assert scheduler.stats()["retries"] == 2
+    assert scheduler.stats()["gave_up"] == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_after_past_deadline_fails_fast():
+    scheduler = UpstreamScheduler("test")
+
+    async def limited():
+        raise RateLimited(retry_after=60)
+
+    start = time.perf_counter()
+    with pytest.raises(UpstreamBusyError):
+        await scheduler.run(limited, deadline=asyncio.get_running_loop().time() + 1)
+    assert time.perf_counter() - start < 0.1
+
+
+@pytest.mark.asyncio
+async def test_adzuna_429_is_retried_not_shown():
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "0.05"}),
+        httpx.Response(200, json={"results": [{"id": "1", "title": "Welder"}], "count": 1}),
+    ]
+    service = AdzunaService()
+    service.scheduler = UpstreamScheduler("adzuna")
+    service.client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: responses.pop(0)))
+
+    result = await service.search_jobs(what="welder", use_cache=False)
+    await service.shutdown()
+
+    assert "error" not in result
+    assert result["jobs"][0]["title"] == "Welder"
+    assert service.scheduler.stats()["retries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_adzuna_gives_a_busy_error_when_quota_never_frees():
+    service = AdzunaService()
+    service.scheduler = UpstreamScheduler("adzuna", max_wait={INTERACTIVE: 0.1})
+    service.client = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(429, headers={"Retry-After": "30"})
+    ))
+
+    result = await service.search_jobs(what="welder", use_cache=False)
+    await service.shutdown()
+
+    assert "busy" in result["error"]
+
+
+@pytest.mark.asyncio
+async def test_llm_429_is_retried():
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    limited = groq.RateLimitError(
+        "rate limited", response=httpx.Response(429, headers={"retry-after": "0.05"}, request=request), body=None
+    )
+    response = MagicMock()
+    response.choices = [MagicMock(message=MagicMock(content=" hello "))]
+    outcomes = [limited, response]
+
+    async def create(**kwargs):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    client = MagicMock()
+    client.chat.completions.create = create
+    llm = LLMClient(client, model="test", scheduler=UpstreamScheduler("groq"))
+
+    assert await llm.complete("analyze_resume", messages=[], max_tokens=10) == "hello"
+    stats = llm.stats()
+    assert stats["scheduler"]["retries"] == 1
+    assert stats["scheduler"]["priorities"]["advisor"]["granted"] == 2
+    assert stats["endpoints"]["analyze_resume"]["in_flight"] == 0
@@ -0,0 +1,100 @@
+import json
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.llm_client import LLMClient
+from app.sessions import SessionStore
+
+SAMPLE_JOBS = [{"id": "1", "title": "Python Developer", "company": "Acme", "location": "Toronto"}]
+
+
+def make_completion(text: str):
+    response = MagicMock()
+    response.choices = [MagicMock(message=MagicMock(content=text))]
+    return response
+
+
+class CountingGroq:
+    def __init__(self):
+        self.prompts = []
+        self.chat = MagicMock()
+        self.chat.completions.create = self.create
+
+    async def create(self, model, max_tokens, messages, **kwargs):
+        self.prompts.append(messages[0]["content"])
+        if "extract job search parameters" in messages[0]["content"]:
+            return make_completion(json.dumps({"is_job_search": True, "what": "python developer", "where": "Toronto"}))
+        return make_completion("Here are some Python roles.")
+
+
+def remember(store, session_id, what="python developer", reply="x" * 100):
+    session = store.open(session_id)
+    store.record(session, f"find {what} jobs", what, "Toronto", SAMPLE_JOBS, 1, reply)
+    return session
+
+
+def test_sessions_are_evicted_least_recently_used_first():
+    store = SessionStore(max_sessions=2)
+    remember(store, "session-a")
+    remember(store, "session-b")
+    store.open("session-a")
+    store.record(store.get("session-a"), "again", "python developer", "Toronto", SAMPLE_JOBS, 1, "ok")
+    remember(store, "session-c")
+
+    assert store.get("session-b") is None
+    assert store.get("session-a") is not None and store.get("session-c") is not None
+    assert store.stats()["evicted"] == 1
+
+
+def test_memory_cap_and_accounting():
+    store = SessionStore(max_bytes=4000)
+    for i in range(20):
+        remember(store, f"session-{i:02}", reply="y" * 500)
+
+    stats = store.stats()
+    assert 0 < stats["sessions"] < 20
+    assert stats["bytes"] <= 4000
+    assert stats["bytes"] == sum(store.get(f"session-{i:02}").nbytes for i in range(20) if store.get(f"session-{i:02}"))
+    assert store.get("session-19") is not None
+
+
+def test_turn_history_is_bounded_and_bad_ids_are_replaced():
+    store = SessionStore(max_turns=3)
+    session = store.open("session-turns")
+    for i in range(5):
+        store.record(session, f"turn {i}", "nurse", "", [], 0, "none")
+    assert [turn[0] for turn in session.turns] == ["turn 2", "turn 3", "turn 4"]
+    assert store.open("bad id!").id != "bad id!"
+
+
+@pytest.mark.asyncio
+async def test_follow_up_reuses_intent_and_results():
+    from app import main
+    from app.claude_service import ClaudeService
+
+    groq = CountingGroq()
+    search = AsyncMock(return_value={"jobs": SAMPLE_JOBS, "count": 1})
+    service = ClaudeService(llm=LLMClient(groq, model="test"))
+    with patch.object(main, "claude_service", service), patch.object(main.adzuna_service, "search_jobs", search), \
+            patch.object(main, "session_store", SessionStore()):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            first = (await client.post("/api/chat", json={"message": "Find Python developer jobs in Toronto"})).json()
+            session_id = first["session_id"]
+            follow_up = (await client.post("/api/chat", json={"message": "how about remote instead?", "session_id": session_id})).json()
+            again = (await client.post("/api/chat", json={"message": "same again", "session_id": session_id})).json()
+            state = (await client.get(f"/api/chat/sessions/{session_id}")).json()
+            stats = (await client.get("/api/stats")).json()["chat_sessions"]
+            missing = await client.get("/api/chat/sessions/unknown-session")
+
+    assert follow_up["session_id"] == again["session_id"] == session_id
+    assert search.await_args_list[1].kwargs["what"] == "Python developer"
+    assert search.await_args_list[1].kwargs["where"] == "remote"
+    # Only the two new searches were summarized; no message needed the LLM parser
+    assert len(groq.prompts) == 2
+    assert again["response"] == follow_up["response"] and again["jobs"] == SAMPLE_JOBS
+
+    assert state["where"] == "remote" and state["job_ids"] == ["1"] and len(state["turns"]) == 3
+    assert state["bytes"] > 0
+    assert stats["follow_ups"] == 2 and stats["reused_replies"] == 1 and stats["sessions"] == 1
+    assert missing.status_code == 404
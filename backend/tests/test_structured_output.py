@@ -0,0 +1,176 @@
+import json
+import httpx
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.claude_service import ClaudeService
+from app.llm_client import LLMClient
+from app.llm_providers import AnthropicProvider, GroqProvider, StubProvider
+from app.structured_output import (
+    JobSearchQuery,
+    JobTitleSuggestions,
+    PartialJSON,
+    ResumeAnalysis,
+    StructuredOutput,
+    StructuredOutputError,
+    loads_json,
+    repair_json,
+)
+
+ANALYSIS = {
+    "profile": {
+        "summary": "Backend engineer with ten years of Python.",
+        "experience_level": "senior",
+        "key_skills": ["Python", "AWS"],
+        "possible_directions": ["Backend Engineer", "Data Engineer"],
+    },
+    "questions": [{"id": "q1", "text": "Remote or on-site?"}, {"id": "q2", "text": "Leadership or hands-on?"}],
+}
+RESUME = "Senior backend engineer with ten years of Python, AWS and PostgreSQL experience. " * 3
+
+
+class ScriptedProvider(StubProvider):
+    """Replies from a script, one per call; streams split each reply into small chunks."""
+
+    def __init__(self, replies, chunk=7):
+        super().__init__()
+        self.replies = list(replies)
+        self.chunk = chunk
+        self.calls = []
+
+    async def _complete(self, messages, max_tokens, schema=None):
+        self.calls.append(messages)
+        return self.replies.pop(0)
+
+    async def _open_stream(self, messages, max_tokens, schema=None):
+        self.calls.append(messages)
+        reply = self.replies.pop(0)
+
+        async def deltas():
+            for i in range(0, len(reply), self.chunk):
+                yield reply[i:i + self.chunk]
+
+        return deltas()
+
+
+def structured(*replies) -> StructuredOutput:
+    provider = ScriptedProvider(replies)
+    return StructuredOutput(LLMClient(providers=[provider]), retries=1)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1, "b": [1, 2,],}', {"a": 1, "b": [1, 2]}),
+    ('{"a": "one", "b": "tw', {"a": "one", "b": "tw"}),
+    ('{"a": "one", "b', {"a": "one"}),
+    ('{"a": {"b": [1, {"c": tru', {"a": {"b": [1, {}]}}),
+    ('{"a": "quote \\', {"a": "quote "}),
+])
+def test_repair_closes_truncated_and_trailing_comma_json(text, expected):
+    assert repair_json(text) == expected
+
+
+def test_loads_json_strips_fences_and_prose():
+    assert loads_json('Sure!\n```json\n{"what": "nurse"}\n```\nAnything else?') == ({"what": "nurse"}, False)
+    assert loads_json('{"what": "nurse", "where": "Hal') == ({"what": "nurse", "where": "Hal"}, True)
+    with pytest.raises(ValueError):
+        loads_json("I could not find any jobs.")
+
+
+def test_partial_json_has_the_summary_before_the_questions():
+    partial = PartialJSON()
+    text = "```json\n" + json.dumps(ANALYSIS)
+    snapshots = [s for s in (partial.feed(text[i:i + 5]) for i in range(0, len(text), 5)) if s is not None]
+    first_with_questions = next(i for i, s in enumerate(snapshots) if s.get("questions"))
+    assert snapshots[first_with_questions - 1]["profile"]["summary"] == ANALYSIS["profile"]["summary"]
+    assert snapshots[-1] == ANALYSIS
+
+
+@pytest.mark.asyncio
+async def test_repaired_reply_needs_no_retry():
+    output = structured('{"is_job_search": true, "what": "nurse", "where": null,}')
+    parsed = await output.complete("parse_job_search_query", [{"role": "user", "content": "q"}], JobSearchQuery, 50)
+    assert parsed.model_dump() == {"is_job_search": True, "what": "nurse", "where": ""}
+    assert output.stats()["endpoints"]["parse_job_search_query"] == {
+        "calls": 1, "parse_failures": 1, "repaired": 1, "retries": 0, "failed": 0
+    }
+
+
+@pytest.mark.asyncio
+async def test_invalid_reply_is_retried_with_the_error():
+    output = structured('{"profile": "senior"}', json.dumps(ANALYSIS))
+    result = await output.complete("analyze_resume", [{"role": "user", "content": "resume"}], ResumeAnalysis, 50)
+    assert result.profile.experience_level == "senior"
+
+    correction = output.llm.primary.calls[1]
+    assert correction[1] == {"role": "assistant", "content": '{"profile": "senior"}'}
+    assert "profile" in correction[2]["content"]
+    assert output.stats()["endpoints"]["analyze_resume"]["retries"] == 1
+
+
+@pytest.mark.parametrize("raw, model", [
+    ('{"is_job_sea', JobSearchQuery),
+    ('{"what": "nurse", "where": "Halifax"', JobSearchQuery),
+    ('{"profile": {"summ', ResumeAnalysis),
+    ('{"intro": "Some directions", "searches": [{"tit', JobTitleSuggestions),
+])
+def test_truncated_reply_missing_required_fields_fails_validation(raw, model):
+    output = structured()
+    with pytest.raises(ValueError):
+        output.validate("p", raw, model)
+    assert output.stats()["endpoints"]["p"]["repaired"] == 1
+
+
+@pytest.mark.asyncio
+async def test_truncated_reply_is_retried_not_defaulted():
+    output = structured('{"is_job_sea', '{"is_job_search": true, "what": "nurse", "where": "Halifax"}')
+    parsed = await output.complete("parse_job_search_query", [{"role": "user", "content": "q"}], JobSearchQuery, 50)
+    assert parsed.model_dump() == {"is_job_search": True, "what": "nurse", "where": "Halifax"}
+    assert output.stats()["endpoints"]["parse_job_search_query"]["retries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_the_retries():
+    output = structured("no idea", "still no idea")
+    with pytest.raises(StructuredOutputError):
+        await output.complete("analyze_resume", [{"role": "user", "content": "resume"}], ResumeAnalysis, 50)
+    stats = output.stats()
+    assert stats["endpoints"]["analyze_resume"]["failed"] == 1 and stats["failure_rate"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_providers_request_json_for_a_schema():
+    groq = MagicMock()
+    groq.chat.completions.create = AsyncMock(return_value=SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content='{"what": "nurse"}'))]
+    ))
+    await GroqProvider(groq, model="test").complete([], 50, schema=JobSearchQuery.model_json_schema())
+    assert groq.chat.completions.create.await_args.kwargs["response_format"] == {"type": "json_object"}
+
+    anthropic = MagicMock()
+    anthropic.messages.create = AsyncMock(return_value=SimpleNamespace(
+        content=[SimpleNamespace(type="tool_use", input={"what": "nurse"})]
+    ))
+    provider = AnthropicProvider(anthropic, model="test")
+    assert await provider.complete([], 50, schema=JobSearchQuery.model_json_schema()) == '{"what": "nurse"}'
+    kwargs = anthropic.messages.create.await_args.kwargs
+    assert kwargs["tool_choice"]["name"] == kwargs["tools"][0]["name"]
+    assert kwargs["tools"][0]["input_schema"]["title"] == "JobSearchQuery"
+
+
+@pytest.mark.asyncio
+async def test_analysis_stream_endpoint():
+    from app import main
+
+    service = ClaudeService(llm=LLMClient(providers=[ScriptedProvider([json.dumps(ANALYSIS)])]))
+    with patch.object(main, "claude_service", service):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            response = await client.post("/api/advisor/analyze/stream", json={"resume_text": RESUME})
+
+    events = [
+        (block.split("\n")[0][len("event: "):], json.loads(block.split("\n")[1][len("data: "):]))
+        for block in response.text.strip().split("\n\n")
+    ]
+    assert events[-1] == ("done", ANALYSIS)
+    partials = [data for event, data in events if event == "partial"]
+    assert any(p.get("profile", {}).get("summary") == ANALYSIS["profile"]["summary"] and not p.get("questions") for p in partials)
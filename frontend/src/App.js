@@ -12,6 +12,8 @@ function JobSearchTab() {
   const [loading, setLoading] = useState(false);
   const [jobs, setJobs] = useState([]);
   const [showJobs, setShowJobs] = useState(false);
+  // Lets the backend read follow-ups ("how about remote instead?") against the last search
+  const [sessionId, setSessionId] = useState(null);
 
   const sendMessage = async (e) => {
     e.preventDefault();
@@ -23,19 +25,73 @@ function JobSearchTab() {
     setInput('');
     setLoading(true);
 
-    try {
-      const response = await axios.post(`${API_URL}/api/chat`, {
-        message: userInput
+    // Streamed reply: jobs render as soon as the search returns, the summary fills in after
+    let replyStarted = false;
+    const appendReply = (text) => {
+      if (!replyStarted) {
+        replyStarted = true;
+        setMessages(prev => [...prev, { text, sender: 'ai' }]);
+        return;
+      }
+      setMessages(prev => {
+        const updated = [...prev];
+        const last = updated[updated.length - 1];
+        updated[updated.length - 1] = { ...last, text: last.text + text };
+        return updated;
       });
+    };
+
+    const handleEvent = (event, data) => {
+      if (event === 'jobs') {
+        setJobs(data.jobs);
+        setShowJobs(data.jobs.length > 0);
+        setLoading(false);
+      } else if (event === 'token') {
+        appendReply(data.text);
+      } else if (event === 'done') {
+        if (data.session_id) {
+          setSessionId(data.session_id);
+        }
+        if (!replyStarted) {
+          appendReply(data.response);
+        } else if (data.error) {
+          appendReply(' … (summary interrupted, the job list above is complete)');
+        }
+        if (!data.job_count) {
+          setShowJobs(false);
+        }
+      }
+    };
 
-      const aiMessage = { text: response.data.response, sender: 'ai' };
-      setMessages(prev => [...prev, aiMessage]);
+    try {
+      const response = await fetch(`${API_URL}/api/chat/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ message: userInput, session_id: sessionId })
+      });
+      if (!response.ok || !response.body) {
+        throw new Error(`Chat stream failed: ${response.status}`);
+      }
 
-      if (response.data.jobs && response.data.jobs.length > 0) {
-        setJobs(response.data.jobs);
-        setShowJobs(true);
-      } else {
-        setShowJobs(false);
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+          const block = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+          let event = 'message';
+          let data = '';
+          for (const line of block.split('\n')) {
+            if (line.startsWith('event: ')) event = line.slice(7);
+            if (line.startsWith('data: ')) data += line.slice(6);
+          }
+          handleEvent(event, JSON.parse(data));
+        }
       }
 
     } catch (error) {
@@ -153,6 +209,7 @@ function CareerAdvisorTab() {
   const [resumeText, setResumeText] = useState('');
   const [inputMode, setInputMode] = useState('paste');
   const [fileName, setFileName] = useState('');
+  const [resumeFile, setResumeFile] = useState(null);
   const [profile, setProfile] = useState(null);
   const [questions, setQuestions] = useState([]);
   const [answers, setAnswers] = useState({});
@@ -167,21 +224,30 @@ function CareerAdvisorTab() {
       return;
     }
     setFileName(file.name);
-    alert(`"${file.name}" selected. PDF parsing coming in the next update!`);
+    setResumeFile(file);
   };
 
   const handleAnalyze = async () => {
     setError('');
     setStage(ADVISOR_STAGE.ANALYZING);
     try {
-      const response = await axios.post(`${API_URL}/api/advisor/analyze`, {
-        resume_text: resumeText
-      });
+      let response;
+      if (inputMode === 'upload') {
+        const form = new FormData();
+        form.append('file', resumeFile);
+        response = await axios.post(`${API_URL}/api/advisor/upload`, form);
+        setResumeText(response.data.resume_text);
+      } else {
+        response = await axios.post(`${API_URL}/api/advisor/analyze`, {
+          resume_text: resumeText
+        });
+      }
       setProfile(response.data.profile);
       setQuestions(response.data.questions);
       setStage(ADVISOR_STAGE.QUESTIONS);
     } catch (err) {
-      setError('Sorry, I had trouble analyzing your resume. Please try again.');
+      const detail = err.response && err.response.status < 500 && err.response.data.detail;
+      setError(detail || 'Sorry, I had trouble analyzing your resume. Please try again.');
       setStage(ADVISOR_STAGE.INPUT);
     }
   };
@@ -282,7 +348,14 @@ function CareerAdvisorTab() {
               />
               {fileName ? <span>📄 {fileName}</span> : <span>Click to select a PDF file</span>}
             </label>
-            <p className="upload-note">PDF parsing coming in the next update.</p>
+            <p className="upload-note">Text-based PDFs up to 5 MB and 10 pages.</p>
+            <button
+              className="advisor-submit-btn"
+              onClick={handleAnalyze}
+              disabled={!resumeFile}
+            >
+              Analyze My Resume →
+            </button>
           </div>
         )}
 